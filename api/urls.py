@@ -168,6 +168,7 @@ urlpatterns = [
     # 🔹 Stats d’allocations par vendor / année
     # path("inventory/vendors/<int:vendor_id>/allocations/", inv_views.VendorAllocationStatsView.as_view(),name="vendor-allocation-stats",),
     path("inventory/produit-lines", inv_views.ProduitLineWithInventoryListView.as_view(),name="produit-line-with-inventory-list",),
+    path("inventory/produit-lines/<int:produit_line_id>/movements", inv_views.ProduitLineMovementListView.as_view(),name="produit-line-movement-list",),
     path("inventory/bijouteries", inv_views.InventoryBijouterieView.as_view(),name="inventory-summary-bijouteries",),
     path("inventory/vendors",inv_views.InventoryVendorView.as_view(),name="inventory-summary-vendors",),
     # END INVENTORY
@@ -5,6 +5,13 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Connexions base de données (voir backend/settings.py) :
+- pas de connexions persistantes (CONN_MAX_AGE=0) en mode ASGI ;
+- pool en processus activé par défaut (DB_POOL=False pour le désactiver),
+  dimensionné par DB_POOL_SIZE / DB_POOL_MAX_OVERFLOW.
+
+    uvicorn backend.asgi:application --workers 4
 """
 
 import os
@@ -12,5 +19,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Lu par backend/settings.py avant tout accès aux settings.
+os.environ['DJANGO_ASGI'] = '1'
 
 application = get_asgi_application()
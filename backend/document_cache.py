@@ -0,0 +1,179 @@
+# backend/document_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# Cache disque des documents imprimables
+# ============================================================
+#
+# Factures A5, tickets ESC/POS, tickets de rachat : rendus une fois,
+# relus ensuite depuis le disque (réimpressions au comptoir).
+#
+# Emplacement : DOCUMENTS_CACHE_DIR (défaut BASE_DIR/var/documents_cache,
+# jamais sous MEDIA_ROOT qui est servi publiquement)
+#     <owner>/<owner_id>/<kind>-<empreinte>.<ext>
+#
+# L'empreinte est un hash des données dont dépend le document
+# (révision de la facture, integrity_hash, montants, statut...) :
+# - une modification produit une nouvelle empreinte, l'ancien fichier
+#   n'est plus lu (il est supprimé à l'écriture du suivant) ;
+# - elle sert aussi d'ETag : une réimpression avec If-None-Match
+#   répond 304 sans relire ni rendre le document.
+#
+# DOCUMENTS_CACHE_DIR vide : rendu à chaque appel (ETag conservé).
+
+
+def _cache_dir() -> Path | None:
+    cache_dir = getattr(settings, "DOCUMENTS_CACHE_DIR", "")
+    return Path(cache_dir) if cache_dir else None
+
+
+def document_fingerprint(*parts) -> str:
+    """
+    Empreinte courte des données dont dépend un document.
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def document_etag(kind: str, fingerprint: str) -> str:
+    return quote_etag(f"{kind}-{fingerprint}")
+
+
+def _document_path(owner, owner_id, kind, fingerprint, extension) -> Path | None:
+    cache_dir = _cache_dir()
+
+    if cache_dir is None:
+        return None
+
+    return cache_dir / owner / str(owner_id) / f"{kind}-{fingerprint}.{extension}"
+
+
+def _write(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Écriture atomique : un autre worker ne lit jamais un fichier tronqué.
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(content)
+    tmp_path.replace(path)
+
+    # Versions précédentes du même document : plus jamais lues.
+    for old_path in path.parent.glob(f"{path.name.rsplit('-', 1)[0]}-*"):
+        if old_path != path and old_path.suffix != ".tmp":
+            old_path.unlink(missing_ok=True)
+
+
+# ============================================================
+# Lecture / rendu
+# ============================================================
+
+def get_or_render_document(
+    *,
+    owner: str,
+    owner_id,
+    kind: str,
+    fingerprint: str,
+    extension: str,
+    render: Callable[[], bytes],
+) -> bytes:
+    """
+    Contenu du document, rendu par `render()` s'il n'est pas en cache.
+    """
+
+    path = _document_path(owner, owner_id, kind, fingerprint, extension)
+
+    if path is not None:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+
+    content = render()
+
+    if path is not None:
+        try:
+            _write(path, content)
+        except OSError:
+            # Disque plein / lecture seule : le document reste servi.
+            logger.exception("Écriture du document %s impossible.", path)
+
+    return content
+
+
+def document_response(
+    request,
+    *,
+    owner: str,
+    owner_id,
+    kind: str,
+    fingerprint: str,
+    extension: str,
+    render: Callable[[], bytes],
+    content_type: str,
+    filename: str,
+    as_attachment: bool = False,
+) -> HttpResponse:
+    """
+    Réponse HTTP d'un document en cache, avec ETag / If-None-Match.
+    """
+
+    etag = document_etag(kind, fingerprint)
+
+    if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    content = get_or_render_document(
+        owner=owner,
+        owner_id=owner_id,
+        kind=kind,
+        fingerprint=fingerprint,
+        extension=extension,
+        render=render,
+    )
+
+    disposition = "attachment" if as_attachment else "inline"
+
+    response = HttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'{disposition}; filename="{filename}"'
+    response["ETag"] = etag
+    # Documents privés : le navigateur revalide à chaque impression.
+    response["Cache-Control"] = "private, no-cache"
+
+    return response
+
+
+# ============================================================
+# Invalidation
+# ============================================================
+
+def invalidate_documents(owner: str, owner_id) -> None:
+    """
+    Supprime les documents en cache d'un objet (au COMMIT de la
+    transaction en cours, immédiatement sinon).
+    """
+
+    cache_dir = _cache_dir()
+
+    if cache_dir is None:
+        return
+
+    def _remove():
+        shutil.rmtree(cache_dir / owner / str(owner_id), ignore_errors=True)
+
+    transaction.on_commit(_remove)
@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime
-from io import BytesIO
+import tempfile
+from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 
 # ============================================================
@@ -82,6 +84,234 @@ def aware_range_month(
     return start_dt, end_dt
 
 
+def aware_range_dates(
+    date_from,
+    date_to,
+    tz,
+):
+    """
+    Retourne une période [start, end) couvrant les jours
+    date_from à date_to inclus.
+
+    Utilisable directement en filtre indexable :
+        created_at__gte=start, created_at__lt=end
+    (au lieu de created_at__date__range, non indexable).
+    """
+
+    if date_to < date_from:
+        raise ValueError(
+            "La date de fin doit être postérieure à la date de début."
+        )
+
+    start_dt = timezone.make_aware(
+        datetime.combine(
+            date_from,
+            datetime.min.time(),
+        ),
+        timezone=tz,
+    )
+
+    end_dt = timezone.make_aware(
+        datetime.combine(
+            date_to + timedelta(days=1),
+            datetime.min.time(),
+        ),
+        timezone=tz,
+    )
+
+    return start_dt, end_dt
+
+
+def aware_range_year(
+    year: int,
+    tz,
+):
+    """
+    Retourne l'année civile sous la forme [start, end).
+
+    Exemple :
+        2026
+        start = 2026-01-01 00:00
+        end   = 2027-01-01 00:00
+    """
+
+    start_dt, _ = aware_range_month(year, 1, tz)
+    end_dt, _ = aware_range_month(int(year) + 1, 1, tz)
+
+    return start_dt, end_dt
+
+
+PERIODS = ("day", "week", "month", "year")
+
+
+def aware_range_period(
+    period: str,
+    *,
+    reference=None,
+    tz=None,
+):
+    """
+    Retourne le jour, la semaine (lundi au lundi suivant), le mois
+    ou l'année contenant `reference` (aujourd'hui par défaut),
+    sous la forme [start, end).
+
+    Exemple :
+        aware_range_period("month", reference=date(2026, 3, 14))
+        start = 2026-03-01 00:00
+        end   = 2026-04-01 00:00
+    """
+
+    tz = tz or timezone.get_current_timezone()
+    reference = reference or timezone.localdate(timezone=tz)
+
+    if period == "day":
+        return aware_range_dates(reference, reference, tz)
+
+    if period == "week":
+        monday = reference - timedelta(days=reference.weekday())
+
+        return aware_range_dates(monday, monday + timedelta(days=6), tz)
+
+    if period == "month":
+        return aware_range_month(reference.year, reference.month, tz)
+
+    if period == "year":
+        return aware_range_year(reference.year, tz)
+
+    raise ValueError(
+        "Période invalide. Valeurs autorisées : "
+        + ", ".join(PERIODS)
+        + "."
+    )
+
+
+def range_filter(
+    field: str,
+    start=None,
+    end=None,
+) -> dict:
+    """
+    Filtre indexable sur une période [start, end) :
+
+        qs.filter(**range_filter("created_at", *aware_range_period("month")))
+
+    Une borne None est ignorée.
+    """
+
+    lookups = {}
+
+    if start is not None:
+        lookups[f"{field}__gte"] = start
+
+    if end is not None:
+        lookups[f"{field}__lt"] = end
+
+    return lookups
+
+
+def parse_date_param(value):
+    """
+    Date d'un paramètre de requête (YYYY-MM-DD), ou None si vide.
+
+    Lève ValueError si la valeur n'est pas une date valide.
+    """
+
+    if value is None or isinstance(value, date):
+        return value
+
+    normalized = str(value).strip()
+
+    if not normalized:
+        return None
+
+    try:
+        parsed = parse_date(normalized)
+    except ValueError:
+        # Format correct, date inexistante (2026-02-30).
+        parsed = None
+
+    if parsed is None:
+        raise ValueError(
+            f"Date invalide : {normalized}. Format attendu YYYY-MM-DD."
+        )
+
+    return parsed
+
+
+def date_range_filter(
+    field: str,
+    date_from=None,
+    date_to=None,
+    *,
+    tz=None,
+) -> dict:
+    """
+    Jours date_from à date_to inclus (chacun optionnel, date ou
+    chaîne YYYY-MM-DD) sur un DateTimeField, en filtre indexable :
+
+        qs.filter(**date_range_filter("created_at", date_from, date_to))
+
+    Remplace field__date__gte / __lte / __range : la conversion en
+    date locale empêche l'usage de l'index sur la colonne.
+    Lève ValueError si une chaîne n'est pas une date.
+    """
+
+    tz = tz or timezone.get_current_timezone()
+
+    date_from = parse_date_param(date_from)
+    date_to = parse_date_param(date_to)
+
+    start_dt = end_dt = None
+
+    if date_from is not None:
+        start_dt, _ = aware_range_dates(date_from, date_from, tz)
+
+    if date_to is not None:
+        _, end_dt = aware_range_dates(date_to, date_to, tz)
+
+    return range_filter(field, start_dt, end_dt)
+
+
+def parse_export_period(
+    params,
+    *,
+    start_param: str = "start_date",
+    end_param: str = "end_date",
+    tz=None,
+):
+    """
+    Lit start_date / end_date (YYYY-MM-DD) pour un export.
+
+    Par défaut : du 1er janvier de l'année en cours à aujourd'hui.
+
+    Retourne la période [start, end) en datetimes aware.
+    """
+
+    today = timezone.localdate()
+
+    raw_start = (params.get(start_param) or "").strip()
+    raw_end = (params.get(end_param) or "").strip()
+
+    date_from = parse_date(raw_start) if raw_start else date(today.year, 1, 1)
+    date_to = parse_date(raw_end) if raw_end else today
+
+    if date_from is None:
+        raise ValueError(
+            f"{start_param} invalide. Format attendu YYYY-MM-DD."
+        )
+
+    if date_to is None:
+        raise ValueError(
+            f"{end_param} invalide. Format attendu YYYY-MM-DD."
+        )
+
+    return aware_range_dates(
+        date_from,
+        date_to,
+        tz or timezone.get_current_timezone(),
+    )
+
+
 def parse_month_or_default(
     mois_str: str | None,
 ):
@@ -199,6 +429,145 @@ ORDERING_MAP = {
 # Export Excel
 # ============================================================
 
+XLSX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument."
+    "spreadsheetml.sheet"
+)
+
+# Au-delà, le fichier temporaire bascule de la mémoire vers le disque.
+XLSX_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Taille des lots lus en base par .iterator() pendant un export.
+EXPORT_CHUNK_SIZE = 2000
+
+
+def safe_xlsx_filename(filename) -> str:
+    safe_filename = (
+        str(filename or "export.xlsx")
+        .replace('"', "")
+        .replace("\n", "")
+        .replace("\r", "")
+        .strip()
+    )
+
+    if not safe_filename.lower().endswith(".xlsx"):
+        safe_filename = f"{safe_filename}.xlsx"
+
+    return safe_filename
+
+
+def write_only_workbook() -> Workbook:
+    """
+    Classeur en mode write-only : les lignes sont écrites au fil
+    de l'eau dans des fichiers temporaires, la mémoire reste
+    bornée quel que soit le nombre de lignes.
+
+    Contraintes : lignes ajoutées uniquement via ws.append(),
+    largeurs de colonnes fixées avant la première ligne.
+    """
+
+    return Workbook(write_only=True)
+
+
+def write_only_sheet(
+    wb: Workbook,
+    title: str,
+    headers=None,
+    *,
+    widths=None,
+    header_font=None,
+    header_fill=None,
+    header_alignment=None,
+):
+    """
+    Crée une feuille write-only avec largeurs et en-tête stylé.
+
+    widths : liste de largeurs (par défaut, déduites des en-têtes).
+    """
+
+    ws = wb.create_sheet(title=title)
+
+    if widths is None and headers:
+        widths = [
+            max(12, min(len(str(header)) + 4, 40))
+            for header in headers
+        ]
+
+    for index, width in enumerate(widths or [], start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    if headers:
+        ws.append(
+            styled_row(
+                ws,
+                headers,
+                font=header_font,
+                fill=header_fill,
+                alignment=header_alignment,
+            )
+        )
+
+    return ws
+
+
+def styled_row(
+    ws,
+    values,
+    *,
+    font=None,
+    fill=None,
+    alignment=None,
+) -> list:
+    """
+    Ligne de cellules stylées pour une feuille write-only.
+    """
+
+    cells = []
+
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+
+        if font is not None:
+            cell.font = font
+
+        if fill is not None:
+            cell.fill = fill
+
+        if alignment is not None:
+            cell.alignment = alignment
+
+        cells.append(cell)
+
+    return cells
+
+
+def xlsx_file_response(
+    wb: Workbook,
+    filename: str,
+) -> FileResponse:
+    """
+    Sauvegarde le classeur dans un fichier temporaire « spooled »
+    (mémoire puis disque au-delà de XLSX_SPOOL_MAX_SIZE) et le
+    renvoie en streaming, sans copie complète en mémoire.
+
+    Le fichier est fermé (et supprimé) par FileResponse.
+    """
+
+    output = tempfile.SpooledTemporaryFile(
+        max_size=XLSX_SPOOL_MAX_SIZE,
+    )
+
+    wb.save(output)
+    output.seek(0)
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=safe_xlsx_filename(filename),
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
 class ExportXlsxMixin:
     """
     Mixin permettant de renvoyer un classeur Excel.
@@ -207,7 +576,14 @@ class ExportXlsxMixin:
 
         class MaVue(ExportXlsxMixin, APIView):
             def get(self, request):
-                wb = Workbook()
+                wb = write_only_workbook()
+                ws = write_only_sheet(wb, "Rapport", ["Date", "Total"])
+
+                for row in qs.values_list(...).iterator(
+                    chunk_size=EXPORT_CHUNK_SIZE,
+                ):
+                    ws.append(row)
+
                 return self._xlsx_response(
                     wb,
                     "rapport.xlsx",
@@ -218,41 +594,16 @@ class ExportXlsxMixin:
         self,
         wb: Workbook,
         filename: str,
-    ) -> HttpResponse:
+    ) -> FileResponse:
         """
         Génère une réponse HTTP contenant un fichier XLSX.
         """
 
-        safe_filename = (
-            str(filename or "export.xlsx")
-            .replace('"', "")
-            .replace("\n", "")
-            .replace("\r", "")
-            .strip()
-        )
-
-        if not safe_filename.lower().endswith(".xlsx"):
-            safe_filename = f"{safe_filename}.xlsx"
-
-        output = BytesIO()
-
-        wb.save(output)
-        output.seek(0)
-
-        response = HttpResponse(
-            output.getvalue(),
-            content_type=(
-                "application/vnd.openxmlformats-officedocument."
-                "spreadsheetml.sheet"
-            ),
+        return xlsx_file_response(
+            wb,
+            filename,
         )
 
-        response["Content-Disposition"] = (
-            f'attachment; filename="{safe_filename}"'
-        )
-
-        return response
-
     def _autosize(
         self,
         ws,
@@ -0,0 +1,291 @@
+# backend/pagination.py
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_yasg import openapi
+from rest_framework.exceptions import ValidationError
+
+# ============================================================
+# Pagination par curseur (keyset)
+# ============================================================
+
+CURSOR_PARAM = "cursor"
+COUNT_PARAM = "count"
+
+# ?count=exact  : COUNT(*) complet
+# ?count=capped : COUNT borné à COUNT_CAP lignes (approximation)
+# absent        : aucun comptage
+COUNT_EXACT = "exact"
+COUNT_CAPPED = "capped"
+COUNT_CAP = 1000
+
+# Paramètres Swagger communs aux vues utilisant KeysetPagination
+CURSOR_SWAGGER_PARAMETERS = [
+    openapi.Parameter(
+        CURSOR_PARAM,
+        openapi.IN_QUERY,
+        description=(
+            "Mode curseur : vide pour la première page, puis la valeur "
+            "next_cursor de la réponse précédente. Sans ce paramètre, "
+            "la pagination page/page_size habituelle est utilisée."
+        ),
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        COUNT_PARAM,
+        openapi.IN_QUERY,
+        description=(
+            "Mode curseur uniquement : exact (COUNT complet) ou "
+            f"capped (compte borné à {COUNT_CAP}). Absent : pas de comptage."
+        ),
+        type=openapi.TYPE_STRING,
+        enum=[COUNT_EXACT, COUNT_CAPPED],
+    ),
+]
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+
+    return value
+
+
+def _row_value(row, name):
+    """
+    Valeur d'un champ de tri sur une ligne servie : instance
+    ("lot__received_at" suit les relations) ou dict values().
+    """
+
+    if isinstance(row, dict):
+        return row[name]
+
+    for part in name.split("__"):
+        row = getattr(row, part)
+
+    return row
+
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+
+    if "dt" in value:
+        parsed = parse_datetime(value["dt"])
+    elif "d" in value:
+        parsed = parse_date(value["d"])
+    elif "dec" in value:
+        parsed = Decimal(value["dec"])
+    else:
+        parsed = None
+
+    if parsed is None:
+        raise ValueError("valeur de curseur invalide")
+
+    return parsed
+
+
+class KeysetPagination:
+    """
+    Pagination par curseur sur un tri stable, sans COUNT(*) ni OFFSET.
+
+    Le curseur encode les valeurs du tri de la dernière ligne servie ;
+    la page suivante filtre directement « après » cette ligne
+    (WHERE (created_at, id) < (x, y)), ce qui reste rapide quelle
+    que soit la profondeur.
+
+    Mode opt-in : la vue garde sa pagination page/page_size et bascule
+    sur ce mode lorsque ?cursor= est présent (vide pour la 1re page).
+
+        keyset = KeysetPagination(ordering=("-created_at", "-id"))
+
+        if keyset.is_requested(request):
+            rows = keyset.paginate_queryset(qs, request)
+            return Response(
+                keyset.get_response_data(
+                    Serializer(rows, many=True).data
+                )
+            )
+
+    Le dernier champ du tri doit être unique (id) et les champs du
+    tri non nuls. Les lignes servies peuvent être des instances ou
+    des dict values() contenant les champs du tri.
+    """
+
+    def __init__(
+        self,
+        *,
+        ordering=("-created_at", "-id"),
+        default_page_size: int = 20,
+        max_page_size: int = 100,
+    ):
+        if not ordering:
+            raise ValueError("Le tri du curseur est obligatoire.")
+
+        self.ordering = tuple(ordering)
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+
+        self.page_size = default_page_size
+        self.next_cursor = None
+        self.count = None
+        self.count_is_exact = None
+
+    # --------------------------------------------------------
+    # Paramètres
+    # --------------------------------------------------------
+
+    @staticmethod
+    def is_requested(request) -> bool:
+        return CURSOR_PARAM in request.query_params
+
+    def get_page_size(self, request) -> int:
+        raw_value = request.query_params.get("page_size")
+
+        try:
+            value = int(raw_value)
+        except (TypeError, ValueError):
+            return self.default_page_size
+
+        return max(1, min(value, self.max_page_size))
+
+    @property
+    def _fields(self):
+        return [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in self.ordering
+        ]
+
+    # --------------------------------------------------------
+    # Curseur
+    # --------------------------------------------------------
+
+    def encode_cursor(self, row) -> str:
+        values = [
+            _encode_value(_row_value(row, name))
+            for name, _descending in self._fields
+        ]
+
+        payload = json.dumps(values, separators=(",", ":"))
+
+        return base64.urlsafe_b64encode(
+            payload.encode("utf-8")
+        ).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(
+                base64.urlsafe_b64decode(padded.encode("ascii"))
+            )
+
+            if (
+                not isinstance(values, list)
+                or len(values) != len(self.ordering)
+            ):
+                raise ValueError("longueur de curseur invalide")
+
+            return [_decode_value(value) for value in values]
+
+        except (
+            binascii.Error,
+            UnicodeError,
+            ValueError,
+            TypeError,
+            ArithmeticError,
+        ):
+            raise ValidationError({CURSOR_PARAM: "Curseur invalide."})
+
+    def _after_q(self, values) -> Q:
+        """
+        Condition lexicographique « strictement après » :
+
+            (a < x) OR (a = x AND b < y) OR ...
+        """
+
+        condition = None
+        equal_prefix = Q()
+
+        for (name, descending), value in zip(self._fields, values):
+            lookup = "lt" if descending else "gt"
+
+            branch = equal_prefix & Q(**{f"{name}__{lookup}": value})
+            condition = branch if condition is None else condition | branch
+
+            equal_prefix &= Q(**{name: value})
+
+        return condition
+
+    # --------------------------------------------------------
+    # Pagination
+    # --------------------------------------------------------
+
+    def _count(self, queryset, request):
+        mode = (request.query_params.get(COUNT_PARAM) or "").strip()
+
+        if mode == COUNT_EXACT:
+            self.count = queryset.count()
+            self.count_is_exact = True
+
+        elif mode == COUNT_CAPPED:
+            # SELECT COUNT(*) FROM (... LIMIT cap+1) : coût borné.
+            capped = queryset.order_by()[:COUNT_CAP + 1].count()
+
+            self.count = min(capped, COUNT_CAP)
+            self.count_is_exact = capped <= COUNT_CAP
+
+    def paginate_queryset(self, queryset, request) -> list:
+        self.page_size = self.get_page_size(request)
+
+        self._count(queryset, request)
+
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = (request.query_params.get(CURSOR_PARAM) or "").strip()
+
+        if cursor:
+            queryset = queryset.filter(
+                self._after_q(self.decode_cursor(cursor))
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        self.next_cursor = (
+            self.encode_cursor(rows[-1])
+            if has_more
+            else None
+        )
+
+        return rows
+
+    def get_response_data(self, results) -> dict:
+        data = {
+            "page_size": self.page_size,
+            "next_cursor": self.next_cursor,
+            "has_more": self.next_cursor is not None,
+        }
+
+        if self.count is not None:
+            data["count"] = self.count
+            data["count_is_exact"] = self.count_is_exact
+
+        data["results"] = results
+
+        return data
@@ -6,7 +6,8 @@ from typing import Optional
 from rest_framework.permissions import BasePermission
 
 from backend.roles import (ROLE_ADMIN, ROLE_BUYER, ROLE_CASHIER, ROLE_MANAGER,
-                           ROLE_VENDOR, get_role_name)
+                           ROLE_VENDOR, get_role_name, get_staff_context,
+                           get_staff_profile)
 
 
 def _verified(profile) -> bool:
@@ -26,10 +27,9 @@ def _manager_profile(user):
     Retourne le profil manager vérifié.
     """
 
-    profile = getattr(
+    profile = get_staff_profile(
         user,
-        "staff_manager_profile",
-        None,
+        ROLE_MANAGER,
     )
 
     return profile if _verified(profile) else None
@@ -40,10 +40,9 @@ def _vendor_profile(user):
     Retourne le profil vendeur vérifié.
     """
 
-    profile = getattr(
+    profile = get_staff_profile(
         user,
-        "staff_vendor_profile",
-        None,
+        ROLE_VENDOR,
     )
 
     return profile if _verified(profile) else None
@@ -54,10 +53,9 @@ def _cashier_profile(user):
     Retourne le profil caissier vérifié.
     """
 
-    profile = getattr(
+    profile = get_staff_profile(
         user,
-        "staff_cashier_profile",
-        None,
+        ROLE_CASHIER,
     )
 
     return profile if _verified(profile) else None
@@ -68,10 +66,9 @@ def _buyer_profile(user):
     Retourne le profil responsable rachat vérifié.
     """
 
-    profile = getattr(
+    profile = get_staff_profile(
         user,
-        "staff_buyer_profile",
-        None,
+        ROLE_BUYER,
     )
 
     return profile if _verified(profile) else None
@@ -360,14 +357,12 @@ def _manager_has_bijouterie(
     if not bijouterie_id:
         return False
 
-    manager = _manager_profile(user)
-
-    if manager is None:
+    if _manager_profile(user) is None:
         return False
 
-    return manager.bijouteries.filter(
-        pk=bijouterie_id
-    ).exists()
+    return bijouterie_id in get_staff_context(
+        user
+    ).manager_bijouterie_ids
 
 
 def _user_is_authenticated(user) -> bool:
@@ -5,7 +5,7 @@ from __future__ import annotations
 from django.db.models import Q, QuerySet
 
 from backend.roles import (ROLE_ADMIN, ROLE_BUYER, ROLE_CASHIER, ROLE_MANAGER,
-                           ROLE_VENDOR, get_role_name)
+                           ROLE_VENDOR, get_staff_context)
 
 # ============================================================
 # Helpers internes
@@ -138,7 +138,9 @@ def scope_bijouterie_q(
             "Le champ de filtrage de la bijouterie est obligatoire."
         )
 
-    role = get_role_name(user)
+    # Rôle et profils résolus une fois par requête.
+    context = get_staff_context(user)
+    role = context.role
 
     # --------------------------------------------------------
     # Admin : accès global
@@ -152,37 +154,17 @@ def scope_bijouterie_q(
     # --------------------------------------------------------
 
     if role == ROLE_MANAGER:
-        manager = getattr(
-            user,
-            "staff_manager_profile",
-            None,
-        )
-
-        if not _is_verified(manager):
+        if not _is_verified(context.profiles.get(ROLE_MANAGER)):
             return _empty_scope_q()
 
-        bijouterie_ids = (
-            manager.bijouteries
-            .values_list(
-                "pk",
-                flat=True,
-            )
-        )
-
-        return Q(**{
-            f"{field}__in": bijouterie_ids,
-        })
+        return context.manager_bijouteries_q(field)
 
     # --------------------------------------------------------
     # Vendor : une bijouterie
     # --------------------------------------------------------
 
     if role == ROLE_VENDOR:
-        vendor = getattr(
-            user,
-            "staff_vendor_profile",
-            None,
-        )
+        vendor = context.profiles.get(ROLE_VENDOR)
 
         return _single_bijouterie_scope(
             profile=vendor,
@@ -194,11 +176,7 @@ def scope_bijouterie_q(
     # --------------------------------------------------------
 
     if role == ROLE_CASHIER:
-        cashier = getattr(
-            user,
-            "staff_cashier_profile",
-            None,
-        )
+        cashier = context.profiles.get(ROLE_CASHIER)
 
         return _single_bijouterie_scope(
             profile=cashier,
@@ -210,11 +188,7 @@ def scope_bijouterie_q(
     # --------------------------------------------------------
 
     if role == ROLE_BUYER:
-        buyer = getattr(
-            user,
-            "staff_buyer_profile",
-            None,
-        )
+        buyer = context.profiles.get(ROLE_BUYER)
 
         return _single_bijouterie_scope(
             profile=buyer,
@@ -0,0 +1,273 @@
+# backend/reference_cache.py
+
+from __future__ import annotations
+
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# ============================================================
+# Cache des données de référence
+# ============================================================
+#
+# Petites tables relues à chaque vente / paiement / liste produit :
+# Purete, Marque, MarquePurete (prix courants), Categorie, Modele,
+# ModePaiement.
+#
+# Backend : alias de cache "reference" (backend/settings.py)
+# - mémoire locale par processus par défaut ;
+# - Redis si REFERENCE_CACHE_URL est défini (partagé entre workers).
+#
+# Clés versionnées par espace de noms :
+#     ref:<namespace>:version          -> compteur (sans expiration)
+#     ref:<namespace>:<version>:<nom>  -> valeur (REFERENCE_CACHE_TIMEOUT)
+#
+# Invalidation : les signaux post_save / post_delete (store.signals,
+# sale.signals) incrémentent la version ; les anciennes clés ne sont
+# plus lues et expirent d'elles-mêmes.
+#
+# Dans une transaction, la version n'est incrémentée qu'après le
+# COMMIT : les autres workers ne mettent jamais en cache des données
+# non validées. D'ici là, le thread qui écrit relit la base
+# directement pour les espaces modifiés (il voit ses propres écritures).
+
+REFERENCE_CACHE_ALIAS = "reference"
+KEY_PREFIX = "ref"
+
+NS_CATEGORIE = "categorie"
+NS_MODELE = "modele"
+NS_PURETE = "purete"
+NS_MARQUE = "marque"
+NS_MARQUE_PURETE = "marque_purete"
+NS_MODE_PAIEMENT = "mode_paiement"
+
+# Espaces invalidés par modèle : les vues sérialisées imbriquent
+# les libellés des tables liées (Modele -> Categorie, Marque -> Purete,
+# MarquePurete -> Marque / Purete).
+INVALIDATIONS = {
+    "store.Categorie": (NS_CATEGORIE, NS_MODELE),
+    "store.Modele": (NS_MODELE,),
+    "store.Purete": (NS_PURETE, NS_MARQUE, NS_MARQUE_PURETE),
+    "store.Marque": (NS_MARQUE, NS_MARQUE_PURETE),
+    "store.MarquePurete": (NS_MARQUE_PURETE,),
+    "sale.ModePaiement": (NS_MODE_PAIEMENT,),
+}
+
+_MISSING = object()
+
+_state = threading.local()
+
+
+def _cache():
+    alias = (
+        REFERENCE_CACHE_ALIAS
+        if REFERENCE_CACHE_ALIAS in settings.CACHES
+        else "default"
+    )
+    return caches[alias]
+
+
+def _timeout() -> int:
+    return getattr(settings, "REFERENCE_CACHE_TIMEOUT", 300)
+
+
+def _dirty_namespaces() -> set:
+    """
+    Espaces modifiés par la transaction en cours de ce thread.
+    """
+    if not hasattr(_state, "namespaces"):
+        _state.namespaces = set()
+
+    return _state.namespaces
+
+
+def _version_key(namespace: str) -> str:
+    return f"{KEY_PREFIX}:{namespace}:version"
+
+
+def _version(namespace: str) -> int:
+    cache = _cache()
+    key = _version_key(namespace)
+
+    version = cache.get(key)
+
+    if version is None:
+        # Départ horodaté : si le compteur a été évincé, on ne retombe
+        # pas sur une ancienne version encore présente en cache.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump(namespaces) -> None:
+    cache = _cache()
+
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            # Compteur absent : la prochaine lecture en crée un nouveau.
+            pass
+
+
+# ============================================================
+# API générique
+# ============================================================
+
+def cached_reference(namespace: str, name: str, builder: Callable[[], Any]) -> Any:
+    """
+    Valeur `name` de l'espace `namespace`, calculée par `builder()`
+    en cas d'absence (valeur picklable : dict, list, Decimal, modèles).
+    """
+
+    connection = transaction.get_connection()
+    dirty = _dirty_namespaces()
+
+    if not connection.in_atomic_block:
+        # Hors transaction : les écritures précédentes sont validées
+        # (callback on_commit) ou annulées.
+        dirty.clear()
+
+    elif namespace in dirty:
+        return builder()
+
+    cache = _cache()
+    key = f"{KEY_PREFIX}:{namespace}:{_version(namespace)}:{name}"
+
+    value = cache.get(key, _MISSING)
+
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout=_timeout())
+
+    return value
+
+
+def invalidate_reference_data(*namespaces: str) -> None:
+    """
+    Invalide les espaces donnés (immédiatement, ou au COMMIT
+    de la transaction en cours).
+    """
+
+    if not namespaces:
+        return
+
+    if not transaction.get_connection().in_atomic_block:
+        _bump(namespaces)
+        return
+
+    _dirty_namespaces().update(namespaces)
+
+    def _after_commit():
+        _dirty_namespaces().difference_update(namespaces)
+        _bump(namespaces)
+
+    transaction.on_commit(_after_commit)
+
+
+def invalidate_reference_model(model) -> None:
+    """
+    Invalide les espaces dépendant d'un modèle (voir INVALIDATIONS).
+    """
+    invalidate_reference_data(*INVALIDATIONS.get(model._meta.label, ()))
+
+
+def clear_reference_cache() -> None:
+    """
+    Oublie toutes les versions connues (tests, commande d'administration).
+    """
+    _dirty_namespaces().clear()
+    _bump(
+        sorted({
+            namespace
+            for namespaces in INVALIDATIONS.values()
+            for namespace in namespaces
+        })
+    )
+
+
+# ============================================================
+# Modes de paiement
+# ============================================================
+
+def get_modes_paiement() -> dict:
+    """
+    {code en minuscules: ModePaiement} — actifs et inactifs.
+    """
+
+    def _build():
+        ModePaiement = apps.get_model("sale", "ModePaiement")
+        return {
+            mode.code.lower(): mode
+            for mode in ModePaiement.objects.all()
+        }
+
+    return cached_reference(NS_MODE_PAIEMENT, "par_code", _build)
+
+
+def get_mode_paiement(code: str | None, *, active_only: bool = True):
+    """
+    ModePaiement par code (insensible à la casse) ou None.
+    """
+
+    mode = get_modes_paiement().get((code or "").strip().lower())
+
+    if mode is None or (active_only and not mode.active):
+        return None
+
+    return mode
+
+
+def get_mode_paiement_by_id(mode_id):
+    """
+    ModePaiement par id (actif ou non) ou None.
+    """
+
+    if not mode_id:
+        return None
+
+    for mode in get_modes_paiement().values():
+        if mode.id == int(mode_id):
+            return mode
+
+    return None
+
+
+# ============================================================
+# Prix marque / pureté
+# ============================================================
+
+def get_marque_purete_prix_map() -> dict:
+    """
+    {(marque_id, purete_id): prix courant (Decimal)}.
+    """
+
+    def _build():
+        MarquePurete = apps.get_model("store", "MarquePurete")
+        return {
+            (marque_id, purete_id): Decimal(str(prix))
+            for marque_id, purete_id, prix in (
+                MarquePurete.objects
+                .values_list("marque_id", "purete_id", "prix")
+            )
+        }
+
+    return cached_reference(NS_MARQUE_PURETE, "prix", _build)
+
+
+def get_marque_purete_prix(marque_id, purete_id) -> Decimal | None:
+    """
+    Prix courant d'une combinaison marque / pureté, ou None.
+    """
+
+    if not marque_id or not purete_id:
+        return None
+
+    return get_marque_purete_prix_map().get((marque_id, purete_id))
@@ -2,11 +2,75 @@ import json
 from datetime import date, datetime
 from decimal import Decimal
 
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer
 
+try:
+    import orjson
+except ImportError:  # requirements.txt ; repli json (API_JSON_RENDERER)
+    orjson = None
 
-class UserRenderer(JSONRenderer):
-    charset = "utf-8"
+
+def custom_encoder(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+
+    if isinstance(obj, Decimal):
+        return str(obj)
+
+    return str(obj)
+
+
+def dumps_stdlib(payload) -> bytes:
+    return json.dumps(
+        payload,
+        default=custom_encoder,
+    ).encode("utf-8")
+
+
+def dumps_orjson(payload) -> bytes:
+    """
+    Même sortie que dumps_stdlib (UTF-8 brut au lieu des séquences
+    \\uXXXX) : datetime / date / UUID sont encodés nativement,
+    custom_encoder ne reste appelé que pour Decimal et les autres types.
+    """
+
+    try:
+        return orjson.dumps(
+            payload,
+            default=custom_encoder,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+    except orjson.JSONEncodeError:
+        # Entier hors 64 bits, imbrication trop profonde...
+        return dumps_stdlib(payload)
+
+
+def orjson_enabled() -> bool:
+    return (
+        orjson is not None
+        and getattr(settings, "API_JSON_RENDERER", "json") == "orjson"
+    )
+
+
+def json_dumps(payload) -> bytes:
+    if orjson_enabled():
+        return dumps_orjson(payload)
+
+    return dumps_stdlib(payload)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer de DRF (renderer par défaut, REST_FRAMEWORK) encodé
+    par orjson lorsque API_JSON_RENDERER = "orjson".
+
+    Sortie identique : datetime / date / time et les types propres à
+    DRF (Decimal, QuerySet, lazy strings...) passent par l'encodeur
+    de DRF (millisecondes, suffixe Z) ; dict, list, str, int, UUID sont
+    encodés en C. Indentation demandée ou encodage impossible :
+    JSONRenderer standard.
+    """
 
     def render(
         self,
@@ -14,15 +78,34 @@ class UserRenderer(JSONRenderer):
         accepted_media_type=None,
         renderer_context=None,
     ):
-        def custom_encoder(obj):
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
+        if data is None or not orjson_enabled():
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
 
-            if isinstance(obj, Decimal):
-                return str(obj)
+        try:
+            return orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(
+                    orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
 
-            return str(obj)
 
+class UserRenderer(JSONRenderer):
+    charset = "utf-8"
+
+    def render(
+        self,
+        data,
+        accepted_media_type=None,
+        renderer_context=None,
+    ):
         renderer_context = renderer_context or {}
         response = renderer_context.get("response")
 
@@ -32,9 +115,4 @@ class UserRenderer(JSONRenderer):
             else data
         )
 
-        return json.dumps(
-            payload,
-            default=custom_encoder,
-        ).encode("utf-8")
-        
-
+        return json_dumps(payload)
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from typing import Optional
 
+from django.db.models import Q
+
 # ============================================================
 # Constantes des rôles
 # ============================================================
@@ -112,60 +114,195 @@ def get_verified_staff_roles(user) -> list[str]:
 
 
 # ============================================================
-# Résolution du rôle
+# Contexte staff (mémorisé par requête)
 # ============================================================
 
-def get_role_name(user) -> Optional[str]:
+# Attribut posé sur l'instance user (request.user est recréé
+# à chaque requête : le cache vit le temps de la requête).
+STAFF_CONTEXT_ATTRIBUTE = "_staff_context"
+
+# Profils dont la bijouterie unique est chargée avec le profil.
+SINGLE_BIJOUTERIE_ROLES = frozenset({
+    ROLE_CASHIER,
+    ROLE_VENDOR,
+    ROLE_BUYER,
+})
+
+
+class StaffContext:
+    """
+    Rôle et profils staff résolus une fois pour un utilisateur.
+
+    - role : rôle effectif (voir get_role_name) ;
+    - profiles : {rôle: profil ou None}, vérifié ou non ;
+    - profile : profil vérifié correspondant au rôle ;
+    - bijouterie_id : bijouterie unique (vendor / cashier / buyer) ;
+    - manager_bijouterie_ids : bijouteries du manager,
+      chargées à la première demande puis conservées.
     """
-    Retourne le rôle effectif de l'utilisateur.
 
-    Priorité :
+    def __init__(self, *, role=None, profiles=None):
+        self.role = role
+        self.profiles = profiles or {}
+        self._manager_bijouterie_ids = None
 
-    1. Superuser Django actif -> admin
-    2. Manager vérifié
-    3. Cashier vérifié
-    4. Vendor vérifié
-    5. Buyer vérifié
-    6. user_role == admin
-    7. Aucun rôle
+    @property
+    def profile(self):
+        profile = self.profiles.get(self.role)
 
-    Important :
+        return profile if _is_verified_profile(profile) else None
 
-    - un utilisateur désactivé ne possède aucun rôle actif ;
-    - un profil staff désactivé ne donne aucun accès ;
-    - un utilisateur doit normalement avoir un seul profil
-      staff actif ;
-    - les rôles staff sont prioritaires sur user_role ;
-    - user_role est utilisé uniquement pour l'administrateur.
+    @property
+    def bijouterie_id(self) -> Optional[int]:
+        if self.role in {ROLE_ADMIN, ROLE_MANAGER}:
+            return None
+
+        return getattr(
+            self.profile,
+            "bijouterie_id",
+            None,
+        )
+
+    @property
+    def manager_bijouterie_ids(self) -> frozenset[int]:
+        manager = self.profiles.get(ROLE_MANAGER)
+
+        if not _is_verified_profile(manager):
+            return frozenset()
+
+        if self._manager_bijouterie_ids is None:
+            self._manager_bijouterie_ids = frozenset(
+                manager.bijouteries.values_list(
+                    "pk",
+                    flat=True,
+                )
+            )
+
+        return self._manager_bijouterie_ids
+
+    def manager_bijouteries_q(self, field: str) -> Q:
+        """
+        Filtre sur les bijouteries du manager.
+
+        Sous-requête tant que les identifiants n'ont pas été
+        chargés : aucune requête supplémentaire.
+        """
+
+        if self._manager_bijouterie_ids is not None:
+            return Q(**{
+                f"{field}__in": self._manager_bijouterie_ids,
+            })
+
+        return Q(**{
+            f"{field}__in": (
+                self.profiles[ROLE_MANAGER]
+                .bijouteries
+                .values_list(
+                    "pk",
+                    flat=True,
+                )
+            ),
+        })
+
+
+def _staff_select_related(user_model) -> list[str]:
+    """
+    Chemins select_related des profils staff.
+
+    select_related attend le related_query_name
+    (ex: "vendor_profile"), pas l'accesseur "staff_vendor_profile".
+    """
+
+    query_names = {
+        relation.get_accessor_name(): relation.name
+        for relation in user_model._meta.related_objects
+        if relation.one_to_one
+    }
+
+    paths = ["user_role"]
+
+    for role_name, profile_attribute in STAFF_ROLE_PROFILES:
+        query_name = query_names[profile_attribute]
+
+        if role_name in SINGLE_BIJOUTERIE_ROLES:
+            query_name = f"{query_name}__bijouterie"
+
+        paths.append(query_name)
+
+    return paths
+
+
+def _load_staff_profiles(user) -> dict:
+    """
+    Charge tous les profils staff (et user_role) en une requête,
+    puis les place dans le cache des relations de `user` afin que
+    getattr(user, "staff_*_profile") ne refasse pas de requête.
     """
 
+    user_model = type(user)
+
+    loaded = (
+        user_model._default_manager
+        .select_related(*_staff_select_related(user_model))
+        .filter(pk=user.pk)
+        .first()
+    )
+
+    if loaded is None:
+        return {}
+
+    profiles = {}
+
+    for role_name, profile_attribute in STAFF_ROLE_PROFILES:
+        profile = getattr(
+            loaded,
+            profile_attribute,
+            None,
+        )
+
+        # Un profil absent est mis en cache à None :
+        # l'accès lève DoesNotExist sans requête.
+        user._state.fields_cache[profile_attribute] = profile
+
+        profiles[role_name] = profile
+
+    user._state.fields_cache["user_role"] = loaded.user_role
+
+    return profiles
+
+
+def _resolve_staff_context(user) -> StaffContext:
     if not user:
-        return None
+        return StaffContext()
 
     if not getattr(user, "is_authenticated", False):
-        return None
+        return StaffContext()
 
     # Un compte désactivé ne doit plus avoir de rôle effectif.
     if not getattr(user, "is_active", False):
-        return None
+        return StaffContext()
 
     # --------------------------------------------------------
-    # Superuser Django
+    # Superuser Django : aucune requête
     # --------------------------------------------------------
 
     if getattr(user, "is_superuser", False):
-        return ROLE_ADMIN
+        return StaffContext(role=ROLE_ADMIN)
 
     # --------------------------------------------------------
     # Profils staff vérifiés
     # --------------------------------------------------------
 
-    verified_staff_roles = get_verified_staff_roles(user)
+    profiles = _load_staff_profiles(user)
 
-    if verified_staff_roles:
+    for role_name, _profile_attribute in STAFF_ROLE_PROFILES:
         # En cas d'incohérence historique, l'ordre défini dans
         # STAFF_ROLE_PROFILES détermine le rôle retenu.
-        return verified_staff_roles[0]
+        if _is_verified_profile(profiles.get(role_name)):
+            return StaffContext(
+                role=role_name,
+                profiles=profiles,
+            )
 
     # --------------------------------------------------------
     # Administrateur applicatif
@@ -185,10 +322,92 @@ def get_role_name(user) -> Optional[str]:
         )
     )
 
-    if role_name == ROLE_ADMIN:
-        return ROLE_ADMIN
+    return StaffContext(
+        role=ROLE_ADMIN if role_name == ROLE_ADMIN else None,
+        profiles=profiles,
+    )
+
+
+def get_staff_context(user) -> StaffContext:
+    """
+    Retourne le contexte staff de l'utilisateur.
+
+    Calculé une seule fois (une requête au plus) puis mémorisé
+    sur l'instance : permissions, scopes et vues d'une même
+    requête partagent le même résultat.
+    """
+
+    if not user:
+        return StaffContext()
+
+    context = getattr(
+        user,
+        STAFF_CONTEXT_ATTRIBUTE,
+        None,
+    )
+
+    if context is None:
+        context = _resolve_staff_context(user)
+
+        try:
+            setattr(user, STAFF_CONTEXT_ATTRIBUTE, context)
+        except AttributeError:
+            # AnonymousUser et objets sans __dict__
+            pass
+
+    return context
+
+
+def clear_staff_context(user) -> None:
+    """
+    Oublie le contexte mémorisé, à appeler après une modification
+    des profils staff ou du rôle de `user` dans la même requête.
+    """
+
+    if user is not None and hasattr(user, "__dict__"):
+        user.__dict__.pop(STAFF_CONTEXT_ATTRIBUTE, None)
+
+
+def get_staff_profile(user, role: str):
+    """
+    Retourne le profil staff `role` de l'utilisateur
+    (vérifié ou non), sans requête supplémentaire.
+    """
+
+    return get_staff_context(user).profiles.get(role)
+
+
+# ============================================================
+# Résolution du rôle
+# ============================================================
+
+def get_role_name(user) -> Optional[str]:
+    """
+    Retourne le rôle effectif de l'utilisateur.
+
+    Priorité :
+
+    1. Superuser Django actif -> admin
+    2. Manager vérifié
+    3. Cashier vérifié
+    4. Vendor vérifié
+    5. Buyer vérifié
+    6. user_role == admin
+    7. Aucun rôle
+
+    Important :
+
+    - un utilisateur désactivé ne possède aucun rôle actif ;
+    - un profil staff désactivé ne donne aucun accès ;
+    - un utilisateur doit normalement avoir un seul profil
+      staff actif ;
+    - les rôles staff sont prioritaires sur user_role ;
+    - user_role est utilisé uniquement pour l'administrateur ;
+    - le résultat est mémorisé sur l'instance user
+      (voir get_staff_context).
+    """
 
-    return None
+    return get_staff_context(user).role
 
 
 # ============================================================
@@ -1,6 +1,8 @@
 # Python 3.10.5
 # python -m django --version 4.2
+import importlib.util
 import os
+import warnings
 from datetime import timedelta
 from pathlib import Path
 
@@ -19,6 +21,32 @@ USE_I18N = True
 USE_TZ = True
 
 
+# --- Connexions MySQL ---
+# WSGI (gunicorn) : connexions persistantes par worker, vérifiées
+# avant réutilisation (CONN_HEALTH_CHECKS) : pas de handshake MySQL
+# à chaque requête. 0 = une connexion par requête (ancien comportement).
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=10, cast=int)
+
+# ASGI (uvicorn) : les connexions persistantes ne sont pas sûres en
+# mode async ; backend/asgi.py active par défaut un pool en processus
+# (paquet optionnel « django-db-connection-pool[mysql] »).
+# RECYCLE doit rester inférieur au wait_timeout du serveur MySQL.
+ASGI_MODE = os.environ.get('DJANGO_ASGI') == '1'
+DB_POOL = config('DB_POOL', default=ASGI_MODE, cast=bool)
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=10, cast=int)
+DB_POOL_MAX_OVERFLOW = config('DB_POOL_MAX_OVERFLOW', default=10, cast=int)
+DB_POOL_RECYCLE = config('DB_POOL_RECYCLE', default=1800, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=30, cast=int)
+
+if DB_POOL and importlib.util.find_spec('dj_db_conn_pool') is None:
+    warnings.warn(
+        "DB_POOL activé mais django-db-connection-pool n'est pas installé : "
+        "connexions non persistantes utilisées à la place."
+    )
+    DB_POOL = False
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
@@ -27,12 +55,29 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        'CONN_MAX_AGE': 0 if ASGI_MODE else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         'OPTIONS': {
             'sql_mode': 'STRICT_ALL_TABLES',
+            'connect_timeout': DB_CONNECT_TIMEOUT,
         },
     }
 }
 
+if DB_POOL:
+    # La connexion « fermée » par Django est rendue au pool.
+    DATABASES['default'].update({
+        'ENGINE': 'dj_db_conn_pool.backends.mysql',
+        'CONN_MAX_AGE': 0,
+        'POOL_OPTIONS': {
+            'POOL_SIZE': DB_POOL_SIZE,
+            'MAX_OVERFLOW': DB_POOL_MAX_OVERFLOW,
+            'RECYCLE': DB_POOL_RECYCLE,
+            'TIMEOUT': DB_POOL_TIMEOUT,
+            'PRE_PING': DB_CONN_HEALTH_CHECKS,
+        },
+    })
+
 
 # ALLOWED_HOSTS = ['*']
 
@@ -65,6 +110,8 @@ INSTALLED_APPS = [
     'compte_depot',
     'order',
     'stock_matiere_premiere',
+    "search.apps.SearchConfig",
+    "reporting.apps.ReportingConfig",
     
     #depense
     "finance",
@@ -126,10 +173,27 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # JSON : orjson si API_JSON_RENDERER = "orjson" (voir plus bas)
+    "DEFAULT_RENDERER_CLASSES": (
+        "backend.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     # "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     # "PAGE_SIZE": 20,
 }
 
+# Encodage JSON des réponses (backend.renderers.UserRenderer) :
+# "orjson" (requirements.txt, Decimal / datetime / UUID encodés en C)
+# ou "json" (bibliothèque standard).
+API_JSON_RENDERER = config('API_JSON_RENDERER', default='orjson')
+
+if API_JSON_RENDERER == 'orjson' and importlib.util.find_spec('orjson') is None:
+    warnings.warn(
+        "API_JSON_RENDERER = 'orjson' mais orjson n'est pas installé "
+        "(pip install -r requirements.txt) : encodeur json standard utilisé."
+    )
+    API_JSON_RENDERER = 'json'
+
 # Pagination par défaut
 DEFAULT_PAGE_SIZE = 50
 MAX_PAGE_SIZE = 100
@@ -341,3 +405,62 @@ COMPTE_DEPOT_DEPOT_MINIMUM = 5000
 # logo
 RIO_LOGO_DIR = os.path.join(MEDIA_ROOT, "logo")
 
+# étiquettes produits : cache disque des PNG rendus (vide = mémoire seule)
+ETIQUETTES_CACHE_DIR = config("ETIQUETTES_CACHE_DIR", default="")
+
+# factures A5 / tickets POS / tickets rachat : cache disque des documents
+# rendus (backend/document_cache.py ; vide = rendu à chaque appel).
+# Hors de MEDIA_ROOT : documents privés (noms et téléphones des clients),
+# MEDIA_ROOT étant servi publiquement.
+DOCUMENTS_CACHE_DIR = config(
+    "DOCUMENTS_CACHE_DIR",
+    default=str(BASE_DIR / "var" / "documents_cache"),
+)
+# pré-génération des documents d'une facture payée : en production
+# « python manage.py pregenerate_facture_documents » (hors du processus
+# web). En dev, DOCUMENTS_PREGENERATE rend dans un thread du serveur
+# juste après le COMMIT (sans worker).
+DOCUMENTS_PREGENERATE = config("DOCUMENTS_PREGENERATE", default=DEBUG, cast=bool)
+
+
+# --- Cache ---
+# Données de référence (puretés, marques, prix, modes de paiement) :
+# voir backend/reference_cache.py. Mémoire locale par processus par
+# défaut ; REFERENCE_CACHE_URL (redis://...) partage le cache entre
+# workers (backend Redis de Django, paquet « redis » requis).
+REFERENCE_CACHE_URL = config("REFERENCE_CACHE_URL", default="")
+# Durée de vie (s) d'une valeur : borne aussi la fraîcheur entre
+# workers lorsque le cache est local à chaque processus.
+REFERENCE_CACHE_TIMEOUT = config("REFERENCE_CACHE_TIMEOUT", default=300, cast=int)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    "reference": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REFERENCE_CACHE_URL,
+            "KEY_PREFIX": "rio",
+        }
+        if REFERENCE_CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "reference-data",
+            "OPTIONS": {"MAX_ENTRIES": 1000},
+        }
+    ),
+}
+
+# --- Outbox des notifications (userauths/outbox.py) ---
+# Emails et SMS écrits dans la transaction, envoyés par
+# « python manage.py process_outbox ». En dev, OUTBOX_INPROCESS envoie
+# dans un thread du serveur juste après le COMMIT (sans worker).
+OUTBOX_INPROCESS = config("OUTBOX_INPROCESS", default=DEBUG, cast=bool)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=8, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config("OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
+OUTBOX_RETRY_MAX_SECONDS = config("OUTBOX_RETRY_MAX_SECONDS", default=3600, cast=int)
+OUTBOX_LEASE_SECONDS = config("OUTBOX_LEASE_SECONDS", default=300, cast=int)
+# Passerelle SMS : classe avec une méthode send(to, body)
+SMS_BACKEND = config("SMS_BACKEND", default="userauths.outbox.ConsoleSmsBackend")
@@ -6,7 +6,7 @@ from decimal import Decimal, InvalidOperation
 from typing import Optional
 
 from backend.roles import (ROLE_ADMIN, ROLE_BUYER, ROLE_CASHIER, ROLE_MANAGER,
-                           ROLE_VENDOR, get_role_name)
+                           ROLE_VENDOR, get_role_name, get_staff_context)
 
 ZERO = Decimal("0.00")
 
@@ -111,14 +111,11 @@ def resolve_bijouterie_for_user(
 
     from store.models import Bijouterie
 
-    role = get_role_name(user)
+    context = get_staff_context(user)
+    role = context.role
 
     if role == ROLE_VENDOR:
-        profile = getattr(
-            user,
-            "staff_vendor_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_VENDOR)
 
         if (
             profile
@@ -130,11 +127,7 @@ def resolve_bijouterie_for_user(
         return None
 
     if role == ROLE_CASHIER:
-        profile = getattr(
-            user,
-            "staff_cashier_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_CASHIER)
 
         if (
             profile
@@ -146,11 +139,7 @@ def resolve_bijouterie_for_user(
         return None
 
     if role == ROLE_BUYER:
-        profile = getattr(
-            user,
-            "staff_buyer_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_BUYER)
 
         if (
             profile
@@ -169,11 +158,7 @@ def resolve_bijouterie_for_user(
         return None
 
     if role == ROLE_MANAGER:
-        profile = getattr(
-            user,
-            "staff_manager_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_MANAGER)
 
         if not (
             profile
@@ -248,7 +233,8 @@ def user_can_access_bijouterie(
     - un identifiant de bijouterie.
     """
 
-    role = get_role_name(user)
+    context = get_staff_context(user)
+    role = context.role
 
     if role == ROLE_ADMIN:
         return True
@@ -261,11 +247,7 @@ def user_can_access_bijouterie(
         return False
 
     if role == ROLE_VENDOR:
-        profile = getattr(
-            user,
-            "staff_vendor_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_VENDOR)
 
         return bool(
             profile
@@ -275,11 +257,7 @@ def user_can_access_bijouterie(
         )
 
     if role == ROLE_CASHIER:
-        profile = getattr(
-            user,
-            "staff_cashier_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_CASHIER)
 
         return bool(
             profile
@@ -289,11 +267,7 @@ def user_can_access_bijouterie(
         )
 
     if role == ROLE_BUYER:
-        profile = getattr(
-            user,
-            "staff_buyer_profile",
-            None,
-        )
+        profile = context.profiles.get(ROLE_BUYER)
 
         return bool(
             profile
@@ -303,18 +277,8 @@ def user_can_access_bijouterie(
         )
 
     if role == ROLE_MANAGER:
-        profile = getattr(
-            user,
-            "staff_manager_profile",
-            None,
-        )
-
-        return bool(
-            profile
-            and getattr(profile, "verifie", False)
-            and profile.bijouteries.filter(
-                pk=bijouterie_id
-            ).exists()
-        )
+        # Identifiants chargés une fois puis réutilisés
+        # pendant toute la requête.
+        return bijouterie_id in context.manager_bijouterie_ids
 
     return False
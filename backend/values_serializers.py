@@ -0,0 +1,135 @@
+# backend/values_serializers.py
+
+from __future__ import annotations
+
+from typing import Callable
+
+from django.db import models
+from django.db.models.fields.files import FieldFile
+from rest_framework import serializers
+
+# ============================================================
+# Sérialisation légère (lecture seule) depuis QuerySet.values()
+# ============================================================
+#
+# Pour les listes longues (ventes, mouvements d'inventaire...), un
+# ModelSerializer instancie un objet modèle par ligne, résout chaque
+# champ par get_attribute() et crée un sérialiseur par niveau imbriqué.
+#
+# Ici :
+# - la base renvoie des tuples (values()), aucun objet modèle ;
+# - chaque colonne a un convertisseur résolu une fois par classe,
+#   à partir du champ modèle (DecimalField -> chaîne quantifiée,
+#   DateTimeField -> ISO 8601 dans le fuseau courant, fichiers -> URL) ;
+# - la représentation est identique à celle du ModelSerializer
+#   correspondant (les tests le vérifient).
+#
+#     class ProduitRows(ValuesSerializer):
+#         model = Produit
+#         fields = {"id": "id", "nom": "nom", "purete": "purete__purete"}
+#
+#     rows = ProduitRows().rows(Produit.objects.filter(...))
+
+
+def _identity(value):
+    return value
+
+
+def _file_url(field: models.FileField) -> Callable:
+    def convert(name):
+        # Sans request dans le contexte, DRF renvoie l'URL relative.
+        return FieldFile(None, field, name).url if name else None
+
+    return convert
+
+
+def field_converter(field: models.Field) -> Callable:
+    """
+    Conversion d'une valeur brute values() vers la représentation DRF
+    du champ modèle (None est laissé à l'appelant).
+    """
+
+    if isinstance(field, models.DecimalField):
+        return serializers.DecimalField(
+            max_digits=field.max_digits,
+            decimal_places=field.decimal_places,
+        ).to_representation
+
+    if isinstance(field, models.DateTimeField):
+        return serializers.DateTimeField().to_representation
+
+    if isinstance(field, models.DateField):
+        return serializers.DateField().to_representation
+
+    if isinstance(field, models.UUIDField):
+        return str
+
+    if isinstance(field, models.FileField):
+        return _file_url(field)
+
+    return _identity
+
+
+def resolve_field(model, lookup: str) -> models.Field:
+    """
+    Champ modèle désigné par un chemin values() ("vendor__user__email").
+    """
+
+    field = None
+
+    for part in lookup.split("__"):
+        field = model._meta.get_field(part)
+
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+
+    if field.is_relation:
+        # "client" -> client_id : la clé primaire de la cible.
+        field = field.target_field
+
+    return field
+
+
+class ValuesSerializer:
+    """
+    Sérialiseur en lecture seule sur des lignes values().
+
+    fields : {clé de sortie: chemin values()}.
+    """
+
+    model = None
+    fields: dict = {}
+
+    _converters_cache: dict = {}
+
+    @classmethod
+    def converters(cls) -> dict:
+        converters = ValuesSerializer._converters_cache.get(cls)
+
+        if converters is None:
+            converters = {
+                key: field_converter(resolve_field(cls.model, lookup))
+                for key, lookup in cls.fields.items()
+            }
+            ValuesSerializer._converters_cache[cls] = converters
+
+        return converters
+
+    def values(self, queryset):
+        return queryset.values(*dict.fromkeys(self.fields.values()))
+
+    def to_representation(self, row: dict) -> dict:
+        converters = self.converters()
+        data = {}
+
+        for key, lookup in self.fields.items():
+            value = row[lookup]
+            data[key] = None if value is None else converters[key](value)
+
+        return data
+
+    def rows(self, queryset) -> list[dict]:
+        return [
+            self.to_representation(row)
+            for row in self.values(queryset)
+        ]
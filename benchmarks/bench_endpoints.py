@@ -0,0 +1,89 @@
+# benchmarks/bench_endpoints.py
+"""
+Endpoints chauds : nombre de requêtes SQL, temps médian et pic
+mémoire, comparés à benchmarks/baseline.json.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from benchmarks.measure import measure, regressions
+
+pytestmark = pytest.mark.django_db
+
+
+# (nom, rôle, url) — l'url peut référencer les champs de BenchmarkData.
+ENDPOINTS = [
+    ("vente_list_page", "admin", "/api/vente/list-produit?page_size=50"),
+    ("vente_list_cursor", "admin", "/api/vente/list-produit?cursor=&page_size=50"),
+    ("manager_dashboard", "manager", "/api/manager/dashboard/"),
+    ("cashier_dashboard", "cashier", "/api/cashier/dashboard/"),
+    ("inventory_bijouteries", "admin", "/api/inventory/bijouteries"),
+    ("inventory_movements", "admin", "/api/inventory/movements"),
+    ("inventory_produit_lines", "admin", "/api/inventory/produit-lines"),
+    (
+        "inventory_produit_lines_search",
+        "admin",
+        "/api/inventory/produit-lines?q=bench+0007",
+    ),
+    (
+        "vente_list_numero",
+        "admin",
+        "/api/vente/list-produit?numero_vente=000042&page_size=50",
+    ),
+    ("achat_liste", "admin", "/api/achat/liste"),
+    ("achat_dashboard", "admin", "/api/achat/dashboard"),
+    ("depense_dashboard", "admin", "/api/depenses/dashboard/"),
+    ("achat_lots", "admin", "/api/achat/lots"),
+    ("vendor_stock", "vendor", "/api/vendor/stock-vendor"),
+    (
+        "ticket_proforma_58mm",
+        "cashier",
+        "/api/factures/{facture_proforma}/ticket-58mm/",
+    ),
+    (
+        "ticket_paiement_80mm",
+        "cashier",
+        "/api/factures/{facture_payee}/ticket-paiement-80mm/",
+    ),
+    (
+        "rachat_ticket_58mm",
+        "admin",
+        "/api/rachats-clients/{rachat_uuid}/ticket-58mm/",
+    ),
+]
+
+ROLE_USER_FIELD = {
+    "admin": "admin_id",
+    "manager": "manager_id",
+    "vendor": "vendor_user_id",
+    "cashier": "cashier_user_id",
+}
+
+
+@pytest.mark.parametrize(
+    "name, role, url",
+    ENDPOINTS,
+    ids=[endpoint[0] for endpoint in ENDPOINTS],
+)
+def bench_endpoint(name, role, url, bench_data, bench_recorder):
+    user_id = getattr(bench_data, ROLE_USER_FIELD[role])
+    url = url.format(**vars(bench_data))
+
+    def call():
+        # Utilisateur rechargé à chaque appel : pas de cache d'instance
+        # (profil, rôle) d'une requête à l'autre.
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.get(pk=user_id))
+        return client.get(url)
+
+    result = measure(call, repeat=bench_recorder.repeat)
+
+    assert result["status"] == 200, f"{name} : HTTP {result['status']}"
+
+    bench_recorder.record(name, result)
+
+    if not bench_recorder.update:
+        errors = regressions(name, result, bench_recorder.reference(name))
+        assert not errors, "\n".join(errors)
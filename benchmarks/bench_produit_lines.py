@@ -0,0 +1,221 @@
+# benchmarks/bench_produit_lines.py
+"""
+/api/inventory/produit-lines à 50 000 ProduitLine.
+
+Lignes ajoutées par bulk_create au-dessus du seed (un stock magasin,
+un stock vendeur et deux mouvements par ligne) dans une transaction
+annulée en fin de module, pour ne pas fausser les autres benchmarks.
+
+Mesures : première page, page profonde (curseur après 40 000 lignes),
+page de 200 lignes, expand=movements, périmètre manager (EXISTS),
+tri sur stock_global (sous-requêtes) et historique paginé d'une ligne.
+La taille de la réponse (size_kb) est affichée avec chaque mesure.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.pagination import KeysetPagination
+from benchmarks.measure import measure, regressions
+from inventory.models import Bucket, InventoryMovement, MovementType
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from stock.models import Stock, VendorStock
+from store.models import Produit
+from vendor.models import Vendor
+
+pytestmark = pytest.mark.django_db
+
+LINES = 50_000
+# (lot, produit) est unique : autant de lignes par lot que de produits.
+LINES_PER_LOT = 20
+DEEP_OFFSET = 40_000
+BATCH_SIZE = 2000
+
+PREFIX = "BENCH-PL50K-"
+
+
+def _bulk_lines(bench_data):
+    vendor = Vendor.objects.filter(bijouterie_id=bench_data.bijouterie_id).first()
+    produits = list(Produit.objects.order_by("id")[:LINES_PER_LOT])
+    now = timezone.now()
+
+    achat = Achat.objects.create(
+        fournisseur=Fournisseur.objects.create(telephone="770050000"),
+        bijouterie_id=bench_data.bijouterie_id,
+    )
+
+    Lot.objects.bulk_create(
+        [
+            Lot(
+                achat=achat,
+                numero_lot=f"{PREFIX}{n:05d}",
+                received_at=now - timedelta(minutes=n),
+            )
+            for n in range(LINES // LINES_PER_LOT)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    lots = list(Lot.objects.filter(numero_lot__startswith=PREFIX).order_by("id"))
+
+    ProduitLine.objects.bulk_create(
+        [
+            ProduitLine(
+                lot=lot,
+                produit=produits[n],
+                prix_achat_gramme=Decimal("30000.00"),
+                quantite=10,
+            )
+            for lot in lots
+            for n in range(LINES_PER_LOT)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    lines = list(
+        ProduitLine.objects
+        .filter(lot__in=lots)
+        .values("id", "produit_id", "lot_id", "lot__received_at")
+    )
+
+    Stock.objects.bulk_create(
+        [
+            Stock(
+                produit_line_id=line["id"],
+                bijouterie_id=bench_data.bijouterie_id,
+                en_stock=6,
+                quantite_totale=10,
+            )
+            for line in lines
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    VendorStock.objects.bulk_create(
+        [
+            VendorStock(
+                produit_line_id=line["id"],
+                vendor=vendor,
+                bijouterie_id=bench_data.bijouterie_id,
+                quantite_allouee=4,
+                quantite_vendue=1,
+            )
+            for line in lines
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    movements = []
+
+    for line in lines:
+        common = {
+            "produit_id": line["produit_id"],
+            "produit_line_id": line["id"],
+            "lot_id": line["lot_id"],
+            "achat": achat,
+            "occurred_at": line["lot__received_at"],
+            "is_locked": True,
+        }
+
+        movements.append(InventoryMovement(
+            movement_type=MovementType.PURCHASE_IN,
+            qty=10,
+            src_bucket=Bucket.EXTERNAL,
+            dst_bucket=Bucket.BIJOUTERIE,
+            dst_bijouterie_id=bench_data.bijouterie_id,
+            **common,
+        ))
+        movements.append(InventoryMovement(
+            movement_type=MovementType.VENDOR_ASSIGN,
+            qty=4,
+            src_bucket=Bucket.BIJOUTERIE,
+            dst_bucket=Bucket.VENDOR,
+            src_bijouterie_id=bench_data.bijouterie_id,
+            dst_bijouterie_id=bench_data.bijouterie_id,
+            vendor=vendor,
+            **common,
+        ))
+
+    InventoryMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+
+
+
+@pytest.fixture(scope="module")
+def produit_lines_50k(bench_data, django_db_blocker):
+    # Transaction annulée en fin de module : bien plus rapide qu'un
+    # delete() de 250 000 lignes (collecteur, contrôles PROTECT).
+    with django_db_blocker.unblock(), transaction.atomic():
+        _bulk_lines(bench_data)
+
+        ordering = ("-lot__received_at", "-id")
+        deep_row = (
+            ProduitLine.objects
+            .order_by(*ordering)
+            .values("id", "lot__received_at")[DEEP_OFFSET]
+        )
+
+        yield {
+            "deep_cursor": KeysetPagination(ordering=ordering).encode_cursor(deep_row),
+            "produit_line_id": deep_row["id"],
+        }
+
+        transaction.set_rollback(True)
+
+
+CASES = [
+    ("produit_lines_50k_first_page", "admin_id", "", {}),
+    ("produit_lines_50k_deep_page", "admin_id", "", {"cursor": "{deep_cursor}"}),
+    ("produit_lines_50k_page_200", "admin_id", "", {"page_size": 200}),
+    ("produit_lines_50k_expand", "admin_id", "", {"expand": "movements"}),
+    ("produit_lines_50k_manager", "manager_id", "", {}),
+    ("produit_lines_50k_by_stock", "admin_id", "", {"ordering": "-stock_global"}),
+    (
+        "produit_lines_50k_movements",
+        "admin_id",
+        "/{produit_line_id}/movements",
+        {},
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "name, user_field, suffix, params",
+    CASES,
+    ids=[case[0] for case in CASES],
+)
+def bench_produit_lines(
+    name,
+    user_field,
+    suffix,
+    params,
+    bench_data,
+    produit_lines_50k,
+    bench_recorder,
+):
+    user_id = getattr(bench_data, user_field)
+    url = "/api/inventory/produit-lines" + suffix.format(**produit_lines_50k)
+    params = {
+        key: str(value).format(**produit_lines_50k)
+        for key, value in params.items()
+    }
+
+    def call():
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.get(pk=user_id))
+        return client.get(url, params)
+
+    result = measure(call, repeat=bench_recorder.repeat)
+
+    assert result["status"] == 200, f"{name} : HTTP {result['status']}"
+
+    bench_recorder.record(name, result)
+
+    if not bench_recorder.update:
+        errors = regressions(name, result, bench_recorder.reference(name))
+        assert not errors, "\n".join(errors)
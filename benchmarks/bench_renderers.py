@@ -0,0 +1,200 @@
+# benchmarks/bench_renderers.py
+"""
+Sérialisation et rendu JSON d'une liste de 1000 lignes :
+- ModelSerializer DRF contre lignes values() (backend/values_serializers.py) ;
+- JSONRenderer / UserRenderer standard contre orjson (API_JSON_RENDERER).
+
+Chaque paire produit le même JSON ; seules les mesures diffèrent.
+"""
+
+import json
+from itertools import cycle, islice
+
+import pytest
+from django.http import HttpResponse
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from backend.renderers import FastJSONRenderer, UserRenderer
+from benchmarks.measure import measure, regressions
+from inventory.models import InventoryMovement
+from inventory.serializers import (InventoryMovementRows,
+                                   InventoryMovementSerializer)
+from sale.models import Vente
+from sale.selectors.ventes import vente_list_rows
+from sale.serializers import VenteListSerializer
+
+pytestmark = pytest.mark.django_db
+
+ROWS = 1000
+
+
+def _cycled(rows):
+    # Données de l'échelle « small » : moins de 1000 lignes, recyclées.
+    return list(islice(cycle(rows), ROWS))
+
+
+def _movements():
+    return (
+        InventoryMovement.objects
+        .select_related(
+            "produit",
+            "lot",
+            "achat",
+            "facture",
+            "vente",
+            "vendor__user",
+            "src_bijouterie",
+            "dst_bijouterie",
+            "created_by",
+        )
+        .order_by("-occurred_at", "-id")
+    )
+
+
+def _vente_ids():
+    return _cycled(
+        Vente.objects
+        .order_by("-created_at", "-id")
+        .values_list("id", flat=True)
+    )
+
+
+# ============================================================
+# Sérialiseurs : ModelSerializer contre values()
+# ============================================================
+
+def _movements_drf():
+    return InventoryMovementSerializer(
+        _cycled(_movements()),
+        many=True,
+    ).data
+
+
+def _movements_values():
+    serializer = InventoryMovementRows()
+
+    return [
+        serializer.to_representation(row)
+        for row in _cycled(serializer.values(_movements()))
+    ]
+
+
+def _ventes_drf():
+    ventes = {
+        vente.id: vente
+        for vente in (
+            Vente.objects
+            .select_related("client", "facture_vente")
+            .prefetch_related(
+                "lignes__produit",
+                "lignes__vendor__user",
+                "lignes__vendor__bijouterie",
+            )
+            .filter(id__in=set(_vente_ids()))
+        )
+    }
+
+    return VenteListSerializer(
+        [ventes[vente_id] for vente_id in _vente_ids()],
+        many=True,
+    ).data
+
+
+def _ventes_values():
+    return vente_list_rows(_vente_ids())
+
+
+SERIALIZERS = [
+    ("serialize_movements_drf", _movements_drf),
+    ("serialize_movements_values", _movements_values),
+    ("serialize_ventes_drf", _ventes_drf),
+    ("serialize_ventes_values", _ventes_values),
+]
+
+
+@pytest.mark.parametrize(
+    "name, build",
+    SERIALIZERS,
+    ids=[entry[0] for entry in SERIALIZERS],
+)
+def bench_serializer(name, build, bench_data, bench_recorder):
+    def call():
+        return HttpResponse(JSONRenderer().render(build()))
+
+    result = measure(call, repeat=bench_recorder.repeat)
+
+    bench_recorder.record(name, result)
+
+    if not bench_recorder.update:
+        errors = regressions(name, result, bench_recorder.reference(name))
+        assert not errors, "\n".join(errors)
+
+
+def bench_serializers_same_output(bench_data):
+    assert json.dumps(_movements_values()) == json.dumps(
+        json.loads(JSONRenderer().render(_movements_drf()))
+    )
+    assert json.dumps(_ventes_values(), default=str) == json.dumps(
+        _ventes_drf(),
+        default=str,
+    )
+
+
+# ============================================================
+# Renderers : json (bibliothèque standard) contre orjson
+# ============================================================
+
+RENDERERS = [
+    # Sortie d'un ModelSerializer (chaînes), renderer par défaut.
+    ("render_default_json", FastJSONRenderer, "json"),
+    ("render_default_orjson", FastJSONRenderer, "orjson"),
+    # Valeurs brutes (Decimal, datetime) : UserRenderer.
+    ("render_user_json", UserRenderer, "json"),
+    ("render_user_orjson", UserRenderer, "orjson"),
+]
+
+
+@pytest.fixture(scope="module")
+def payloads(bench_data, django_db_blocker):
+    with django_db_blocker.unblock():
+        return {
+            FastJSONRenderer: _movements_values(),
+            UserRenderer: _cycled(
+                InventoryMovementRows().values(_movements())
+            ),
+        }
+
+
+@pytest.mark.parametrize(
+    "name, renderer_class, backend",
+    RENDERERS,
+    ids=[entry[0] for entry in RENDERERS],
+)
+def bench_renderer(name, renderer_class, backend, payloads, bench_recorder):
+    payload = payloads[renderer_class]
+
+    assert len(payload) == ROWS
+
+    with override_settings(API_JSON_RENDERER=backend):
+        def call():
+            return HttpResponse(renderer_class().render(payload))
+
+        result = measure(call, repeat=bench_recorder.repeat)
+
+    bench_recorder.record(name, result)
+
+    if not bench_recorder.update:
+        errors = regressions(name, result, bench_recorder.reference(name))
+        assert not errors, "\n".join(errors)
+
+
+def bench_renderers_same_output(payloads):
+    for renderer_class, payload in payloads.items():
+        outputs = []
+
+        for backend in ("json", "orjson"):
+            with override_settings(API_JSON_RENDERER=backend):
+                outputs.append(json.loads(renderer_class().render(payload)))
+
+        assert outputs[0] == outputs[1]
@@ -0,0 +1,148 @@
+# benchmarks/conftest.py
+"""
+Benchmarks de l'API (pytest-django).
+
+    # SQLite (réglages de test locaux) ou MySQL (backend.settings + .env)
+    DJANGO_SETTINGS_MODULE=backend.settings pytest benchmarks
+
+Options :
+    --bench-scale=small|medium   volume de données (défaut : small)
+    --bench-repeat=N             appels chronométrés par endpoint
+    --bench-update-baseline      réécrit benchmarks/baseline.json
+
+La baseline est indexée par moteur et par échelle
+("sqlite:small", "mysql:medium"...). Sans baseline pour la
+combinaison courante, les mesures sont affichées sans comparaison ;
+un endpoint absent d'une baseline existante fait échouer le
+benchmark.
+"""
+
+import pytest
+from django.test import override_settings
+
+from benchmarks.measure import baseline_key, load_baseline, save_baseline
+from benchmarks.seed import SCALES, seed_benchmark_data
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-scale",
+        default="small",
+        choices=sorted(SCALES),
+        help="Volume de données généré.",
+    )
+    group.addoption(
+        "--bench-repeat",
+        type=int,
+        default=5,
+        help="Nombre d'appels chronométrés par endpoint.",
+    )
+    group.addoption(
+        "--bench-update-baseline",
+        action="store_true",
+        help="Enregistrer les mesures comme nouvelle baseline.",
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _documents_cache_dir(tmp_path_factory):
+    """
+    Documents imprimables mis en cache hors de MEDIA_ROOT.
+    """
+
+    with override_settings(
+        DOCUMENTS_CACHE_DIR=str(tmp_path_factory.mktemp("documents")),
+    ):
+        yield
+
+
+@pytest.fixture(scope="session")
+def bench_data(django_db_setup, django_db_blocker, request):
+    """
+    Données générées une fois par session, dans la base de test.
+    """
+
+    with django_db_blocker.unblock():
+        return seed_benchmark_data(request.config.getoption("--bench-scale"))
+
+
+class BenchmarkRecorder:
+    def __init__(self, config):
+        self.config = config
+        self.scale = config.getoption("--bench-scale")
+        self.repeat = config.getoption("--bench-repeat")
+        self.update = config.getoption("--bench-update-baseline")
+        self.baseline = load_baseline()
+        self.results = {}
+
+    def reference(self, name):
+        """
+        Entrée de baseline de `name` ; {} si la baseline du moteur et
+        de l'échelle existe sans cet endpoint, None sans baseline.
+        """
+
+        section = self.baseline.get(baseline_key(self.scale))
+
+        if section is None or self.update:
+            return None
+
+        return section.get(name, {})
+
+    def record(self, name, result):
+        self.results[name] = result
+
+    def finish(self):
+        if not self.results:
+            return
+
+        key = baseline_key(self.scale)
+
+        if self.update:
+            self.baseline.setdefault(key, {}).update({
+                name: {
+                    "queries": result["queries"],
+                    "wall_ms": result["wall_ms"],
+                    "peak_kb": result["peak_kb"],
+                }
+                for name, result in self.results.items()
+            })
+            save_baseline(self.baseline)
+
+
+@pytest.fixture(scope="session")
+def bench_recorder(request):
+    recorder = BenchmarkRecorder(request.config)
+    yield recorder
+    recorder.finish()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    recorder = getattr(config, "_bench_recorder", None)
+
+    if not recorder or not recorder.results:
+        return
+
+    terminalreporter.section(
+        f"benchmarks ({baseline_key(recorder.scale)})"
+    )
+
+    for name, result in sorted(recorder.results.items()):
+        reference = recorder.reference(name) or {}
+        size = result.get("size_kb")
+        terminalreporter.write_line(
+            f"{name:<28} {result['queries']:>4} req "
+            f"{result['wall_ms']:>9.2f} ms {result['peak_kb']:>9.1f} Ko"
+            + (f" {size:>9.1f} Ko (réponse)" if size is not None else "")
+            + (
+                f"   (baseline {reference['queries']} req, "
+                f"{reference['wall_ms']} ms, {reference['peak_kb']} Ko)"
+                if reference
+                else "   (pas de baseline)"
+            )
+        )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _expose_recorder(request, bench_recorder):
+    request.config._bench_recorder = bench_recorder
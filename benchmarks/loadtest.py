@@ -0,0 +1,259 @@
+# benchmarks/loadtest.py
+"""
+Test de charge HTTP : requêtes/seconde et latences d'endpoints chauds
+sur un serveur lancé localement (base MySQL locale de préférence).
+
+Serveur déjà démarré :
+
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:8000 \\
+        --login admin@example.com:secret
+
+Avant / après connexions persistantes (le serveur est lancé deux fois,
+avec DB_CONN_MAX_AGE=0 puis DB_CONN_MAX_AGE=60) :
+
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:8001 \\
+        --login admin@example.com:secret \\
+        --compare "gunicorn backend.wsgi -w 4 -b 127.0.0.1:8001"
+
+Pour l'ASGI, comparer DB_POOL=False / DB_POOL=True avec
+--compare "uvicorn backend.asgi:application --workers 4 --port 8001"
+--before-env DB_POOL=False --after-env DB_POOL=True.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+DEFAULT_PATHS = [
+    "/api/vente/list-produit?page_size=50",
+    "/api/inventory/bijouteries",
+    "/api/achat/liste",
+]
+
+
+# ============================================================
+# Client
+# ============================================================
+
+def login(base_url, credentials):
+    identifier, _, password = credentials.partition(":")
+
+    request = urllib.request.Request(
+        f"{base_url}/api/login",
+        data=json.dumps({"user": identifier, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())["access"]
+
+
+def _worker(base_url, paths, headers, deadline, results, lock):
+    latencies = []
+    errors = 0
+    index = 0
+
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+
+        request = urllib.request.Request(f"{base_url}{path}", headers=headers)
+        start = time.perf_counter()
+
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except (urllib.error.URLError, OSError):
+            errors += 1
+
+        latencies.append(time.perf_counter() - start)
+
+    with lock:
+        results["latencies"].extend(latencies)
+        results["errors"] += errors
+
+
+def run_load(base_url, paths, headers, *, concurrency, duration, warmup):
+    # Échauffement : imports, caches, premières connexions.
+    _worker(base_url, paths, headers, time.perf_counter() + warmup, {
+        "latencies": [], "errors": 0,
+    }, threading.Lock())
+
+    results = {"latencies": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(base_url, paths, headers, deadline, results, lock),
+        )
+        for _ in range(concurrency)
+    ]
+
+    started = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(results["latencies"])
+
+    if not latencies:
+        return {"requests": 0, "errors": results["errors"], "rps": 0.0,
+                "p50_ms": 0.0, "p95_ms": 0.0}
+
+    return {
+        "requests": len(latencies),
+        "errors": results["errors"],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+# ============================================================
+# Serveur (mode --compare)
+# ============================================================
+
+def _wait_for_port(base_url, timeout=60):
+    parsed = urlparse(base_url)
+    deadline = time.time() + timeout
+
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(
+                (parsed.hostname, parsed.port or 80),
+                timeout=1,
+            ):
+                return
+        except OSError:
+            time.sleep(0.3)
+
+    raise SystemExit(f"Serveur injoignable : {base_url}")
+
+
+def _parse_env(pairs):
+    return dict(pair.split("=", 1) for pair in pairs)
+
+
+def _run_with_server(command, env_overrides, base_url, run):
+    env = {**os.environ, **env_overrides}
+    server = subprocess.Popen(shlex.split(command), env=env)
+
+    try:
+        _wait_for_port(base_url)
+        return run()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _print_result(label, result):
+    print(
+        f"{label:<8} {result['rps']:>9.1f} req/s   "
+        f"p50 {result['p50_ms']:>7.1f} ms   "
+        f"p95 {result['p95_ms']:>7.1f} ms   "
+        f"{result['requests']} requêtes, {result['errors']} erreurs"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="Endpoint à appeler (répétable ; défaut : listes chaudes).",
+    )
+    parser.add_argument("--login", help="identifiant:mot_de_passe (JWT).")
+    parser.add_argument("--token", help="Jeton d'accès JWT déjà obtenu.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument(
+        "--compare",
+        metavar="COMMANDE",
+        help="Commande du serveur, lancée deux fois (avant / après).",
+    )
+    parser.add_argument(
+        "--before-env",
+        action="append",
+        default=None,
+        help="Variables « avant » (défaut : DB_CONN_MAX_AGE=0).",
+    )
+    parser.add_argument(
+        "--after-env",
+        action="append",
+        default=None,
+        help="Variables « après » (défaut : DB_CONN_MAX_AGE=60).",
+    )
+    args = parser.parse_args(argv)
+
+    base_url = args.base_url.rstrip("/")
+    paths = args.paths or DEFAULT_PATHS
+
+    def load():
+        headers = {"Accept": "application/json"}
+        token = args.token or (login(base_url, args.login) if args.login else None)
+
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        return run_load(
+            base_url,
+            paths,
+            headers,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+        )
+
+    print(
+        f"{len(paths)} endpoint(s), {args.concurrency} clients, "
+        f"{args.duration:.0f} s"
+    )
+
+    if not args.compare:
+        _print_result("mesure", load())
+        return 0
+
+    before = _run_with_server(
+        args.compare,
+        _parse_env(args.before_env or ["DB_CONN_MAX_AGE=0"]),
+        base_url,
+        load,
+    )
+    _print_result("avant", before)
+
+    after = _run_with_server(
+        args.compare,
+        _parse_env(args.after_env or ["DB_CONN_MAX_AGE=60"]),
+        base_url,
+        load,
+    )
+    _print_result("après", after)
+
+    if before["rps"]:
+        print(f"gain     {after['rps'] / before['rps']:>9.2f} x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# benchmarks/measure.py
+"""
+Mesure d'un appel d'API : nombre de requêtes SQL, temps (médiane),
+pic mémoire Python et taille de la réponse, puis comparaison avec
+la baseline.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Tolérances (surchargeables par variables d'environnement).
+# Le nombre de requêtes est déterministe : aucune marge.
+WALL_TOLERANCE = float(os.environ.get("BENCH_WALL_TOLERANCE", "1.0"))
+WALL_SLACK_MS = float(os.environ.get("BENCH_WALL_SLACK_MS", "25"))
+MEMORY_TOLERANCE = float(os.environ.get("BENCH_MEMORY_TOLERANCE", "0.5"))
+MEMORY_SLACK_KB = float(os.environ.get("BENCH_MEMORY_SLACK_KB", "256"))
+
+
+def measure(call, repeat: int = 5) -> dict:
+    """
+    call : fonction sans argument qui exécute la requête HTTP
+    et retourne la réponse.
+
+    - 1 appel de chauffe (caches, imports) ;
+    - 1 appel sous CaptureQueriesContext (requêtes SQL) ;
+    - `repeat` appels chronométrés (médiane) ;
+    - 1 appel sous tracemalloc (pic mémoire).
+    """
+
+    response = call()
+
+    # queries_log est borné (9000) : déjà plein après le seed avec
+    # DEBUG=True, sa longueur ne bougerait plus.
+    reset_queries()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = call()
+
+    # À lire tout de suite : chaque requête HTTP suivante vide le journal.
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "queries": query_count,
+        "wall_ms": round(statistics.median(timings), 2),
+        "peak_kb": round(peak / 1024, 1),
+        # Réponses en flux (exports, documents) : taille inconnue.
+        "size_kb": (
+            None
+            if response.streaming
+            else round(len(response.content) / 1024, 1)
+        ),
+    }
+
+
+def baseline_key(scale: str) -> str:
+    return f"{connection.vendor}:{scale}"
+
+
+def load_baseline() -> dict:
+    if not BASELINE_PATH.exists():
+        return {}
+
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def save_baseline(data: dict) -> None:
+    BASELINE_PATH.write_text(
+        json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False) + "\n",
+        encoding="utf-8",
+    )
+
+
+def regressions(name: str, result: dict, reference: dict | None) -> list[str]:
+    """
+    Écarts bloquants par rapport à la baseline (liste vide si OK).
+
+    reference :
+    - None : pas de baseline pour ce moteur / cette échelle (ou
+      --bench-update-baseline), mesures affichées sans comparaison ;
+    - {} : baseline existante sans entrée pour cet endpoint, bloquant
+      (un nouvel endpoint est commité avec sa baseline).
+    """
+
+    if reference is None:
+        return []
+
+    if not reference:
+        return [
+            f"{name} : absent de {BASELINE_PATH.name} "
+            "(relancer avec --bench-update-baseline)"
+        ]
+
+    errors = []
+
+    if result["queries"] > reference["queries"]:
+        errors.append(
+            f"{name} : {result['queries']} requêtes "
+            f"(baseline {reference['queries']})"
+        )
+
+    wall_limit = max(
+        reference["wall_ms"] * (1 + WALL_TOLERANCE),
+        reference["wall_ms"] + WALL_SLACK_MS,
+    )
+    if result["wall_ms"] > wall_limit:
+        errors.append(
+            f"{name} : {result['wall_ms']} ms "
+            f"(baseline {reference['wall_ms']} ms, limite {wall_limit:.1f})"
+        )
+
+    memory_limit = max(
+        reference["peak_kb"] * (1 + MEMORY_TOLERANCE),
+        reference["peak_kb"] + MEMORY_SLACK_KB,
+    )
+    if result["peak_kb"] > memory_limit:
+        errors.append(
+            f"{name} : pic mémoire {result['peak_kb']} Ko "
+            f"(baseline {reference['peak_kb']} Ko, limite {memory_limit:.0f})"
+        )
+
+    return errors
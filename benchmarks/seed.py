@@ -0,0 +1,502 @@
+# benchmarks/seed.py
+"""
+Générateur de données pour les benchmarks.
+
+Volumes réalistes, déterministes (graine fixe) et insérés par
+bulk_create : bijouteries, produits, lots, mouvements d'inventaire,
+stocks vendeurs, ventes, factures, paiements et rachats clients.
+
+Les champs dénormalisés (InventoryBalance, montant_paye /
+reste_a_payer) sont reconstruits par les services du projet,
+comme après une migration.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from inventory.models import Bucket, InventoryMovement, MovementType
+from inventory.services import rebuild_inventory_balances
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from sale.models import (Client, Facture, ModePaiement, Paiement,
+                         PaiementLigne, Vente, VenteProduit)
+from reporting.services import rebuild_daily_activity
+from search.services import rebuild_search_index
+from staff.models import Cashier, Manager
+from stock.models import VendorStock
+from stock_matiere_premiere.models import RachatClient
+from store.models import (Bijouterie, Categorie, Marque, MarquePurete, Modele,
+                          Produit, Purete)
+from vendor.models import Vendor
+
+SEED = 20240501
+
+SCALES = {
+    # Rapide : CI / SQLite
+    "small": {
+        "shops": 2,
+        "produits": 20,
+        "lots_per_shop": 10,
+        "ventes_per_shop": 150,
+        "lignes_par_vente": 3,
+        "rachats_per_shop": 40,
+    },
+    # Proche d'une base de production d'une petite chaîne
+    "medium": {
+        "shops": 5,
+        "produits": 80,
+        "lots_per_shop": 40,
+        "ventes_per_shop": 2000,
+        "lignes_par_vente": 3,
+        "rachats_per_shop": 500,
+    },
+}
+
+BATCH_SIZE = 1000
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class BenchmarkData:
+    """Références utiles aux benchmarks (ids, numéros)."""
+
+    scale: str
+    admin_id: int
+    manager_id: int
+    vendor_user_id: int
+    cashier_user_id: int
+    bijouterie_id: int
+    facture_proforma: str
+    facture_payee: str
+    rachat_uuid: str
+    counts: dict = field(default_factory=dict)
+
+
+def _user(email, **extra):
+    return get_user_model().objects.create_user(
+        email=email,
+        password="bench-secret",
+        **extra,
+    )
+
+
+def _days_ago(rng, now, max_days=365):
+    return now - timedelta(
+        days=rng.randint(0, max_days),
+        minutes=rng.randint(0, 24 * 60),
+    )
+
+
+def seed_benchmark_data(scale: str = "small") -> BenchmarkData:
+    if scale not in SCALES:
+        raise ValueError(f"Échelle inconnue : {scale} ({', '.join(SCALES)}).")
+
+    volumes = SCALES[scale]
+    rng = random.Random(SEED)
+    now = timezone.now()
+
+    # =========================================================
+    # Utilisateurs et bijouteries
+    # =========================================================
+    admin = _user("bench.admin@example.com", is_superuser=True, is_staff=True)
+
+    bijouteries = [
+        Bijouterie.objects.create(nom=f"Bench Bijouterie {n}")
+        for n in range(1, volumes["shops"] + 1)
+    ]
+
+    manager_user = _user("bench.manager@example.com")
+    manager = Manager.objects.create(user=manager_user, verifie=True)
+    manager.bijouteries.set(bijouteries)
+
+    vendors = {}
+    cashiers = {}
+
+    for bijouterie in bijouteries:
+        vendors[bijouterie.id] = Vendor.objects.create(
+            user=_user(f"bench.vendor{bijouterie.id}@example.com"),
+            bijouterie=bijouterie,
+            verifie=True,
+        )
+        cashiers[bijouterie.id] = Cashier.objects.create(
+            user=_user(f"bench.cashier{bijouterie.id}@example.com"),
+            bijouterie=bijouterie,
+            verifie=True,
+        )
+
+    # =========================================================
+    # Catalogue
+    # =========================================================
+    categorie, _ = Categorie.objects.get_or_create(nom="Bench Bagues")
+    modele, _ = Modele.objects.get_or_create(modele="Bench Solitaire", categorie=categorie)
+    marque, _ = Marque.objects.get_or_create(marque="Bench Local")
+    purete, _ = Purete.objects.get_or_create(purete="18")
+
+    MarquePurete.objects.get_or_create(
+        marque=marque,
+        purete=purete,
+        defaults={"prix": Decimal("45000.00")},
+    )
+
+    produits = [
+        Produit.objects.create(
+            categorie=categorie,
+            modele=modele,
+            marque=marque,
+            purete=purete,
+            poids=Decimal("1.50") + Decimal(n) / 10,
+        )
+        for n in range(volumes["produits"])
+    ]
+
+    mode_paiement, _ = ModePaiement.objects.get_or_create(
+        code="especes",
+        defaults={"nom": "Espèces"},
+    )
+
+    # =========================================================
+    # Achats, lots, lignes produit
+    # =========================================================
+    fournisseur = Fournisseur.objects.create(telephone="770000000")
+
+    lots = []
+    for bijouterie in bijouteries:
+        achat = Achat.objects.create(fournisseur=fournisseur, bijouterie=bijouterie)
+
+        for n in range(volumes["lots_per_shop"]):
+            lots.append(Lot(
+                achat=achat,
+                numero_lot=f"BENCH-{bijouterie.id}-{n:05d}",
+                received_at=_days_ago(rng, now),
+            ))
+
+    Lot.objects.bulk_create(lots, batch_size=BATCH_SIZE)
+    lots = list(
+        Lot.objects
+        .filter(numero_lot__startswith="BENCH-")
+        .select_related("achat")
+    )
+
+    ProduitLine.objects.bulk_create(
+        [
+            ProduitLine(
+                lot=lot,
+                produit=rng.choice(produits),
+                prix_achat_gramme=Decimal("30000.00"),
+                quantite=60,
+            )
+            for lot in lots
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    produit_lines = list(
+        ProduitLine.objects
+        .filter(lot__in=lots)
+        .select_related("lot__achat")
+    )
+
+    # =========================================================
+    # Stock : achat → magasin → vendeur, puis ventes
+    # =========================================================
+    vendor_stocks = {}
+    movements = []
+
+    for produit_line in produit_lines:
+        bijouterie_id = produit_line.lot.achat.bijouterie_id
+        vendor = vendors[bijouterie_id]
+
+        movements.append(InventoryMovement(
+            produit_id=produit_line.produit_id,
+            produit_line=produit_line,
+            lot_id=produit_line.lot_id,
+            achat_id=produit_line.lot.achat_id,
+            movement_type=MovementType.PURCHASE_IN,
+            qty=60,
+            src_bucket=Bucket.EXTERNAL,
+            dst_bucket=Bucket.BIJOUTERIE,
+            dst_bijouterie_id=bijouterie_id,
+            occurred_at=produit_line.lot.received_at,
+            is_locked=True,
+        ))
+        movements.append(InventoryMovement(
+            produit_id=produit_line.produit_id,
+            produit_line=produit_line,
+            lot_id=produit_line.lot_id,
+            achat_id=produit_line.lot.achat_id,
+            movement_type=MovementType.VENDOR_ASSIGN,
+            qty=40,
+            src_bucket=Bucket.BIJOUTERIE,
+            dst_bucket=Bucket.VENDOR,
+            src_bijouterie_id=bijouterie_id,
+            dst_bijouterie_id=bijouterie_id,
+            vendor=vendor,
+            occurred_at=produit_line.lot.received_at,
+            is_locked=True,
+        ))
+
+        vendor_stocks[produit_line.id] = VendorStock(
+            produit_line=produit_line,
+            vendor=vendor,
+            bijouterie_id=bijouterie_id,
+            quantite_allouee=40,
+            quantite_vendue=0,
+        )
+
+    lines_by_shop = {}
+    for produit_line in produit_lines:
+        lines_by_shop.setdefault(
+            produit_line.lot.achat.bijouterie_id, []
+        ).append(produit_line)
+
+    # =========================================================
+    # Ventes, lignes, factures, paiements
+    # =========================================================
+    ventes = []
+    for bijouterie in bijouteries:
+        for n in range(volumes["ventes_per_shop"]):
+            ventes.append(Vente(
+                numero_vente=f"BENCH-V-{bijouterie.id}-{n:06d}",
+                bijouterie=bijouterie,
+                vendor=vendors[bijouterie.id],
+                created_by=vendors[bijouterie.id].user,
+            ))
+
+    Vente.objects.bulk_create(ventes, batch_size=BATCH_SIZE)
+    ventes = list(Vente.objects.filter(numero_vente__startswith="BENCH-V-").order_by("id"))
+
+    lignes = []
+    ligne_produit_lines = []
+    totals = {}
+
+    for vente in ventes:
+        vente.created_at = _days_ago(rng, now)
+        total = ZERO
+
+        for produit_line in rng.sample(
+            lines_by_shop[vente.bijouterie_id],
+            volumes["lignes_par_vente"],
+        ):
+            quantite = rng.randint(1, 2)
+            stock = vendor_stocks[produit_line.id]
+
+            if stock.quantite_vendue + quantite > stock.quantite_allouee:
+                continue
+
+            stock.quantite_vendue += quantite
+
+            montant = Decimal("45000.00") * quantite
+            total += montant
+
+            lignes.append(VenteProduit(
+                vente=vente,
+                produit_id=produit_line.produit_id,
+                vendor_id=vente.vendor_id,
+                quantite=quantite,
+                prix_vente_grammes=Decimal("45000.00"),
+                montant_ht=montant,
+                montant_total=montant,
+            ))
+            ligne_produit_lines.append(produit_line)
+
+        vente.montant_total = total
+        totals[vente.id] = total
+
+    Vente.objects.bulk_update(ventes, ["created_at", "montant_total"], batch_size=BATCH_SIZE)
+    VenteProduit.objects.bulk_create(lignes, batch_size=BATCH_SIZE)
+    VendorStock.objects.bulk_create(vendor_stocks.values(), batch_size=BATCH_SIZE)
+
+    factures = []
+    for index, vente in enumerate(ventes):
+        tirage = rng.random()
+
+        if not totals[vente.id]:
+            # Stock vendeur épuisé : vente vide, jamais payée.
+            status = Facture.STAT_NON_PAYE
+        elif tirage < 0.6:
+            status = Facture.STAT_PAYE
+        elif tirage < 0.8:
+            status = Facture.STAT_PARTIEL
+        else:
+            status = Facture.STAT_NON_PAYE
+
+        factures.append(Facture(
+            numero_facture=f"FAC-BENCH-{index:07d}",
+            numero_facture_key=f"FAC-BENCH-{index:07d}",
+            vente=vente,
+            bijouterie_id=vente.bijouterie_id,
+            montant_ht=totals[vente.id],
+            montant_total=totals[vente.id],
+            reste_a_payer=totals[vente.id],
+            status=status,
+            type_facture=(
+                Facture.TYPE_FACTURE
+                if status != Facture.STAT_NON_PAYE
+                else Facture.TYPE_PROFORMA
+            ),
+            stock_consumed=status == Facture.STAT_PAYE,
+        ))
+
+    Facture.objects.bulk_create(factures, batch_size=BATCH_SIZE)
+    factures = list(
+        Facture.objects
+        .filter(numero_facture__startswith="FAC-BENCH-")
+        .select_related("vente")
+        .order_by("id")
+    )
+
+    for facture in factures:
+        facture.date_creation = facture.vente.created_at
+
+    Facture.objects.bulk_update(factures, ["date_creation"], batch_size=BATCH_SIZE)
+
+    a_payer = [f for f in factures if f.status != Facture.STAT_NON_PAYE]
+
+    Paiement.objects.bulk_create(
+        [
+            Paiement(
+                facture=facture,
+                cashier=cashiers[facture.bijouterie_id],
+                created_by=cashiers[facture.bijouterie_id].user,
+            )
+            for facture in a_payer
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    paiements = {
+        paiement.facture_id: paiement
+        for paiement in Paiement.objects.filter(facture__in=a_payer)
+    }
+
+    PaiementLigne.objects.bulk_create(
+        [
+            PaiementLigne(
+                paiement=paiements[facture.id],
+                mode_paiement=mode_paiement,
+                montant_paye=(
+                    facture.montant_total
+                    if facture.status == Facture.STAT_PAYE
+                    else (facture.montant_total / 2).quantize(Decimal("0.01"))
+                ),
+            )
+            for facture in a_payer
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    Facture.refresh_paiement_totals(numero_facture__startswith="FAC-BENCH-")
+
+    # SALE_OUT pour les factures payées. Les lignes relues par id
+    # sont dans l'ordre d'insertion (clé auto-incrémentée).
+    lignes_par_vente = {}
+    for ligne, produit_line in zip(
+        VenteProduit.objects.filter(vente__in=ventes).order_by("id"),
+        ligne_produit_lines,
+    ):
+        lignes_par_vente.setdefault(ligne.vente_id, []).append(
+            (ligne, produit_line)
+        )
+
+    for facture in factures:
+        if facture.status != Facture.STAT_PAYE:
+            continue
+
+        for ligne, produit_line in lignes_par_vente.get(facture.vente_id, []):
+            movements.append(InventoryMovement(
+                produit_id=ligne.produit_id,
+                produit_line=produit_line,
+                lot_id=produit_line.lot_id,
+                achat_id=produit_line.lot.achat_id,
+                movement_type=MovementType.SALE_OUT,
+                qty=ligne.quantite,
+                src_bucket=Bucket.VENDOR,
+                src_bijouterie_id=facture.bijouterie_id,
+                dst_bucket=Bucket.EXTERNAL,
+                facture=facture,
+                vente_id=facture.vente_id,
+                vente_ligne=ligne,
+                vendor_id=ligne.vendor_id,
+                occurred_at=facture.date_creation,
+                is_locked=True,
+            ))
+
+    InventoryMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+    rebuild_inventory_balances([b.id for b in bijouteries])
+
+    # =========================================================
+    # Rachats clients
+    # =========================================================
+    Client.objects.bulk_create(
+        [
+            Client(
+                prenom=f"Client{n}",
+                nom="Bench",
+                telephone=f"78{n:07d}",
+            )
+            for n in range(volumes["rachats_per_shop"] * len(bijouteries))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    clients = list(Client.objects.filter(nom="Bench").order_by("id"))
+
+    rachats = []
+    for n, client in enumerate(clients):
+        bijouterie = bijouteries[n % len(bijouteries)]
+        rachats.append(RachatClient(
+            uuid=uuid.UUID(int=rng.getrandbits(128)),
+            numero_ticket=f"BENCH-RC-{n:06d}",
+            client=client,
+            bijouterie=bijouterie,
+            montant_total=Decimal("150000.00"),
+            adresse_client="Dakar",
+        ))
+
+    RachatClient.objects.bulk_create(rachats, batch_size=BATCH_SIZE)
+
+    # bulk_create ne déclenche pas les signaux de l'index de recherche
+    # ni ceux de l'agrégat journalier.
+    rebuild_search_index()
+    rebuild_daily_activity()
+
+    # =========================================================
+    # Références
+    # =========================================================
+    premiere = bijouteries[0]
+
+    facture_proforma = next(
+        f for f in factures
+        if f.bijouterie_id == premiere.id and f.status == Facture.STAT_NON_PAYE
+    )
+    facture_payee = next(
+        f for f in factures
+        if f.bijouterie_id == premiere.id and f.status == Facture.STAT_PAYE
+    )
+
+    return BenchmarkData(
+        scale=scale,
+        admin_id=admin.id,
+        manager_id=manager_user.id,
+        vendor_user_id=vendors[premiere.id].user_id,
+        cashier_user_id=cashiers[premiere.id].user_id,
+        bijouterie_id=premiere.id,
+        facture_proforma=facture_proforma.numero_facture,
+        facture_payee=facture_payee.numero_facture,
+        rachat_uuid=str(rachats[0].uuid),
+        counts={
+            "bijouteries": len(bijouteries),
+            "produits": len(produits),
+            "produit_lines": len(produit_lines),
+            "mouvements": len(movements),
+            "ventes": len(ventes),
+            "lignes_vente": len(lignes),
+            "factures": len(factures),
+            "paiements": len(a_payer),
+            "rachats": len(rachats),
+        },
+    )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compte_depot', '0003_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comptedepottransaction',
+            index=models.Index(fields=['date_transaction'], name='cd_tx_date_idx'),
+        ),
+    ]
@@ -139,6 +139,14 @@ class CompteDepotTransaction(models.Model):
         ),
         ]
 
+        indexes = [
+            # Tri de la liste (mode curseur : -date_transaction, -id)
+            models.Index(
+                fields=["date_transaction"],
+                name="cd_tx_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.get_type_transaction_display()} de {self.montant} FCFA sur {self.compte.numero_compte}"
 
@@ -1,5 +1,11 @@
 from django.utils import timezone
 
+from userauths.outbox import enqueue_sms
+
+# Les notifications client sont mises en file (outbox) dans la
+# transaction de l'opération et envoyées après COMMIT par le worker
+# `process_outbox` : la passerelle SMS ne ralentit pas la requête.
+
 
 def build_compte_created_message(compte, montant_initial):
     client = compte.client
@@ -44,8 +50,13 @@ def send_compte_created_notification(compte, montant_initial):
         montant_initial
     )
 
-    print("MESSAGE À ENVOYER :", telephone)
-    print(message)
+    enqueue_sms(
+        to=telephone,
+        body=message,
+        template="compte_depot_creation",
+        context={"compte_id": compte.pk},
+        reason="Création de compte dépôt",
+    )
 
     return True
 
@@ -58,8 +69,14 @@ def send_compte_depot_notification(tx):
 
     message = build_compte_depot_message(tx)
 
-    # Ici tu branches WhatsApp / SMS / Orange SMS / Twilio / Meta WhatsApp API
-    print("MESSAGE À ENVOYER :", telephone, message)
+    # Passerelle (WhatsApp / SMS / Orange SMS / Twilio...) : SMS_BACKEND
+    enqueue_sms(
+        to=telephone,
+        body=message,
+        template="compte_depot_operation",
+        context={"transaction_id": tx.pk},
+        reason=f"Opération compte dépôt ({tx.type_transaction})",
+    )
 
     return True
 
@@ -91,7 +108,12 @@ def send_compte_depot_facture_notification(tx):
 
     message = build_compte_depot_facture_message(tx)
 
-    print("MESSAGE À ENVOYER :", telephone)
-    print(message)
+    enqueue_sms(
+        to=telephone,
+        body=message,
+        template="compte_depot_facture",
+        context={"transaction_id": tx.pk},
+        reason="Paiement de facture par compte dépôt",
+    )
 
     return True
@@ -7,18 +7,21 @@ from django.conf import settings
 from django.db import transaction
 from django.db.models import Count, Sum
 from django.db.models.functions import Coalesce
-from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import (EXPORT_CHUNK_SIZE, date_range_filter,
+                            write_only_sheet, write_only_workbook,
+                            xlsx_file_response)
+from backend.pagination import (CURSOR_SWAGGER_PARAMETERS,
+                                KeysetPagination)
 from backend.renderers import UserRenderer
 from backend.utils.helpers import (resolve_bijouterie_for_user,
                                    user_can_access_bijouterie)
@@ -723,6 +726,8 @@ class ListerToutesCompteDepotTransactionsAPIView(APIView):
             openapi.Parameter("statut", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False),
             openapi.Parameter("start_date", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
             openapi.Parameter("end_date", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+            openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False, description="Mode curseur uniquement."),
+            *CURSOR_SWAGGER_PARAMETERS,
         ],
         tags=["compte dépôt"],
         responses={200: openapi.Response("Liste des transactions", CompteDepotTransactionSerializer(many=True))}
@@ -776,10 +781,23 @@ class ListerToutesCompteDepotTransactionsAPIView(APIView):
             qs = qs.filter(type_transaction=type_transaction)
         if statut:
             qs = qs.filter(statut=statut)
-        if start_date:
-            qs = qs.filter(date_transaction__date__gte=start_date)
-        if end_date:
-            qs = qs.filter(date_transaction__date__lte=end_date)
+        try:
+            qs = qs.filter(
+                **date_range_filter("date_transaction", start_date, end_date)
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ Mode curseur (opt-in) ; sans ?cursor= : liste complète comme avant
+        keyset = KeysetPagination(ordering=("-date_transaction", "-id"))
+        if keyset.is_requested(request):
+            transactions = keyset.paginate_queryset(qs, request)
+            return Response(
+                keyset.get_response_data(
+                    CompteDepotTransactionSerializer(transactions, many=True).data
+                ),
+                status=status.HTTP_200_OK,
+            )
 
         serializer = CompteDepotTransactionSerializer(qs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -817,7 +835,34 @@ class ExportCompteDepotTransactionsExcelAPIView(APIView):
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
 
-        qs = CompteDepotTransaction.objects.select_related("compte__client", "user").order_by("-date_transaction")
+        qs = CompteDepotTransaction.objects.select_related("compte__client", "user").order_by("-date_transaction", "-id")
+
+        # ✅ Scope par bijouterie (même règle que la liste)
+        if role == "manager":
+            manager = getattr(request.user, "staff_manager_profile", None)
+
+            if not manager:
+                return Response(
+                    {"detail": "Profil manager introuvable."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+
+            qs = qs.filter(
+                compte__client__bijouterie__in=manager.bijouteries.all()
+            )
+
+        elif role == "cashier":
+            cashier = getattr(request.user, "staff_cashier_profile", None)
+
+            if not cashier or not cashier.bijouterie_id:
+                return Response(
+                    {"detail": "Profil caissier invalide."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+
+            qs = qs.filter(
+                compte__client__bijouterie_id=cashier.bijouterie_id
+            )
 
         if telephone:
             qs = qs.filter(compte__client__telephone__icontains=telephone)
@@ -827,14 +872,14 @@ class ExportCompteDepotTransactionsExcelAPIView(APIView):
             qs = qs.filter(type_transaction=type_transaction)
         if statut:
             qs = qs.filter(statut=statut)
-        if start_date:
-            qs = qs.filter(date_transaction__date__gte=start_date)
-        if end_date:
-            qs = qs.filter(date_transaction__date__lte=end_date)
+        try:
+            qs = qs.filter(
+                **date_range_filter("date_transaction", start_date, end_date)
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Transactions Compte Depot"
+        wb = write_only_workbook()
 
         headers = [
             "Date",
@@ -851,16 +896,21 @@ class ExportCompteDepotTransactionsExcelAPIView(APIView):
             "Commentaire",
             "Utilisateur",
         ]
-        ws.append(headers)
 
         header_fill = PatternFill(fill_type="solid", fgColor="1F4E78")
         header_font = Font(bold=True, color="FFFFFF")
 
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
+        # Write-only : largeurs fixées d'avance, lignes lues par lots.
+        ws = write_only_sheet(
+            wb,
+            "Transactions Compte Depot",
+            headers,
+            widths=[20, 12, 12, 18, 20, 20, 16, 14, 14, 14, 30, 40, 30],
+            header_font=header_font,
+            header_fill=header_fill,
+        )
 
-        for tx in qs:
+        for tx in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
             client = getattr(tx.compte, "client", None)
             user_label = ""
             if tx.user:
@@ -882,17 +932,8 @@ class ExportCompteDepotTransactionsExcelAPIView(APIView):
                 user_label,
             ])
 
-        for column_cells in ws.columns:
-            length = max(len(str(cell.value or "")) for cell in column_cells)
-            ws.column_dimensions[column_cells[0].column_letter].width = min(length + 2, 40)
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
         filename = f"transactions_compte_depot_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        wb.save(response)
-        return response
+        return xlsx_file_response(wb, filename)
 
 
 # sauvegarde état des soldes actuels
@@ -932,9 +973,7 @@ class ExportCompteDepotSoldesExcelAPIView(APIView):
 
             comptes = comptes.filter(client__bijouterie__in=manager_profile.bijouteries.all())
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Soldes Comptes Depot"
+        wb = write_only_workbook()
 
         headers = [
             "Date sauvegarde",
@@ -947,18 +986,22 @@ class ExportCompteDepotSoldesExcelAPIView(APIView):
             "Date création compte",
             "Créé par",
         ]
-        ws.append(headers)
 
         header_fill = PatternFill(fill_type="solid", fgColor="1F4E78")
         header_font = Font(bold=True, color="FFFFFF")
 
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
+        ws = write_only_sheet(
+            wb,
+            "Soldes Comptes Depot",
+            headers,
+            widths=[20, 25, 20, 20, 16, 18, 16, 20, 30],
+            header_font=header_font,
+            header_fill=header_fill,
+        )
 
         now = timezone.localtime(timezone.now())
 
-        for compte in comptes:
+        for compte in comptes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
             client = compte.client
             bijouterie = getattr(client, "bijouterie", None)
 
@@ -982,19 +1025,8 @@ class ExportCompteDepotSoldesExcelAPIView(APIView):
                 created_by,
             ])
 
-        for column_cells in ws.columns:
-            length = max(len(str(cell.value or "")) for cell in column_cells)
-            ws.column_dimensions[column_cells[0].column_letter].width = min(length + 2, 45)
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
         filename = f"sauvegarde_soldes_compte_depot_{now.strftime('%Y_%m_%d_%H%M%S')}.xlsx"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        wb.save(response)
-        return response
+        return xlsx_file_response(wb, filename)
 # =========================================================
 # DASHBOARD COMPTE DEPOT
 # =========================================================
@@ -1020,10 +1052,12 @@ class CompteDepotDashboardAPIView(APIView):
         tx_qs = CompteDepotTransaction.objects.select_related("compte__client", "user")
         compte_qs = CompteDepot.objects.select_related("client")
 
-        if start_date:
-            tx_qs = tx_qs.filter(date_transaction__date__gte=start_date)
-        if end_date:
-            tx_qs = tx_qs.filter(date_transaction__date__lte=end_date)
+        try:
+            tx_qs = tx_qs.filter(
+                **date_range_filter("date_transaction", start_date, end_date)
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         total_comptes = compte_qs.count()
         total_solde_global = compte_qs.aggregate(
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_initial'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='depense',
+            index=models.Index(fields=['bijouterie', 'created_at'], name='depense_shop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='depense',
+            index=models.Index(fields=['status', 'created_at'], name='depense_status_created_idx'),
+        ),
+    ]
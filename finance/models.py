@@ -89,6 +89,16 @@ class Depense(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["bijouterie", "created_at"],
+                name="depense_shop_created_idx",
+            ),
+            models.Index(
+                fields=["status", "created_at"],
+                name="depense_status_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.titre} - {self.montant} FCFA"
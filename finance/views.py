@@ -1,21 +1,24 @@
 # finance/views.py
+from decimal import Decimal
+
 from django.db import transaction
 from django.db.models import Count, Sum
 from django.db.models.functions import Coalesce
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.utils.dateparse import parse_date
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font, PatternFill
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import (EXPORT_CHUNK_SIZE, date_range_filter,
+                            parse_date_param, styled_row, write_only_sheet,
+                            write_only_workbook, xlsx_file_response)
 from backend.roles import get_role_name
 from backend.utils.helpers import resolve_bijouterie_for_user
+from reporting.selectors import activity, total
 
 from .models import Depense
 from .serializers import DepenseSerializer
@@ -122,11 +125,12 @@ class DepenseListView(APIView):
         if status_param:
             qs = qs.filter(status=status_param)
 
-        if start_date:
-            qs = qs.filter(created_at__date__gte=start_date)
-
-        if end_date:
-            qs = qs.filter(created_at__date__lte=end_date)
+        try:
+            qs = qs.filter(
+                **date_range_filter("created_at", start_date, end_date)
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
         if bijouterie_id:
             qs = qs.filter(bijouterie_id=bijouterie_id)
@@ -230,46 +234,62 @@ class DepenseDashboardView(APIView):
         end_date = request.query_params.get("end_date")
         bijouterie_id = request.query_params.get("bijouterie_id")
 
-        if start_date:
-            qs = qs.filter(created_at__date__gte=start_date)
+        try:
+            parsed_start = parse_date_param(start_date)
+            parsed_end = parse_date_param(end_date)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
-        if end_date:
-            qs = qs.filter(created_at__date__lte=end_date)
+        qs = qs.filter(
+            **date_range_filter("created_at", parsed_start, parsed_end)
+        )
 
         if bijouterie_id:
             qs = qs.filter(bijouterie_id=bijouterie_id)
 
-        qs_paid = qs.filter(status=Depense.STATUS_PAID)
-        qs_cancelled = qs.filter(status=Depense.STATUS_CANCELLED)
+        # Totaux et répartition par bijouterie : agrégat journalier
+        # reporting.DailyActivity (mêmes jours locaux que created_at).
+        activite = activity(date_from=parsed_start, date_to=parsed_end)
 
-        total_depenses = qs_paid.aggregate(
-            total=Coalesce(Sum("montant"), 0)
-        )["total"]
+        if role == ROLE_MANAGER:
+            activite = activite.filter(
+                bijouterie__in=user.staff_manager_profile.bijouteries.all()
+            )
 
-        total_annule = qs_cancelled.aggregate(
-            total=Coalesce(Sum("montant"), 0)
-        )["total"]
+        if bijouterie_id:
+            activite = activite.filter(bijouterie_id=bijouterie_id)
+
+        totaux = activite.aggregate(
+            total_depenses=total("montant_depenses"),
+            nombre_depenses=total("nb_depenses"),
+            total_annule=total("montant_depenses_annulees"),
+            nombre_annule=total("nb_depenses_annulees"),
+        )
 
-        depenses_par_type = qs_paid.values("type_depense").annotate(
-            total=Coalesce(Sum("montant"), 0),
+        depenses_par_type = qs.filter(
+            status=Depense.STATUS_PAID,
+        ).values("type_depense").annotate(
+            total=Coalesce(Sum("montant"), Decimal("0.00")),
             nombre=Count("id"),
         ).order_by("type_depense")
 
-        depenses_par_bijouterie = qs_paid.values(
+        depenses_par_bijouterie = activite.values(
             "bijouterie_id",
             "bijouterie__nom",
         ).annotate(
-            total=Coalesce(Sum("montant"), 0),
-            nombre=Count("id"),
+            total=total("montant_depenses"),
+            nombre=total("nb_depenses"),
+        ).filter(
+            nombre__gt=0,
         ).order_by("bijouterie__nom")
 
         return Response({
-            "total_depenses": total_depenses,
-            "nombre_depenses": qs_paid.count(),
-            "total_annule": total_annule,
-            "nombre_annule": qs_cancelled.count(),
-            "depenses_par_type": depenses_par_type,
-            "depenses_par_bijouterie": depenses_par_bijouterie,
+            "total_depenses": totaux["total_depenses"],
+            "nombre_depenses": totaux["nombre_depenses"],
+            "total_annule": totaux["total_annule"],
+            "nombre_annule": totaux["nombre_annule"],
+            "depenses_par_type": list(depenses_par_type),
+            "depenses_par_bijouterie": list(depenses_par_bijouterie),
         })
         
 
@@ -330,17 +350,15 @@ class ExportDepensesExcelView(APIView):
         status_param = request.query_params.get("status")
         bijouterie_id = request.query_params.get("bijouterie_id")
 
-        if start_date:
-            parsed_start = parse_date(start_date)
-            if not parsed_start:
-                return Response({"detail": "start_date invalide. Format attendu YYYY-MM-DD."}, status=400)
-            qs = qs.filter(created_at__date__gte=parsed_start)
+        try:
+            parsed_start = parse_date_param(start_date)
+            parsed_end = parse_date_param(end_date)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
-        if end_date:
-            parsed_end = parse_date(end_date)
-            if not parsed_end:
-                return Response({"detail": "end_date invalide. Format attendu YYYY-MM-DD."}, status=400)
-            qs = qs.filter(created_at__date__lte=parsed_end)
+        qs = qs.filter(
+            **date_range_filter("created_at", parsed_start, parsed_end)
+        )
 
         if type_depense:
             qs = qs.filter(type_depense=type_depense)
@@ -353,9 +371,7 @@ class ExportDepensesExcelView(APIView):
 
         qs = qs.order_by("-created_at")
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Dépenses"
+        wb = write_only_workbook()
 
         headers = [
             "ID",
@@ -376,19 +392,23 @@ class ExportDepensesExcelView(APIView):
             "Motif annulation",
         ]
 
-        ws.append(headers)
-
         header_fill = PatternFill("solid", fgColor="1F4E78")
         header_font = Font(color="FFFFFF", bold=True)
 
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center")
+        # Write-only : largeurs fixées d'avance, lignes lues par lots.
+        ws = write_only_sheet(
+            wb,
+            "Dépenses",
+            headers,
+            widths=[8, 18, 25, 18, 30, 35, 14, 25, 20, 12, 25, 25, 18, 25, 18, 35],
+            header_font=header_font,
+            header_fill=header_fill,
+            header_alignment=Alignment(horizontal="center"),
+        )
 
         total_montant = 0
 
-        for depense in qs:
+        for depense in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
             montant = depense.montant or 0
 
             if depense.status == Depense.STATUS_PAID:
@@ -413,27 +433,15 @@ class ExportDepensesExcelView(APIView):
                 depense.cancel_reason or "",
             ])
 
-        total_row = ws.max_row + 2
-        ws.cell(row=total_row, column=6, value="TOTAL DÉPENSES PAYÉES").font = Font(bold=True)
-        ws.cell(row=total_row, column=7, value=float(total_montant)).font = Font(bold=True)
-
-        for col in ws.columns:
-            max_length = 0
-            col_letter = col[0].column_letter
-
-            for cell in col:
-                value = str(cell.value or "")
-                max_length = max(max_length, len(value))
-
-            ws.column_dimensions[col_letter].width = min(max_length + 3, 35)
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        ws.append([])
+        ws.append(
+            styled_row(
+                ws,
+                [None] * 5 + ["TOTAL DÉPENSES PAYÉES", float(total_montant)],
+                font=Font(bold=True),
+            )
         )
-        filename = "export_depenses.xlsx"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-        wb.save(response)
-        return response
+        return xlsx_file_response(wb, "export_depenses.xlsx")
     
     
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Bucket, InventoryMovement
+from .models import Bucket, InventoryBalance, InventoryMovement
 
 
 @admin.register(InventoryMovement)
@@ -151,4 +151,43 @@ class InventoryMovementAdmin(admin.ModelAdmin):
                 mv.is_locked = False
                 mv.save(update_fields=["is_locked"])
                 n += 1
-        self.message_user(request, f"{n} mouvement(s) déverrouillé(s).")
\ No newline at end of file
+        self.message_user(request, f"{n} mouvement(s) déverrouillé(s).")
+
+
+@admin.register(InventoryBalance)
+class InventoryBalanceAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "bijouterie",
+        "produit",
+        "produit_line",
+        "lot",
+        "stock_magasin",
+        "stock_vendeurs",
+        "purchase_in",
+        "sale_out",
+        "updated_at",
+    )
+
+    list_filter = ("bijouterie",)
+
+    search_fields = (
+        "produit__nom",
+        "produit__sku",
+        "lot__numero_lot",
+    )
+
+    list_select_related = (
+        "bijouterie",
+        "produit",
+        "produit_line",
+        "lot",
+    )
+
+    # Maintenu par InventoryMovement.save et
+    # la commande rebuild_inventory_balances.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,53 @@
+# inventory/management/commands/rebuild_inventory_balances.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services import (rebuild_inventory_balances,
+                                verify_inventory_balances)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les soldes InventoryBalance depuis le journal "
+        "InventoryMovement, puis vérifie leur cohérence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bijouterie",
+            type=int,
+            action="append",
+            dest="bijouterie_ids",
+            help="Limiter à une bijouterie (option répétable).",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Vérifier les soldes sans les reconstruire.",
+        )
+
+    def handle(self, *args, **options):
+        bijouterie_ids = options.get("bijouterie_ids")
+
+        if not options["verify_only"]:
+            count = rebuild_inventory_balances(bijouterie_ids)
+            self.stdout.write(f"{count} solde(s) reconstruit(s).")
+
+        differences = verify_inventory_balances(bijouterie_ids)
+
+        if differences:
+            for diff in differences[:50]:
+                self.stderr.write(
+                    f"Bijouterie#{diff['bijouterie_id']} "
+                    f"produit#{diff['produit_id']} "
+                    f"PL#{diff['produit_line_id']} : {diff['ecarts']}"
+                )
+
+            raise CommandError(
+                f"{len(differences)} écart(s) entre InventoryBalance "
+                "et le journal."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            "Soldes cohérents avec le journal."
+        ))
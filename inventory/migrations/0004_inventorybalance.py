@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+# (compteur, filtre du journal, champ donnant la bijouterie)
+LEDGER_RULES = (
+    ("purchase_in", Q(movement_type="PURCHASE_IN"), "dst_bijouterie_id"),
+    ("return_in", Q(movement_type="RETURN_IN"), "dst_bijouterie_id"),
+    ("cancel_purchase_out", Q(movement_type="CANCEL_PURCHASE"), "src_bijouterie_id"),
+    ("vendor_assign_out", Q(movement_type="VENDOR_ASSIGN"), "src_bijouterie_id"),
+    ("sale_out", Q(movement_type="SALE_OUT"), "vendor__bijouterie_id"),
+    ("adjustment_in", Q(movement_type="ADJUSTMENT", dst_bucket="BIJOUTERIE"), "dst_bijouterie_id"),
+    ("adjustment_out", Q(movement_type="ADJUSTMENT", src_bucket="BIJOUTERIE", dst_bucket="EXTERNAL"), "src_bijouterie_id"),
+)
+
+
+def build_balances(apps, schema_editor):
+    InventoryMovement = apps.get_model("inventory", "InventoryMovement")
+    InventoryBalance = apps.get_model("inventory", "InventoryBalance")
+
+    balances = {}
+
+    for counter, condition, bijouterie_field in LEDGER_RULES:
+        rows = (
+            InventoryMovement.objects
+            .filter(condition)
+            .exclude(**{f"{bijouterie_field}__isnull": True})
+            .order_by()
+            .values(bijouterie_field, "produit_id", "produit_line_id", "lot_id")
+            .annotate(total=Sum("qty"))
+        )
+
+        for row in rows:
+            key = (row[bijouterie_field], row["produit_id"], row["produit_line_id"])
+            entry = balances.setdefault(key, {"lot_id": row["lot_id"]})
+            entry[counter] = entry.get(counter, 0) + int(row["total"] or 0)
+
+    objects = []
+
+    for (bijouterie_id, produit_id, produit_line_id), values in balances.items():
+        counters = {rule[0]: values.get(rule[0], 0) for rule in LEDGER_RULES}
+        objects.append(InventoryBalance(
+            bijouterie_id=bijouterie_id,
+            produit_id=produit_id,
+            produit_line_id=produit_line_id,
+            lot_id=values["lot_id"],
+            stock_magasin=(
+                counters["purchase_in"] + counters["return_in"] + counters["adjustment_in"]
+                - counters["vendor_assign_out"] - counters["cancel_purchase_out"]
+                - counters["adjustment_out"]
+            ),
+            stock_vendeurs=counters["vendor_assign_out"] - counters["sale_out"],
+            **counters,
+        ))
+
+    InventoryBalance.objects.bulk_create(objects, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_initial'),
+        ('purchase', '0003_initial'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_in', models.IntegerField(default=0)),
+                ('cancel_purchase_out', models.IntegerField(default=0)),
+                ('vendor_assign_out', models.IntegerField(default=0)),
+                ('sale_out', models.IntegerField(default=0)),
+                ('return_in', models.IntegerField(default=0)),
+                ('adjustment_in', models.IntegerField(default=0)),
+                ('adjustment_out', models.IntegerField(default=0)),
+                ('stock_magasin', models.IntegerField(default=0)),
+                ('stock_vendeurs', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bijouterie', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='inventory_balances', to='store.bijouterie')),
+                ('lot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='inventory_balances', to='purchase.lot')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='inventory_balances', to='store.produit')),
+                ('produit_line', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='inventory_balances', to='purchase.produitline')),
+            ],
+            options={
+                'ordering': ['bijouterie_id', 'produit_id', 'produit_line_id'],
+                'indexes': [models.Index(fields=['bijouterie', 'produit'], name='inv_bal_shop_product_idx'), models.Index(fields=['bijouterie', 'lot'], name='inv_bal_shop_lot_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bijouterie', 'produit', 'produit_line'), name='uq_inv_balance_shop_product_line')],
+            },
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
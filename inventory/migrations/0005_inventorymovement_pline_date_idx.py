@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_inventorybalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['produit_line', '-occurred_at', '-id'], name='inv_mov_pline_date_idx'),
+        ),
+    ]
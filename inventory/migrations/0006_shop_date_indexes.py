@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventorymovement_pline_date_idx'),
+        ('purchase', '0003_initial'),
+        ('sale', '0009_facture_documents_version'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        ('vendor', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventorymovement',
+            name='inv_mov_src_shop_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='inventorymovement',
+            name='inv_mov_dst_shop_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['src_bijouterie', 'occurred_at'], name='inv_mov_src_shop_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['dst_bijouterie', 'occurred_at'], name='inv_mov_dst_shop_date_idx'),
+        ),
+    ]
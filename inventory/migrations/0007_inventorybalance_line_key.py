@@ -0,0 +1,96 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:43
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+# Règles figées de la migration 0004.
+LEDGER_RULES = import_module(
+    "inventory.migrations.0004_inventorybalance"
+).LEDGER_RULES
+
+
+def fill_line_key(apps, schema_editor):
+    """
+    Renseigne produit_line_key, puis recalcule depuis le journal les
+    soldes sans ProduitLine créés en double (NULL non couvert par
+    l'ancienne contrainte).
+    """
+
+    InventoryBalance = apps.get_model("inventory", "InventoryBalance")
+    InventoryMovement = apps.get_model("inventory", "InventoryMovement")
+
+    InventoryBalance.objects.filter(produit_line__isnull=False).update(
+        produit_line_key=F("produit_line_id"),
+    )
+
+    duplicates = list(
+        InventoryBalance.objects
+        .order_by()
+        .values("bijouterie_id", "produit_id", "produit_line_key")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .values_list("bijouterie_id", "produit_id", "produit_line_key")
+    )
+
+    for bijouterie_id, produit_id, produit_line_key in duplicates:
+        balances = InventoryBalance.objects.filter(
+            bijouterie_id=bijouterie_id,
+            produit_id=produit_id,
+            produit_line_key=produit_line_key,
+        )
+        kept = balances.order_by("id").first()
+        balances.exclude(pk=kept.pk).delete()
+
+        counters = {}
+
+        for counter, condition, bijouterie_field in LEDGER_RULES:
+            counters[counter] = int(
+                InventoryMovement.objects
+                .filter(condition)
+                .filter(**{
+                    bijouterie_field: bijouterie_id,
+                    "produit_id": produit_id,
+                    "produit_line_id": kept.produit_line_id,
+                })
+                .aggregate(total=Sum("qty"))["total"]
+                or 0
+            )
+
+        for field, value in counters.items():
+            setattr(kept, field, value)
+
+        kept.stock_magasin = (
+            counters["purchase_in"] + counters["return_in"] + counters["adjustment_in"]
+            - counters["vendor_assign_out"] - counters["cancel_purchase_out"]
+            - counters["adjustment_out"]
+        )
+        kept.stock_vendeurs = counters["vendor_assign_out"] - counters["sale_out"]
+        kept.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_shop_date_indexes'),
+        ('purchase', '0004_shop_date_indexes'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='inventorybalance',
+            name='uq_inv_balance_shop_product_line',
+        ),
+        migrations.AddField(
+            model_name='inventorybalance',
+            name='produit_line_key',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_line_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventorybalance',
+            constraint=models.UniqueConstraint(fields=('bijouterie', 'produit', 'produit_line_key'), name='uq_inv_balance_shop_product_line'),
+        ),
+    ]
@@ -6,8 +6,8 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 # ============================================================
@@ -234,13 +234,15 @@ class InventoryMovement(models.Model):
                 fields=["produit", "occurred_at"],
                 name="inv_mov_product_date_idx",
             ),
+            # Journal d'une bijouterie sur une période (date_from /
+            # date_to) ; couvre aussi le filtre sur la seule bijouterie.
             models.Index(
-                fields=["src_bijouterie"],
-                name="inv_mov_src_shop_idx",
+                fields=["src_bijouterie", "occurred_at"],
+                name="inv_mov_src_shop_date_idx",
             ),
             models.Index(
-                fields=["dst_bijouterie"],
-                name="inv_mov_dst_shop_idx",
+                fields=["dst_bijouterie", "occurred_at"],
+                name="inv_mov_dst_shop_date_idx",
             ),
             models.Index(
                 fields=["vendor", "occurred_at"],
@@ -258,6 +260,12 @@ class InventoryMovement(models.Model):
                 fields=["produit_line", "movement_type"],
                 name="inv_mov_pline_type_idx",
             ),
+            # Mouvements d'une ProduitLine, du plus récent au plus
+            # ancien (sous-ressource paginée, expand=movements).
+            models.Index(
+                fields=["produit_line", "-occurred_at", "-id"],
+                name="inv_mov_pline_date_idx",
+            ),
         ]
 
         constraints = [
@@ -944,7 +952,32 @@ class InventoryMovement(models.Model):
 
         self.full_clean()
 
-        return super().save(*args, **kwargs)
+        # Le mouvement et les soldes InventoryBalance sont écrits
+        # dans la même transaction.
+        with transaction.atomic():
+            previous = None
+
+            if self.pk and not self._state.adding:
+                previous = (
+                    InventoryMovement.objects
+                    .select_related("vendor")
+                    .filter(pk=self.pk)
+                    .first()
+                )
+
+            result = super().save(*args, **kwargs)
+
+            if previous is not None:
+                InventoryBalance.apply_movement(previous, sign=-1)
+
+            InventoryBalance.apply_movement(self)
+
+        return result
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            InventoryBalance.apply_movement(self, sign=-1)
+            return super().delete(*args, **kwargs)
 
     # ========================================================
     # Verrouillage
@@ -970,4 +1003,409 @@ class InventoryMovement(models.Model):
             update_fields=update_fields,
         )
         
-    
\ No newline at end of file
+    
+
+# ============================================================
+# Soldes matérialisés par bijouterie
+# ============================================================
+
+# Règles de ventilation d'un mouvement sur les soldes, seule
+# définition utilisée par InventoryBalance.movement_deltas et par
+# la reconstruction depuis le journal (inventory.services) :
+#
+# (compteur, type de mouvement, conditions sur les buckets,
+#  champ donnant la bijouterie, (effet stock_magasin, effet stock_vendeurs))
+#
+# La migration 0004 en garde une copie figée.
+BALANCE_RULES = (
+    (
+        "purchase_in",
+        MovementType.PURCHASE_IN,
+        {},
+        "dst_bijouterie_id",
+        (1, 0),
+    ),
+    (
+        "return_in",
+        MovementType.RETURN_IN,
+        {},
+        "dst_bijouterie_id",
+        (1, 0),
+    ),
+    (
+        "cancel_purchase_out",
+        MovementType.CANCEL_PURCHASE,
+        {},
+        "src_bijouterie_id",
+        (-1, 0),
+    ),
+    (
+        "vendor_assign_out",
+        MovementType.VENDOR_ASSIGN,
+        {},
+        "src_bijouterie_id",
+        (-1, 1),
+    ),
+    (
+        "sale_out",
+        MovementType.SALE_OUT,
+        {},
+        "vendor__bijouterie_id",
+        (0, -1),
+    ),
+    (
+        "adjustment_in",
+        MovementType.ADJUSTMENT,
+        {"dst_bucket": Bucket.BIJOUTERIE},
+        "dst_bijouterie_id",
+        (1, 0),
+    ),
+    (
+        "adjustment_out",
+        MovementType.ADJUSTMENT,
+        {
+            "src_bucket": Bucket.BIJOUTERIE,
+            "dst_bucket": Bucket.EXTERNAL,
+        },
+        "src_bijouterie_id",
+        (-1, 0),
+    ),
+)
+
+
+class InventoryBalance(models.Model):
+    """
+    Solde d'inventaire maintenu incrémentalement à partir du
+    journal InventoryMovement.
+
+    Une ligne par (bijouterie, produit, produit_line).
+
+    Les compteurs par type de mouvement reprennent exactement
+    les définitions de InventoryBijouterieView :
+
+    stock_magasin :
+        bucket BIJOUTERIE.
+
+        PURCHASE_IN
+        + RETURN_IN
+        + ADJUSTMENT entrée
+        - VENDOR_ASSIGN
+        - CANCEL_PURCHASE
+        - ADJUSTMENT sortie
+
+    stock_vendeurs :
+        bucket VENDOR, pour les vendeurs de la bijouterie.
+
+        VENDOR_ASSIGN
+        - SALE_OUT
+
+    Le journal reste la source de vérité : la commande
+    `rebuild_inventory_balances` reconstruit et vérifie ces soldes.
+    """
+
+    COUNTER_FIELDS = (
+        "purchase_in",
+        "cancel_purchase_out",
+        "vendor_assign_out",
+        "sale_out",
+        "return_in",
+        "adjustment_in",
+        "adjustment_out",
+    )
+
+    # Clé de ligne non nulle (0 sans ProduitLine) : la contrainte
+    # d'unicité porte sur cette colonne, NULL ne déclenchant aucun
+    # conflit sous MySQL ni SQLite.
+    NO_LINE = 0
+
+    bijouterie = models.ForeignKey(
+        "store.Bijouterie",
+        on_delete=models.PROTECT,
+        related_name="inventory_balances",
+    )
+
+    produit = models.ForeignKey(
+        "store.Produit",
+        on_delete=models.PROTECT,
+        related_name="inventory_balances",
+    )
+
+    produit_line = models.ForeignKey(
+        "purchase.ProduitLine",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="inventory_balances",
+    )
+
+    produit_line_key = models.PositiveBigIntegerField(
+        default=NO_LINE,
+        editable=False,
+    )
+
+    lot = models.ForeignKey(
+        "purchase.Lot",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="inventory_balances",
+    )
+
+    purchase_in = models.IntegerField(default=0)
+    cancel_purchase_out = models.IntegerField(default=0)
+    vendor_assign_out = models.IntegerField(default=0)
+    sale_out = models.IntegerField(default=0)
+    return_in = models.IntegerField(default=0)
+    adjustment_in = models.IntegerField(default=0)
+    adjustment_out = models.IntegerField(default=0)
+
+    stock_magasin = models.IntegerField(default=0)
+    stock_vendeurs = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = [
+            "bijouterie_id",
+            "produit_id",
+            "produit_line_id",
+        ]
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "bijouterie",
+                    "produit",
+                    "produit_line_key",
+                ],
+                name="uq_inv_balance_shop_product_line",
+            ),
+        ]
+
+        indexes = [
+            models.Index(
+                fields=["bijouterie", "produit"],
+                name="inv_bal_shop_product_idx",
+            ),
+            models.Index(
+                fields=["bijouterie", "lot"],
+                name="inv_bal_shop_lot_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Bijouterie#{self.bijouterie_id} "
+            f"produit#{self.produit_id} "
+            f"PL#{self.produit_line_id} "
+            f"magasin={self.stock_magasin} "
+            f"vendeurs={self.stock_vendeurs}"
+        )
+
+    @property
+    def stock_global(self) -> int:
+        return self.stock_magasin + self.stock_vendeurs
+
+    # ========================================================
+    # Ventilation d'un mouvement
+    # ========================================================
+
+    @classmethod
+    def line_key(cls, produit_line_id) -> int:
+        return produit_line_id or cls.NO_LINE
+
+    def save(self, *args, **kwargs):
+        self.produit_line_key = self.line_key(self.produit_line_id)
+        return super().save(*args, **kwargs)
+
+    @staticmethod
+    def movement_deltas(movement) -> list[tuple[int, dict]]:
+        """
+        Retourne la liste des (bijouterie_id, {champ: delta})
+        induite par un mouvement, d'après BALANCE_RULES.
+
+        La bijouterie retenue est celle utilisée par
+        InventoryBijouterieView :
+        - destination pour les entrées ;
+        - source pour les sorties et affectations ;
+        - bijouterie du vendeur pour SALE_OUT.
+        """
+
+        qty = int(movement.qty or 0)
+
+        for counter, movement_type, conditions, bijouterie_field, effects in BALANCE_RULES:
+            if movement.movement_type != movement_type:
+                continue
+
+            if any(
+                getattr(movement, field) != value
+                for field, value in conditions.items()
+            ):
+                continue
+
+            if bijouterie_field == "vendor__bijouterie_id":
+                bijouterie_id = (
+                    movement.vendor.bijouterie_id
+                    if movement.vendor_id else None
+                )
+            else:
+                bijouterie_id = getattr(movement, bijouterie_field)
+
+            deltas = {counter: qty}
+
+            for field, effect in zip(("stock_magasin", "stock_vendeurs"), effects):
+                if effect:
+                    deltas[field] = effect * qty
+
+            return [(bijouterie_id, deltas)]
+
+        return []
+
+    # ========================================================
+    # Mise à jour incrémentale
+    # ========================================================
+
+    @classmethod
+    def apply_movement(cls, movement, sign: int = 1) -> None:
+        """
+        Répercute un mouvement (sign=1) ou son annulation (sign=-1)
+        sur les soldes.
+
+        Doit être appelé dans la transaction qui écrit le mouvement.
+        La mise à jour se fait par UPDATE ... SET col = col + delta,
+        sans lecture préalable de la ligne.
+        """
+
+        cls.apply_movements([movement], sign=sign)
+
+    @classmethod
+    def apply_movements(cls, movements, sign: int = 1) -> None:
+        """
+        Variante par lot de apply_movement (mouvements créés par
+        bulk_create) : les deltas sont cumulés par
+        (bijouterie, produit, produit_line), puis un seul UPDATE
+        est exécuté par solde touché.
+        """
+
+        merged = {}
+
+        for movement in movements:
+            for bijouterie_id, deltas in cls.movement_deltas(movement):
+                if not bijouterie_id:
+                    continue
+
+                key = (
+                    bijouterie_id,
+                    movement.produit_id,
+                    movement.produit_line_id,
+                )
+
+                entry = merged.setdefault(key, {
+                    "lot_id": movement.lot_id,
+                    "deltas": {},
+                })
+
+                for field, delta in deltas.items():
+                    entry["deltas"][field] = (
+                        entry["deltas"].get(field, 0) + delta
+                    )
+
+        created = cls._bulk_create_missing(merged, sign)
+
+        for (bijouterie_id, produit_id, produit_line_id), entry in merged.items():
+            if (bijouterie_id, produit_id, produit_line_id) in created:
+                continue
+
+            key = {
+                "bijouterie_id": bijouterie_id,
+                "produit_id": produit_id,
+                "produit_line_key": cls.line_key(produit_line_id),
+            }
+
+            deltas = entry["deltas"]
+
+            updates = {
+                field: F(field) + sign * delta
+                for field, delta in deltas.items()
+            }
+
+            with transaction.atomic():
+                updated = cls.objects.filter(**key).update(
+                    **updates,
+                    updated_at=timezone.now(),
+                )
+
+                if updated:
+                    continue
+
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            **key,
+                            produit_line_id=produit_line_id,
+                            lot_id=entry["lot_id"],
+                            **{
+                                field: sign * delta
+                                for field, delta in deltas.items()
+                            },
+                        )
+                except IntegrityError:
+                    # Ligne créée entre-temps par une autre transaction.
+                    cls.objects.filter(**key).update(
+                        **updates,
+                        updated_at=timezone.now(),
+                    )
+
+    @classmethod
+    def _bulk_create_missing(cls, merged, sign: int) -> set:
+        """
+        Crée en un INSERT groupé les soldes absents de `merged`
+        (une requête pour détecter les clés existantes).
+
+        Retourne les clés créées ; en cas de conflit (solde créé
+        entre-temps par une autre transaction), rien n'est créé ici
+        et apply_movements traite chaque clé individuellement.
+        """
+
+        keys = list(merged)
+
+        if not keys:
+            return set()
+
+        existing = {
+            (bijouterie_id, produit_id, produit_line_key or None)
+            for bijouterie_id, produit_id, produit_line_key in (
+                cls.objects
+                .filter(
+                    bijouterie_id__in={key[0] for key in keys},
+                    produit_id__in={key[1] for key in keys},
+                )
+                .values_list("bijouterie_id", "produit_id", "produit_line_key")
+            )
+        }
+
+        missing = [key for key in keys if key not in existing]
+
+        if not missing:
+            return set()
+
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(
+                        bijouterie_id=key[0],
+                        produit_id=key[1],
+                        produit_line_id=key[2],
+                        produit_line_key=cls.line_key(key[2]),
+                        lot_id=merged[key]["lot_id"],
+                        **{
+                            field: sign * delta
+                            for field, delta in merged[key]["deltas"].items()
+                        },
+                    )
+                    for key in missing
+                ])
+        except IntegrityError:
+            return set()
+
+        return set(missing)
@@ -0,0 +1,467 @@
+# inventory/selectors/produit_lines.py
+
+from __future__ import annotations
+
+from django.db.models import (Count, F, IntegerField, OuterRef, Subquery, Sum,
+                              Value, Window)
+from django.db.models.functions import Coalesce, RowNumber
+from rest_framework import serializers
+
+from backend.values_serializers import ValuesSerializer
+from inventory.models import InventoryMovement, MovementType
+from inventory.serializers import InventoryMovementRows
+from purchase.models import ProduitLine
+from stock.models import Stock, VendorStock
+
+# ============================================================
+# ProduitLine avec inventaire : lignes d'une page
+# ============================================================
+#
+# Même représentation que ProduitLineWithInventorySerializer, pour les
+# seules ProduitLine d'une page (ProduitLineWithInventoryListView) :
+#     lignes + lot / achat / fournisseur / produit ;
+#     stocks magasin, stocks vendeurs : les résumés (stock_magasin,
+#     quantite_vendue...) sont sommés sur ces lignes, sans sous-requête ;
+#     entrées par retour (RETURN_IN) et nombre de mouvements (GROUP BY) ;
+#     expand=movements : les N mouvements les plus récents par ligne
+#     (ROW_NUMBER() partitionné par ProduitLine).
+# Le nombre de requêtes ne dépend pas de la taille de la page.
+
+
+class ProduitLineRows(ValuesSerializer):
+    model = ProduitLine
+    fields = {
+        "id": "id",
+        "prix_achat_gramme": "prix_achat_gramme",
+        "quantite": "quantite",
+
+        # Achat / bijouterie / fournisseur
+        "achat_id": "lot__achat_id",
+        "numero_achat": "lot__achat__numero_achat",
+        "achat_status": "lot__achat__status",
+        "reference_commande": "lot__achat__reference_commande",
+        "bijouterie_id": "lot__achat__bijouterie_id",
+        "bijouterie_nom": "lot__achat__bijouterie__nom",
+        "fournisseur_id": "lot__achat__fournisseur_id",
+        "fournisseur_nom": "lot__achat__fournisseur__nom",
+        "fournisseur_prenom": "lot__achat__fournisseur__prenom",
+        "fournisseur_telephone": "lot__achat__fournisseur__telephone",
+
+        # Lot
+        "lot_id": "lot_id",
+        "numero_lot": "lot__numero_lot",
+        "lot_description": "lot__description",
+        "received_at": "lot__received_at",
+
+        # Produit
+        "produit_id": "produit_id",
+        "produit_nom": "produit__nom",
+        "produit_sku": "produit__sku",
+        "produit_slug": "produit__slug",
+        "categorie_id": "produit__categorie_id",
+        "categorie_nom": "produit__categorie__nom",
+        "modele_id": "produit__modele_id",
+        "modele_nom": "produit__modele__modele",
+        "marque_id": "produit__marque_id",
+        "marque_nom": "produit__marque__marque",
+        "purete_id": "produit__purete_id",
+        "purete_nom": "produit__purete__purete",
+        "poids": "produit__poids",
+    }
+
+    # ProduitLineWithInventorySerializer.poids_unitaire
+    poids_field = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=3,
+    )
+
+    @staticmethod
+    def _fournisseur_nom(data):
+        if data["fournisseur_id"] is None:
+            return None
+
+        full_name = " ".join(
+            part.strip()
+            for part in (data["fournisseur_nom"], data["fournisseur_prenom"])
+            if part and part.strip()
+        )
+
+        return (
+            full_name
+            or data["fournisseur_telephone"]
+            or f"Fournisseur #{data['fournisseur_id']}"
+        )
+
+    def to_representation(self, row: dict) -> dict:
+        data = super().to_representation(row)
+        poids = row["produit__poids"]
+
+        return {
+            "id": data["id"],
+
+            "achat_id": data["achat_id"],
+            "numero_achat": data["numero_achat"],
+            "achat_status": data["achat_status"],
+            "reference_commande": data["reference_commande"],
+
+            "bijouterie_id": data["bijouterie_id"],
+            "bijouterie_nom": data["bijouterie_nom"],
+
+            "fournisseur_id": data["fournisseur_id"],
+            "fournisseur_nom": self._fournisseur_nom(data),
+            "fournisseur_telephone": data["fournisseur_telephone"],
+
+            "lot_id": data["lot_id"],
+            "numero_lot": data["numero_lot"],
+            "lot_description": data["lot_description"],
+            "received_at": data["received_at"],
+
+            "produit_id": data["produit_id"],
+            "produit_nom": data["produit_nom"],
+            "produit_sku": data["produit_sku"],
+            "produit_slug": data["produit_slug"],
+
+            "categorie_id": data["categorie_id"],
+            "categorie_nom": data["categorie_nom"],
+
+            "modele_id": data["modele_id"],
+            "modele_nom": data["modele_nom"],
+
+            "marque_id": data["marque_id"],
+            "marque_nom": data["marque_nom"],
+
+            "purete_id": data["purete_id"],
+            "purete_nom": data["purete_nom"],
+
+            "poids_unitaire": (
+                self.poids_field.to_representation(poids)
+                if poids is not None else None
+            ),
+            # Decimal brut, comme get_poids_total.
+            "poids_total": (
+                poids * row["quantite"]
+                if poids is not None else None
+            ),
+
+            "prix_achat_gramme": data["prix_achat_gramme"],
+            "quantite": data["quantite"],
+        }
+
+
+class ProduitLineStockRows(ValuesSerializer):
+    model = Stock
+    fields = {
+        "id": "id",
+        "produit_line_id": "produit_line_id",
+        "bijouterie_id": "bijouterie_id",
+        "bijouterie_nom": "bijouterie__nom",
+        "en_stock": "en_stock",
+        "quantite_totale": "quantite_totale",
+    }
+
+
+class ProduitLineVendorStockRows(ValuesSerializer):
+    model = VendorStock
+    fields = {
+        "id": "id",
+        "produit_line_id": "produit_line_id",
+        "vendor_id": "vendor_id",
+        "vendor_first_name": "vendor__user__first_name",
+        "vendor_last_name": "vendor__user__last_name",
+        "vendor_email": "vendor__user__email",
+        "bijouterie_id": "bijouterie_id",
+        "bijouterie_nom": "bijouterie__nom",
+        "quantite_allouee": "quantite_allouee",
+        "quantite_vendue": "quantite_vendue",
+    }
+
+    def to_representation(self, row: dict) -> dict:
+        data = super().to_representation(row)
+
+        return {
+            "id": data["id"],
+            "produit_line_id": data["produit_line_id"],
+            "vendor_id": data["vendor_id"],
+            "vendor_nom": InventoryMovementRows._nom(
+                data["vendor_first_name"],
+                data["vendor_last_name"],
+                data["vendor_email"],
+            ),
+            "vendor_email": data["vendor_email"],
+            "bijouterie_id": data["bijouterie_id"],
+            "bijouterie_nom": data["bijouterie_nom"],
+            "quantite_allouee": data["quantite_allouee"],
+            "quantite_vendue": data["quantite_vendue"],
+            # VendorStock.en_stock
+            "en_stock": max(
+                0,
+                int(data["quantite_allouee"] or 0)
+                - int(data["quantite_vendue"] or 0),
+            ),
+        }
+
+
+# ============================================================
+# Résumés de stock en sous-requêtes (tri et filtre has_stock)
+# ============================================================
+
+def annotate_stock_totals(queryset, *, bijouterie_id=None, vendor_id=None):
+    """
+    Annote stock_magasin, quantite_entree_cumulee,
+    quantite_allouee_vendeur, quantite_vendue, quantite_retournee,
+    stock_vendeur et stock_global (sous-requêtes corrélées).
+
+    Réservé au tri sur ces colonnes et au filtre has_stock : pour
+    l'affichage, produit_line_inventory_rows() calcule les mêmes
+    valeurs sur les seules lignes de la page.
+    """
+
+    stocks = Stock.objects.filter(produit_line_id=OuterRef("pk"))
+    vendor_stocks = VendorStock.objects.filter(produit_line_id=OuterRef("pk"))
+    returned = InventoryMovement.objects.filter(
+        produit_line_id=OuterRef("pk"),
+        movement_type=MovementType.RETURN_IN,
+    )
+
+    if bijouterie_id is not None:
+        stocks = stocks.filter(bijouterie_id=bijouterie_id)
+        vendor_stocks = vendor_stocks.filter(bijouterie_id=bijouterie_id)
+        returned = returned.filter(dst_bijouterie_id=bijouterie_id)
+
+    if vendor_id is not None:
+        vendor_stocks = vendor_stocks.filter(vendor_id=vendor_id)
+
+    def total(queryset, field):
+        return Coalesce(
+            Subquery(
+                queryset
+                .values("produit_line_id")
+                .annotate(total=Sum(field))
+                .values("total")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    return (
+        queryset
+        .annotate(
+            stock_magasin=total(stocks, "en_stock"),
+            quantite_entree_cumulee=total(stocks, "quantite_totale"),
+            quantite_allouee_vendeur=total(vendor_stocks, "quantite_allouee"),
+            quantite_vendue=total(vendor_stocks, "quantite_vendue"),
+            quantite_retournee=total(returned, "qty"),
+        )
+        .annotate(
+            stock_vendeur=(
+                F("quantite_allouee_vendeur")
+                - F("quantite_vendue")
+            ),
+            stock_global=(
+                F("stock_magasin")
+                + F("quantite_allouee_vendeur")
+                - F("quantite_vendue")
+            ),
+        )
+    )
+
+
+# ============================================================
+# Mouvements d'une page de ProduitLine
+# ============================================================
+
+def latest_movements(produit_line_ids, limit: int) -> dict:
+    """
+    {produit_line_id: [mouvements]} : au plus `limit` mouvements par
+    ligne, du plus récent au plus ancien, en une requête.
+    """
+
+    queryset = (
+        InventoryMovement.objects
+        .filter(produit_line_id__in=produit_line_ids)
+        .annotate(
+            rang=Window(
+                RowNumber(),
+                partition_by=[F("produit_line_id")],
+                order_by=[F("occurred_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(rang__lte=limit)
+        .order_by("produit_line_id", "-occurred_at", "-id")
+    )
+
+    movements = {}
+
+    for movement in InventoryMovementRows().rows(queryset):
+        movements.setdefault(movement["produit_line_id"], []).append(movement)
+
+    return movements
+
+
+def movement_counts(produit_line_ids) -> dict:
+    return dict(
+        InventoryMovement.objects
+        .filter(produit_line_id__in=produit_line_ids)
+        .order_by()
+        .values("produit_line_id")
+        .annotate(total=Count("id"))
+        .values_list("produit_line_id", "total")
+    )
+
+
+# ============================================================
+# Page complète
+# ============================================================
+
+def produit_line_inventory_rows(
+    produit_line_ids,
+    *,
+    bijouterie_id=None,
+    vendor_id=None,
+    movements_limit: int = 0,
+) -> list[dict]:
+    """
+    Représentation ProduitLineWithInventorySerializer des ProduitLine
+    données, dans l'ordre de `produit_line_ids`.
+
+    bijouterie_id / vendor_id restreignent les résumés de stock (comme
+    les anciennes sous-requêtes), pas les listes stocks / vendor_stocks.
+
+    movements_limit > 0 (expand=movements) : clé "movements" avec les
+    mouvements les plus récents ; au-delà, la sous-ressource
+    /inventory/produit-lines/<id>/movements pagine l'historique.
+    """
+
+    produit_line_ids = list(produit_line_ids)
+
+    if not produit_line_ids:
+        return []
+
+    lines = {
+        row["id"]: row
+        for row in ProduitLineRows().rows(
+            ProduitLine.objects.filter(id__in=produit_line_ids)
+        )
+    }
+
+    # --------------------------------------------------------
+    # Stocks magasin et vendeurs de la page
+    # --------------------------------------------------------
+
+    stocks_par_ligne = {}
+
+    for stock in ProduitLineStockRows().rows(
+        Stock.objects
+        .filter(produit_line_id__in=produit_line_ids)
+        .order_by("bijouterie_id", "produit_line_id", "id")
+    ):
+        stocks_par_ligne.setdefault(
+            stock.pop("produit_line_id"), []
+        ).append(stock)
+
+    vendor_stocks_par_ligne = {}
+
+    for vendor_stock in ProduitLineVendorStockRows().rows(
+        VendorStock.objects
+        .filter(produit_line_id__in=produit_line_ids)
+        .order_by("produit_line_id", "vendor_id", "id")
+    ):
+        vendor_stocks_par_ligne.setdefault(
+            vendor_stock.pop("produit_line_id"), []
+        ).append(vendor_stock)
+
+    returned_queryset = InventoryMovement.objects.filter(
+        produit_line_id__in=produit_line_ids,
+        movement_type=MovementType.RETURN_IN,
+    )
+
+    if bijouterie_id is not None:
+        returned_queryset = returned_queryset.filter(
+            dst_bijouterie_id=bijouterie_id,
+        )
+
+    returned = dict(
+        returned_queryset
+        .order_by()
+        .values("produit_line_id")
+        .annotate(total=Sum("qty"))
+        .values_list("produit_line_id", "total")
+    )
+
+    counts = movement_counts(produit_line_ids)
+
+    movements = (
+        latest_movements(produit_line_ids, movements_limit)
+        if movements_limit > 0
+        else None
+    )
+
+    # --------------------------------------------------------
+    # Assemblage
+    # --------------------------------------------------------
+
+    data = []
+
+    for produit_line_id in produit_line_ids:
+        row = lines.get(produit_line_id)
+
+        if row is None:
+            continue
+
+        stocks = stocks_par_ligne.get(produit_line_id, [])
+        vendor_stocks = vendor_stocks_par_ligne.get(produit_line_id, [])
+
+        stocks_filtres = [
+            stock
+            for stock in stocks
+            if bijouterie_id is None
+            or stock["bijouterie_id"] == bijouterie_id
+        ]
+        vendor_stocks_filtres = [
+            vendor_stock
+            for vendor_stock in vendor_stocks
+            if (
+                bijouterie_id is None
+                or vendor_stock["bijouterie_id"] == bijouterie_id
+            )
+            and (
+                vendor_id is None
+                or vendor_stock["vendor_id"] == vendor_id
+            )
+        ]
+
+        stock_magasin = sum(
+            stock["en_stock"] or 0 for stock in stocks_filtres
+        )
+        quantite_allouee = sum(
+            vendor_stock["quantite_allouee"] or 0
+            for vendor_stock in vendor_stocks_filtres
+        )
+        quantite_vendue = sum(
+            vendor_stock["quantite_vendue"] or 0
+            for vendor_stock in vendor_stocks_filtres
+        )
+
+        row.update({
+            "stock_magasin": stock_magasin,
+            "quantite_entree_cumulee": sum(
+                stock["quantite_totale"] or 0 for stock in stocks_filtres
+            ),
+            "quantite_allouee_vendeur": quantite_allouee,
+            "quantite_vendue": quantite_vendue,
+            "quantite_retournee": returned.get(produit_line_id) or 0,
+            "stock_vendeur": quantite_allouee - quantite_vendue,
+            "stock_global": stock_magasin + quantite_allouee - quantite_vendue,
+
+            "stocks": stocks,
+            "vendor_stocks": vendor_stocks,
+
+            "movements_count": counts.get(produit_line_id, 0),
+        })
+
+        if movements is not None:
+            row["movements"] = movements.get(produit_line_id, [])
+
+        data.append(row)
+
+    return data
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+from decimal import Decimal
+
 from rest_framework import serializers
 
+from backend.values_serializers import ValuesSerializer
 from inventory.models import Bucket, InventoryMovement, MovementType
 from purchase.models import ProduitLine
 
@@ -274,6 +277,165 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
         return full_name or obj.created_by.email
 
 
+class InventoryMovementRows(ValuesSerializer):
+    """
+    Variante values() d'InventoryMovementSerializer (même sortie),
+    utilisée par InventoryMovementListView : une requête, aucun
+    objet modèle par mouvement.
+    """
+
+    model = InventoryMovement
+    fields = {
+        key: key
+        for key in (
+            "id",
+            "occurred_at",
+            "created_at",
+            "movement_type",
+            "produit_id",
+            "produit_line_id",
+            "lot_id",
+            "achat_id",
+            "qty",
+            "unit_cost",
+            "src_bucket",
+            "src_bijouterie_id",
+            "dst_bucket",
+            "dst_bijouterie_id",
+            "vendor_id",
+            "vente_id",
+            "vente_ligne_id",
+            "facture_id",
+            "stock_consumed",
+            "is_locked",
+            "reason",
+            "created_by_id",
+        )
+    } | {
+        "produit_nom": "produit__nom",
+        "produit_sku": "produit__sku",
+        "numero_lot": "lot__numero_lot",
+        "numero_achat": "achat__numero_achat",
+        "numero_vente": "vente__numero_vente",
+        "numero_facture": "facture__numero_facture",
+        "vendor_first_name": "vendor__user__first_name",
+        "vendor_last_name": "vendor__user__last_name",
+        "vendor_email": "vendor__user__email",
+        "src_bijouterie_nom": "src_bijouterie__nom",
+        "dst_bijouterie_nom": "dst_bijouterie__nom",
+        "created_by_first_name": "created_by__first_name",
+        "created_by_last_name": "created_by__last_name",
+        "created_by_email": "created_by__email",
+    }
+
+    MOVEMENT_LABELS = dict(MovementType.choices)
+    BUCKET_LABELS = dict(Bucket.choices)
+
+    total_cost_field = serializers.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+    )
+
+    def values(self, queryset):
+        # Les select_related de la vue ne servent pas ici.
+        return super().values(queryset.select_related(None))
+
+    @staticmethod
+    def _nom(first_name, last_name, email):
+        # userauths.User.full_name, sinon l'email.
+        return " ".join(filter(None, [first_name, last_name])).strip() or email
+
+    def _label(self, labels, value):
+        if value is None:
+            return None
+
+        return str(labels.get(value, value))
+
+    def to_representation(self, row: dict) -> dict:
+        data = super().to_representation(row)
+
+        return {
+            "id": data["id"],
+            "occurred_at": data["occurred_at"],
+            "created_at": data["created_at"],
+
+            "movement_type": data["movement_type"],
+            "movement_type_label": self._label(
+                self.MOVEMENT_LABELS,
+                data["movement_type"],
+            ),
+
+            "produit_id": data["produit_id"],
+            "produit_nom": data["produit_nom"],
+            "produit_sku": data["produit_sku"],
+
+            "produit_line_id": data["produit_line_id"],
+
+            "lot_id": data["lot_id"],
+            "numero_lot": data["numero_lot"],
+
+            "achat_id": data["achat_id"],
+            "numero_achat": data["numero_achat"],
+
+            "qty": data["qty"],
+            "unit_cost": data["unit_cost"],
+            "total_cost": self.total_cost_field.to_representation(
+                Decimal(row["qty"] or 0)
+                * Decimal(row["unit_cost"] or 0)
+            ),
+
+            "src_bucket": data["src_bucket"],
+            "src_bucket_label": self._label(
+                self.BUCKET_LABELS,
+                data["src_bucket"],
+            ),
+            "src_bijouterie_id": data["src_bijouterie_id"],
+            "src_bijouterie_nom": data["src_bijouterie_nom"],
+
+            "dst_bucket": data["dst_bucket"],
+            "dst_bucket_label": self._label(
+                self.BUCKET_LABELS,
+                data["dst_bucket"],
+            ),
+            "dst_bijouterie_id": data["dst_bijouterie_id"],
+            "dst_bijouterie_nom": data["dst_bijouterie_nom"],
+
+            "vendor_id": data["vendor_id"],
+            "vendor_nom": (
+                self._nom(
+                    data["vendor_first_name"],
+                    data["vendor_last_name"],
+                    data["vendor_email"],
+                )
+                if data["vendor_id"] is not None else None
+            ),
+            "vendor_email": data["vendor_email"],
+
+            "vente_id": data["vente_id"],
+            "numero_vente": data["numero_vente"],
+            "vente_ligne_id": data["vente_ligne_id"],
+
+            "facture_id": data["facture_id"],
+            "numero_facture": data["numero_facture"],
+
+            "stock_consumed": data["stock_consumed"],
+            "is_locked": data["is_locked"],
+
+            "reason": data["reason"],
+
+            "created_by_id": data["created_by_id"],
+            "created_by_nom": (
+                self._nom(
+                    data["created_by_first_name"],
+                    data["created_by_last_name"],
+                    data["created_by_email"],
+                )
+                if data["created_by_id"] is not None else None
+            ),
+            "created_by_email": data["created_by_email"],
+        }
+
+
 # ============================================================
 # Stock magasin lié à une ProduitLine
 # ============================================================
@@ -505,7 +667,7 @@ class ProduitLineWithInventorySerializer(
     )
 
     marque_nom = serializers.CharField(
-        source="produit.marque.nom",
+        source="produit.marque.marque",
         read_only=True,
         default=None,
     )
@@ -586,9 +748,14 @@ class ProduitLineWithInventorySerializer(
     )
 
     # ========================================================
-    # Mouvements
+    # Mouvements (expand=movements : les plus récents seulement)
     # ========================================================
 
+    movements_count = serializers.IntegerField(
+        read_only=True,
+        default=0,
+    )
+
     movements = InventoryMovementSerializer(
         source="inventory_movements",
         many=True,
@@ -659,6 +826,7 @@ class ProduitLineWithInventorySerializer(
             # Détails
             "stocks",
             "vendor_stocks",
+            "movements_count",
             "movements",
         ]
 
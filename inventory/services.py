@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Q, Sum
 
-from inventory.models import Bucket, InventoryMovement, MovementType
+from inventory.models import (BALANCE_RULES, Bucket, InventoryBalance,
+                              InventoryMovement, MovementType)
 from vendor.models import Vendor
 
 
@@ -165,3 +167,212 @@ def log_move(
 
     return movement
 
+
+
+# ============================================================
+# Soldes InventoryBalance
+# ============================================================
+
+# (compteur, filtre du journal, champ donnant la bijouterie),
+# dérivé de inventory.models.BALANCE_RULES.
+BALANCE_LEDGER_RULES = tuple(
+    (
+        counter,
+        Q(movement_type=movement_type, **conditions),
+        bijouterie_field,
+    )
+    for counter, movement_type, conditions, bijouterie_field, _ in BALANCE_RULES
+)
+
+
+def _derive_stocks(counters: dict) -> dict:
+    counters["stock_magasin"] = 0
+    counters["stock_vendeurs"] = 0
+
+    for counter, _, _, _, (magasin, vendeurs) in BALANCE_RULES:
+        counters["stock_magasin"] += magasin * counters[counter]
+        counters["stock_vendeurs"] += vendeurs * counters[counter]
+
+    return counters
+
+
+def compute_inventory_balances_from_ledger(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> dict:
+    """
+    Recalcule les soldes depuis le journal InventoryMovement.
+
+    Une requête groupée par règle de BALANCE_LEDGER_RULES.
+
+    Retourne :
+        {(bijouterie_id, produit_id, produit_line_id): {
+            "lot_id": ..., "purchase_in": ..., ...
+        }}
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    balances = {}
+
+    for counter, condition, bijouterie_field in BALANCE_LEDGER_RULES:
+        rows = InventoryMovement.objects.filter(condition)
+
+        if bijouterie_ids is not None:
+            rows = rows.filter(**{
+                f"{bijouterie_field}__in": bijouterie_ids,
+            })
+
+        rows = (
+            rows
+            .exclude(**{f"{bijouterie_field}__isnull": True})
+            .order_by()
+            .values(
+                bijouterie_field,
+                "produit_id",
+                "produit_line_id",
+                "lot_id",
+            )
+            .annotate(total=Sum("qty"))
+        )
+
+        for row in rows:
+            key = (
+                row[bijouterie_field],
+                row["produit_id"],
+                row["produit_line_id"],
+            )
+
+            entry = balances.get(key)
+
+            if entry is None:
+                entry = {
+                    "lot_id": row["lot_id"],
+                    **{
+                        field: 0
+                        for field in InventoryBalance.COUNTER_FIELDS
+                    },
+                }
+                balances[key] = entry
+
+            if not entry["lot_id"]:
+                entry["lot_id"] = row["lot_id"]
+
+            entry[counter] += int(row["total"] or 0)
+
+    for entry in balances.values():
+        _derive_stocks(entry)
+
+    return balances
+
+
+@transaction.atomic
+def rebuild_inventory_balances(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Reconstruit les soldes InventoryBalance depuis le journal.
+
+    Retourne le nombre de lignes écrites.
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    balances = compute_inventory_balances_from_ledger(bijouterie_ids)
+
+    existing = InventoryBalance.objects.select_for_update()
+
+    if bijouterie_ids is not None:
+        existing = existing.filter(bijouterie_id__in=bijouterie_ids)
+
+    existing.delete()
+
+    InventoryBalance.objects.bulk_create(
+        [
+            InventoryBalance(
+                bijouterie_id=bijouterie_id,
+                produit_id=produit_id,
+                produit_line_id=produit_line_id,
+                produit_line_key=InventoryBalance.line_key(produit_line_id),
+                **values,
+            )
+            for (
+                bijouterie_id,
+                produit_id,
+                produit_line_id,
+            ), values in balances.items()
+        ],
+        batch_size=1000,
+    )
+
+    return len(balances)
+
+
+def verify_inventory_balances(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> list[dict]:
+    """
+    Compare les soldes InventoryBalance avec le journal.
+
+    Retourne la liste des écarts (vide si tout est cohérent).
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    expected = compute_inventory_balances_from_ledger(bijouterie_ids)
+
+    fields = InventoryBalance.COUNTER_FIELDS + (
+        "stock_magasin",
+        "stock_vendeurs",
+    )
+
+    stored_rows = InventoryBalance.objects.all()
+
+    if bijouterie_ids is not None:
+        stored_rows = stored_rows.filter(bijouterie_id__in=bijouterie_ids)
+
+    stored = {
+        (
+            row["bijouterie_id"],
+            row["produit_id"],
+            row["produit_line_id"],
+        ): row
+        for row in stored_rows.values(
+            "bijouterie_id",
+            "produit_id",
+            "produit_line_id",
+            *fields,
+        )
+    }
+
+    empty = {field: 0 for field in fields}
+
+    differences = []
+
+    for key in sorted(
+        set(expected) | set(stored),
+        key=lambda k: tuple(v or 0 for v in k),
+    ):
+        expected_row = expected.get(key, empty)
+        stored_row = stored.get(key, empty)
+
+        mismatched = {
+            field: {
+                "attendu": expected_row[field],
+                "enregistre": stored_row[field],
+            }
+            for field in fields
+            if expected_row[field] != stored_row[field]
+        }
+
+        if mismatched:
+            differences.append({
+                "bijouterie_id": key[0],
+                "produit_id": key[1],
+                "produit_line_id": key[2],
+                "ecarts": mismatched,
+            })
+
+    return differences
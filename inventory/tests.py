@@ -1,3 +1,508 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from inventory.models import (Bucket, InventoryBalance, InventoryMovement,
+                              MovementType)
+from inventory.selectors.produit_lines import annotate_stock_totals
+from inventory.serializers import (InventoryMovementSerializer,
+                                   ProduitLineWithInventorySerializer)
+from inventory.services import log_move, verify_inventory_balances
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from staff.models import Cashier
+from stock.models import Stock, VendorStock
+from store.models import (Bijouterie, Categorie, Marque, Modele, Produit,
+                          Purete)
+from vendor.models import Vendor
+
+
+class InventorySummaryQueryCountTests(TestCase):
+    """
+    Les résumés par bijouterie et par vendeur doivent exécuter
+    un nombre constant de requêtes, quel que soit le nombre
+    de bijouteries ou de vendeurs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+
+        cls.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+
+        cls.produit_kwargs = {
+            "categorie": categorie,
+            "modele": Modele.objects.get_or_create(
+                modele="Solitaire",
+                categorie=categorie,
+            )[0],
+            "purete": Purete.objects.get_or_create(purete="18")[0],
+            "marque": Marque.objects.get_or_create(marque="Local")[0],
+        }
+
+        cls.counter = 0
+
+    def _create_shop_with_activity(self):
+        type(self).counter += 1
+        n = self.counter
+
+        bijouterie = Bijouterie.objects.create(nom=f"Bijouterie {n}")
+
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email=f"vendor{n}@example.com",
+                password="secret",
+            ),
+            bijouterie=bijouterie,
+        )
+
+        produit = Produit.objects.create(
+            poids=Decimal("2.50") + n,
+            **self.produit_kwargs,
+        )
+
+        achat = Achat.objects.create(
+            fournisseur=Fournisseur.objects.create(
+                telephone=f"7700000{n:02d}",
+            ),
+            bijouterie=bijouterie,
+        )
+
+        produit_line = ProduitLine.objects.create(
+            lot=Lot.objects.create(achat=achat, numero_lot=f"LOT-{n}"),
+            produit=produit,
+            prix_achat_gramme=Decimal("1000.00"),
+            quantite=10,
+        )
+
+        log_move(
+            produit=produit,
+            qty=10,
+            movement_type=MovementType.PURCHASE_IN,
+            src_bucket=Bucket.EXTERNAL,
+            dst_bucket=Bucket.BIJOUTERIE,
+            dst_bijouterie_id=bijouterie.id,
+            produit_line=produit_line,
+            lot=produit_line.lot,
+        )
+
+        log_move(
+            produit=produit,
+            qty=4,
+            movement_type=MovementType.VENDOR_ASSIGN,
+            src_bucket=Bucket.BIJOUTERIE,
+            dst_bucket=Bucket.VENDOR,
+            src_bijouterie_id=bijouterie.id,
+            dst_bijouterie_id=bijouterie.id,
+            vendor=vendor,
+            produit_line=produit_line,
+        )
+
+        log_move(
+            produit=produit,
+            qty=1,
+            movement_type=MovementType.ADJUSTMENT,
+            src_bucket=Bucket.BIJOUTERIE,
+            dst_bucket=Bucket.EXTERNAL,
+            src_bijouterie_id=bijouterie.id,
+            produit_line=produit_line,
+            reason="Casse",
+        )
+
+        VendorStock.objects.create(
+            produit_line=produit_line,
+            vendor=vendor,
+            bijouterie=bijouterie,
+            quantite_allouee=4,
+        )
+
+        return bijouterie
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _assert_constant_queries(self, url, expected_queries):
+        self._create_shop_with_activity()
+
+        with self.assertNumQueries(expected_queries):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+        for _ in range(3):
+            self._create_shop_with_activity()
+
+        with self.assertNumQueries(expected_queries):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+
+        return response.json()
+
+    def test_bijouterie_summary_from_balances(self):
+        data = self._assert_constant_queries(
+            "/api/inventory/bijouteries",
+            expected_queries=2,
+        )
+
+        self.assertEqual(data[0]["purchase_in"], 10)
+        self.assertEqual(data[0]["vendor_assign_out"], 4)
+        self.assertEqual(data[0]["adjustment_out"], 1)
+        self.assertEqual(data[0]["stock_magasin_net"], 5)
+        self.assertEqual(data[0]["stock_global_net"], 9)
+
+    def test_bijouterie_summary_from_ledger(self):
+        data = self._assert_constant_queries(
+            "/api/inventory/bijouteries?date_from=2000-01-01",
+            expected_queries=2,
+        )
+
+        self.assertEqual(
+            data,
+            self.client.get("/api/inventory/bijouteries").json(),
+        )
+
+    def test_vendor_summary(self):
+        data = self._assert_constant_queries(
+            "/api/inventory/vendors",
+            expected_queries=3,
+        )
+
+        self.assertEqual(data[0]["vendor_assign_in"], 4)
+        self.assertEqual(data[0]["sale_out_vendor"], 0)
+        self.assertEqual(data[0]["quantite_allouee"], 4)
+        self.assertEqual(data[0]["stock_restant"], 4)
+
+    def test_movement_list_from_values(self):
+        self._create_shop_with_activity()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/inventory/movements")
+
+        for _ in range(3):
+            self._create_shop_with_activity()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/inventory/movements")
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = InventoryMovementSerializer(
+            InventoryMovement.objects.order_by("-occurred_at", "-id"),
+            many=True,
+        ).data
+
+        # Même représentation, clés dans le même ordre.
+        self.assertEqual(len(expected), 12)
+        self.assertEqual(
+            json.dumps(response.json()),
+            json.dumps(json.loads(json.dumps(expected, default=str))),
+        )
+
+    # --------------------------------------------------------
+    # ProduitLine avec inventaire : pagination par curseur
+    # --------------------------------------------------------
+
+    def _produit_lines_with_stock(self, count):
+        for _ in range(count):
+            bijouterie = self._create_shop_with_activity()
+            produit_line = ProduitLine.objects.get(lot__achat__bijouterie=bijouterie)
+
+            Stock.objects.create(
+                produit_line=produit_line,
+                bijouterie=bijouterie,
+                en_stock=5,
+                quantite_totale=10,
+            )
+
+    def _all_pages(self, url):
+        ids, cursor = [], ""
+
+        while True:
+            data = self.client.get(url, {"page_size": 2, "cursor": cursor}).json()
+            ids += [row["id"] for row in data["results"]]
+
+            if not data["has_more"]:
+                return ids
+
+            cursor = data["next_cursor"]
+
+    def test_produit_lines_paginated_in_constant_queries(self):
+        url = "/api/inventory/produit-lines?page_size=2"
+
+        self._produit_lines_with_stock(1)
+
+        with self.assertNumQueries(6):
+            self.client.get(url)
+
+        self._produit_lines_with_stock(3)
+
+        with self.assertNumQueries(6):
+            data = self.client.get(url).json()
+
+        self.assertEqual(len(data["results"]), 2)
+        self.assertTrue(data["has_more"])
+        self.assertNotIn("movements", data["results"][0])
+        self.assertEqual(data["results"][0]["movements_count"], 3)
+
+        self.assertEqual(
+            self._all_pages("/api/inventory/produit-lines"),
+            list(
+                ProduitLine.objects
+                .order_by("-lot__received_at", "-id")
+                .values_list("id", flat=True)
+            ),
+        )
+        self.assertEqual(
+            self._all_pages("/api/inventory/produit-lines?ordering=-stock_global"),
+            list(
+                annotate_stock_totals(ProduitLine.objects.all())
+                .order_by("-stock_global", "-id")
+                .values_list("id", flat=True)
+            ),
+        )
+
+    def test_produit_lines_same_as_serializer(self):
+        self._produit_lines_with_stock(3)
+        bijouterie_id = Bijouterie.objects.order_by("id").values_list("id", flat=True)[1]
+
+        for params in ({}, {"bijouterie_id": bijouterie_id}):
+            response = self.client.get("/api/inventory/produit-lines", params)
+
+            expected = ProduitLineWithInventorySerializer(
+                annotate_stock_totals(ProduitLine.objects.all(), **params)
+                .filter(
+                    id__in=[row["id"] for row in response.json()["results"]]
+                )
+                .annotate(movements_count=Count("inventory_movements"))
+                .order_by("-lot__received_at", "-id"),
+                many=True,
+            ).data
+
+            for row in expected:
+                del row["movements"]
+
+            # Même représentation, clés dans le même ordre.
+            self.assertEqual(
+                json.dumps(response.json()["results"]),
+                json.dumps(json.loads(JSONRenderer().render(expected))),
+            )
+
+        self.assertEqual(len(expected), 1)
+        self.assertEqual(expected[0]["marque_nom"], "Local")
+        self.assertEqual(expected[0]["stock_magasin"], 5)
+        self.assertEqual(expected[0]["quantite_allouee_vendeur"], 4)
+        self.assertEqual(expected[0]["stock_global"], 9)
+
+    def test_produit_line_movements_expand_and_sub_resource(self):
+        self._produit_lines_with_stock(2)
+        produit_line = ProduitLine.objects.order_by("id").first()
+
+        with self.assertNumQueries(7):
+            data = self.client.get(
+                "/api/inventory/produit-lines",
+                {"expand": "movements"},
+            ).json()
+
+        lines = {row["id"]: row for row in data["results"]}
+        expected = InventoryMovementSerializer(
+            produit_line.inventory_movements.order_by("-occurred_at", "-id"),
+            many=True,
+        ).data
+
+        self.assertEqual(
+            json.dumps(lines[produit_line.id]["movements"]),
+            json.dumps(json.loads(JSONRenderer().render(expected))),
+        )
+
+        url = f"/api/inventory/produit-lines/{produit_line.id}/movements"
+        first = self.client.get(url, {"page_size": 2}).json()
+        second = self.client.get(
+            url,
+            {"page_size": 2, "cursor": first["next_cursor"]},
+        ).json()
+
+        self.assertEqual(
+            [row["id"] for row in first["results"] + second["results"]],
+            [row["id"] for row in expected],
+        )
+        self.assertFalse(second["has_more"])
+
+        self.assertEqual(
+            self.client.get(
+                "/api/inventory/produit-lines",
+                {"expand": "tout"},
+            ).status_code,
+            400,
+        )
+
+        # Caissier d'une autre bijouterie : ligne hors périmètre.
+        autre = ProduitLine.objects.exclude(pk=produit_line.pk).get()
+        cashier = Cashier.objects.create(
+            user=get_user_model().objects.create_user(
+                email="cashier.pl@example.com",
+                password="secret",
+            ),
+            bijouterie=autre.lot.achat.bijouterie,
+            verifie=True,
+        )
+        self.client.force_authenticate(cashier.user)
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            [
+                row["id"]
+                for row in self.client.get(
+                    "/api/inventory/produit-lines"
+                ).json()["results"]
+            ],
+            [autre.id],
+        )
+
+
+class InventoryBalanceTests(TestCase):
+    """
+    Soldes InventoryBalance : mise à jour par InventoryMovement
+    (création, modification, suppression) et reconstruction depuis
+    le journal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Sandaga")
+
+        cls.produit = Produit.objects.create(
+            poids=Decimal("3.00"),
+            categorie=categorie,
+            modele=Modele.objects.get_or_create(
+                modele="Alliance",
+                categorie=categorie,
+            )[0],
+            purete=Purete.objects.get_or_create(purete="18")[0],
+            marque=Marque.objects.get_or_create(marque="Local")[0],
+        )
+
+        cls.produit_line = ProduitLine.objects.create(
+            lot=Lot.objects.create(
+                achat=Achat.objects.create(
+                    fournisseur=Fournisseur.objects.create(telephone="770009999"),
+                    bijouterie=cls.bijouterie,
+                ),
+                numero_lot="LOT-SOLDE",
+            ),
+            produit=cls.produit,
+            prix_achat_gramme=Decimal("1000.00"),
+            quantite=10,
+        )
+
+    def _purchase(self, qty):
+        return log_move(
+            produit=self.produit,
+            qty=qty,
+            movement_type=MovementType.PURCHASE_IN,
+            src_bucket=Bucket.EXTERNAL,
+            dst_bucket=Bucket.BIJOUTERIE,
+            dst_bijouterie_id=self.bijouterie.id,
+            produit_line=self.produit_line,
+            lock=False,
+        )
+
+    def _balance(self):
+        return InventoryBalance.objects.get(
+            bijouterie=self.bijouterie,
+            produit_line=self.produit_line,
+        )
+
+    def test_movement_update_and_delete(self):
+        movement = self._purchase(10)
+        self._purchase(2)
+
+        movement.qty = 7
+        movement.save()
+
+        balance = self._balance()
+        self.assertEqual(balance.purchase_in, 9)
+        self.assertEqual(balance.stock_magasin, 9)
+
+        movement.delete()
+
+        balance = self._balance()
+        self.assertEqual(balance.purchase_in, 2)
+        self.assertEqual(balance.stock_magasin, 2)
+        self.assertEqual(verify_inventory_balances(), [])
+
+    def test_balance_without_line_is_unique(self):
+        InventoryBalance.objects.create(
+            bijouterie=self.bijouterie,
+            produit=self.produit,
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InventoryBalance.objects.create(
+                bijouterie=self.bijouterie,
+                produit=self.produit,
+            )
+
+        # Ligne existante : mise à jour, pas de second solde.
+        InventoryBalance.objects.all().delete()
+        movement = InventoryMovement(
+            produit=self.produit,
+            qty=3,
+            movement_type=MovementType.PURCHASE_IN,
+            dst_bijouterie_id=self.bijouterie.id,
+        )
+        InventoryBalance.apply_movements([movement])
+        InventoryBalance.apply_movements([movement])
+
+        balance = InventoryBalance.objects.get()
+        self.assertIsNone(balance.produit_line_id)
+        self.assertEqual(balance.stock_magasin, 6)
+
+    def test_rebuild_command_and_verify_only(self):
+        self._purchase(10)
+
+        InventoryBalance.objects.update(stock_magasin=99)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_inventory_balances",
+                "--verify-only",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        self.assertEqual(self._balance().stock_magasin, 99)
+
+        out = StringIO()
+        call_command(
+            "rebuild_inventory_balances",
+            "--bijouterie",
+            str(self.bijouterie.id),
+            stdout=out,
+        )
+
+        self.assertIn("1 solde(s) reconstruit(s).", out.getvalue())
+        self.assertEqual(self._balance().stock_magasin, 10)
+        self.assertEqual(self._balance().produit_line_key, self.produit_line.id)
 
-# Create your tests here.
+        out = StringIO()
+        call_command("rebuild_inventory_balances", "--verify-only", stdout=out)
+        self.assertIn("Soldes cohérents", out.getvalue())
@@ -2,25 +2,34 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models import (Case, Exists, F, IntegerField, OuterRef, Q,
+                              Sum, Value, When)
 from django.db.models.functions import Coalesce
 from django.utils.dateparse import parse_date, parse_datetime
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.exceptions import (NotFound, PermissionDenied,
+                                       ValidationError)
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import date_range_filter
+from backend.pagination import KeysetPagination
 from backend.roles import (ROLE_ADMIN, ROLE_CASHIER, ROLE_MANAGER, ROLE_VENDOR,
                            get_role_name)
-from inventory.models import Bucket, InventoryMovement, MovementType
+from inventory.models import (Bucket, InventoryBalance, InventoryMovement,
+                              MovementType)
+from inventory.selectors.produit_lines import (annotate_stock_totals,
+                                               produit_line_inventory_rows)
 from inventory.serializers import (InventoryBijouterieSerializer,
+                                   InventoryMovementRows,
                                    InventoryMovementSerializer,
                                    InventoryVendorSerializer,
                                    ProduitLineWithInventorySerializer)
 from purchase.models import ProduitLine
+from search.selectors import search
 from stock.models import Stock, VendorStock
 from store.models import Bijouterie
 from vendor.models import Vendor
@@ -250,6 +259,13 @@ class InventoryMovementListView(ListAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        # Journal complet (sans pagination) : lignes values(),
+        # même représentation qu'InventoryMovementSerializer.
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return Response(InventoryMovementRows().rows(queryset))
+
     # ========================================================
     # Helpers
     # ========================================================
@@ -639,15 +655,13 @@ class InventoryMovementListView(ListAPIView):
                 )
             })
 
-        if date_from:
-            queryset = queryset.filter(
-                occurred_at__date__gte=date_from,
-            )
-
-        if date_to:
-            queryset = queryset.filter(
-                occurred_at__date__lte=date_to,
+        queryset = queryset.filter(
+            **date_range_filter(
+                "occurred_at",
+                date_from,
+                date_to,
             )
+        )
 
         # ====================================================
         # Quantités
@@ -729,7 +743,125 @@ class InventoryMovementListView(ListAPIView):
     
 
 
-class ProduitLineWithInventoryListView(ListAPIView):
+class ProduitLineScopeMixin:
+    """
+    Périmètre des ProduitLine selon le rôle (liste avec inventaire et
+    historique des mouvements d'une ligne).
+
+    Les conditions sont des EXISTS corrélés : aucune jointure vers
+    les stocks ou les mouvements, donc ni doublons ni DISTINCT.
+    """
+
+    @staticmethod
+    def _verified_profile(user, attribute):
+        profile = getattr(user, attribute, None)
+
+        if not profile:
+            return None
+
+        if not getattr(profile, "verifie", True):
+            return None
+
+        return profile
+
+    @staticmethod
+    def _in_bijouteries(bijouterie_ids):
+        """
+        ProduitLine présente dans ces bijouteries : stock magasin,
+        stock vendeur ou mouvement (source ou destination).
+        """
+
+        return (
+            Exists(
+                Stock.objects.filter(
+                    produit_line_id=OuterRef("pk"),
+                    bijouterie_id__in=bijouterie_ids,
+                )
+            )
+            | Exists(
+                VendorStock.objects.filter(
+                    produit_line_id=OuterRef("pk"),
+                    bijouterie_id__in=bijouterie_ids,
+                )
+            )
+            | Exists(
+                InventoryMovement.objects.filter(
+                    Q(src_bijouterie_id__in=bijouterie_ids)
+                    | Q(dst_bijouterie_id__in=bijouterie_ids),
+                    produit_line_id=OuterRef("pk"),
+                )
+            )
+        )
+
+    @staticmethod
+    def _with_vendor(vendor_id):
+        return Exists(
+            VendorStock.objects.filter(
+                produit_line_id=OuterRef("pk"),
+                vendor_id=vendor_id,
+            )
+        )
+
+    def _apply_role_scope(self, queryset):
+        user = self.request.user
+        role = get_role_name(user)
+
+        if role == ROLE_ADMIN:
+            return queryset
+
+        if role == ROLE_MANAGER:
+            manager = self._verified_profile(
+                user,
+                "staff_manager_profile",
+            )
+
+            if not manager:
+                return queryset.none()
+
+            return queryset.filter(
+                self._in_bijouteries(
+                    manager.bijouteries.values("id"),
+                )
+            )
+
+        if role == ROLE_CASHIER:
+            cashier = self._verified_profile(
+                user,
+                "staff_cashier_profile",
+            )
+
+            if not cashier or not cashier.bijouterie_id:
+                return queryset.none()
+
+            return queryset.filter(
+                self._in_bijouteries(
+                    [cashier.bijouterie_id],
+                )
+            )
+
+        if role == ROLE_VENDOR:
+            vendor = (
+                self._verified_profile(
+                    user,
+                    "vendor_profile",
+                )
+                or self._verified_profile(
+                    user,
+                    "staff_vendor_profile",
+                )
+            )
+
+            if not vendor:
+                return queryset.none()
+
+            return queryset.filter(
+                self._with_vendor(vendor.id),
+            )
+
+        return queryset.none()
+
+
+class ProduitLineWithInventoryListView(ProduitLineScopeMixin, ListAPIView):
     """
     Liste détaillée des ProduitLine avec :
 
@@ -741,7 +873,14 @@ class ProduitLineWithInventoryListView(ListAPIView):
     - stock vendeur ;
     - quantité vendue ;
     - quantité retournée ;
-    - mouvements d'inventaire.
+    - mouvements d'inventaire (expand=movements).
+
+    Pagination par curseur obligatoire (page_size 50 par défaut,
+    200 au plus). Les lignes d'une page sont construites par
+    produit_line_inventory_rows() en un nombre fixe de requêtes ;
+    les mouvements ne sont inclus que sur demande (expand=movements,
+    MOVEMENTS_LIMIT par ligne), l'historique complet étant servi par
+    ProduitLineMovementListView.
 
     Accès :
     - admin : toutes les ProduitLine ;
@@ -754,6 +893,14 @@ class ProduitLineWithInventoryListView(ListAPIView):
     serializer_class = ProduitLineWithInventorySerializer
     pagination_class = None
 
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    MOVEMENTS_LIMIT = 20
+
+    ALLOWED_EXPAND = {
+        "movements",
+    }
+
     ALLOWED_ORDERING = {
         "id",
         "-id",
@@ -773,6 +920,14 @@ class ProduitLineWithInventoryListView(ListAPIView):
         "-stock_global",
     }
 
+    # Tris calculés : seules colonnes qui nécessitent encore les
+    # sous-requêtes d'annotate_stock_totals().
+    STOCK_ORDERING = {
+        "stock_magasin",
+        "stock_vendeur",
+        "stock_global",
+    }
+
     @swagger_auto_schema(
         operation_id="listProduitLinesWithInventory",
         operation_summary=(
@@ -787,7 +942,13 @@ class ProduitLineWithInventoryListView(ListAPIView):
             "- le stock magasin ;\n"
             "- le stock affecté aux vendeurs ;\n"
             "- les quantités vendues ;\n"
-            "- les mouvements d'inventaire associés.\n\n"
+            "- le nombre de mouvements d'inventaire (movements_count).\n\n"
+            "Pagination par curseur : la réponse contient page_size, "
+            "next_cursor, has_more et results ; passer next_cursor dans "
+            "cursor pour la page suivante.\n\n"
+            "expand=movements ajoute les 20 mouvements les plus récents "
+            "de chaque ligne ; l'historique complet est paginé par "
+            "/inventory/produit-lines/{id}/movements.\n\n"
             "Le résultat est automatiquement limité selon le rôle "
             "de l'utilisateur connecté."
         ),
@@ -797,7 +958,8 @@ class ProduitLineWithInventoryListView(ListAPIView):
                 openapi.IN_QUERY,
                 description=(
                     "Recherche par produit, SKU, lot, achat, "
-                    "fournisseur ou description."
+                    "fournisseur ou description : début de mot, "
+                    "ou fragment pour les SKU, numéros et téléphones."
                 ),
                 type=openapi.TYPE_STRING,
             ),
@@ -885,6 +1047,41 @@ class ProduitLineWithInventoryListView(ListAPIView):
                 ),
                 type=openapi.TYPE_STRING,
             ),
+            openapi.Parameter(
+                "expand",
+                openapi.IN_QUERY,
+                description=(
+                    "movements : inclure les mouvements les plus "
+                    "récents de chaque ligne."
+                ),
+                type=openapi.TYPE_STRING,
+                enum=sorted(ALLOWED_EXPAND),
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description=(
+                    "Absent pour la première page, puis la valeur "
+                    "next_cursor de la réponse précédente."
+                ),
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description="Lignes par page (50 par défaut, 200 au plus).",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "count",
+                openapi.IN_QUERY,
+                description=(
+                    "exact (COUNT complet) ou capped (compte borné). "
+                    "Absent : pas de comptage."
+                ),
+                type=openapi.TYPE_STRING,
+                enum=["exact", "capped"],
+            ),
         ],
         responses={
             200: ProduitLineWithInventorySerializer(many=True),
@@ -969,103 +1166,61 @@ class ProduitLineWithInventoryListView(ListAPIView):
             )
         })
 
-    @staticmethod
-    def _verified_profile(user, attribute):
-        profile = getattr(user, attribute, None)
-
-        if not profile:
-            return None
-
-        if not getattr(profile, "verifie", True):
-            return None
-
-        return profile
-
-    # ========================================================
-    # Scope selon le rôle
-    # ========================================================
-
-    def _apply_role_scope(self, queryset):
-        user = self.request.user
-        role = get_role_name(user)
-
-        if role == ROLE_ADMIN:
-            return queryset
-
-        if role == ROLE_MANAGER:
-            manager = self._verified_profile(
-                user,
-                "staff_manager_profile",
-            )
+    def _get_stock_filters(self):
+        params = self.request.query_params
 
-            if not manager:
-                return queryset.none()
+        return (
+            self._parse_positive_int(
+                params.get("bijouterie_id"),
+                "bijouterie_id",
+            ),
+            self._parse_positive_int(
+                params.get("vendor_id"),
+                "vendor_id",
+            ),
+        )
 
-            bijouterie_ids = manager.bijouteries.values_list(
-                "id",
-                flat=True,
-            )
+    def _get_ordering(self):
+        ordering = (
+            self.request.query_params.get("ordering")
+            or "-lot__received_at"
+        ).strip()
 
-            return queryset.filter(
-                Q(stocks__bijouterie_id__in=bijouterie_ids)
-                | Q(
-                    vendor_stocks__bijouterie_id__in=
-                    bijouterie_ids
-                )
-                | Q(
-                    inventory_movements__src_bijouterie_id__in=
-                    bijouterie_ids
-                )
-                | Q(
-                    inventory_movements__dst_bijouterie_id__in=
-                    bijouterie_ids
+        if ordering not in self.ALLOWED_ORDERING:
+            raise ValidationError({
+                "ordering": (
+                    "Tri invalide. Valeurs autorisées : "
+                    + ", ".join(
+                        sorted(self.ALLOWED_ORDERING)
+                    )
                 )
-            ).distinct()
+            })
 
-        if role == ROLE_CASHIER:
-            cashier = self._verified_profile(
-                user,
-                "staff_cashier_profile",
-            )
+        if ordering.lstrip("-") == "id":
+            return (ordering,)
 
-            if not cashier or not cashier.bijouterie_id:
-                return queryset.none()
+        return (ordering, "-id")
 
-            bijouterie_id = cashier.bijouterie_id
+    def _get_expand(self):
+        expand = {
+            part.strip()
+            for part in (
+                self.request.query_params.get("expand") or ""
+            ).split(",")
+            if part.strip()
+        }
 
-            return queryset.filter(
-                Q(stocks__bijouterie_id=bijouterie_id)
-                | Q(vendor_stocks__bijouterie_id=bijouterie_id)
-                | Q(
-                    inventory_movements__src_bijouterie_id=
-                    bijouterie_id
-                )
-                | Q(
-                    inventory_movements__dst_bijouterie_id=
-                    bijouterie_id
-                )
-            ).distinct()
+        invalid = expand - self.ALLOWED_EXPAND
 
-        if role == ROLE_VENDOR:
-            vendor = (
-                self._verified_profile(
-                    user,
-                    "vendor_profile",
-                )
-                or self._verified_profile(
-                    user,
-                    "staff_vendor_profile",
+        if invalid:
+            raise ValidationError({
+                "expand": (
+                    "Valeur invalide. Valeurs autorisées : "
+                    + ", ".join(sorted(self.ALLOWED_EXPAND))
                 )
-            )
-
-            if not vendor:
-                return queryset.none()
-
-            return queryset.filter(
-                vendor_stocks__vendor_id=vendor.id,
-            ).distinct()
+            })
 
-        return queryset.none()
+        return expand
 
     # ========================================================
     # Queryset
@@ -1074,238 +1229,43 @@ class ProduitLineWithInventoryListView(ListAPIView):
     def get_queryset(self):
         params = self.request.query_params
 
-        bijouterie_id = self._parse_positive_int(
-            params.get("bijouterie_id"),
-            "bijouterie_id",
-        )
-
-        vendor_id = self._parse_positive_int(
-            params.get("vendor_id"),
-            "vendor_id",
-        )
-
-        # ----------------------------------------------------
-        # Sous-requête stock magasin
-        # ----------------------------------------------------
-
-        stock_magasin_queryset = (
-            Stock.objects
-            .filter(
-                produit_line_id=OuterRef("pk"),
-            )
-        )
-
-        if bijouterie_id is not None:
-            stock_magasin_queryset = (
-                stock_magasin_queryset.filter(
-                    bijouterie_id=bijouterie_id,
-                )
-            )
-
-        stock_magasin_subquery = (
-            stock_magasin_queryset
-            .values("produit_line_id")
-            .annotate(total=Sum("en_stock"))
-            .values("total")[:1]
-        )
-
-        # ----------------------------------------------------
-        # Sous-requête entrées cumulées magasin
-        # ----------------------------------------------------
-
-        quantite_totale_queryset = (
-            Stock.objects
-            .filter(
-                produit_line_id=OuterRef("pk"),
-            )
-        )
-
-        if bijouterie_id is not None:
-            quantite_totale_queryset = (
-                quantite_totale_queryset.filter(
-                    bijouterie_id=bijouterie_id,
-                )
-            )
-
-        quantite_totale_subquery = (
-            quantite_totale_queryset
-            .values("produit_line_id")
-            .annotate(total=Sum("quantite_totale"))
-            .values("total")[:1]
-        )
+        bijouterie_id, vendor_id = self._get_stock_filters()
 
-        # ----------------------------------------------------
-        # Sous-requêtes stock vendeur
-        # ----------------------------------------------------
-
-        vendor_stock_queryset = (
-            VendorStock.objects
-            .filter(
-                produit_line_id=OuterRef("pk"),
-            )
-        )
-
-        if bijouterie_id is not None:
-            vendor_stock_queryset = (
-                vendor_stock_queryset.filter(
-                    bijouterie_id=bijouterie_id,
-                )
-            )
-
-        if vendor_id is not None:
-            vendor_stock_queryset = (
-                vendor_stock_queryset.filter(
-                    vendor_id=vendor_id,
-                )
-            )
-
-        quantite_allouee_subquery = (
-            vendor_stock_queryset
-            .values("produit_line_id")
-            .annotate(total=Sum("quantite_allouee"))
-            .values("total")[:1]
-        )
-
-        quantite_vendue_subquery = (
-            vendor_stock_queryset
-            .values("produit_line_id")
-            .annotate(total=Sum("quantite_vendue"))
-            .values("total")[:1]
-        )
-
-        # ----------------------------------------------------
-        # Quantité retournée
-        # ----------------------------------------------------
-
-        returned_queryset = (
-            InventoryMovement.objects
-            .filter(
-                produit_line_id=OuterRef("pk"),
-                movement_type=MovementType.RETURN_IN,
-            )
+        has_stock = self._parse_boolean(
+            params.get("has_stock"),
+            "has_stock",
         )
 
-        if bijouterie_id is not None:
-            returned_queryset = returned_queryset.filter(
-                dst_bijouterie_id=bijouterie_id,
-            )
+        ordering = self._get_ordering()
 
-        returned_subquery = (
-            returned_queryset
-            .values("produit_line_id")
-            .annotate(total=Sum("qty"))
-            .values("total")[:1]
-        )
-
-        # ----------------------------------------------------
-        # Queryset principal
-        # ----------------------------------------------------
+        queryset = ProduitLine.objects.all()
 
-        queryset = (
-            ProduitLine.objects
-            .select_related(
-                "produit",
-                "produit__categorie",
-                "produit__modele",
-                "produit__marque",
-                "produit__purete",
-                "lot",
-                "lot__achat",
-                "lot__achat__fournisseur",
-                "lot__achat__bijouterie",
-            )
-            .prefetch_related(
-                "stocks",
-                "stocks__bijouterie",
-                "vendor_stocks",
-                "vendor_stocks__vendor",
-                "vendor_stocks__vendor__user",
-                "vendor_stocks__bijouterie",
-                "inventory_movements",
-                "inventory_movements__src_bijouterie",
-                "inventory_movements__dst_bijouterie",
-                "inventory_movements__vendor",
-                "inventory_movements__created_by",
-            )
-            .annotate(
-                stock_magasin=Coalesce(
-                    Subquery(
-                        stock_magasin_subquery,
-                        output_field=IntegerField(),
-                    ),
-                    Value(0),
-                ),
-                quantite_entree_cumulee=Coalesce(
-                    Subquery(
-                        quantite_totale_subquery,
-                        output_field=IntegerField(),
-                    ),
-                    Value(0),
-                ),
-                quantite_allouee_vendeur=Coalesce(
-                    Subquery(
-                        quantite_allouee_subquery,
-                        output_field=IntegerField(),
-                    ),
-                    Value(0),
-                ),
-                quantite_vendue=Coalesce(
-                    Subquery(
-                        quantite_vendue_subquery,
-                        output_field=IntegerField(),
-                    ),
-                    Value(0),
-                ),
-                quantite_retournee=Coalesce(
-                    Subquery(
-                        returned_subquery,
-                        output_field=IntegerField(),
-                    ),
-                    Value(0),
-                ),
-            )
-            .annotate(
-                stock_vendeur=(
-                    F("quantite_allouee_vendeur")
-                    - F("quantite_vendue")
-                ),
-                stock_global=(
-                    F("stock_magasin")
-                    + F("quantite_allouee_vendeur")
-                    - F("quantite_vendue")
-                ),
+        # Sous-requêtes de stock : uniquement pour trier ou filtrer
+        # sur ces colonnes. L'affichage les recalcule sur la page.
+        if (
+            has_stock is not None
+            or ordering[0].lstrip("-") in self.STOCK_ORDERING
+        ):
+            queryset = annotate_stock_totals(
+                queryset,
+                bijouterie_id=bijouterie_id,
+                vendor_id=vendor_id,
             )
-        )
 
         queryset = self._apply_role_scope(queryset)
 
         # ====================================================
-        # Filtres simples
-        # ====================================================
-
-        q = (params.get("q") or "").strip()
-
-        if q:
-            queryset = queryset.filter(
-                Q(produit__nom__icontains=q)
-                | Q(produit__sku__icontains=q)
-                | Q(lot__numero_lot__icontains=q)
-                | Q(lot__description__icontains=q)
-                | Q(
-                    lot__achat__numero_achat__icontains=q
-                )
-                | Q(
-                    lot__achat__description__icontains=q
-                )
-                | Q(
-                    lot__achat__fournisseur__nom__icontains=q
-                )
-                | Q(
-                    lot__achat__fournisseur__prenom__icontains=q
-                )
-                | Q(
-                    lot__achat__fournisseur__telephone__icontains=q
-                )
+        # Filtres simples
+        # ====================================================
+
+        q = (params.get("q") or "").strip()
+
+        if q:
+            # Produit, SKU, lot, achat, fournisseur : index de recherche.
+            queryset = search(
+                queryset,
+                q,
+                kind="produit_line",
             )
 
         year = self._parse_year(
@@ -1349,24 +1309,12 @@ class ProduitLineWithInventoryListView(ListAPIView):
 
         if bijouterie_id is not None:
             queryset = queryset.filter(
-                Q(stocks__bijouterie_id=bijouterie_id)
-                | Q(
-                    vendor_stocks__bijouterie_id=
-                    bijouterie_id
-                )
-                | Q(
-                    inventory_movements__src_bijouterie_id=
-                    bijouterie_id
-                )
-                | Q(
-                    inventory_movements__dst_bijouterie_id=
-                    bijouterie_id
-                )
+                self._in_bijouteries([bijouterie_id]),
             )
 
         if vendor_id is not None:
             queryset = queryset.filter(
-                vendor_stocks__vendor_id=vendor_id,
+                self._with_vendor(vendor_id),
             )
 
         movement_type = (
@@ -1388,15 +1336,14 @@ class ProduitLineWithInventoryListView(ListAPIView):
                 })
 
             queryset = queryset.filter(
-                inventory_movements__movement_type=
-                movement_type,
+                Exists(
+                    InventoryMovement.objects.filter(
+                        produit_line_id=OuterRef("pk"),
+                        movement_type=movement_type,
+                    )
+                )
             )
 
-        has_stock = self._parse_boolean(
-            params.get("has_stock"),
-            "has_stock",
-        )
-
         if has_stock is True:
             queryset = queryset.filter(
                 stock_global__gt=0,
@@ -1407,30 +1354,127 @@ class ProduitLineWithInventoryListView(ListAPIView):
                 stock_global=0,
             )
 
-        # ====================================================
-        # Tri
-        # ====================================================
+        # Tri appliqué par KeysetPagination.
+        return queryset
 
-        ordering = (
-            params.get("ordering")
-            or "-lot__received_at"
-        ).strip()
+    # ========================================================
+    # Liste paginée
+    # ========================================================
 
-        if ordering not in self.ALLOWED_ORDERING:
-            raise ValidationError({
-                "ordering": (
-                    "Tri invalide. Valeurs autorisées : "
-                    + ", ".join(
-                        sorted(self.ALLOWED_ORDERING)
-                    )
+    def list(self, request, *args, **kwargs):
+        ordering = self._get_ordering()
+        expand = self._get_expand()
+        bijouterie_id, vendor_id = self._get_stock_filters()
+
+        keyset = KeysetPagination(
+            ordering=ordering,
+            default_page_size=self.PAGE_SIZE,
+            max_page_size=self.MAX_PAGE_SIZE,
+        )
+
+        # Page : identifiants et valeurs du tri seulement ; les lignes
+        # sont ensuite lues par clé primaire.
+        page = keyset.paginate_queryset(
+            self.filter_queryset(self.get_queryset()).values(
+                *dict.fromkeys(
+                    ["id"] + [name.lstrip("-") for name in ordering]
                 )
-            })
+            ),
+            request,
+        )
 
-        return queryset.distinct().order_by(
-            ordering,
-            "-id",
+        return Response(
+            keyset.get_response_data(
+                produit_line_inventory_rows(
+                    (row["id"] for row in page),
+                    bijouterie_id=bijouterie_id,
+                    vendor_id=vendor_id,
+                    movements_limit=(
+                        self.MOVEMENTS_LIMIT
+                        if "movements" in expand
+                        else 0
+                    ),
+                )
+            )
+        )
+
+
+class ProduitLineMovementListView(ProduitLineScopeMixin, APIView):
+    """
+    Historique des mouvements d'inventaire d'une ProduitLine, du plus
+    récent au plus ancien, paginé par curseur.
+
+    Même périmètre que ProduitLineWithInventoryListView : une ligne
+    hors du périmètre de l'utilisateur renvoie 404.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @swagger_auto_schema(
+        operation_id="listProduitLineMovements",
+        operation_summary="Mouvements d'une ProduitLine",
+        operation_description=(
+            "Mouvements d'inventaire de la ProduitLine, du plus récent "
+            "au plus ancien. Pagination par curseur : passer "
+            "next_cursor dans cursor pour la page suivante."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description=(
+                    "Absent pour la première page, puis la valeur "
+                    "next_cursor de la réponse précédente."
+                ),
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description="Mouvements par page (50 par défaut, 200 au plus).",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+        responses={
+            200: InventoryMovementSerializer(many=True),
+            404: "ProduitLine introuvable.",
+        },
+    )
+    def get(self, request, produit_line_id):
+        visible = self._apply_role_scope(
+            ProduitLine.objects.filter(pk=produit_line_id)
+        ).exists()
+
+        if not visible:
+            raise NotFound("ProduitLine introuvable.")
+
+        keyset = KeysetPagination(
+            ordering=("-occurred_at", "-id"),
+            default_page_size=self.PAGE_SIZE,
+            max_page_size=self.MAX_PAGE_SIZE,
+        )
+
+        serializer = InventoryMovementRows()
+
+        movements = keyset.paginate_queryset(
+            serializer.values(
+                InventoryMovement.objects.filter(
+                    produit_line_id=produit_line_id,
+                )
+            ),
+            request,
+        )
+
+        return Response(
+            keyset.get_response_data([
+                serializer.to_representation(movement)
+                for movement in movements
+            ])
         )
-        
+
 
 class InventoryBijouterieView(APIView):
     """
@@ -1461,6 +1505,9 @@ class InventoryBijouterieView(APIView):
 
     VENDOR_ASSIGN ne diminue donc pas le stock global :
     il déplace seulement le stock du magasin vers un vendeur.
+
+    Sans filtre de date, les totaux sont lus dans InventoryBalance.
+    Avec date_from / date_to, ils sont recalculés depuis le journal.
     """
 
     permission_classes = [IsAuthenticated]
@@ -1575,43 +1622,62 @@ class InventoryBijouterieView(APIView):
                 id=bijouterie_id,
             )
 
-        movements = InventoryMovement.objects.all()
-
-        if date_from:
-            movements = movements.filter(
-                occurred_at__date__gte=date_from,
+        # Sans filtre de date, les soldes matérialisés InventoryBalance
+        # suffisent : pas de parcours du journal.
+        if not date_from and not date_to:
+            totals_by_bijouterie = self._aggregate_balances(
+                bijouteries=bijouteries,
+                produit_id=produit_id,
+                lot_id=lot_id,
+                produit_line_id=produit_line_id,
             )
 
-        if date_to:
-            movements = movements.filter(
-                occurred_at__date__lte=date_to,
-            )
+        else:
+            movements = InventoryMovement.objects.all()
 
-        if produit_id is not None:
             movements = movements.filter(
-                produit_id=produit_id,
+                **date_range_filter(
+                    "occurred_at",
+                    date_from,
+                    date_to,
+                )
             )
 
-        if lot_id is not None:
-            movements = movements.filter(
-                lot_id=lot_id,
-            )
+            if produit_id is not None:
+                movements = movements.filter(
+                    produit_id=produit_id,
+                )
 
-        if produit_line_id is not None:
-            movements = movements.filter(
-                produit_line_id=produit_line_id,
+            if lot_id is not None:
+                movements = movements.filter(
+                    lot_id=lot_id,
+                )
+
+            if produit_line_id is not None:
+                movements = movements.filter(
+                    produit_line_id=produit_line_id,
+                )
+
+            totals_by_bijouterie = self._aggregate_movements(
+                bijouteries=bijouteries,
+                movements=movements,
             )
 
         results = []
 
         for bijouterie in bijouteries.order_by("nom", "id"):
-            summary = self._build_summary(
-                bijouterie=bijouterie,
-                movements=movements,
+            totals = totals_by_bijouterie.get(bijouterie.id, {})
+
+            results.append(
+                self._summary_payload(
+                    bijouterie=bijouterie,
+                    **{
+                        field: int(totals.get(field) or 0)
+                        for field in InventoryBalance.COUNTER_FIELDS
+                    },
+                )
             )
 
-            results.append(summary)
-
         serializer = InventoryBijouterieSerializer(
             results,
             many=True,
@@ -1743,112 +1809,159 @@ class InventoryBijouterieView(APIView):
     # Calcul des quantités
     # ========================================================
 
-    @staticmethod
-    def _sum_qty(queryset):
-        return (
-            queryset.aggregate(
-                total=Coalesce(
-                    Sum("qty"),
-                    0,
-                )
-            )["total"]
-            or 0
-        )
-
-    def _build_summary(self, *, bijouterie, movements):
-        bijouterie_id = bijouterie.id
-
-        # ----------------------------------------------------
-        # Entrée fournisseur dans la bijouterie
-        # ----------------------------------------------------
-
-        purchase_in = self._sum_qty(
-            movements.filter(
+    # Compteur -> (condition sur le mouvement, bijouterie concernée).
+    #
+    # SALE_OUT est rattaché à la bijouterie du vendeur.
+    MOVEMENT_COUNTERS = {
+        "purchase_in": (
+            Q(
                 movement_type=MovementType.PURCHASE_IN,
                 src_bucket=Bucket.EXTERNAL,
                 dst_bucket=Bucket.BIJOUTERIE,
-                dst_bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Annulation d'achat : sortie de la bijouterie
-        # ----------------------------------------------------
-
-        cancel_purchase_out = self._sum_qty(
-            movements.filter(
+            ),
+            "dst_bijouterie_id",
+        ),
+        "cancel_purchase_out": (
+            Q(
                 movement_type=MovementType.CANCEL_PURCHASE,
                 src_bucket=Bucket.BIJOUTERIE,
                 dst_bucket=Bucket.EXTERNAL,
-                src_bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Affectation au vendeur
-        # ----------------------------------------------------
-
-        vendor_assign_out = self._sum_qty(
-            movements.filter(
+            ),
+            "src_bijouterie_id",
+        ),
+        "vendor_assign_out": (
+            Q(
                 movement_type=MovementType.VENDOR_ASSIGN,
                 src_bucket=Bucket.BIJOUTERIE,
                 dst_bucket=Bucket.VENDOR,
-                src_bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Vente depuis un vendeur de cette bijouterie
-        # ----------------------------------------------------
-
-        sale_out = self._sum_qty(
-            movements.filter(
+            ),
+            "src_bijouterie_id",
+        ),
+        "sale_out": (
+            Q(
                 movement_type=MovementType.SALE_OUT,
                 src_bucket=Bucket.VENDOR,
                 dst_bucket=Bucket.EXTERNAL,
-                vendor__bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Retour client dans la bijouterie
-        # ----------------------------------------------------
-
-        return_in = self._sum_qty(
-            movements.filter(
+            ),
+            "vendor__bijouterie_id",
+        ),
+        "return_in": (
+            Q(
                 movement_type=MovementType.RETURN_IN,
                 src_bucket=Bucket.EXTERNAL,
                 dst_bucket=Bucket.BIJOUTERIE,
-                dst_bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Ajustement positif
-        # ----------------------------------------------------
-
-        adjustment_in = self._sum_qty(
-            movements.filter(
+            ),
+            "dst_bijouterie_id",
+        ),
+        "adjustment_in": (
+            Q(
                 movement_type=MovementType.ADJUSTMENT,
                 src_bucket=Bucket.EXTERNAL,
                 dst_bucket=Bucket.BIJOUTERIE,
-                dst_bijouterie_id=bijouterie_id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Ajustement négatif
-        # ----------------------------------------------------
-
-        adjustment_out = self._sum_qty(
-            movements.filter(
+            ),
+            "dst_bijouterie_id",
+        ),
+        "adjustment_out": (
+            Q(
                 movement_type=MovementType.ADJUSTMENT,
                 src_bucket=Bucket.BIJOUTERIE,
                 dst_bucket=Bucket.EXTERNAL,
-                src_bijouterie_id=bijouterie_id,
-            )
+            ),
+            "src_bijouterie_id",
+        ),
+    }
+
+    def _aggregate_movements(self, *, bijouteries, movements):
+        """
+        Une seule requête groupée par bijouterie :
+
+            SELECT shop_id, SUM(CASE WHEN ... THEN qty ELSE 0 END), ...
+            GROUP BY shop_id
+        """
+
+        shop_id = Case(
+            *[
+                When(condition, then=F(field))
+                for condition, field in self.MOVEMENT_COUNTERS.values()
+            ],
+            default=Value(None),
+            output_field=IntegerField(),
+        )
+
+        rows = (
+            movements
+            .annotate(shop_id=shop_id)
+            .filter(shop_id__in=bijouteries.values("id"))
+            .order_by()
+            .values("shop_id")
+            .annotate(**{
+                counter: Coalesce(
+                    Sum(
+                        Case(
+                            When(condition, then=F("qty")),
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        )
+                    ),
+                    0,
+                )
+                for counter, (condition, _) in self.MOVEMENT_COUNTERS.items()
+            })
+        )
+
+        return {
+            row["shop_id"]: row
+            for row in rows
+        }
+
+    @staticmethod
+    def _aggregate_balances(
+        *,
+        bijouteries,
+        produit_id=None,
+        lot_id=None,
+        produit_line_id=None,
+    ):
+        balances = InventoryBalance.objects.filter(
+            bijouterie_id__in=bijouteries.values("id"),
+        )
+
+        if produit_id is not None:
+            balances = balances.filter(produit_id=produit_id)
+
+        if lot_id is not None:
+            balances = balances.filter(lot_id=lot_id)
+
+        if produit_line_id is not None:
+            balances = balances.filter(produit_line_id=produit_line_id)
+
+        rows = (
+            balances
+            .order_by()
+            .values("bijouterie_id")
+            .annotate(**{
+                field: Coalesce(Sum(field), 0)
+                for field in InventoryBalance.COUNTER_FIELDS
+            })
         )
 
+        return {
+            row["bijouterie_id"]: row
+            for row in rows
+        }
+
+    @staticmethod
+    def _summary_payload(
+        *,
+        bijouterie,
+        purchase_in,
+        cancel_purchase_out,
+        vendor_assign_out,
+        sale_out,
+        return_in,
+        adjustment_in,
+        adjustment_out,
+    ):
         # ----------------------------------------------------
         # Stock physiquement présent en magasin
         # ----------------------------------------------------
@@ -1879,7 +1992,7 @@ class InventoryBijouterieView(APIView):
         )
 
         return {
-            "bijouterie_id": bijouterie_id,
+            "bijouterie_id": bijouterie.id,
             "bijouterie_nom": bijouterie.nom,
 
             "purchase_in": purchase_in,
@@ -2105,15 +2218,23 @@ class InventoryVendorView(APIView):
                 produit_line__lot_id=lot_id,
             )
 
-        if date_from:
-            movements = movements.filter(
-                occurred_at__date__gte=date_from,
+        movements = movements.filter(
+            **date_range_filter(
+                "occurred_at",
+                date_from,
+                date_to,
             )
+        )
 
-        if date_to:
-            movements = movements.filter(
-                occurred_at__date__lte=date_to,
-            )
+        movement_totals = self._aggregate_movements(
+            vendors=vendors,
+            movements=movements,
+        )
+
+        stock_totals = self._aggregate_vendor_stocks(
+            vendors=vendors,
+            vendor_stocks=vendor_stocks,
+        )
 
         results = []
 
@@ -2128,8 +2249,8 @@ class InventoryVendorView(APIView):
         ):
             summary = self._build_summary(
                 vendor=vendor,
-                movements=movements,
-                vendor_stocks=vendor_stocks,
+                movement_totals=movement_totals.get(vendor.id, {}),
+                stock_totals=stock_totals.get(vendor.id, {}),
             )
 
             if has_stock is True and summary["stock_restant"] <= 0:
@@ -2305,78 +2426,98 @@ class InventoryVendorView(APIView):
     # ========================================================
 
     @staticmethod
-    def _sum_qty(queryset):
-        return (
-            queryset.aggregate(
-                total=Coalesce(
-                    Sum("qty"),
+    def _aggregate_movements(*, vendors, movements):
+        """
+        Une seule requête groupée par vendeur :
+        VENDOR_ASSIGN reçus et SALE_OUT vendus.
+        """
+
+        vendor_assign = Q(
+            movement_type=MovementType.VENDOR_ASSIGN,
+            src_bucket=Bucket.BIJOUTERIE,
+            dst_bucket=Bucket.VENDOR,
+        )
+
+        sale_out = Q(
+            movement_type=MovementType.SALE_OUT,
+            src_bucket=Bucket.VENDOR,
+            dst_bucket=Bucket.EXTERNAL,
+        )
+
+        rows = (
+            movements
+            .filter(vendor_id__in=vendors.values("id"))
+            .filter(vendor_assign | sale_out)
+            .order_by()
+            .values("vendor_id")
+            .annotate(
+                vendor_assign_in=Coalesce(
+                    Sum(
+                        Case(
+                            When(vendor_assign, then=F("qty")),
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        )
+                    ),
                     0,
-                )
-            )["total"]
-            or 0
+                ),
+                sale_out_vendor=Coalesce(
+                    Sum(
+                        Case(
+                            When(sale_out, then=F("qty")),
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        )
+                    ),
+                    0,
+                ),
+            )
         )
 
+        return {
+            row["vendor_id"]: row
+            for row in rows
+        }
+
     @staticmethod
-    def _sum_vendor_stock(queryset, field):
-        return (
-            queryset.aggregate(
-                total=Coalesce(
-                    Sum(field),
-                    0,
-                )
-            )["total"]
-            or 0
+    def _aggregate_vendor_stocks(*, vendors, vendor_stocks):
+        rows = (
+            vendor_stocks
+            .filter(vendor_id__in=vendors.values("id"))
+            .order_by()
+            .values("vendor_id")
+            .annotate(
+                quantite_allouee=Coalesce(Sum("quantite_allouee"), 0),
+                quantite_vendue=Coalesce(Sum("quantite_vendue"), 0),
+            )
         )
 
+        return {
+            row["vendor_id"]: row
+            for row in rows
+        }
+
     def _build_summary(
         self,
         *,
         vendor,
-        movements,
-        vendor_stocks,
+        movement_totals,
+        stock_totals,
     ):
-        # ----------------------------------------------------
-        # Quantité affectée au vendeur selon le journal
-        # ----------------------------------------------------
-
-        vendor_assign_in = self._sum_qty(
-            movements.filter(
-                movement_type=MovementType.VENDOR_ASSIGN,
-                src_bucket=Bucket.BIJOUTERIE,
-                dst_bucket=Bucket.VENDOR,
-                vendor_id=vendor.id,
-            )
-        )
-
-        # ----------------------------------------------------
-        # Quantité vendue selon le journal
-        # ----------------------------------------------------
-
-        sale_out_vendor = self._sum_qty(
-            movements.filter(
-                movement_type=MovementType.SALE_OUT,
-                src_bucket=Bucket.VENDOR,
-                dst_bucket=Bucket.EXTERNAL,
-                vendor_id=vendor.id,
-            )
+        vendor_assign_in = int(
+            movement_totals.get("vendor_assign_in") or 0
         )
 
-        # ----------------------------------------------------
-        # État courant du VendorStock
-        # ----------------------------------------------------
-
-        current_vendor_stocks = vendor_stocks.filter(
-            vendor_id=vendor.id,
+        sale_out_vendor = int(
+            movement_totals.get("sale_out_vendor") or 0
         )
 
-        quantite_allouee = self._sum_vendor_stock(
-            current_vendor_stocks,
-            "quantite_allouee",
+        quantite_allouee = int(
+            stock_totals.get("quantite_allouee") or 0
         )
 
-        quantite_vendue = self._sum_vendor_stock(
-            current_vendor_stocks,
-            "quantite_vendue",
+        quantite_vendue = int(
+            stock_totals.get("quantite_vendue") or 0
         )
 
         stock_restant = max(
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_initial'),
+        ('person', '0002_initial'),
+        ('sale', '0010_paiement_date_index'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        ('vendor', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commandeclient',
+            index=models.Index(fields=['bijouterie', 'date_commande'], name='commande_shop_date_idx'),
+        ),
+    ]
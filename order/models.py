@@ -5,7 +5,8 @@ from decimal import Decimal
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Sum
+from django.db.models import OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from person.models import Ouvrier
@@ -21,7 +22,49 @@ def dec(v) -> Decimal:
         return Decimal(str(v))
     except Exception:
         raise ValidationError(f"Valeur décimale invalide : {v}")
-    
+
+
+class CommandeClientQuerySet(models.QuerySet):
+    def with_payment_totals(self):
+        """
+        Annote les encaissements de chaque commande :
+        - acompte_encaisse : lignes de paiement des factures d'acompte ;
+        - total_encaisse : lignes de paiement de toutes ses factures.
+
+        Sous-requêtes corrélées, groupées par commande, dans la requête
+        de la liste (au lieu d'un aggregate par commande et par
+        propriété). Les serializers lisent ces annotations quand elles
+        sont présentes ; total_acompte_paye / total_paye_global restent
+        calculées à la demande (services, commande fraîchement modifiée).
+        """
+        from django.apps import apps
+
+        PaiementLigne = apps.get_model("sale", "PaiementLigne")
+
+        lignes = (
+            PaiementLigne.objects
+            .filter(paiement__facture__commande_client=OuterRef("pk"))
+            .order_by()
+            .values("paiement__facture__commande_client")
+        )
+
+        def total(condition=None):
+            return Coalesce(
+                Subquery(
+                    lignes
+                    .annotate(total=Sum("montant_paye", filter=condition))
+                    .values("total")
+                ),
+                Value(ZERO, output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+            )
+
+        return self.annotate(
+            acompte_encaisse=total(
+                Q(paiement__facture__type_facture="acompte")
+            ),
+            total_encaisse=total(),
+        )
+
 
 class CommandeClient(models.Model):
     STATUT_BROUILLON = "BROUILLON"
@@ -88,6 +131,8 @@ class CommandeClient(models.Model):
         blank=True,
     )
 
+    objects = CommandeClientQuerySet.as_manager()
+
     class Meta:
         ordering = ["-id"]
         indexes = [
@@ -96,6 +141,10 @@ class CommandeClient(models.Model):
             models.Index(fields=["numero_commande"]),
             models.Index(fields=["statut"]),
             models.Index(fields=["date_commande"]),
+            models.Index(
+                fields=["bijouterie", "date_commande"],
+                name="commande_shop_date_idx",
+            ),
             models.Index(fields=["bijouterie", "statut"]),
             models.Index(fields=["vendor", "statut"]),
         ]
@@ -187,9 +236,6 @@ class CommandeClient(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
-        if self.commande_id:
-            self.commande.recalculate_total(save=True)
-
     @classmethod
     def generate_numero_commande(cls) -> str:
         today = timezone.localdate()
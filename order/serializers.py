@@ -30,6 +30,51 @@ def dec(v) -> Decimal:
         raise serializers.ValidationError(f"Valeur décimale invalide : {v}")
 
 
+class CommandePaymentTotalsMixin:
+    """
+    Encaissements d'une commande : annotations de
+    CommandeClient.objects.with_payment_totals() si présentes, sinon
+    les propriétés du modèle (une requête chacune).
+    """
+
+    def _total_acompte_paye(self, obj):
+        if hasattr(obj, "acompte_encaisse"):
+            return obj.acompte_encaisse
+        return obj.total_acompte_paye
+
+    def _total_paye_global(self, obj):
+        if hasattr(obj, "total_encaisse"):
+            return obj.total_encaisse
+        return obj.total_paye_global
+
+    def get_acompte_minimum_requis(self, obj):
+        return obj.acompte_minimum_requis
+
+    def get_total_acompte_paye(self, obj):
+        return self._total_acompte_paye(obj)
+
+    def get_total_paye_global(self, obj):
+        return self._total_paye_global(obj)
+
+    def get_reste_global(self, obj):
+        return max(dec(obj.montant_total) - dec(self._total_paye_global(obj)), ZERO)
+
+    def get_acompte_regle(self, obj):
+        return self._total_acompte_paye(obj) >= obj.acompte_minimum_requis
+
+    def get_peut_passer_en_production(self, obj):
+        return self.get_acompte_regle(obj) and obj.statut in [
+            CommandeClient.STATUT_BROUILLON,
+            CommandeClient.STATUT_EN_ATTENTE,
+        ]
+
+    def get_peut_etre_livree(self, obj):
+        return (
+            obj.statut == CommandeClient.STATUT_TERMINEE
+            and self.get_reste_global(obj) == ZERO
+        )
+
+
 class OuvrierSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ouvrier
@@ -173,7 +218,7 @@ class FactureMiniSerializer(serializers.ModelSerializer):
         return obj.reste_a_payer
 
 
-class CommandeClientDetailSerializer(serializers.ModelSerializer):
+class CommandeClientDetailSerializer(CommandePaymentTotalsMixin, serializers.ModelSerializer):
     client_nom = serializers.CharField(source="client.full_name", read_only=True)
     client_telephone = serializers.CharField(source="client.telephone", read_only=True)
     bijouterie_nom = serializers.CharField(source="bijouterie.nom", read_only=True)
@@ -232,27 +277,6 @@ class CommandeClientDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
-    def get_acompte_minimum_requis(self, obj):
-        return obj.acompte_minimum_requis
-
-    def get_total_acompte_paye(self, obj):
-        return obj.total_acompte_paye
-
-    def get_total_paye_global(self, obj):
-        return obj.total_paye_global
-
-    def get_reste_global(self, obj):
-        return obj.reste_global
-
-    def get_acompte_regle(self, obj):
-        return obj.acompte_regle
-
-    def get_peut_passer_en_production(self, obj):
-        return obj.peut_passer_en_production
-
-    def get_peut_etre_livree(self, obj):
-        return obj.peut_etre_livree
-
 
 class PaiementLigneInSerializer(serializers.Serializer):
     mode_paiement_id = serializers.PrimaryKeyRelatedField(
@@ -478,7 +502,7 @@ class PayerSoldeCommandeSerializer(serializers.Serializer):
         return attrs
     
     
-class CommandeDashboardRecentSerializer(serializers.ModelSerializer):
+class CommandeDashboardRecentSerializer(CommandePaymentTotalsMixin, serializers.ModelSerializer):
     client_nom = serializers.CharField(source="client.full_name", read_only=True)
     client_telephone = serializers.CharField(source="client.telephone", read_only=True)
     bijouterie_nom = serializers.CharField(source="bijouterie.nom", read_only=True)
@@ -518,18 +542,6 @@ class CommandeDashboardRecentSerializer(serializers.ModelSerializer):
             return None
         return f"{obj.ouvrier.prenom} {obj.ouvrier.nom}".strip()
 
-    def get_acompte_minimum_requis(self, obj):
-        return obj.acompte_minimum_requis
-
-    def get_total_acompte_paye(self, obj):
-        return obj.total_acompte_paye
-
-    def get_total_paye_global(self, obj):
-        return obj.total_paye_global
-
-    def get_reste_global(self, obj):
-        return obj.reste_global
-
 
 class OuvrierDashboardSerializer(serializers.ModelSerializer):
     ouvrier_nom = serializers.SerializerMethodField()
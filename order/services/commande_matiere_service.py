@@ -7,6 +7,7 @@ from django.db import transaction
 
 from stock_matiere_premiere.models import (MatierePremiereMovement,
                                            MatierePremiereStock)
+from stock_matiere_premiere.services import post_matiere_movement
 
 
 @transaction.atomic
@@ -25,18 +26,11 @@ def sortir_matiere_pour_ouvrier(*, commande, poids, user=None):
     if stock.poids_total < poids:
         raise ValidationError("Stock matière première insuffisant.")
 
-    stock.poids_total -= poids
-    stock.save(update_fields=["poids_total"])
-
-    MatierePremiereMovement.objects.create(
-        bijouterie=commande.bijouterie,
-        matiere=commande.matiere,
-        purete=commande.purete,
+    # Matière donnée à l'ouvrier.
+    post_matiere_movement(
+        stock=stock,
         poids=poids,
-        source="commande_atelier_out",
-        commande_client=commande,
-        created_by=user,
-        commentaire="Matière donnée à l’ouvrier.",
+        source=MatierePremiereMovement.SOURCE_COMMANDE_ATELIER_OUT,
     )
 
     commande.poids_envoye_ouvrier = poids
@@ -60,21 +54,15 @@ def retourner_matiere_ouvrier(*, commande, poids_retour, user=None):
         defaults={"poids_total": Decimal("0.000")},
     )
 
-    stock.poids_total += poids_retour
-    stock.save(update_fields=["poids_total"])
-
     perte = commande.poids_envoye_ouvrier - poids_retour
 
-    MatierePremiereMovement.objects.create(
-        bijouterie=commande.bijouterie,
-        matiere=commande.matiere,
-        purete=commande.purete,
-        poids=poids_retour,
-        source="commande_atelier_in",
-        commande_client=commande,
-        created_by=user,
-        commentaire=f"Retour atelier. Perte: {perte} g",
-    )
+    # Retour atelier (poids > 0 : un mouvement porte au moins 0.001 g).
+    if poids_retour > 0:
+        post_matiere_movement(
+            stock=stock,
+            poids=poids_retour,
+            source=MatierePremiereMovement.SOURCE_COMMANDE_ATELIER_IN,
+        )
 
     commande.poids_retour_ouvrier = poids_retour
     commande.poids_perte = perte
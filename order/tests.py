@@ -1,3 +1,139 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from order.models import CommandeClient
+from sale.models import Client, Facture, ModePaiement, Paiement, PaiementLigne
+from store.models import Bijouterie
+from vendor.models import Vendor
+
+
+class CommandePaymentTotalsTests(TestCase):
+    """
+    with_payment_totals() : encaissements annotés (liste, détail,
+    dashboard) identiques aux propriétés du modèle.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Médina")
+
+        cls.vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.commande@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+            verifie=True,
+        )
+
+        cls.especes = ModePaiement.objects.get_or_create(
+            code="especes",
+            defaults={"nom": "Espèces"},
+        )[0]
+
+        cls.admin = get_user_model().objects.create_superuser(
+            email="admin.commande@example.com",
+            password="secret",
+        )
+
+    def setUp(self):
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(self.admin)
+
+    def _commande(self, index, montant, acompte=None, solde=None):
+        commande = CommandeClient.objects.create(
+            client=Client.objects.create(
+                prenom="Fatou",
+                nom=f"Sarr {index}",
+                telephone=f"77000000{index}",
+            ),
+            bijouterie=self.bijouterie,
+            vendor=self.vendor,
+            montant_total=montant,
+        )
+
+        for type_facture, montant_paye in (
+            (Facture.TYPE_ACOMPTE, acompte),
+            (Facture.TYPE_FINALE, solde),
+        ):
+            if not montant_paye:
+                continue
+
+            facture = Facture.objects.create(
+                commande_client=commande,
+                bijouterie=self.bijouterie,
+                montant_ht=montant_paye,
+                type_facture=type_facture,
+            )
+            PaiementLigne.objects.create(
+                paiement=Paiement.objects.create(facture=facture),
+                mode_paiement=self.especes,
+                montant_paye=montant_paye,
+            )
+
+        return commande
+
+    def test_annotations_match_properties(self):
+        self._commande(1, Decimal("1000.00"), Decimal("500.00"), Decimal("500.00"))
+        self._commande(2, Decimal("800.00"), Decimal("100.00"))
+        self._commande(3, Decimal("600.00"))
+
+        for commande in CommandeClient.objects.with_payment_totals():
+            self.assertEqual(commande.acompte_encaisse, commande.total_acompte_paye)
+            self.assertEqual(commande.total_encaisse, commande.total_paye_global)
+
+        response = self.client_api.get("/api/commandes/")
+
+        self.assertEqual(response.status_code, 200)
+
+        rows = {
+            row["id"]: row
+            for row in response.data
+        }
+
+        for commande in CommandeClient.objects.all():
+            row = rows[commande.id]
+            self.assertEqual(row["total_acompte_paye"], commande.total_acompte_paye)
+            self.assertEqual(row["total_paye_global"], commande.total_paye_global)
+            self.assertEqual(row["reste_global"], commande.reste_global)
+            self.assertEqual(row["acompte_regle"], commande.acompte_regle)
+            self.assertEqual(
+                row["peut_passer_en_production"],
+                commande.peut_passer_en_production,
+            )
+
+        response = self.client_api.get("/api/commandes/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["kpis"]["total_commandes"], 3)
+        self.assertEqual(
+            Decimal(str(response.data["kpis"]["total_encaisse"])),
+            Decimal("1100.00"),
+        )
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        self._commande(1, Decimal("1000.00"), Decimal("500.00"))
+
+        with CaptureQueriesContext(connection) as single:
+            self.client_api.get("/api/commandes/")
+
+        for index in range(2, 6):
+            self._commande(index, Decimal("400.00"), Decimal("200.00"), Decimal("100.00"))
+
+        with CaptureQueriesContext(connection) as several:
+            response = self.client_api.get("/api/commandes/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(several), len(single))
+
+        with CaptureQueriesContext(connection) as dashboard:
+            response = self.client_api.get("/api/commandes/dashboard/")
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        # Agrégat (compteurs + montant), encaissé, ouvriers, récentes.
+        self.assertEqual(len(dashboard), 4)
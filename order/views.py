@@ -12,21 +12,21 @@ from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import date_range_filter
 from backend.roles import get_role_name
 from sale.models import Facture, PaiementLigne
 
 from .models import CommandeClient, Ouvrier
 from .serializers import (AssignerOuvrierSerializer,
                           CommandeClientDetailSerializer,
-                          CommandeDashboardRecentSerializer,
                           CommandeDashboardSerializer,
                           CreateCommandeClientSerializer,
-                          OuvrierDashboardSerializer,
                           PayerSoldeCommandeSerializer,
                           TerminerCommandeSerializer)
 from .services.commande_finance_service import (
@@ -116,6 +116,7 @@ class CommandeClientListView(ListAPIView):
             CommandeClient.objects
             .select_related("client", "bijouterie", "vendor__user", "ouvrier")
             .prefetch_related("lignes", "factures", "historiques")
+            .with_payment_totals()
         )
 
         if role == "vendor":
@@ -137,10 +138,12 @@ class CommandeClientListView(ListAPIView):
             qs = qs.filter(vendor_id=vendor_id)
         if ouvrier_id:
             qs = qs.filter(ouvrier_id=ouvrier_id)
-        if date_from:
-            qs = qs.filter(date_commande__date__gte=date_from)
-        if date_to:
-            qs = qs.filter(date_commande__date__lte=date_to)
+        try:
+            qs = qs.filter(
+                **date_range_filter("date_commande", date_from, date_to)
+            )
+        except ValueError as exc:
+            raise ValidationError({"date": str(exc)})
         if q:
             qs = qs.filter(
                 Q(numero_commande__icontains=q) |
@@ -160,6 +163,7 @@ class CommandeClientDetailView(RetrieveAPIView):
         CommandeClient.objects
         .select_related("client", "bijouterie", "vendor__user", "ouvrier")
         .prefetch_related("lignes", "factures", "historiques")
+        .with_payment_totals()
     )
 
     @swagger_auto_schema(
@@ -566,14 +570,15 @@ class CommandeDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get_base_queryset(self, request):
+        """
+        Commandes du périmètre, sans jointures ni prefetch : la base ne
+        sert qu'aux agrégats et sous-requêtes (les commandes récentes
+        chargent leurs relations à part).
+        """
         user = request.user
         role = get_role_name(user)
 
-        qs = (
-            CommandeClient.objects
-            .select_related("client", "bijouterie", "vendor__user", "ouvrier")
-            .prefetch_related("factures", "historiques", "lignes")
-        )
+        qs = CommandeClient.objects.all()
 
         # Scope par rôle
         if role == "vendor":
@@ -608,11 +613,16 @@ class CommandeDashboardView(APIView):
         if params.get("ouvrier_id"):
             qs = qs.filter(ouvrier_id=params["ouvrier_id"])
 
-        if params.get("date_from"):
-            qs = qs.filter(date_commande__date__gte=params["date_from"])
-
-        if params.get("date_to"):
-            qs = qs.filter(date_commande__date__lte=params["date_to"])
+        try:
+            qs = qs.filter(
+                **date_range_filter(
+                    "date_commande",
+                    params.get("date_from"),
+                    params.get("date_to"),
+                )
+            )
+        except ValueError as exc:
+            raise ValidationError({"date": str(exc)})
 
         if params.get("q"):
             q = params["q"]
@@ -679,27 +689,9 @@ Dashboard résumé des commandes :
     def get(self, request):
         qs = self.get_base_queryset(request)
 
-        total_commandes = qs.count()
-
-        total_montant = qs.aggregate(
-            total=Sum("montant_total")
-        )["total"] or Decimal("0.00")
-
-        total_paye = (
-            PaiementLigne.objects
-            .filter(paiement__facture__commande_client__in=qs)
-            .aggregate(total=Sum("montant_paye"))["total"]
-            or Decimal("0.00")
-        )
-
-        reste_global = max(total_montant - total_paye, Decimal("0.00"))
-
-        taux_paiement = (
-            (total_paye / total_montant * 100)
-            if total_montant > 0 else Decimal("0.00")
-        )
-
-        statuts = qs.aggregate(
+        totaux = qs.aggregate(
+            total_commandes=Count("id"),
+            total_montant=Sum("montant_total"),
             brouillon=Count(
                 "id",
                 filter=Q(statut=CommandeClient.STATUT_BROUILLON),
@@ -726,6 +718,23 @@ Dashboard résumé des commandes :
             ),
         )
 
+        total_commandes = totaux["total_commandes"]
+        total_montant = totaux["total_montant"] or Decimal("0.00")
+
+        total_paye = (
+            PaiementLigne.objects
+            .filter(paiement__facture__commande_client__in=qs.values("pk"))
+            .aggregate(total=Sum("montant_paye"))["total"]
+            or Decimal("0.00")
+        )
+
+        reste_global = max(total_montant - total_paye, Decimal("0.00"))
+
+        taux_paiement = (
+            (total_paye / total_montant * 100)
+            if total_montant > 0 else Decimal("0.00")
+        )
+
         ouvriers_qs = (
             Ouvrier.objects
             .filter(commandes_clients__in=qs)
@@ -756,7 +765,12 @@ Dashboard résumé des commandes :
             .order_by("-nb_en_production", "-nb_commandes_total", "nom", "prenom")
         )
 
-        recentes_qs = qs.order_by("-date_commande", "-id")[:10]
+        recentes_qs = (
+            qs
+            .select_related("client", "bijouterie", "vendor__user", "ouvrier")
+            .with_payment_totals()
+            .order_by("-date_commande", "-id")[:10]
+        )
 
         payload = {
             "periode": {
@@ -776,15 +790,16 @@ Dashboard résumé des commandes :
                 "taux_paiement": taux_paiement,
             },
             "statuts": {
-                "brouillon": statuts["brouillon"],
-                "en_attente": statuts["en_attente"],
-                "en_production": statuts["en_production"],
-                "terminees": statuts["terminees"],
-                "livrees": statuts["livrees"],
-                "annulees": statuts["annulees"],
+                "brouillon": totaux["brouillon"],
+                "en_attente": totaux["en_attente"],
+                "en_production": totaux["en_production"],
+                "terminees": totaux["terminees"],
+                "livrees": totaux["livrees"],
+                "annulees": totaux["annulees"],
             },
-            "ouvriers": OuvrierDashboardSerializer(ouvriers_qs, many=True).data,
-            "recentes": CommandeDashboardRecentSerializer(recentes_qs, many=True).data,
+            # Sérialisés une fois, par CommandeDashboardSerializer.
+            "ouvriers": ouvriers_qs,
+            "recentes": recentes_qs,
         }
 
         serializer = CommandeDashboardSerializer(payload)
@@ -0,0 +1,220 @@
+# purchase/management/commands/import_arrivage.py
+
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from openpyxl import load_workbook
+from rest_framework.exceptions import ValidationError
+
+from purchase.services.arrivage_service import (ingest_arrivage,
+                                                resolve_arrivage_fournisseur)
+from store.models import Bijouterie
+
+REQUIRED_COLUMNS = {"produit_id", "quantite", "prix_achat_gramme"}
+
+
+class _DryRun(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe un arrivage fournisseur depuis un fichier CSV ou XLSX "
+        "(une ligne par produit). Colonnes : produit_id, quantite, "
+        "prix_achat_gramme, et optionnellement lot, description, "
+        "received_at. Les lignes partageant la même valeur de « lot » "
+        "forment un même lot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fichier", help="Fichier .csv ou .xlsx.")
+        parser.add_argument("--bijouterie", type=int, required=True)
+        parser.add_argument(
+            "--fournisseur-telephone",
+            required=True,
+            help="Téléphone du fournisseur (clé métier).",
+        )
+        parser.add_argument("--fournisseur-nom", default="")
+        parser.add_argument("--fournisseur-prenom", default="")
+        parser.add_argument("--reference-commande", default="")
+        parser.add_argument("--description", default="")
+        parser.add_argument("--frais-transport", default="0.00")
+        parser.add_argument("--frais-douane", default="0.00")
+        parser.add_argument(
+            "--user",
+            help="Email de l'utilisateur enregistré sur les mouvements.",
+        )
+        parser.add_argument(
+            "--delimiter",
+            default=";",
+            help="Séparateur CSV (défaut : « ; »).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Tout valider et insérer puis annuler la transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["fichier"])
+
+        if not path.exists():
+            raise CommandError(f"Fichier introuvable : {path}")
+
+        bijouterie = Bijouterie.objects.filter(pk=options["bijouterie"]).first()
+        if not bijouterie:
+            raise CommandError("Bijouterie introuvable.")
+
+        user = None
+        if options.get("user"):
+            user = get_user_model().objects.filter(email=options["user"]).first()
+            if not user:
+                raise CommandError("Utilisateur introuvable.")
+
+        try:
+            frais_transport = Decimal(options["frais_transport"])
+            frais_douane = Decimal(options["frais_douane"])
+        except InvalidOperation:
+            raise CommandError("Frais invalides.")
+
+        rows = self._read_rows(path, options["delimiter"])
+        lots = self._group_lots(rows)
+
+        try:
+            with transaction.atomic():
+                fournisseur = resolve_arrivage_fournisseur({
+                    "telephone": options["fournisseur_telephone"],
+                    "nom": options["fournisseur_nom"],
+                    "prenom": options["fournisseur_prenom"],
+                })
+
+                result = ingest_arrivage(
+                    bijouterie=bijouterie,
+                    fournisseur=fournisseur,
+                    lots=lots,
+                    user=user,
+                    reference_commande=options["reference_commande"],
+                    description=options["description"],
+                    frais_transport=frais_transport,
+                    frais_douane=frais_douane,
+                )
+
+                self._report(result, dry_run=options["dry_run"])
+
+                if options["dry_run"]:
+                    raise _DryRun()
+
+        except _DryRun:
+            self.stdout.write(self.style.WARNING("Dry-run : rien n'a été enregistré."))
+            return
+
+        except ValidationError as exc:
+            raise CommandError(f"Arrivage invalide : {exc.detail}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Arrivage {result.achat.numero_achat} créé."
+        ))
+
+    # --------------------------------------------------------
+
+    def _read_rows(self, path, delimiter):
+        suffix = path.suffix.lower()
+
+        if suffix == ".csv":
+            with path.open(newline="", encoding="utf-8-sig") as handle:
+                reader = csv.reader(handle, delimiter=delimiter)
+                table = [row for row in reader if any(cell.strip() for cell in row)]
+
+        elif suffix in (".xlsx", ".xlsm"):
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                table = [
+                    list(row)
+                    for row in workbook.active.iter_rows(values_only=True)
+                    if any(cell not in (None, "") for cell in row)
+                ]
+            finally:
+                workbook.close()
+
+        else:
+            raise CommandError("Format non pris en charge (.csv ou .xlsx).")
+
+        if not table:
+            raise CommandError("Fichier vide.")
+
+        headers = [str(cell or "").strip().lower() for cell in table[0]]
+        missing = REQUIRED_COLUMNS - set(headers)
+
+        if missing:
+            raise CommandError(f"Colonne(s) manquante(s) : {sorted(missing)}.")
+
+        return [dict(zip(headers, row)) for row in table[1:]]
+
+    def _group_lots(self, rows):
+        """
+        Lignes → lots au format de ArrivageCreateInSerializer,
+        dans l'ordre d'apparition des valeurs de « lot ».
+        """
+
+        lots = {}
+
+        for index, row in enumerate(rows, start=2):
+            key = str(row.get("lot") or "1").strip()
+
+            lot = lots.setdefault(key, {
+                "description": str(row.get("description") or "").strip(),
+                "received_at": self._parse_received_at(row.get("received_at"), index),
+                "lignes": [],
+            })
+
+            lot["lignes"].append({
+                "produit_id": row.get("produit_id"),
+                "quantite": row.get("quantite"),
+                "prix_achat_gramme": row.get("prix_achat_gramme"),
+            })
+
+        if not lots:
+            raise CommandError("Aucune ligne à importer.")
+
+        return list(lots.values())
+
+    def _parse_received_at(self, value, line_number):
+        if value in (None, ""):
+            return None
+
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            text = str(value).strip()
+            parsed = parse_datetime(text)
+
+            if parsed is None and parse_date(text):
+                parsed = datetime.combine(parse_date(text), datetime.min.time())
+
+            if parsed is None:
+                raise CommandError(
+                    f"Ligne {line_number} : date de réception invalide ({text})."
+                )
+
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+
+        return parsed
+
+    def _report(self, result, *, dry_run):
+        prefix = "[dry-run] " if dry_run else ""
+
+        self.stdout.write(f"{prefix}Lots            : {len(result.lots)}")
+        self.stdout.write(f"{prefix}Lignes produit  : {len(result.produit_lines)}")
+        self.stdout.write(
+            f"{prefix}Unités          : "
+            f"{sum(line.quantite for line in result.produit_lines)}"
+        )
+        self.stdout.write(f"{prefix}Total HT        : {result.achat.montant_total_ht}")
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0003_initial'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achat',
+            index=models.Index(fields=['bijouterie', 'created_at'], name='achat_shop_created_idx'),
+        ),
+    ]
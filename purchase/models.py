@@ -113,6 +113,10 @@ class Achat(models.Model):
             models.Index(fields=["created_at"]),
             models.Index(fields=["fournisseur"]),
             models.Index(fields=["status"]),
+            models.Index(
+                fields=["bijouterie", "created_at"],
+                name="achat_shop_created_idx",
+            ),
         ]
         constraints = [
             models.CheckConstraint(check=Q(frais_transport__gte=0), name="achat_frais_transport_gte_0"),
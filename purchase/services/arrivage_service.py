@@ -0,0 +1,460 @@
+# purchase/services/arrivage_service.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from inventory.models import (Bucket, InventoryBalance, InventoryMovement,
+                              MovementType)
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from purchase.utils import generate_numeros_lot
+from stock.models import Stock
+from store.models import Bijouterie, Produit
+
+# ============================================================
+# Ingestion d'un arrivage fournisseur par lots
+# ============================================================
+#
+# Même résultat que la création ligne à ligne (Lot, ProduitLine,
+# Stock magasin, PURCHASE_IN verrouillé, InventoryBalance), mais :
+#
+# - toutes les lignes sont validées en mémoire avant toute écriture ;
+# - les numéros de lot sont réservés en bloc ;
+# - lots, lignes, stocks et mouvements sont insérés par bulk_create ;
+# - le total de l'achat est recalculé une seule fois.
+#
+# bulk_create ne déclenche ni save() ni post_save : pas de
+# Achat.update_total par ProduitLine (purchase.signals).
+
+BULK_BATCH_SIZE = 500
+LOT_NUMBER_ATTEMPTS = 5
+
+ZERO = Decimal("0.00")
+TWOPLACES = Decimal("0.01")
+
+
+@dataclass
+class ArrivageResult:
+    achat: Achat
+    lots: list[Lot] = field(default_factory=list)
+    produit_lines: list[ProduitLine] = field(default_factory=list)
+
+
+# ============================================================
+# Validation (sans écriture)
+# ============================================================
+
+def normalize_arrivage_lots(
+    lots_in: list[dict[str, Any]],
+    *,
+    default_description: str = "",
+) -> list[dict[str, Any]]:
+    """
+    Valide et normalise les lots d'un arrivage.
+
+    Retourne :
+        [{"description", "received_at", "lignes": [
+            {"produit_id", "quantite", "prix_achat_gramme"}, ...
+        ]}, ...]
+    """
+
+    if not lots_in:
+        raise ValidationError({
+            "lots": "Au moins un lot est requis."
+        })
+
+    lots_normalises = []
+
+    for lot_index, lot_in in enumerate(lots_in):
+        lignes_in = lot_in.get("lignes") or []
+
+        if not lignes_in:
+            raise ValidationError({
+                f"lots[{lot_index}].lignes": (
+                    "Chaque lot doit contenir "
+                    "au moins une ligne."
+                )
+            })
+
+        produits_du_lot = set()
+        lignes_normalisees = []
+
+        for ligne_index, ligne_in in enumerate(lignes_in):
+            prefixe = (
+                f"lots[{lot_index}]."
+                f"lignes[{ligne_index}]"
+            )
+
+            produit_id = ligne_in.get("produit_id")
+
+            if not produit_id:
+                raise ValidationError({
+                    f"{prefixe}.produit_id": (
+                        "produit_id est obligatoire."
+                    )
+                })
+
+            try:
+                produit_id = int(produit_id)
+            except (TypeError, ValueError):
+                raise ValidationError({
+                    f"{prefixe}.produit_id": (
+                        "produit_id invalide."
+                    )
+                })
+
+            if produit_id in produits_du_lot:
+                raise ValidationError({
+                    f"{prefixe}.produit_id": (
+                        "Un produit ne peut apparaître "
+                        "qu'une seule fois dans un même lot."
+                    )
+                })
+
+            produits_du_lot.add(produit_id)
+
+            try:
+                quantite = int(ligne_in.get("quantite"))
+            except (TypeError, ValueError):
+                raise ValidationError({
+                    f"{prefixe}.quantite": (
+                        "Quantité invalide."
+                    )
+                })
+
+            if quantite < 1:
+                raise ValidationError({
+                    f"{prefixe}.quantite": (
+                        "La quantité doit être supérieure "
+                        "ou égale à 1."
+                    )
+                })
+
+            prix_brut = ligne_in.get("prix_achat_gramme")
+
+            if prix_brut is None or prix_brut == "":
+                raise ValidationError({
+                    f"{prefixe}.prix_achat_gramme": (
+                        "Le prix d'achat par gramme "
+                        "est obligatoire."
+                    )
+                })
+
+            try:
+                prix_achat_gramme = Decimal(
+                    str(prix_brut)
+                ).quantize(
+                    TWOPLACES,
+                    rounding=ROUND_HALF_UP,
+                )
+            except (InvalidOperation, TypeError, ValueError):
+                raise ValidationError({
+                    f"{prefixe}.prix_achat_gramme": (
+                        "Prix d'achat par gramme invalide."
+                    )
+                })
+
+            if prix_achat_gramme < ZERO:
+                raise ValidationError({
+                    f"{prefixe}.prix_achat_gramme": (
+                        "Le prix d'achat par gramme "
+                        "ne peut pas être négatif."
+                    )
+                })
+
+            lignes_normalisees.append({
+                "produit_id": produit_id,
+                "quantite": quantite,
+                "prix_achat_gramme": prix_achat_gramme,
+            })
+
+        lots_normalises.append({
+            "description": (
+                lot_in.get("description")
+                or default_description
+                or ""
+            ),
+            "received_at": lot_in.get("received_at"),
+            "lignes": lignes_normalisees,
+        })
+
+    return lots_normalises
+
+
+def load_arrivage_produits(lots: list[dict[str, Any]]) -> dict[int, Produit]:
+    """
+    Charge en une requête les produits des lots normalisés ;
+    tous doivent exister et avoir un poids.
+    """
+
+    produit_ids = {
+        ligne["produit_id"]
+        for lot in lots
+        for ligne in lot["lignes"]
+    }
+
+    produits_by_id = {
+        produit.id: produit
+        for produit in (
+            Produit.objects
+            .filter(pk__in=produit_ids)
+            .only("id", "poids")
+        )
+    }
+
+    produits_manquants = produit_ids - set(produits_by_id)
+
+    if produits_manquants:
+        raise ValidationError({
+            "lots": (
+                "Produit(s) introuvable(s) : "
+                f"{sorted(produits_manquants)}."
+            )
+        })
+
+    produits_sans_poids = [
+        produit.id
+        for produit in produits_by_id.values()
+        if produit.poids is None
+    ]
+
+    if produits_sans_poids:
+        raise ValidationError({
+            "lots": (
+                "Produit(s) sans poids renseigné : "
+                f"{sorted(produits_sans_poids)}."
+            )
+        })
+
+    return produits_by_id
+
+
+def resolve_arrivage_fournisseur(fournisseur_data: dict[str, Any]) -> Fournisseur:
+    """
+    Téléphone = clé métier fournisseur.
+    """
+
+    telephone = (fournisseur_data.get("telephone") or "").strip()
+
+    if not telephone:
+        raise ValidationError({
+            "fournisseur": {
+                "telephone": (
+                    "Le téléphone du fournisseur "
+                    "est obligatoire."
+                )
+            }
+        })
+
+    fournisseur, _ = Fournisseur.objects.update_or_create(
+        telephone=telephone,
+        defaults={
+            "nom": fournisseur_data.get("nom") or "",
+            "prenom": fournisseur_data.get("prenom") or "",
+            "address": fournisseur_data.get("address") or "",
+        },
+    )
+
+    return fournisseur
+
+
+# ============================================================
+# Écriture
+# ============================================================
+
+def _bulk_create_lots(achat: Achat, lots: list[dict[str, Any]]) -> list[Lot]:
+    """
+    Numéros réservés en bloc puis insertion groupée ; en cas de
+    collision (arrivage concurrent), nouveau bloc dans un savepoint.
+    """
+
+    now = timezone.now()
+
+    for _ in range(LOT_NUMBER_ATTEMPTS):
+        numeros = generate_numeros_lot(len(lots))
+
+        try:
+            with transaction.atomic():
+                Lot.objects.bulk_create(
+                    [
+                        Lot(
+                            achat=achat,
+                            numero_lot=numero,
+                            description=lot_data["description"],
+                            received_at=lot_data["received_at"] or now,
+                        )
+                        for numero, lot_data in zip(numeros, lots)
+                    ],
+                    batch_size=BULK_BATCH_SIZE,
+                )
+        except IntegrityError:
+            continue
+
+        # Relecture : MySQL ne renvoie pas les pk après bulk_create.
+        lots_by_numero = Lot.objects.in_bulk(numeros, field_name="numero_lot")
+
+        return [lots_by_numero[numero] for numero in numeros]
+
+    raise ValidationError({
+        "numero_lot": (
+            "Impossible de générer un "
+            "numéro de lot unique."
+        )
+    })
+
+
+@transaction.atomic
+def ingest_arrivage(
+    *,
+    bijouterie: Bijouterie,
+    fournisseur: Fournisseur,
+    lots: list[dict[str, Any]],
+    user=None,
+    reference_commande: str = "",
+    description: str = "",
+    frais_transport: Decimal = ZERO,
+    frais_douane: Decimal = ZERO,
+) -> ArrivageResult:
+    """
+    Crée l'achat, ses lots, ProduitLine, Stock magasin et mouvements
+    PURCHASE_IN (EXTERNAL → BIJOUTERIE) en quelques requêtes groupées.
+
+    lots : format d'entrée de ArrivageCreateInSerializer
+    (validé et normalisé ici, avant toute écriture).
+    """
+
+    lots = normalize_arrivage_lots(
+        lots,
+        default_description=description or "",
+    )
+    load_arrivage_produits(lots)
+
+    # =========================================================
+    # 1. Achat
+    # =========================================================
+    achat = Achat.objects.create(
+        fournisseur=fournisseur,
+        bijouterie=bijouterie,
+        reference_commande=reference_commande or "",
+        description=description or "",
+        frais_transport=frais_transport or ZERO,
+        frais_douane=frais_douane or ZERO,
+        status=Achat.STATUS_CONFIRMED,
+    )
+
+    # =========================================================
+    # 2. Lots
+    # =========================================================
+    lots_created = _bulk_create_lots(achat, lots)
+
+    # =========================================================
+    # 3. ProduitLine
+    # =========================================================
+    ProduitLine.objects.bulk_create(
+        [
+            ProduitLine(
+                lot=lot,
+                produit_id=ligne["produit_id"],
+                quantite=ligne["quantite"],
+                prix_achat_gramme=ligne["prix_achat_gramme"],
+            )
+            for lot, lot_data in zip(lots_created, lots)
+            for ligne in lot_data["lignes"]
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+    # Relecture (pk) en une requête, rattachée aux lots : la réponse
+    # sérialise lots → lignes → produit sans requête supplémentaire.
+    prefetch_related_objects(
+        lots_created,
+        Prefetch(
+            "lignes",
+            queryset=(
+                ProduitLine.objects
+                .select_related("produit")
+                .order_by("id")
+            ),
+        ),
+    )
+
+    produit_lines = [
+        produit_line
+        for lot in lots_created
+        for produit_line in lot.lignes.all()
+    ]
+
+    # =========================================================
+    # 4. Stock magasin
+    # =========================================================
+    Stock.objects.bulk_create(
+        [
+            Stock(
+                produit_line=produit_line,
+                bijouterie=bijouterie,
+                # Stock.save() n'est pas appelé : clé calculée ici.
+                stock_key=(
+                    f"PL:{produit_line.id}:"
+                    f"BIJ:{bijouterie.id}"
+                ),
+                quantite_totale=produit_line.quantite,
+                en_stock=produit_line.quantite,
+            )
+            for produit_line in produit_lines
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+    # =========================================================
+    # 5. PURCHASE_IN (verrouillés, comme log_move)
+    # =========================================================
+    now = timezone.now()
+
+    movements = [
+        InventoryMovement(
+            produit_id=produit_line.produit_id,
+            movement_type=MovementType.PURCHASE_IN,
+            qty=produit_line.quantite,
+            unit_cost=produit_line.prix_achat_gramme,
+
+            src_bucket=Bucket.EXTERNAL,
+            dst_bucket=Bucket.BIJOUTERIE,
+            dst_bijouterie_id=bijouterie.id,
+
+            achat=achat,
+            produit_line=produit_line,
+            lot_id=produit_line.lot_id,
+
+            reason="Entrée fournisseur vers bijouterie",
+            created_by=user,
+            occurred_at=now,
+            is_locked=True,
+        )
+        for produit_line in produit_lines
+    ]
+
+    InventoryMovement.objects.bulk_create(
+        movements,
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+    # bulk_create ne passe pas par save() : soldes mis à jour ici,
+    # dans la même transaction.
+    InventoryBalance.apply_movements(movements)
+
+    # =========================================================
+    # 6. Total de l'achat (une seule fois)
+    # =========================================================
+    achat.update_total(save=True)
+
+    return ArrivageResult(
+        achat=achat,
+        lots=lots_created,
+        produit_lines=produit_lines,
+    )
@@ -1,7 +1,14 @@
+import hashlib
+import json
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 
 import qrcode
+from django.conf import settings
 from PIL import Image, ImageDraw, ImageFont
 
 # ============================================================
@@ -15,25 +22,53 @@ from PIL import Image, ImageDraw, ImageFont
 #
 # QR contenu :
 # - P:<produit.uuid>
+#
+# Rendu :
+# - une étiquette est rendue une seule fois par contenu
+#   (cache mémoire LRU + cache disque optionnel ETIQUETTES_CACHE_DIR) ;
+# - les N exemplaires d'une ligne réutilisent le même PNG.
 # ============================================================
 
+ETIQUETTE_WIDTH = 240
+ETIQUETTE_HEIGHT = 200
+ETIQUETTE_DPI = 203
+
+# Nombre d'étiquettes PNG gardées en mémoire par processus.
+ETIQUETTES_CACHE_SIZE = 512
+
+FONT_PATHS = [
+    "C:/Windows/Fonts/arialbd.ttf",
+    "C:/Windows/Fonts/Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+
+
+@lru_cache(maxsize=1)
+def _font_path() -> str | None:
+    """
+    Première police disponible (recherchée une fois par processus).
+    """
+    for font_path in FONT_PATHS:
+        if Path(font_path).exists():
+            return font_path
+
+    return None
 
+
+@lru_cache(maxsize=None)
 def _load_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
     """
     Charge une police compatible Windows + Linux.
     Sur VPS Linux : DejaVuSans-Bold.ttf
     Sur Windows local : Arial Bold
+
+    Une instance par taille et par processus.
     """
-    font_paths = [
-        "C:/Windows/Fonts/arialbd.ttf",
-        "C:/Windows/Fonts/Arial.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-    ]
+    font_path = _font_path()
 
-    for font_path in font_paths:
-        if Path(font_path).exists():
-            return ImageFont.truetype(font_path, size)
+    if font_path:
+        return ImageFont.truetype(font_path, size)
 
     return ImageFont.load_default()
 
@@ -49,17 +84,13 @@ def _center_text(draw: ImageDraw.ImageDraw, x1: int, x2: int, y: int, text: str,
     draw.text((x, y), text, fill="black", font=font)
 
 
-def build_etiquette_bague_png(produit) -> BytesIO:
-    """
-    Génère une étiquette PNG pour Phomemo M221.
-
-    Format réel :
-    - 30 mm x 25 mm
-    - 203 DPI
-    - 240 px x 200 px
+# ============================================================
+# Contenu de l'étiquette
+# ============================================================
 
-    Le QR code contient l'identifiant technique stable :
-    - P:<produit.uuid>
+def etiquette_content(produit) -> dict:
+    """
+    Textes imprimés sur l'étiquette d'un produit.
 
     Le SKU court affiché est :
     - CAT-MOD-ETAT
@@ -67,25 +98,6 @@ def build_etiquette_bague_png(produit) -> BytesIO:
     - BAG-ALL-N
     """
 
-    # Dimensions 30 x 25 mm à 203 DPI
-    width = 240
-    height = 200
-
-    img = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(img)
-
-    # Polices
-    font_title = _load_font(20)
-    font_label = _load_font(14)
-    font_purete = _load_font(38)
-    font_marque = _load_font(20)
-    font_poids = _load_font(28)
-    font_sku = _load_font(16)
-
-    # ------------------------------------------------------------
-    # Données produit
-    # ------------------------------------------------------------
-
     produit_uuid = getattr(produit, "uuid", None)
 
     if not produit_uuid:
@@ -93,8 +105,6 @@ def build_etiquette_bague_png(produit) -> BytesIO:
             f"Le produit #{getattr(produit, 'id', '?')} ne possède pas d'UUID."
         )
 
-    qr_content = f"P:{produit_uuid}"
-
     purete = str(produit.purete) if getattr(produit, "purete", None) else ""
     poids = f"{produit.poids} g" if getattr(produit, "poids", None) else ""
 
@@ -118,15 +128,52 @@ def build_etiquette_bague_png(produit) -> BytesIO:
         else ""
     )
 
-    # SKU visible sous le QR
-    sku_court = (
-        f"{categorie_nom[:3].upper()}-"
-        f"{modele_nom[:3].upper()}-"
-        f"{etat.upper()}"
-    ).strip("-")
+    return {
+        "uuid": str(produit_uuid),
+        "qr": f"P:{produit_uuid}",
+        # SKU visible sous le QR
+        "sku": (
+            f"{categorie_nom[:3].upper()}-"
+            f"{modele_nom[:3].upper()}-"
+            f"{etat.upper()}"
+        ).strip("-"),
+        "purete": purete,
+        # Marque affichée à droite
+        "marque": marque[:5].upper(),
+        "poids": poids,
+    }
+
+
+def etiquette_cache_key(content: dict) -> str:
+    """
+    <uuid>-<empreinte du contenu> : une modification du produit
+    (poids, pureté, marque...) change la clé.
+    """
+    digest = hashlib.sha1(
+        json.dumps(content, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+    return f"{content['uuid']}-{digest}"
 
-    # Marque affichée à droite
-    marque_courte = marque[:5].upper()
+
+# ============================================================
+# Rendu
+# ============================================================
+
+def _render_etiquette(content: dict) -> Image.Image:
+    width = ETIQUETTE_WIDTH
+    height = ETIQUETTE_HEIGHT
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+
+    # Polices
+    font_title = _load_font(20)
+    font_label = _load_font(14)
+    font_purete = _load_font(38)
+    font_marque = _load_font(20)
+    font_poids = _load_font(28)
+    font_sku = _load_font(16)
 
     # ------------------------------------------------------------
     # Zone gauche : QR + SKU
@@ -144,7 +191,7 @@ def build_etiquette_bague_png(produit) -> BytesIO:
         box_size=6,
         border=2,
     )
-    qr.add_data(qr_content)
+    qr.add_data(content["qr"])
     qr.make(fit=True)
 
     qr_img = qr.make_image(
@@ -162,7 +209,7 @@ def build_etiquette_bague_png(produit) -> BytesIO:
         x1=8,
         x2=112,
         y=112,
-        text=sku_court,
+        text=content["sku"],
         font=font_sku,
     )
 
@@ -176,19 +223,203 @@ def build_etiquette_bague_png(produit) -> BytesIO:
     _center_text(draw, right_x1, right_x2, 10, "RIO GOLD", font_title)
 
     _center_text(draw, right_x1, right_x2, 42, "PURETÉ", font_label)
-    _center_text(draw, right_x1, right_x2, 56, purete, font_purete)
+    _center_text(draw, right_x1, right_x2, 56, content["purete"], font_purete)
 
-    _center_text(draw, right_x1, right_x2, 105, marque_courte, font_marque)
+    _center_text(draw, right_x1, right_x2, 105, content["marque"], font_marque)
 
     _center_text(draw, right_x1, right_x2, 130, "POIDS", font_label)
-    _center_text(draw, right_x1, right_x2, 148, poids, font_poids)
+    _center_text(draw, right_x1, right_x2, 148, content["poids"], font_poids)
 
-    # ------------------------------------------------------------
-    # Sortie PNG en mémoire
-    # ------------------------------------------------------------
+    return img
 
-    output = BytesIO()
-    img.save(output, format="PNG")
+
+class _PngCache:
+    """
+    Cache LRU des PNG rendus (bytes), partagé entre threads,
+    doublé d'un cache disque si ETIQUETTES_CACHE_DIR est défini.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def _disk_path(self, key: str) -> Path | None:
+        cache_dir = getattr(settings, "ETIQUETTES_CACHE_DIR", "")
+
+        if not cache_dir:
+            return None
+
+        return Path(cache_dir) / f"{key}.png"
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._items.get(key)
+
+            if data is not None:
+                self._items.move_to_end(key)
+                return data
+
+        path = self._disk_path(key)
+
+        if path and path.exists():
+            data = path.read_bytes()
+            self._remember(key, data)
+            return data
+
+        return None
+
+    def set(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+
+        path = self._disk_path(key)
+
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Écriture atomique : un autre worker ne lit jamais un PNG tronqué.
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_png_cache = _PngCache(ETIQUETTES_CACHE_SIZE)
+
+
+def clear_etiquettes_cache() -> None:
+    """Vide le cache mémoire (le cache disque est conservé)."""
+    _png_cache.clear()
+
+
+def render_etiquette_png(produit) -> bytes:
+    """
+    PNG de l'étiquette d'un produit, rendu au plus une fois
+    par contenu (uuid + textes imprimés).
+    """
+
+    content = etiquette_content(produit)
+    key = etiquette_cache_key(content)
+
+    data = _png_cache.get(key)
+
+    if data is None:
+        output = BytesIO()
+        _render_etiquette(content).save(output, format="PNG", optimize=True)
+        data = output.getvalue()
+        _png_cache.set(key, data)
+
+    return data
+
+
+def build_etiquette_bague_png(produit) -> BytesIO:
+    """
+    Génère une étiquette PNG pour Phomemo M221.
+
+    Format réel :
+    - 30 mm x 25 mm
+    - 203 DPI
+    - 240 px x 200 px
+
+    Le QR code contient l'identifiant technique stable :
+    - P:<produit.uuid>
+    """
+
+    output = BytesIO(render_etiquette_png(produit))
     output.seek(0)
 
     return output
+
+
+# ============================================================
+# Archives
+# ============================================================
+
+class _StreamSink:
+    """
+    Fichier en écriture seule pour zipfile : les octets écrits sont
+    récupérés au fur et à mesure par le générateur (pas de seek,
+    zipfile utilise alors des descripteurs de données).
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_etiquettes_zip(entries):
+    """
+    Produit une archive ZIP par morceaux à partir de (nom, png_bytes).
+
+    Les PNG sont déjà compressés : stockés tels quels (ZIP_STORED),
+    sans recompression DEFLATE ni archive complète en mémoire.
+    """
+
+    sink = _StreamSink()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zip_file:
+        for filename, data in entries:
+            zip_file.writestr(filename, data)
+
+            chunk = sink.pop()
+            if chunk:
+                yield chunk
+
+    chunk = sink.pop()
+    if chunk:
+        yield chunk
+
+
+def build_etiquettes_pdf(pages) -> bytes:
+    """
+    PDF multi-pages (une étiquette 30 x 25 mm par page) pour impression
+    directe sur la Phomemo.
+
+    pages : itérable de (png_bytes, exemplaires). Chaque PNG distinct
+    n'est décodé qu'une fois.
+    """
+
+    images = []
+
+    for data, copies in pages:
+        if copies < 1:
+            continue
+
+        # Noir et blanc : impression thermique, PDF plus léger.
+        image = Image.open(BytesIO(data)).convert("1")
+        images.extend([image] * copies)
+
+    if not images:
+        raise ValueError("Aucune étiquette à imprimer.")
+
+    output = BytesIO()
+    images[0].save(
+        output,
+        format="PDF",
+        save_all=True,
+        append_images=images[1:],
+        resolution=ETIQUETTE_DPI,
+    )
+
+    return output.getvalue()
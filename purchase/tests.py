@@ -1,3 +1,294 @@
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from inventory.models import InventoryBalance, InventoryMovement, MovementType
+from inventory.services import verify_inventory_balances
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from purchase.services import etiquettes
+from stock.models import Stock
+from store.models import (Bijouterie, Categorie, Marque, Modele, Produit,
+                          Purete)
+
+
+class EtiquettesZIPTests(TestCase):
+    """
+    Une étiquette rendue par produit distinct, N exemplaires en sortie.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin-etiquettes@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+
+        bijouterie = Bijouterie.objects.create(nom="Bijouterie Étiquettes")
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+        kwargs = {
+            "categorie": categorie,
+            "modele": Modele.objects.get_or_create(
+                modele="Alliance",
+                categorie=categorie,
+            )[0],
+            "purete": Purete.objects.get_or_create(purete="18")[0],
+            "marque": Marque.objects.get_or_create(marque="Local")[0],
+        }
+
+        cls.produit_a = Produit.objects.create(poids=Decimal("2.50"), **kwargs)
+        cls.produit_b = Produit.objects.create(poids=Decimal("4.00"), **kwargs)
+
+        lot = Lot.objects.create(
+            achat=Achat.objects.create(
+                fournisseur=Fournisseur.objects.create(telephone="770003344"),
+                bijouterie=bijouterie,
+            ),
+            numero_lot="LOT-ETQ-1",
+        )
+
+        cls.lines = [
+            ProduitLine.objects.create(
+                lot=lot,
+                produit=produit,
+                prix_achat_gramme=Decimal("1000.00"),
+                quantite=quantite,
+            )
+            for produit, quantite in ((cls.produit_a, 5), (cls.produit_b, 3))
+        ]
+
+    def setUp(self):
+        etiquettes.clear_etiquettes_cache()
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _post(self, **extra):
+        return self.client.post(
+            "/api/achat/etiquettes-png/",
+            {"produit_line_ids": [line.id for line in self.lines], **extra},
+            format="json",
+        )
+
+    def test_zip_rend_chaque_produit_une_fois(self):
+        with mock.patch.object(
+            etiquettes,
+            "_render_etiquette",
+            wraps=etiquettes._render_etiquette,
+        ) as render:
+            response = self._post()
+            archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(render.call_count, 2)
+
+        infos = archive.infolist()
+        self.assertEqual(len(infos), 8)
+        self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in infos))
+        self.assertEqual(
+            archive.read(f"produit_{self.produit_a.id}_1.png"),
+            archive.read(f"produit_{self.produit_a.id}_5.png"),
+        )
+        self.assertIsNone(archive.testzip())
+
+        # Deuxième demande : servie par le cache.
+        with mock.patch.object(etiquettes, "_render_etiquette") as render:
+            b"".join(self._post().streaming_content)
+
+        render.assert_not_called()
+
+    def test_contenu_modifie_invalide_le_cache(self):
+        key = etiquettes.etiquette_cache_key(
+            etiquettes.etiquette_content(self.produit_a)
+        )
+
+        self.produit_a.poids = Decimal("2.75")
+
+        self.assertNotEqual(
+            key,
+            etiquettes.etiquette_cache_key(
+                etiquettes.etiquette_content(self.produit_a)
+            ),
+        )
+
+    def test_pdf_une_page_par_unite(self):
+        response = self._post(format="pdf")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response.content.count(b"/Type /Page\n"), 8)
+
+
+class ArrivageIngestionTests(TestCase):
+    """
+    Arrivage inséré par lots : mêmes données que la création ligne
+    à ligne, nombre de requêtes indépendant du nombre de lignes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin-arrivage@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Arrivage")
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+        cls.produits = [
+            Produit.objects.create(
+                categorie=categorie,
+                modele=Modele.objects.get_or_create(
+                    modele="Solitaire",
+                    categorie=categorie,
+                )[0],
+                purete=Purete.objects.get_or_create(purete="18")[0],
+                marque=Marque.objects.get_or_create(marque="Local")[0],
+                poids=Decimal("2.00") + index,
+            )
+            for index in range(30)
+        ]
+
+    def _payload(self, lignes_par_lot):
+        return {
+            "bijouterie_id": self.bijouterie.id,
+            "fournisseur": {"telephone": "770009988", "nom": "Diallo"},
+            "frais_transport": "1000.00",
+            "lots": [
+                {
+                    "description": f"Lot {lot_index}",
+                    "lignes": [
+                        {
+                            "produit_id": produit.id,
+                            "quantite": 2,
+                            "prix_achat_gramme": "1000",
+                        }
+                        for produit in self.produits[:lignes_par_lot]
+                    ],
+                }
+                for lot_index in range(2)
+            ],
+        }
+
+    def _post(self, payload):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.get(pk=self.admin.pk)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post("/api/achat/arrivage", payload, format="json")
+
+        return response, len(queries)
+
+    def test_arrivage_complet_en_requetes_groupees(self):
+        response, petites = self._post(self._payload(2))
+        self.assertEqual(response.status_code, 201, response.data)
+
+        response, grandes = self._post(self._payload(30))
+        self.assertEqual(response.status_code, 201, response.data)
+        # 60 lignes au lieu de 4 : seules les réponses (lignes des lots)
+        # et l'éventuel découpage en lots de 500 peuvent varier.
+        self.assertLessEqual(grandes - petites, 4)
+
+        achat = Achat.objects.get(pk=response.data["achat"]["id"])
+        lines = ProduitLine.objects.filter(lot__achat=achat)
+
+        self.assertEqual(lines.count(), 60)
+        self.assertEqual(
+            achat.montant_total_ht,
+            Decimal("1000.00") + 2 * sum(
+                2 * Decimal("1000") * produit.poids
+                for produit in self.produits
+            ),
+        )
+
+        numeros = list(
+            Lot.objects.filter(achat=achat).values_list("numero_lot", flat=True)
+        )
+        self.assertEqual(len(set(numeros)), 2)
+        self.assertEqual(Lot.objects.count(), 4)
+
+        stock = Stock.objects.get(produit_line=lines.first())
+        self.assertEqual(
+            stock.stock_key,
+            f"PL:{stock.produit_line_id}:BIJ:{self.bijouterie.id}",
+        )
+        self.assertEqual((stock.en_stock, stock.quantite_totale), (2, 2))
+
+        movements = InventoryMovement.objects.filter(
+            achat=achat,
+            movement_type=MovementType.PURCHASE_IN,
+        )
+        self.assertEqual(movements.count(), 60)
+        self.assertFalse(movements.filter(is_locked=False).exists())
+        self.assertEqual(
+            InventoryBalance.objects.get(
+                bijouterie=self.bijouterie,
+                produit_line=lines.first(),
+            ).stock_magasin,
+            2,
+        )
+        self.assertEqual(verify_inventory_balances(), [])
+
+    def test_ligne_invalide_rien_n_est_cree(self):
+        payload = self._payload(3)
+        payload["lots"][1]["lignes"][2]["produit_id"] = 999999
+
+        response, _ = self._post(payload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Achat.objects.exists())
+        self.assertFalse(Lot.objects.exists())
+
+    def test_commande_import_csv(self):
+        lignes = ["lot;produit_id;quantite;prix_achat_gramme;received_at"]
+        lignes += [
+            f"{'A' if index < 3 else 'B'};{produit.id};1;1500;2026-01-15"
+            for index, produit in enumerate(self.produits[:5])
+        ]
+
+        with tempfile.NamedTemporaryFile(
+            "w",
+            suffix=".csv",
+            delete=False,
+            encoding="utf-8",
+        ) as handle:
+            handle.write("\n".join(lignes))
+
+        self.addCleanup(os.unlink, handle.name)
+
+        args = [
+            handle.name,
+            "--bijouterie", str(self.bijouterie.id),
+            "--fournisseur-telephone", "770001111",
+        ]
+
+        call_command("import_arrivage", *args, "--dry-run", stdout=StringIO())
+        self.assertFalse(Achat.objects.exists())
+
+        call_command("import_arrivage", *args, stdout=StringIO())
 
-# Create your tests here.
+        achat = Achat.objects.get()
+        self.assertEqual(
+            sorted(
+                Lot.objects.filter(achat=achat)
+                .values_list("lignes__quantite", flat=True)
+            ),
+            [1] * 5,
+        )
+        self.assertEqual(Lot.objects.filter(achat=achat).count(), 2)
+        self.assertEqual(
+            Lot.objects.filter(achat=achat).first().received_at.date().isoformat(),
+            "2026-01-15",
+        )
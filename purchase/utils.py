@@ -5,19 +5,20 @@ from django.utils import timezone
 from purchase.models import Lot
 
 
-def generate_numero_lot() -> str:
+def generate_numeros_lot(count: int) -> list[str]:
     """
-    Génère un numéro de lot au format :
-
-        LOT-YYYYMMDD-0001
+    Réserve `count` numéros de lot consécutifs du jour :
 
-    La séquence repart à 0001 chaque jour.
+        LOT-YYYYMMDD-0007 ... LOT-YYYYMMDD-0012
 
-    Exemple :
-        LOT-20260722-0001
-        LOT-20260722-0002
+    Une seule lecture du dernier numéro. L'unicité reste garantie
+    par la contrainte sur Lot.numero_lot : en cas de création
+    concurrente, l'appelant recommence avec un nouveau bloc.
     """
 
+    if count < 1:
+        return []
+
     today = timezone.localdate().strftime("%Y%m%d")
     prefix = f"LOT-{today}-"
 
@@ -39,5 +40,23 @@ def generate_numero_lot() -> str:
         except (IndexError, ValueError):
             sequence = 1
 
-    return f"{prefix}{sequence:04d}"
+    return [
+        f"{prefix}{sequence + offset:04d}"
+        for offset in range(count)
+    ]
+
+
+def generate_numero_lot() -> str:
+    """
+    Génère un numéro de lot au format :
+
+        LOT-YYYYMMDD-0001
+
+    La séquence repart à 0001 chaque jour.
+
+    Exemple :
+        LOT-20260722-0001
+        LOT-20260722-0002
+    """
 
+    return generate_numeros_lot(1)[0]
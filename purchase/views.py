@@ -1,12 +1,10 @@
-import zipfile
 from datetime import datetime
-from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
-from io import BytesIO
+from decimal import Decimal
 
-from django.db import IntegrityError, transaction
-from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
 from django.db.models.functions import Coalesce, ExtractYear
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_yasg import openapi
@@ -18,17 +16,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import aware_range_year, date_range_filter
 from backend.permissions import ROLE_ADMIN, ROLE_MANAGER, IsAdminOrManager
 from backend.query_scopes import scope_queryset_by_bijouterie
 from backend.renderers import UserRenderer
 from backend.roles import ROLE_ADMIN, ROLE_MANAGER, get_role_name
-from inventory.models import Bucket, MovementType
-from inventory.services import log_move
 from purchase.models import Achat, Fournisseur, Lot, ProduitLine
-from purchase.services.etiquettes import build_etiquette_bague_png
-from purchase.utils import generate_numero_lot
-from stock.models import Stock
-from store.models import Bijouterie, Produit
+from purchase.services.arrivage_service import (
+    ingest_arrivage, resolve_arrivage_fournisseur)
+from purchase.services.etiquettes import (build_etiquettes_pdf,
+                                          iter_etiquettes_zip,
+                                          render_etiquette_png)
+from reporting.selectors import activity, total, yearly_totals
+from search.selectors import search as search_index
+from store.models import Bijouterie
 
 from .models import Achat, Fournisseur, Lot, ProduitLine
 from .serializers import (AchatDetailSerializer, AchatOutSerializer,
@@ -196,12 +197,8 @@ class AchatDashboardView(APIView):
         else:
             start_year = current_year - 2
 
-        start_date = timezone.make_aware(
-            datetime(
-                start_year,
-                1,
-                1,
-            ),
+        start_date, _ = aware_range_year(
+            start_year,
             timezone.get_current_timezone(),
         )
 
@@ -396,18 +393,24 @@ class AchatDashboardView(APIView):
         # 7. Statistiques globales
         # =====================================================
 
-        total_achats = achats.count()
+        # Achats : agrégat journalier reporting.DailyActivity.
+        activite = activity(
+            bijouterie_ids=(
+                [bijouterie_id]
+                if bijouterie_id is not None
+                else accessible_bijouterie_ids
+            ),
+            date_from=start_date.date(),
+        )
 
-        montant_total = achats.aggregate(
-            total=Coalesce(
-                Sum("montant_total_ht"),
-                Decimal("0.00"),
-                output_field=DecimalField(
-                    max_digits=18,
-                    decimal_places=2,
-                ),
-            )
-        )["total"]
+        achats_totaux = activite.aggregate(
+            total_achats=total("nb_achats"),
+            montant_total=total("montant_achats_ht"),
+        )
+
+        total_achats = achats_totaux["total_achats"]
+
+        montant_total = achats_totaux["montant_total"]
 
         total_lots = lots.count()
 
@@ -433,35 +436,19 @@ class AchatDashboardView(APIView):
         # 8. Achats par année
         # =====================================================
 
-        achats_par_annee_qs = (
-            achats
-            .annotate(
-                annee=ExtractYear(
-                    "created_at"
-                )
-            )
-            .values(
-                "annee"
-            )
-            .annotate(
-                total_achats=Count(
-                    "id"
-                ),
-                montant_total=Coalesce(
-                    Sum(
-                        "montant_total_ht"
-                    ),
-                    Decimal("0.00"),
-                    output_field=DecimalField(
-                        max_digits=18,
-                        decimal_places=2,
-                    ),
-                ),
-            )
-            .order_by(
-                "annee"
+        achats_par_annee_qs = [
+            row
+            for annee, row in sorted(
+                yearly_totals(
+                    activite,
+                    {
+                        "total_achats": "nb_achats",
+                        "montant_total": "montant_achats_ht",
+                    },
+                ).items()
             )
-        )
+            if row["total_achats"]
+        ]
 
         # =====================================================
         # 9. Quantités reçues par année
@@ -893,10 +880,9 @@ class FournisseurListView(APIView):
         fournisseurs = Fournisseur.objects.all()
 
         if search:
-            fournisseurs = fournisseurs.filter(
-                Q(nom__icontains=search)
-                | Q(prenom__icontains=search)
-                | Q(telephone__icontains=search)
+            fournisseurs = search_index(
+                fournisseurs,
+                search,
             )
 
         fournisseurs = fournisseurs.order_by(
@@ -1264,228 +1250,23 @@ class ArrivageCreateView(APIView):
             )
 
         # =====================================================
-        # 3. Validation des lots
-        # =====================================================
-
-        if not lots_in:
-            raise ValidationError({
-                "lots": "Au moins un lot est requis."
-            })
-
-        produit_ids = set()
-        lots_normalises = []
-
-        for lot_index, lot_in in enumerate(lots_in):
-            lignes_in = lot_in.get("lignes") or []
-
-            if not lignes_in:
-                raise ValidationError({
-                    f"lots[{lot_index}].lignes": (
-                        "Chaque lot doit contenir "
-                        "au moins une ligne."
-                    )
-                })
-
-            produits_du_lot = set()
-            lignes_normalisees = []
-
-            for ligne_index, ligne_in in enumerate(
-                lignes_in
-            ):
-                prefixe = (
-                    f"lots[{lot_index}]."
-                    f"lignes[{ligne_index}]"
-                )
-
-                produit_id = ligne_in.get("produit_id")
-
-                if not produit_id:
-                    raise ValidationError({
-                        f"{prefixe}.produit_id": (
-                            "produit_id est obligatoire."
-                        )
-                    })
-
-                if produit_id in produits_du_lot:
-                    raise ValidationError({
-                        f"{prefixe}.produit_id": (
-                            "Un produit ne peut apparaître "
-                            "qu'une seule fois dans un même lot."
-                        )
-                    })
-
-                produits_du_lot.add(produit_id)
-                produit_ids.add(produit_id)
-
-                try:
-                    quantite = int(
-                        ligne_in.get("quantite")
-                    )
-                except (TypeError, ValueError):
-                    raise ValidationError({
-                        f"{prefixe}.quantite": (
-                            "Quantité invalide."
-                        )
-                    })
-
-                if quantite < 1:
-                    raise ValidationError({
-                        f"{prefixe}.quantite": (
-                            "La quantité doit être supérieure "
-                            "ou égale à 1."
-                        )
-                    })
-
-                prix_brut = ligne_in.get(
-                    "prix_achat_gramme"
-                )
-
-                if prix_brut is None:
-                    raise ValidationError({
-                        f"{prefixe}.prix_achat_gramme": (
-                            "Le prix d'achat par gramme "
-                            "est obligatoire."
-                        )
-                    })
-
-                try:
-                    prix_achat_gramme = Decimal(
-                        str(prix_brut)
-                    ).quantize(
-                        Decimal("0.01"),
-                        rounding=ROUND_HALF_UP,
-                    )
-                except (
-                    InvalidOperation,
-                    TypeError,
-                    ValueError,
-                ):
-                    raise ValidationError({
-                        f"{prefixe}.prix_achat_gramme": (
-                            "Prix d'achat par gramme invalide."
-                        )
-                    })
-
-                if prix_achat_gramme < Decimal("0.00"):
-                    raise ValidationError({
-                        f"{prefixe}.prix_achat_gramme": (
-                            "Le prix d'achat par gramme "
-                            "ne peut pas être négatif."
-                        )
-                    })
-
-                lignes_normalisees.append({
-                    "produit_id": produit_id,
-                    "quantite": quantite,
-                    "prix_achat_gramme": (
-                        prix_achat_gramme
-                    ),
-                })
-
-            lots_normalises.append({
-                "description": (
-                    lot_in.get("description")
-                    or data.get("description")
-                    or ""
-                ),
-                "received_at": lot_in.get(
-                    "received_at"
-                ),
-                "lignes": lignes_normalisees,
-            })
-
-        # =====================================================
-        # 4. Validation des produits
+        # 3. Fournisseur
         # =====================================================
 
-        produits = (
-            Produit.objects
-            .filter(pk__in=produit_ids)
-            .only(
-                "id",
-                "poids",
-            )
-        )
-
-        produits_by_id = {
-            produit.id: produit
-            for produit in produits
-        }
-
-        produits_manquants = (
-            produit_ids - set(produits_by_id)
-        )
-
-        if produits_manquants:
-            raise ValidationError({
-                "lots": (
-                    "Produit(s) introuvable(s) : "
-                    f"{sorted(produits_manquants)}."
-                )
-            })
-
-        produits_sans_poids = [
-            produit.id
-            for produit in produits_by_id.values()
-            if produit.poids is None
-        ]
-
-        if produits_sans_poids:
-            raise ValidationError({
-                "lots": (
-                    "Produit(s) sans poids renseigné : "
-                    f"{sorted(produits_sans_poids)}."
-                )
-            })
-
-        # =====================================================
-        # 5. Fournisseur
-        # =====================================================
-
-        fournisseur_data = data["fournisseur"]
-
-        telephone = (
-            fournisseur_data["telephone"]
-            or ""
-        ).strip()
-
-        if not telephone:
-            raise ValidationError({
-                "fournisseur": {
-                    "telephone": (
-                        "Le téléphone du fournisseur "
-                        "est obligatoire."
-                    )
-                }
-            })
-
-        fournisseur, _ = (
-            Fournisseur.objects.update_or_create(
-                telephone=telephone,
-                defaults={
-                    "nom": (
-                        fournisseur_data.get("nom")
-                        or ""
-                    ),
-                    "prenom": (
-                        fournisseur_data.get("prenom")
-                        or ""
-                    ),
-                    "address": (
-                        fournisseur_data.get("address")
-                        or ""
-                    ),
-                },
-            )
+        fournisseur = resolve_arrivage_fournisseur(
+            data["fournisseur"]
         )
 
         # =====================================================
-        # 6. Création de l'achat
+        # 4. Achat, lots, ProduitLine, Stock et PURCHASE_IN
+        #    (validation complète puis insertions groupées)
         # =====================================================
 
-        achat = Achat.objects.create(
-            fournisseur=fournisseur,
+        result = ingest_arrivage(
             bijouterie=bijouterie,
+            fournisseur=fournisseur,
+            lots=lots_in,
+            user=request.user,
             reference_commande=(
                 data.get("reference_commande")
                 or ""
@@ -1502,115 +1283,15 @@ class ArrivageCreateView(APIView):
                 data.get("frais_douane")
                 or Decimal("0.00")
             ),
-            status=Achat.STATUS_CONFIRMED,
         )
 
-        lots_created = []
-
         # =====================================================
-        # 7. Lots, ProduitLine, Stock et PURCHASE_IN
-        # =====================================================
-
-        for lot_data in lots_normalises:
-            lot = None
-
-            for _ in range(5):
-                try:
-                    lot = Lot.objects.create(
-                        achat=achat,
-                        numero_lot=(
-                            generate_numero_lot()
-                        ),
-                        description=(
-                            lot_data["description"]
-                        ),
-                        received_at=(
-                            lot_data["received_at"]
-                            or timezone.now()
-                        ),
-                    )
-                    break
-
-                except IntegrityError:
-                    lot = None
-
-            if lot is None:
-                raise ValidationError({
-                    "numero_lot": (
-                        "Impossible de générer un "
-                        "numéro de lot unique."
-                    )
-                })
-
-            lots_created.append(lot)
-
-            for ligne in lot_data["lignes"]:
-                produit = produits_by_id[
-                    ligne["produit_id"]
-                ]
-
-                quantite = ligne["quantite"]
-                prix_achat_gramme = ligne[
-                    "prix_achat_gramme"
-                ]
-
-                produit_line = (
-                    ProduitLine.objects.create(
-                        lot=lot,
-                        produit=produit,
-                        quantite=quantite,
-                        prix_achat_gramme=(
-                            prix_achat_gramme
-                        ),
-                    )
-                )
-
-                Stock.objects.create(
-                    produit_line=produit_line,
-                    bijouterie=bijouterie,
-                    quantite_totale=quantite,
-                    en_stock=quantite,
-                )
-
-                log_move(
-                    produit=produit,
-                    qty=quantite,
-                    movement_type=(
-                        MovementType.PURCHASE_IN
-                    ),
-                    src_bucket=Bucket.EXTERNAL,
-                    dst_bucket=Bucket.BIJOUTERIE,
-                    dst_bijouterie_id=bijouterie.id,
-                    unit_cost=prix_achat_gramme,
-                    achat=achat,
-                    produit_line=produit_line,
-                    lot=lot,
-                    user=request.user,
-                    reason=(
-                        "Entrée fournisseur vers bijouterie"
-                    ),
-                )
-
-        # =====================================================
-        # 8. Totaux définitifs
-        # =====================================================
-
-        achat.update_total(save=True)
-
-        achat.refresh_from_db(
-            fields=[
-                "montant_total_ht",
-                "montant_total_ttc",
-            ]
-        )
-
-        # =====================================================
-        # 9. Réponse
+        # 5. Réponse
         # =====================================================
 
         payload = {
-            "achat": achat,
-            "lots": lots_created,
+            "achat": result.achat,
+            "lots": result.lots,
         }
 
         output = ArrivageCreateResponseSerializer(
@@ -2044,7 +1725,8 @@ class LotListView(ListAPIView):
             )
 
             queryset = queryset.filter(
-                received_at__date__range=(
+                **date_range_filter(
+                    "received_at",
                     date_from,
                     date_to,
                 )
@@ -2480,7 +2162,8 @@ class AchatListView(ListAPIView):
             )
 
             queryset = queryset.filter(
-                created_at__date__range=(
+                **date_range_filter(
+                    "created_at",
                     date_from,
                     date_to,
                 )
@@ -3601,10 +3284,20 @@ class ArrivageMetaUpdateView(APIView):
 
 
 class ProduitLineEtiquettesZIPView(APIView):
+    """
+    Étiquettes des lignes produit : une étiquette par unité physique.
+
+    Chaque produit distinct est rendu une seule fois (cache des PNG),
+    puis ses N exemplaires sont :
+    - format=zip (défaut) : stockés tels quels dans un ZIP envoyé
+      en flux (PNG déjà compressés, pas d'archive en mémoire) ;
+    - format=pdf : assemblés dans un PDF multi-pages pour la Phomemo.
+    """
+
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_summary="Télécharger les étiquettes PNG",
+        operation_summary="Télécharger les étiquettes PNG (ZIP) ou PDF",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             required=["produit_line_ids"],
@@ -3614,6 +3307,11 @@ class ProduitLineEtiquettesZIPView(APIView):
                     items=openapi.Items(type=openapi.TYPE_INTEGER),
                     example=[1, 2, 3],
                 ),
+                "format": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    enum=["zip", "pdf"],
+                    default="zip",
+                ),
             },
         ),
         tags=["Étiquettes"],
@@ -3632,7 +3330,15 @@ class ProduitLineEtiquettesZIPView(APIView):
                 status=400,
             )
 
-        produit_lines = (
+        output_format = str(request.data.get("format") or "zip").lower()
+
+        if output_format not in ("zip", "pdf"):
+            return Response(
+                {"detail": "format doit valoir 'zip' ou 'pdf'."},
+                status=400,
+            )
+
+        produit_lines = list(
             ProduitLine.objects
             .select_related(
                 "produit",
@@ -3642,9 +3348,10 @@ class ProduitLineEtiquettesZIPView(APIView):
                 "produit__modele",
             )
             .filter(id__in=produit_line_ids)
+            .order_by("id")
         )
 
-        found_ids = set(produit_lines.values_list("id", flat=True))
+        found_ids = {line.id for line in produit_lines}
         requested_ids = set(produit_line_ids)
         missing_ids = requested_ids - found_ids
 
@@ -3657,30 +3364,47 @@ class ProduitLineEtiquettesZIPView(APIView):
                 status=404,
             )
 
-        zip_buffer = BytesIO()
+        # ------------------------------------------------------------
+        # Un rendu par produit distinct, avant d'envoyer quoi que ce soit
+        # (une erreur de rendu donne un 400, pas une archive tronquée).
+        # ------------------------------------------------------------
+        pngs = {}
+        copies = {}
 
-        with zipfile.ZipFile(
-            zip_buffer,
-            "w",
-            compression=zipfile.ZIP_DEFLATED,
-        ) as zip_file:
+        try:
             for line in produit_lines:
                 produit = line.produit
-                safe_name = f"produit_{produit.id}"
 
-                for i in range(1, int(line.quantite) + 1):
-                    image_buffer = build_etiquette_bague_png(produit)
-                    filename = f"{safe_name}_{i}.png"
+                if produit.id not in pngs:
+                    pngs[produit.id] = render_etiquette_png(produit)
 
-                    zip_file.writestr(
-                        filename,
-                        image_buffer.getvalue(),
-                    )
+                copies[produit.id] = copies.get(produit.id, 0) + int(line.quantite or 0)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        if output_format == "pdf":
+            try:
+                pdf = build_etiquettes_pdf(
+                    (pngs[produit_id], count)
+                    for produit_id, count in copies.items()
+                )
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=400)
+
+            response = HttpResponse(pdf, content_type="application/pdf")
+            response["Content-Disposition"] = (
+                'attachment; filename="etiquettes_produits.pdf"'
+            )
+
+            return response
 
-        zip_buffer.seek(0)
+        def entries():
+            for produit_id, count in copies.items():
+                for i in range(1, count + 1):
+                    yield f"produit_{produit_id}_{i}.png", pngs[produit_id]
 
-        response = HttpResponse(
-            zip_buffer.getvalue(),
+        response = StreamingHttpResponse(
+            iter_etiquettes_zip(entries()),
             content_type="application/zip",
         )
         response["Content-Disposition"] = (
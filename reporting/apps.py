@@ -0,0 +1,11 @@
+# reporting/apps.py
+
+from django.apps import AppConfig
+
+
+class ReportingConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "reporting"
+
+    def ready(self):
+        from . import signals  # noqa: F401
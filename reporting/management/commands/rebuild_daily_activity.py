@@ -0,0 +1,47 @@
+# reporting/management/commands/rebuild_daily_activity.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reporting.services import rebuild_daily_activity
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit l'agrégat journalier DailyActivity (ventes, "
+        "encaissements, achats, dépenses) depuis les tables métier : "
+        "après un import, un bulk_create ou des update() qui ne passent "
+        "pas par les signaux."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bijouterie",
+            type=int,
+            action="append",
+            dest="bijouterie_ids",
+            help="Limiter à une bijouterie (option répétable).",
+        )
+        parser.add_argument(
+            "--depuis",
+            help="Reconstruire à partir de ce jour (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args, **options):
+        date_from = None
+
+        if options.get("depuis"):
+            date_from = parse_date(options["depuis"])
+
+            if date_from is None:
+                raise CommandError(
+                    "--depuis invalide. Format attendu YYYY-MM-DD."
+                )
+
+        count = rebuild_daily_activity(
+            options.get("bijouterie_ids"),
+            date_from=date_from,
+        )
+
+        self.stdout.write(f"{count} ligne(s) journalière(s) reconstruite(s).")
+        self.stdout.write(self.style.SUCCESS("Agrégat journalier à jour."))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+# Agrégat initial : construit par 0002 (clés *_key requises par
+# reporting.services).
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('finance', '0003_initial'),
+        ('purchase', '0003_initial'),
+        ('sale', '0009_facture_documents_version'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        ('vendor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('nb_ventes', models.PositiveIntegerField(default=0)),
+                ('montant_ventes', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('quantite_vendue', models.PositiveIntegerField(default=0)),
+                ('nb_paiements', models.PositiveIntegerField(default=0)),
+                ('nb_lignes_paiement', models.PositiveIntegerField(default=0)),
+                ('montant_encaisse', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('nb_achats', models.PositiveIntegerField(default=0)),
+                ('montant_achats_ht', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('montant_achats_ttc', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('nb_depenses', models.PositiveIntegerField(default=0)),
+                ('montant_depenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('nb_depenses_annulees', models.PositiveIntegerField(default=0)),
+                ('montant_depenses_annulees', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('bijouterie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='activites_journalieres', to='store.bijouterie')),
+                ('mode_paiement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='activites_journalieres', to='sale.modepaiement')),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='activites_journalieres', to='vendor.vendor')),
+            ],
+            options={
+                'ordering': ['-jour', 'bijouterie_id', 'vendor_id', 'mode_paiement_id'],
+                'indexes': [models.Index(fields=['jour'], name='activite_jour_idx'), models.Index(fields=['bijouterie', 'jour'], name='activite_shop_jour_idx'), models.Index(fields=['vendor', 'jour'], name='activite_vendor_jour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('jour', 'bijouterie', 'vendor', 'mode_paiement'), name='uq_activite_jour')],
+            },
+        ),
+    ]
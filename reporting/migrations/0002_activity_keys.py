@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+def build_daily_activity(apps, schema_editor):
+    # Agrégat reconstruit depuis les tables métier (modèles
+    # historiques) : remplit les clés et supprime les doublons
+    # laissés par l'ancienne contrainte.
+    from reporting.services import rebuild_daily_activity
+
+    rebuild_daily_activity(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0001_initial'),
+        ('sale', '0010_paiement_date_index'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        ('vendor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailyactivity',
+            name='uq_activite_jour',
+        ),
+        migrations.AddField(
+            model_name='dailyactivity',
+            name='bijouterie_key',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailyactivity',
+            name='mode_paiement_key',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailyactivity',
+            name='vendor_key',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(build_daily_activity, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyactivity',
+            constraint=models.UniqueConstraint(fields=('jour', 'bijouterie_key', 'vendor_key', 'mode_paiement_key'), name='uq_activite_jour'),
+        ),
+    ]
@@ -0,0 +1,161 @@
+# reporting/models.py
+
+from decimal import Decimal
+
+from django.db import models
+
+# Clé d'une dimension vide (bijouterie, vendeur, mode de paiement).
+NO_KEY = 0
+
+
+def activity_keys(bijouterie_id, vendor_id, mode_paiement_id) -> dict:
+    """
+    Colonnes *_key d'une ligne DailyActivity (aussi utilisées par
+    reporting.services avec le registre historique des migrations).
+    """
+
+    return {
+        "bijouterie_key": bijouterie_id or NO_KEY,
+        "vendor_key": vendor_id or NO_KEY,
+        "mode_paiement_key": mode_paiement_id or NO_KEY,
+    }
+
+
+class DailyActivity(models.Model):
+    """
+    Agrégat journalier des ventes, encaissements, achats et dépenses.
+
+    Une ligne par (jour local, bijouterie, vendeur, mode de paiement) :
+    - vendor / mode_paiement vides : ventes et nombre de paiements du
+      vendeur (ou achats et dépenses, sans vendeur) ;
+    - mode_paiement renseigné : encaissements de ce mode.
+
+    Les sections historiques et graphiques des dashboards somment ces
+    lignes au lieu de parcourir les ventes, paiements, achats et
+    dépenses. Les tables métier restent la source de vérité : chaque
+    écriture recalcule sa tranche (jour, bijouterie) après commit
+    (reporting.signals) ; la commande `rebuild_daily_activity`
+    reconstruit l'agrégat.
+
+    Unicité : sur les clés *_key (identifiant, ou NO_KEY si vide),
+    NULL ne déclenchant aucun conflit sous MySQL ni SQLite.
+    """
+
+    jour = models.DateField()
+
+    bijouterie = models.ForeignKey(
+        "store.Bijouterie",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="activites_journalieres",
+    )
+
+    vendor = models.ForeignKey(
+        "vendor.Vendor",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="activites_journalieres",
+    )
+
+    mode_paiement = models.ForeignKey(
+        "sale.ModePaiement",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="activites_journalieres",
+    )
+
+    bijouterie_key = models.PositiveBigIntegerField(default=NO_KEY, editable=False)
+    vendor_key = models.PositiveBigIntegerField(default=NO_KEY, editable=False)
+    mode_paiement_key = models.PositiveBigIntegerField(default=NO_KEY, editable=False)
+
+    # Ventes non annulées (Vente.created_at)
+    nb_ventes = models.PositiveIntegerField(default=0)
+
+    montant_ventes = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    quantite_vendue = models.PositiveIntegerField(default=0)
+
+    # Encaissements (Paiement.date_paiement)
+    nb_paiements = models.PositiveIntegerField(default=0)
+
+    nb_lignes_paiement = models.PositiveIntegerField(default=0)
+
+    montant_encaisse = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    # Achats confirmés (Achat.created_at)
+    nb_achats = models.PositiveIntegerField(default=0)
+
+    montant_achats_ht = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    montant_achats_ttc = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    # Dépenses payées / annulées (Depense.created_at)
+    nb_depenses = models.PositiveIntegerField(default=0)
+
+    montant_depenses = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    nb_depenses_annulees = models.PositiveIntegerField(default=0)
+
+    montant_depenses_annulees = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    class Meta:
+        ordering = ["-jour", "bijouterie_id", "vendor_id", "mode_paiement_id"]
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["jour", "bijouterie_key", "vendor_key", "mode_paiement_key"],
+                name="uq_activite_jour",
+            ),
+        ]
+
+        indexes = [
+            models.Index(fields=["jour"], name="activite_jour_idx"),
+            models.Index(
+                fields=["bijouterie", "jour"],
+                name="activite_shop_jour_idx",
+            ),
+            models.Index(
+                fields=["vendor", "jour"],
+                name="activite_vendor_jour_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - bijouterie#{self.bijouterie_id} : {self.montant_ventes}"
+
+    def save(self, *args, **kwargs):
+        for field, value in activity_keys(
+            self.bijouterie_id,
+            self.vendor_id,
+            self.mode_paiement_id,
+        ).items():
+            setattr(self, field, value)
+
+        return super().save(*args, **kwargs)
@@ -0,0 +1,185 @@
+# reporting/selectors.py
+
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+from reporting.models import DailyActivity
+
+# ============================================================
+# Lectures des dashboards
+# ============================================================
+#
+# Sommes de DailyActivity : quelques centaines de lignes par
+# bijouterie et par an, lues par l'index (bijouterie, jour) ou
+# (vendor, jour).
+
+
+def activity(*, bijouterie_ids=None, vendor_id=None, date_from=None, date_to=None):
+    queryset = DailyActivity.objects.all()
+
+    if bijouterie_ids is not None:
+        queryset = queryset.filter(bijouterie_id__in=list(bijouterie_ids))
+
+    if vendor_id is not None:
+        queryset = queryset.filter(vendor_id=vendor_id)
+
+    if date_from is not None:
+        queryset = queryset.filter(jour__gte=date_from)
+
+    if date_to is not None:
+        queryset = queryset.filter(jour__lte=date_to)
+
+    return queryset
+
+
+def total_zero(field: str):
+    if isinstance(DailyActivity._meta.get_field(field), DecimalField):
+        return Decimal("0.00")
+
+    return 0
+
+
+def total(field: str, **filters):
+    """
+    Sum(field) avec 0 (ou 0.00) quand aucune ligne ne correspond.
+    `filters` : agrégat conditionnel (Q) sur les lignes.
+    """
+
+    zero = total_zero(field)
+
+    if isinstance(zero, Decimal):
+        zero = Value(
+            zero,
+            output_field=DecimalField(max_digits=20, decimal_places=2),
+        )
+    else:
+        zero = Value(zero)
+
+    condition = Q(**filters) if filters else None
+
+    return Coalesce(Sum(field, filter=condition), zero)
+
+
+def _aliases(fields) -> dict:
+    # ["montant_ventes"] ou {"chiffre_affaires": "montant_ventes"}
+    if isinstance(fields, dict):
+        return dict(fields)
+
+    return {field: field for field in fields}
+
+
+def period_totals(queryset, periods: dict, fields) -> dict:
+    """
+    Totaux de plusieurs périodes en une requête. `fields` : liste de
+    champs, ou {alias: champ} (comme les autres lectures).
+
+        period_totals(qs, {"week": (lundi, today)}, ["montant_ventes"])
+        -> {"week": {"montant_ventes": Decimal(...)}}
+    """
+
+    fields = _aliases(fields)
+
+    row = queryset.aggregate(
+        **{
+            f"{alias}__{name}": total(
+                field,
+                jour__gte=start,
+                jour__lte=end,
+            )
+            for name, (start, end) in periods.items()
+            for alias, field in fields.items()
+        }
+    )
+
+    return {
+        name: {
+            alias: row[f"{alias}__{name}"]
+            for alias in fields
+        }
+        for name in periods
+    }
+
+
+def daily_series(queryset, date_from, date_to, fields) -> list[dict]:
+    """
+    Une entrée par jour de date_from à date_to, jours sans activité
+    inclus (valeurs à zéro).
+    """
+
+    fields = _aliases(fields)
+
+    by_day = {
+        row["jour"]: row
+        for row in (
+            queryset
+            .filter(jour__gte=date_from, jour__lte=date_to)
+            .order_by()
+            .values("jour")
+            .annotate(
+                **{alias: total(field) for alias, field in fields.items()}
+            )
+        )
+    }
+
+    series = []
+    day = date_from
+
+    while day <= date_to:
+        row = by_day.get(day, {})
+
+        series.append({
+            "jour": day,
+            **{
+                alias: row.get(alias, total_zero(field))
+                for alias, field in fields.items()
+            },
+        })
+
+        day += timedelta(days=1)
+
+    return series
+
+
+def monthly_totals(queryset, fields):
+    """
+    Lignes {"annee", "mois", champs...} triées par année puis mois.
+    """
+
+    return (
+        queryset
+        .annotate(
+            annee=ExtractYear("jour"),
+            mois=ExtractMonth("jour"),
+        )
+        .order_by()
+        .values("annee", "mois")
+        .annotate(
+            **{alias: total(field) for alias, field in _aliases(fields).items()}
+        )
+        .order_by("annee", "mois")
+    )
+
+
+def yearly_totals(queryset, fields) -> dict:
+    """
+    {annee: {champ: total}}.
+    """
+
+    return {
+        row["annee"]: row
+        for row in (
+            queryset
+            .annotate(annee=ExtractYear("jour"))
+            .order_by()
+            .values("annee")
+            .annotate(
+                **{alias: total(field) for alias, field in _aliases(fields).items()}
+            )
+        )
+    }
+
@@ -0,0 +1,433 @@
+# reporting/services.py
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from finance.models import Depense
+from purchase.models import Achat
+from reporting.models import activity_keys
+
+ZERO = Decimal("0.00")
+
+BATCH_SIZE = 1000
+
+# Mesures de DailyActivity (valeur nulle par défaut).
+MEASURES = {
+    "nb_ventes": 0,
+    "montant_ventes": ZERO,
+    "quantite_vendue": 0,
+    "nb_paiements": 0,
+    "nb_lignes_paiement": 0,
+    "montant_encaisse": ZERO,
+    "nb_achats": 0,
+    "montant_achats_ht": ZERO,
+    "montant_achats_ttc": ZERO,
+    "nb_depenses": 0,
+    "montant_depenses": ZERO,
+    "nb_depenses_annulees": 0,
+    "montant_depenses_annulees": ZERO,
+}
+
+# ============================================================
+# Calcul depuis les tables métier
+# ============================================================
+#
+# Une requête GROUP BY par source, clé :
+#     (jour local, bijouterie_id, vendor_id, mode_paiement_id)
+#
+# `apps` : registre des modèles (global par défaut, historique dans
+# une migration). Les périodes sont des bornes [début, fin) sur les
+# colonnes datetime : filtres indexables.
+
+
+def _bounds(date_from, date_to):
+    tz = timezone.get_current_timezone()
+    bounds = {}
+
+    if date_from is not None:
+        bounds["gte"] = timezone.make_aware(
+            datetime.combine(date_from, datetime.min.time()),
+            timezone=tz,
+        )
+
+    if date_to is not None:
+        bounds["lt"] = timezone.make_aware(
+            datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+            timezone=tz,
+        )
+
+    return bounds
+
+
+def _scoped(queryset, *, date_field, bounds, bijouterie_field, bijouterie_ids):
+    queryset = queryset.filter(
+        **{f"{date_field}__{lookup}": value for lookup, value in bounds.items()}
+    )
+
+    if bijouterie_ids is None:
+        return queryset
+
+    ids = [pk for pk in bijouterie_ids if pk is not None]
+    scope = Q(**{f"{bijouterie_field}__in": ids})
+
+    if None in bijouterie_ids:
+        scope |= Q(**{f"{bijouterie_field}__isnull": True})
+
+    return queryset.filter(scope)
+
+
+def _grouped(queryset, *, date_field, keys, **aggregates):
+    return (
+        queryset
+        .annotate(
+            jour=TruncDate(
+                date_field,
+                tzinfo=timezone.get_current_timezone(),
+            )
+        )
+        .order_by()
+        .values("jour", *keys)
+        .annotate(**aggregates)
+    )
+
+
+def compute_daily_activity(
+    *,
+    date_from=None,
+    date_to=None,
+    bijouterie_ids: Optional[Iterable] = None,
+    apps=global_apps,
+) -> dict:
+    """
+    Agrégat journalier recalculé depuis les ventes, paiements,
+    achats et dépenses (jours date_from à date_to inclus).
+
+    bijouterie_ids peut contenir None (lignes sans bijouterie).
+
+    Retourne :
+        {(jour, bijouterie_id, vendor_id, mode_paiement_id): {mesure: valeur}}
+    """
+
+    Vente = apps.get_model("sale", "Vente")
+    VenteProduit = apps.get_model("sale", "VenteProduit")
+    Paiement = apps.get_model("sale", "Paiement")
+    PaiementLigne = apps.get_model("sale", "PaiementLigne")
+    AchatModel = apps.get_model("purchase", "Achat")
+    DepenseModel = apps.get_model("finance", "Depense")
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = set(bijouterie_ids)
+
+    bounds = _bounds(date_from, date_to)
+
+    result = defaultdict(lambda: dict(MEASURES))
+
+    def add(jour, bijouterie_id, vendor_id, mode_paiement_id, **values):
+        row = result[(jour, bijouterie_id, vendor_id, mode_paiement_id)]
+
+        for field, value in values.items():
+            row[field] += value or MEASURES[field]
+
+    # ---------------------------------------------------------
+    # Ventes non annulées
+    # ---------------------------------------------------------
+    ventes = _scoped(
+        Vente.objects.filter(is_cancelled=False),
+        date_field="created_at",
+        bounds=bounds,
+        bijouterie_field="bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        ventes,
+        date_field="created_at",
+        keys=("bijouterie_id", "vendor_id"),
+        nb=Count("id"),
+        montant=Coalesce(Sum("montant_total"), ZERO),
+    ):
+        add(
+            row["jour"], row["bijouterie_id"], row["vendor_id"], None,
+            nb_ventes=row["nb"],
+            montant_ventes=row["montant"],
+        )
+
+    lignes = _scoped(
+        VenteProduit.objects.filter(vente__is_cancelled=False),
+        date_field="vente__created_at",
+        bounds=bounds,
+        bijouterie_field="vente__bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        lignes,
+        date_field="vente__created_at",
+        keys=("vente__bijouterie_id", "vente__vendor_id"),
+        quantite=Coalesce(Sum("quantite"), 0),
+    ):
+        add(
+            row["jour"], row["vente__bijouterie_id"], row["vente__vendor_id"], None,
+            quantite_vendue=row["quantite"],
+        )
+
+    # ---------------------------------------------------------
+    # Encaissements : nombre de paiements sur la ligne sans mode,
+    # montants par mode de paiement.
+    # ---------------------------------------------------------
+    paiements = _scoped(
+        Paiement.objects.all(),
+        date_field="date_paiement",
+        bounds=bounds,
+        bijouterie_field="facture__bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        paiements,
+        date_field="date_paiement",
+        keys=("facture__bijouterie_id", "facture__vente__vendor_id"),
+        nb=Count("id"),
+    ):
+        add(
+            row["jour"],
+            row["facture__bijouterie_id"],
+            row["facture__vente__vendor_id"],
+            None,
+            nb_paiements=row["nb"],
+        )
+
+    paiement_lignes = _scoped(
+        PaiementLigne.objects.all(),
+        date_field="paiement__date_paiement",
+        bounds=bounds,
+        bijouterie_field="paiement__facture__bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        paiement_lignes,
+        date_field="paiement__date_paiement",
+        keys=(
+            "paiement__facture__bijouterie_id",
+            "paiement__facture__vente__vendor_id",
+            "mode_paiement_id",
+        ),
+        nb=Count("id"),
+        montant=Coalesce(Sum("montant_paye"), ZERO),
+    ):
+        add(
+            row["jour"],
+            row["paiement__facture__bijouterie_id"],
+            row["paiement__facture__vente__vendor_id"],
+            row["mode_paiement_id"],
+            nb_lignes_paiement=row["nb"],
+            montant_encaisse=row["montant"],
+        )
+
+    # ---------------------------------------------------------
+    # Achats confirmés
+    # ---------------------------------------------------------
+    achats = _scoped(
+        AchatModel.objects.filter(status=Achat.STATUS_CONFIRMED),
+        date_field="created_at",
+        bounds=bounds,
+        bijouterie_field="bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        achats,
+        date_field="created_at",
+        keys=("bijouterie_id",),
+        nb=Count("id"),
+        ht=Coalesce(Sum("montant_total_ht"), ZERO),
+        ttc=Coalesce(Sum("montant_total_ttc"), ZERO),
+    ):
+        add(
+            row["jour"], row["bijouterie_id"], None, None,
+            nb_achats=row["nb"],
+            montant_achats_ht=row["ht"],
+            montant_achats_ttc=row["ttc"],
+        )
+
+    # ---------------------------------------------------------
+    # Dépenses payées / annulées
+    # ---------------------------------------------------------
+    depenses = _scoped(
+        DepenseModel.objects.filter(
+            status__in=[Depense.STATUS_PAID, Depense.STATUS_CANCELLED],
+        ),
+        date_field="created_at",
+        bounds=bounds,
+        bijouterie_field="bijouterie_id",
+        bijouterie_ids=bijouterie_ids,
+    )
+
+    for row in _grouped(
+        depenses,
+        date_field="created_at",
+        keys=("bijouterie_id", "status"),
+        nb=Count("id"),
+        montant=Coalesce(Sum("montant"), ZERO),
+    ):
+        if row["status"] == Depense.STATUS_PAID:
+            add(
+                row["jour"], row["bijouterie_id"], None, None,
+                nb_depenses=row["nb"],
+                montant_depenses=row["montant"],
+            )
+        else:
+            add(
+                row["jour"], row["bijouterie_id"], None, None,
+                nb_depenses_annulees=row["nb"],
+                montant_depenses_annulees=row["montant"],
+            )
+
+    return dict(result)
+
+
+# ============================================================
+# Écriture de l'agrégat
+# ============================================================
+#
+# Deux commits d'une même bijouterie le même jour recalculent la même
+# tranche en parallèle : les lignes Bijouterie concernées sont
+# verrouillées (SELECT ... FOR UPDATE, ordre des clés) avant la
+# lecture des tables métier. Le second recalcul attend le premier,
+# puis lit les écritures validées entre-temps (InnoDB : la vue
+# cohérente n'est ouverte qu'à la première lecture non verrouillante).
+#
+# Tranches sans bijouterie (aucune ligne à verrouiller) : la
+# contrainte uq_activite_jour, sur des clés non nulles, refuse les
+# doublons ; le recalcul perdant est journalisé (reporting.signals).
+
+
+def _lock_bijouteries(bijouterie_ids, apps) -> None:
+    Bijouterie = apps.get_model("store", "Bijouterie")
+
+    locked = Bijouterie.objects.select_for_update().order_by("pk")
+
+    if bijouterie_ids is not None:
+        locked = locked.filter(
+            pk__in=[pk for pk in bijouterie_ids if pk is not None],
+        )
+
+    list(locked.values_list("pk", flat=True))
+
+
+@transaction.atomic
+def _replace_daily_activity(*, date_from, date_to, bijouterie_ids, apps) -> int:
+    DailyActivity = apps.get_model("reporting", "DailyActivity")
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = set(bijouterie_ids)
+
+    _lock_bijouteries(bijouterie_ids, apps)
+
+    expected = compute_daily_activity(
+        date_from=date_from,
+        date_to=date_to,
+        bijouterie_ids=bijouterie_ids,
+        apps=apps,
+    )
+
+    stored = DailyActivity.objects.all()
+
+    if date_from is not None:
+        stored = stored.filter(jour__gte=date_from)
+
+    if date_to is not None:
+        stored = stored.filter(jour__lte=date_to)
+
+    if bijouterie_ids is not None:
+        scope = Q(bijouterie_id__in=[pk for pk in bijouterie_ids if pk is not None])
+
+        if None in bijouterie_ids:
+            scope |= Q(bijouterie__isnull=True)
+
+        stored = stored.filter(scope)
+
+    stored.delete()
+
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(
+                jour=jour,
+                bijouterie_id=bijouterie_id,
+                vendor_id=vendor_id,
+                mode_paiement_id=mode_paiement_id,
+                **activity_keys(bijouterie_id, vendor_id, mode_paiement_id),
+                **values,
+            )
+            for (
+                jour,
+                bijouterie_id,
+                vendor_id,
+                mode_paiement_id,
+            ), values in expected.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    return len(expected)
+
+
+def refresh_daily_activity(slices, *, apps=global_apps) -> int:
+    """
+    Recalcule les tranches (jour, bijouterie_id) données : quelques
+    lectures indexées sur une journée d'une bijouterie, quel que soit
+    le volume de l'historique.
+
+    Recalcul complet de la tranche (et non un delta) : idempotent,
+    valable aussi pour une modification ou une annulation.
+    Retourne le nombre de lignes écrites.
+    """
+
+    by_day = defaultdict(set)
+
+    for jour, bijouterie_id in slices:
+        by_day[jour].add(bijouterie_id)
+
+    count = 0
+
+    for jour in sorted(by_day):
+        count += _replace_daily_activity(
+            date_from=jour,
+            date_to=jour,
+            bijouterie_ids=by_day[jour],
+            apps=apps,
+        )
+
+    return count
+
+
+def rebuild_daily_activity(
+    bijouterie_ids: Optional[Iterable] = None,
+    *,
+    date_from=None,
+    apps=global_apps,
+) -> int:
+    """
+    Reconstruit DailyActivity depuis les tables métier (tout
+    l'historique, ou à partir de date_from).
+
+    Retourne le nombre de lignes écrites.
+    """
+
+    return _replace_daily_activity(
+        date_from=date_from,
+        date_to=None,
+        bijouterie_ids=bijouterie_ids,
+        apps=apps,
+    )
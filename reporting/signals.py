@@ -0,0 +1,151 @@
+# reporting/signals.py
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from finance.models import Depense
+from purchase.models import Achat
+from reporting.services import refresh_daily_activity
+from sale.models import Facture, Paiement, PaiementLigne, Vente, VenteProduit
+
+# ============================================================
+# Synchronisation de DailyActivity
+# ============================================================
+#
+# Chaque écriture note sa tranche (jour local, bijouterie) ; les
+# tranches notées sont recalculées une fois, après validation de la
+# transaction. Un échec est journalisé (robust=True) sans annuler
+# l'écriture métier : python manage.py rebuild_daily_activity.
+#
+# Une tranche notée dans une transaction annulée est recalculée au
+# commit suivant du même thread (recalcul idempotent).
+# bulk_create / update() ne déclenchent pas ces signaux.
+
+_pending = threading.local()
+
+
+def _flush():
+    slices = getattr(_pending, "slices", None)
+
+    if not slices:
+        return
+
+    _pending.slices = None
+
+    refresh_daily_activity(slices)
+
+
+def _schedule(moment, bijouterie_id):
+    if moment is None:
+        return
+
+    slices = getattr(_pending, "slices", None)
+
+    if slices is None:
+        slices = _pending.slices = set()
+
+    slices.add((timezone.localdate(moment), bijouterie_id))
+
+    transaction.on_commit(_flush, robust=True)
+
+
+# =========================================================
+# Ventes
+# =========================================================
+@receiver(pre_save, sender=Vente)
+def note_previous_vente_slice(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Bijouterie modifiée (réaffectation du vendeur) : l'ancienne
+    tranche perd la vente.
+    """
+
+    if raw or not instance.pk:
+        return
+
+    if update_fields is not None and "bijouterie" not in update_fields:
+        return
+
+    previous = (
+        Vente.objects
+        .filter(pk=instance.pk)
+        .values_list("bijouterie_id", "created_at")
+        .first()
+    )
+
+    if previous and previous[0] != instance.bijouterie_id:
+        _schedule(previous[1], previous[0])
+
+
+@receiver(post_save, sender=Vente)
+@receiver(post_delete, sender=Vente)
+def refresh_vente_slice(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    _schedule(instance.created_at, instance.bijouterie_id)
+
+
+@receiver(post_save, sender=VenteProduit)
+def refresh_vente_produit_slice(sender, instance, raw=False, **kwargs):
+    # Lignes écrites une à une (deferred_vente_totals) : total de la
+    # vente mis à jour par update(), sans post_save de la vente.
+    if raw or not instance.vente_id:
+        return
+
+    _schedule(instance.vente.created_at, instance.vente.bijouterie_id)
+
+
+# =========================================================
+# Encaissements
+# =========================================================
+@receiver(post_save, sender=Paiement)
+@receiver(post_delete, sender=Paiement)
+def refresh_paiement_slice(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    bijouterie_id = (
+        Facture.objects
+        .filter(pk=instance.facture_id)
+        .values_list("bijouterie_id", flat=True)
+        .first()
+    )
+
+    _schedule(instance.date_paiement, bijouterie_id)
+
+
+@receiver(post_save, sender=PaiementLigne)
+@receiver(post_delete, sender=PaiementLigne)
+def refresh_paiement_ligne_slice(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    paiement = (
+        Paiement.objects
+        .filter(pk=instance.paiement_id)
+        .values_list("date_paiement", "facture__bijouterie_id")
+        .first()
+    )
+
+    # Suppression en cascade du paiement : tranche notée par
+    # refresh_paiement_slice.
+    if paiement:
+        _schedule(*paiement)
+
+
+# =========================================================
+# Achats et dépenses
+# =========================================================
+@receiver(post_save, sender=Achat)
+@receiver(post_delete, sender=Achat)
+@receiver(post_save, sender=Depense)
+@receiver(post_delete, sender=Depense)
+def refresh_achat_depense_slice(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    _schedule(instance.created_at, instance.bijouterie_id)
@@ -0,0 +1,236 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from finance.models import Depense
+from purchase.models import Achat, Fournisseur
+from reporting.models import DailyActivity
+from reporting.services import (MEASURES, compute_daily_activity,
+                                refresh_daily_activity)
+from sale.models import Facture, ModePaiement, Paiement, PaiementLigne, Vente
+from staff.models import Cashier
+from store.models import Bijouterie
+from vendor.models import Vendor
+
+
+class DailyActivityTests(TestCase):
+    """
+    DailyActivity suit les ventes, encaissements, achats et dépenses
+    (recalcul après commit) et alimente les dashboards.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Plateau")
+
+        cls.vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.activite@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+            verifie=True,
+        )
+
+        cls.especes = ModePaiement.objects.get_or_create(
+            code="especes",
+            defaults={"nom": "Espèces"},
+        )[0]
+        cls.wave = ModePaiement.objects.get_or_create(
+            code="wave",
+            defaults={"nom": "Wave"},
+        )[0]
+
+        cls.fournisseur = Fournisseur.objects.create(
+            nom="Diop",
+            prenom="Awa",
+            telephone="771234567",
+        )
+
+    def _sell(self, montant, paiements=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            vente = Vente.objects.create(
+                bijouterie=self.bijouterie,
+                vendor=self.vendor,
+                montant_total=montant,
+            )
+            facture = Facture.objects.create(
+                vente=vente,
+                bijouterie=self.bijouterie,
+                montant_ht=montant,
+                type_facture=Facture.TYPE_FACTURE,
+            )
+
+            for mode, montant_paye in paiements:
+                PaiementLigne.objects.create(
+                    paiement=Paiement.objects.create(facture=facture),
+                    mode_paiement=mode,
+                    montant_paye=montant_paye,
+                    reference=f"REF-{mode.code}",
+                )
+
+        return vente
+
+    def _row(self, mode=None, vendor=True):
+        return DailyActivity.objects.get(
+            jour=timezone.localdate(),
+            bijouterie=self.bijouterie,
+            vendor=self.vendor if vendor else None,
+            mode_paiement=mode,
+        )
+
+    def _stored(self):
+        return {
+            (row.jour, row.bijouterie_id, row.vendor_id, row.mode_paiement_id): {
+                field: getattr(row, field)
+                for field in MEASURES
+            }
+            for row in DailyActivity.objects.all()
+        }
+
+    def test_rollup_follows_writes(self):
+        vente = self._sell(
+            Decimal("1000.00"),
+            [(self.especes, Decimal("600.00")), (self.wave, Decimal("150.00"))],
+        )
+        self._sell(Decimal("500.00"))
+
+        row = self._row()
+        self.assertEqual(row.nb_ventes, 2)
+        self.assertEqual(row.montant_ventes, Decimal("1500.00"))
+        self.assertEqual(row.nb_paiements, 2)
+        self.assertEqual(
+            self._row(self.especes).montant_encaisse,
+            Decimal("600.00"),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Achat.objects.create(
+                fournisseur=self.fournisseur,
+                bijouterie=self.bijouterie,
+                montant_total_ht=Decimal("2000.00"),
+                montant_total_ttc=Decimal("2360.00"),
+            )
+            Depense.objects.create(
+                bijouterie=self.bijouterie,
+                type_depense=Depense.TYPE_LOYER,
+                titre="Loyer",
+                montant=Decimal("300.00"),
+                status=Depense.STATUS_PAID,
+            )
+
+        row = self._row(vendor=False)
+        self.assertEqual(row.nb_achats, 1)
+        self.assertEqual(row.montant_achats_ttc, Decimal("2360.00"))
+        self.assertEqual(row.montant_depenses, Decimal("300.00"))
+
+        # Annulation : la vente sort de l'agrégat, ses encaissements
+        # restent.
+        with self.captureOnCommitCallbacks(execute=True):
+            vente.is_cancelled = True
+            vente.cancelled_at = timezone.now()
+            vente.save()
+
+        row = self._row()
+        self.assertEqual(row.nb_ventes, 1)
+        self.assertEqual(row.montant_ventes, Decimal("500.00"))
+        self.assertEqual(
+            self._row(self.wave).montant_encaisse,
+            Decimal("150.00"),
+        )
+
+        self.assertEqual(self._stored(), compute_daily_activity())
+
+    def test_same_slice_refreshed_twice(self):
+        self._sell(Decimal("700.00"), [(self.especes, Decimal("700.00"))])
+
+        slice_ = (timezone.localdate(), self.bijouterie.id)
+        refresh_daily_activity([slice_])
+        refresh_daily_activity([slice_, slice_])
+
+        self.assertEqual(
+            DailyActivity.objects.count(),
+            len(compute_daily_activity()),
+        )
+        self.assertEqual(self._stored(), compute_daily_activity())
+
+        # Dimensions vides : la contrainte porte sur les clés non nulles.
+        DailyActivity.objects.create(
+            jour=timezone.localdate(),
+            bijouterie=self.bijouterie,
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyActivity.objects.create(
+                jour=timezone.localdate(),
+                bijouterie=self.bijouterie,
+            )
+
+    def test_rebuild_command(self):
+        self._sell(Decimal("800.00"), [(self.especes, Decimal("800.00"))])
+
+        # update() ne passe pas par les signaux.
+        Vente.objects.update(
+            created_at=timezone.now() - timedelta(days=3),
+        )
+        DailyActivity.objects.all().delete()
+
+        out = StringIO()
+        call_command(
+            "rebuild_daily_activity",
+            "--bijouterie",
+            str(self.bijouterie.id),
+            stdout=out,
+        )
+
+        # Vente à J-3 ; paiement (nombre et mode) du jour.
+        self.assertIn("3 ligne(s) journalière(s)", out.getvalue())
+        self.assertEqual(self._stored(), compute_daily_activity())
+        self.assertEqual(
+            DailyActivity.objects.get(nb_ventes=1).jour,
+            timezone.localdate() - timedelta(days=3),
+        )
+
+    def test_cashier_dashboard(self):
+        self._sell(
+            Decimal("1000.00"),
+            [(self.especes, Decimal("400.00")), (self.wave, Decimal("100.00"))],
+        )
+
+        user = get_user_model().objects.create_user(
+            email="cashier.activite@example.com",
+            password="secret",
+        )
+        Cashier.objects.create(
+            user=user,
+            bijouterie=self.bijouterie,
+            verifie=True,
+        )
+
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get("/api/cashier/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["ca_encaisse"]["aujourdhui"], "500.00")
+        self.assertEqual(response.data["ventes"]["ventes_jour"], 1)
+        self.assertEqual(
+            {
+                mode["code"]: mode["montant"]
+                for mode in response.data["modes_paiement"]
+                if mode["nombre"]
+            },
+            {"especes": "400.00", "wave": "100.00"},
+        )
+        self.assertEqual(
+            response.data["historique"][str(timezone.localdate().year)]["encaissements"],
+            "500.00",
+        )
@@ -1,13 +1,25 @@
-# Compteur par bijouterie et par jour
-from django.db import models, transaction
-from django.db.models import F
-from django.utils import timezone
+# Compteur par séquence, bijouterie et jour
+from django.db import models
 
 from store.models import Bijouterie
 
+# Séquences gérées par sale.services.numbering_service
+SEQUENCE_FACTURE = "FAC"
+SEQUENCE_VENTE = "VENTE"
 
-# pour les numero de facture
+SEQUENCE_CHOICES = [
+    (SEQUENCE_FACTURE, "Facture"),
+    (SEQUENCE_VENTE, "Vente"),
+]
+
+
+# pour les numero de facture (et de vente)
 class InvoiceCounter(models.Model):
+    sequence = models.CharField(
+        max_length=16,
+        choices=SEQUENCE_CHOICES,
+        default=SEQUENCE_FACTURE,
+    )
     bijouterie = models.ForeignKey(
         Bijouterie,
         on_delete=models.CASCADE,
@@ -18,23 +30,26 @@ class InvoiceCounter(models.Model):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["bijouterie", "day"], name="uniq_invoice_counter_per_shop_day"),
+            models.UniqueConstraint(
+                fields=["sequence", "bijouterie", "day"],
+                name="uniq_counter_per_sequence_shop_day",
+            ),
         ]
         indexes = [models.Index(fields=["bijouterie", "day"])]
 
+    def __str__(self):
+        return f"{self.sequence} {self.bijouterie_id} {self.day} → {self.last_value}"
+
     @classmethod
     def next_for_today(cls, bijouterie) -> int:
+        """
+        Numéro de facture suivant (gap-free) pour aujourd'hui.
+
+        Conservé pour compatibilité : voir numbering_service.next_value.
+        """
+        from sale.services.numbering_service import next_value
+
         if not bijouterie:
             raise ValueError("Bijouterie requise pour incrémenter le compteur.")
-        today = timezone.localdate()
-        with transaction.atomic():
-            row, _ = (cls.objects
-                        .select_for_update()
-                        .get_or_create(bijouterie=bijouterie, day=today, defaults={"last_value": 0}))
-            row.last_value = F("last_value") + 1
-            row.save(update_fields=["last_value"])
-            row.refresh_from_db(fields=["last_value"])
-            return row.last_value
-        
-                
-        
\ No newline at end of file
+
+        return next_value(SEQUENCE_FACTURE, bijouterie.pk)
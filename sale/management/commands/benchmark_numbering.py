@@ -0,0 +1,198 @@
+# sale/management/commands/benchmark_numbering.py
+
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sale.models import Facture, Vente
+from sale.services.numbering_service import reset_number_blocks
+from store.models import Bijouterie
+from vendor.models import Vendor
+
+FACTURE_SEQ_RE = re.compile(r"^FAC-\d{8}-(\d+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de numérotation : N threads créent des ventes "
+        "(vente + facture proforma) en parallèle sur la base locale, "
+        "puis débit, doublons et trous de numérotation sont affichés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bijouterie",
+            type=int,
+            required=True,
+            help="Bijouterie cible.",
+        )
+        parser.add_argument(
+            "--vendor",
+            type=int,
+            help="Vendeur (par défaut : le premier de la bijouterie).",
+        )
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--per-thread",
+            type=int,
+            default=50,
+            help="Ventes créées par thread.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Conserver les ventes / factures créées.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Autoriser l'exécution avec DEBUG=False.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "Benchmark réservé à une base locale (DEBUG=True) ; "
+                "--force pour passer outre."
+            )
+
+        if connection.vendor == "sqlite":
+            self.stderr.write(
+                "SQLite sérialise les écritures : résultats peu représentatifs."
+            )
+
+        bijouterie = Bijouterie.objects.filter(pk=options["bijouterie"]).first()
+        if not bijouterie:
+            raise CommandError("Bijouterie introuvable.")
+
+        vendors = Vendor.objects.filter(bijouterie=bijouterie)
+        if options.get("vendor"):
+            vendors = vendors.filter(pk=options["vendor"])
+
+        vendor = vendors.order_by("id").first()
+        if not vendor:
+            raise CommandError("Aucun vendeur pour cette bijouterie.")
+
+        threads_count = max(1, options["threads"])
+        per_thread = max(1, options["per_thread"])
+
+        reset_number_blocks()
+
+        lock = threading.Lock()
+        created = []
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(per_thread):
+                    try:
+                        with transaction.atomic():
+                            vente = Vente.objects.create(
+                                bijouterie=bijouterie,
+                                vendor=vendor,
+                            )
+                            facture = Facture.objects.create(
+                                vente=vente,
+                                bijouterie=bijouterie,
+                                montant_ht=Decimal("0.00"),
+                                type_facture=Facture.TYPE_PROFORMA,
+                            )
+                    except Exception as exc:
+                        with lock:
+                            errors.append(repr(exc))
+                        continue
+
+                    with lock:
+                        created.append((
+                            vente.pk,
+                            vente.numero_vente,
+                            facture.pk,
+                            facture.numero_facture,
+                        ))
+            finally:
+                # Une connexion par thread : à fermer explicitement.
+                connection.close()
+
+        workers = [
+            threading.Thread(target=worker)
+            for _ in range(threads_count)
+        ]
+
+        started = time.perf_counter()
+
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        elapsed = time.perf_counter() - started
+
+        self._report(bijouterie, created, errors, elapsed)
+
+        if not options["keep"]:
+            Facture.objects.filter(pk__in=[row[2] for row in created]).delete()
+            Vente.objects.filter(pk__in=[row[0] for row in created]).delete()
+
+    # --------------------------------------------------------
+
+    def _report(self, bijouterie, created, errors, elapsed):
+        ventes = [row[1] for row in created]
+        factures = [row[3] for row in created]
+
+        dup_ventes = sum(n - 1 for n in Counter(ventes).values() if n > 1)
+        dup_factures = sum(n - 1 for n in Counter(factures).values() if n > 1)
+
+        # Trous : numéros manquants entre le plus petit et le plus grand
+        # numéro du jour produits par le benchmark (autres ventes comprises).
+        seqs = sorted(
+            int(match.group(1))
+            for match in map(FACTURE_SEQ_RE.match, factures)
+            if match
+        )
+        gaps = 0
+
+        if seqs:
+            prefix = f"FAC-{timezone.localdate().strftime('%Y%m%d')}-"
+            existing = {
+                int(FACTURE_SEQ_RE.match(numero).group(1))
+                for numero in (
+                    Facture.objects
+                    .filter(
+                        bijouterie=bijouterie,
+                        numero_facture__startswith=prefix,
+                    )
+                    .values_list("numero_facture", flat=True)
+                )
+                if FACTURE_SEQ_RE.match(numero)
+            }
+            gaps = sum(
+                1
+                for seq in range(seqs[0], seqs[-1] + 1)
+                if seq not in existing
+            )
+
+        self.stdout.write(f"Base               : {connection.vendor}")
+        self.stdout.write(f"Ventes créées      : {len(created)}")
+        self.stdout.write(f"Erreurs            : {len(errors)}")
+        self.stdout.write(f"Durée              : {elapsed:.2f} s")
+        self.stdout.write(
+            f"Débit              : {len(created) / elapsed if elapsed else 0:.1f} ventes/s"
+        )
+        self.stdout.write(f"Doublons vente     : {dup_ventes}")
+        self.stdout.write(f"Doublons facture   : {dup_factures}")
+        self.stdout.write(f"Trous facture      : {gaps}")
+
+        for error in errors[:10]:
+            self.stderr.write(error)
+
+        if dup_ventes or dup_factures or gaps:
+            self.stderr.write(self.style.ERROR("Numérotation incohérente."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Numérotation cohérente."))
@@ -0,0 +1,70 @@
+# sale/management/commands/pregenerate_facture_documents.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from sale.models import Paiement
+from sale.services.facture_document_service import \
+    pregenerate_facture_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-génère les documents imprimables (A5, tickets POS) des "
+        "factures ayant reçu un paiement récemment. Les documents déjà "
+        "en cache disque ne sont pas rendus une seconde fois."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=10,
+            help="Paiements des N dernières minutes (défaut : 10).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Traiter une fois puis s'arrêter (cron).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5.0,
+            help="Pause (s) entre deux passages (défaut : 5).",
+        )
+
+    def handle(self, *args, **options):
+        window = timedelta(minutes=max(1, options["minutes"]))
+
+        try:
+            while True:
+                close_old_connections()
+
+                facture_ids = list(
+                    Paiement.objects
+                    .filter(date_paiement__gte=timezone.now() - window)
+                    .order_by()
+                    .values_list("facture_id", flat=True)
+                    .distinct()
+                )
+
+                for facture_id in facture_ids:
+                    pregenerate_facture_documents(facture_id)
+
+                if facture_ids:
+                    self.stdout.write(
+                        f"{len(facture_ids)} facture(s) traitée(s)."
+                    )
+
+                if options["once"]:
+                    break
+
+                time.sleep(options["sleep"])
+
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt demandé.")
@@ -0,0 +1,52 @@
+# sale/management/commands/rebuild_facture_totaux.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sale.services.facture_totaux_service import (rebuild_facture_totaux,
+                                                  verify_facture_totaux)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule Facture.montant_paye / reste_a_payer depuis les "
+        "PaiementLigne, puis vérifie leur cohérence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bijouterie",
+            type=int,
+            action="append",
+            dest="bijouterie_ids",
+            help="Limiter à une bijouterie (option répétable).",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Vérifier les totaux sans les recalculer.",
+        )
+
+    def handle(self, *args, **options):
+        bijouterie_ids = options.get("bijouterie_ids")
+
+        if not options["verify_only"]:
+            count = rebuild_facture_totaux(bijouterie_ids)
+            self.stdout.write(f"{count} facture(s) recalculée(s).")
+
+        differences = verify_facture_totaux(bijouterie_ids)
+
+        if differences:
+            for diff in differences[:50]:
+                self.stderr.write(
+                    f"Facture#{diff['facture_id']} "
+                    f"{diff['numero_facture']} : {diff['ecarts']}"
+                )
+
+            raise CommandError(
+                f"{len(differences)} écart(s) entre les totaux facture "
+                "et les paiements."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            "Totaux facture cohérents avec les paiements."
+        ))
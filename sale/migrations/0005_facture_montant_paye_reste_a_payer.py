@@ -0,0 +1,71 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:25
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import (DecimalField, F, OuterRef, Subquery, Sum,
+                              Value)
+from django.db.models.functions import Coalesce, Greatest
+
+ZERO = Decimal("0.00")
+
+
+def backfill_totaux(apps, schema_editor):
+    """
+    Initialise montant_paye / reste_a_payer depuis les PaiementLigne
+    existantes (même calcul que Facture.refresh_paiement_totals).
+    """
+    Facture = apps.get_model("sale", "Facture")
+    PaiementLigne = apps.get_model("sale", "PaiementLigne")
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    paye = Coalesce(
+        Subquery(
+            PaiementLigne.objects
+            .filter(paiement__facture_id=OuterRef("pk"))
+            .order_by()
+            .values("paiement__facture_id")
+            .annotate(total=Sum("montant_paye"))
+            .values("total")[:1],
+            output_field=money,
+        ),
+        Value(ZERO),
+        output_field=money,
+    )
+
+    Facture.objects.update(
+        montant_paye=paye,
+        reste_a_payer=Greatest(
+            F("montant_total") - paye,
+            Value(ZERO),
+            output_field=money,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_initial'),
+        ('sale', '0004_facture_frais_transaction'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='montant_paye',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='facture',
+            name='reste_a_payer',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_totaux, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['bijouterie', 'status', 'reste_a_payer'], name='facture_shop_status_reste_idx'),
+        ),
+    ]
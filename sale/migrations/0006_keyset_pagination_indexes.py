@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sale', '0005_facture_montant_paye_reste_a_payer'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        ('vendor', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vente',
+            index=models.Index(fields=['bijouterie', 'created_at'], name='vente_shop_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sale', '0006_keyset_pagination_indexes'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicecounter',
+            name='sequence',
+            field=models.CharField(choices=[('FAC', 'Facture'), ('VENTE', 'Vente')], default='FAC', max_length=16),
+        ),
+        migrations.AddConstraint(
+            model_name='invoicecounter',
+            constraint=models.UniqueConstraint(fields=('sequence', 'bijouterie', 'day'), name='uniq_counter_per_sequence_shop_day'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='invoicecounter',
+            name='uniq_invoice_counter_per_shop_day',
+        ),
+    ]
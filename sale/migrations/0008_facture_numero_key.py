@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:05
+
+from django.db import migrations, models
+from django.db.models.functions import Trim, Upper
+
+
+def backfill_numero_facture_key(apps, schema_editor):
+    """
+    Initialise la clé canonique (même règle que Facture.normalize_numero).
+    """
+    Facture = apps.get_model("sale", "Facture")
+
+    Facture.objects.update(numero_facture_key=Upper(Trim("numero_facture")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_initial'),
+        ('sale', '0007_invoicecounter_sequence'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='numero_facture_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(
+            backfill_numero_facture_key,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['numero_facture_key'], name='facture_numero_key_idx'),
+        ),
+    ]
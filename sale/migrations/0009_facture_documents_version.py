@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sale', '0008_facture_numero_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='documents_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
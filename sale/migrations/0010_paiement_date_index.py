@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sale', '0009_facture_documents_version'),
+        ('staff', '0003_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['date_paiement'], name='paiement_date_idx'),
+        ),
+    ]
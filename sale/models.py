@@ -1,21 +1,29 @@
 # sale/models.py
 from __future__ import annotations
 
-import random
+import threading
 import uuid
+from contextlib import contextmanager
 from decimal import ROUND_HALF_UP, Decimal
 
 from django.apps import apps
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, models, transaction
-from django.db.models import CheckConstraint, F, Q, Sum
+from django.db import models, transaction
+from django.db.models import (CheckConstraint, DecimalField, F, OuterRef, Q,
+                              Subquery, Sum, Value)
+from django.db.models.functions import Coalesce, Greatest
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
 
-from .counters import InvoiceCounter  # OK (dans la même app)
+from backend.reference_cache import get_mode_paiement, get_mode_paiement_by_id
+
+from .counters import InvoiceCounter  # noqa: F401 (modèle de l'app)
+from .services.numbering_service import (next_numero_facture,
+                                         next_numero_vente,
+                                         numero_vente_sans_bijouterie)
 
 TWOPLACES = Decimal("0.01")
 ZERO = Decimal("0.00")
@@ -136,6 +144,10 @@ class Vente(models.Model):
             models.Index(fields=["created_at"]),
             models.Index(fields=["numero_vente"]),
             models.Index(fields=["vendor", "created_at"]),
+            models.Index(
+                fields=["bijouterie", "created_at"],
+                name="vente_shop_created_idx",
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -150,23 +162,19 @@ class Vente(models.Model):
         return f"Vente #{self.numero_vente or 'N/A'} - Client: {nom_client} - {date_txt}"
 
     def generer_numero_vente(self) -> str:
-        now = timezone.now()
-        suffixe = "".join(random.choices("0123456789", k=4))
-        return f"VENTE-{now.strftime('%m%d%Y%H%M%S')}-{suffixe}".upper()
+        bijouterie_id = self.bijouterie_id
+
+        if not bijouterie_id and self.vendor_id:
+            bijouterie_id = self.vendor.bijouterie_id
+
+        if not bijouterie_id:
+            return numero_vente_sans_bijouterie()
+
+        return next_numero_vente(bijouterie_id)
 
     def save(self, *args, **kwargs):
         if not self.numero_vente:
-            for _ in range(10):
-                self.numero_vente = self.generer_numero_vente()
-                try:
-                    with transaction.atomic():
-                        super().save(*args, **kwargs)
-                    break
-                except IntegrityError:
-                    self.numero_vente = None
-            else:
-                raise ValueError("Impossible de générer un numéro de vente unique après 10 tentatives.")
-            return
+            self.numero_vente = self.generer_numero_vente()
         return super().save(*args, **kwargs)
 
     def marquer_livree(self, by_user):
@@ -182,6 +190,77 @@ class Vente(models.Model):
             self.save(update_fields=["montant_total"])
         return total
 
+    @classmethod
+    def recalculer_montants_totaux(cls, vente_ids) -> int:
+        """
+        Recalcule montant_total de plusieurs ventes en un seul UPDATE
+        (somme des lignes par sous-requête).
+        """
+
+        vente_ids = [pk for pk in set(vente_ids) if pk]
+
+        if not vente_ids:
+            return 0
+
+        total_lignes = (
+            VenteProduit.objects
+            .filter(vente_id=OuterRef("pk"))
+            .order_by()
+            .values("vente_id")
+            .annotate(total=Sum("montant_total"))
+            .values("total")[:1]
+        )
+
+        return cls.objects.filter(pk__in=vente_ids).update(
+            montant_total=Coalesce(
+                Subquery(
+                    total_lignes,
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                ),
+                Value(ZERO),
+            )
+        )
+
+
+# =========================
+# Recalcul différé des totaux de vente
+# =========================
+_deferred_totals = threading.local()
+
+
+@contextmanager
+def deferred_vente_totals():
+    """
+    Diffère le recalcul de Vente.montant_total pendant le bloc.
+
+    Sans ce contexte, chaque VenteProduit.save() ré-agrège toutes
+    les lignes de la vente et la sauvegarde (O(N²) pour N lignes).
+    Dans le bloc, les ventes touchées sont notées puis recalculées
+    en un seul UPDATE à la sortie (pas en cas d'exception).
+
+    Imbriqué : seul le bloc le plus externe recalcule.
+
+        with deferred_vente_totals():
+            for ligne in lignes:
+                ligne.save()
+    """
+
+    pending = getattr(_deferred_totals, "pending", None)
+
+    if pending is not None:
+        yield pending
+        return
+
+    pending = set()
+    _deferred_totals.pending = pending
+
+    try:
+        yield pending
+    finally:
+        _deferred_totals.pending = None
+
+    Vente.recalculer_montants_totaux(pending)
+
 
 
 class VenteProduit(models.Model):
@@ -263,14 +342,19 @@ class VenteProduit(models.Model):
 
         return Decimal(str(poids))
     
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def calculer_montants(self, poids) -> None:
+        """
+        montant_ht = prix/g × poids × quantité ;
+        montant_total = montant_ht - remise + autres (≥ 0).
+
+        Utilisé par save() et par l'écriture groupée des lignes
+        (sale.services.vente_lines_service), sans requête.
+        """
 
         unit_price = self._resolve_unit_price()
-        weight = self._get_product_weight()
         qte = int(self.quantite or 0)
 
-        base_ht = unit_price * weight * qte
+        base_ht = unit_price * Decimal(str(poids)) * qte
         self.montant_ht = base_ht.quantize(TWOPLACES, rounding=ROUND_HALF_UP)
 
         remise_v = Decimal(str(self.remise or ZERO))
@@ -282,9 +366,24 @@ class VenteProduit(models.Model):
 
         self.montant_total = total.quantize(TWOPLACES, rounding=ROUND_HALF_UP)
 
+    def save(self, *args, **kwargs):
+        self.full_clean()
+
+        self.calculer_montants(self._get_product_weight())
+
         super().save(*args, **kwargs)
 
-        if self.vente_id and hasattr(self.vente, "mettre_a_jour_montant_total"):
+        if not self.vente_id:
+            return
+
+        pending = getattr(_deferred_totals, "pending", None)
+
+        if pending is not None:
+            # Recalcul à la sortie de deferred_vente_totals().
+            pending.add(self.vente_id)
+            return
+
+        if hasattr(self.vente, "mettre_a_jour_montant_total"):
             try:
                 self.vente.mettre_a_jour_montant_total()
             except Exception:
@@ -319,9 +418,26 @@ class Facture(models.Model):
         (TYPE_FINALE, "Facture finale"),
     )
 
+    # Champs dont dépend reste_a_payer lors d'un save(update_fields=...)
+    TOTAUX_FIELDS = {
+        "montant_ht",
+        "appliquer_tva",
+        "taux_tva",
+        "montant_tva",
+        "montant_total",
+    }
+
     # uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     uuid = models.UUIDField(default=uuid.uuid4,editable=False,null=True,blank=True,)
     numero_facture = models.CharField(max_length=32, editable=False)
+    # Numéro canonique (majuscules, sans espaces) : recherche par
+    # égalité indexée au lieu de numero_facture__iexact.
+    numero_facture_key = models.CharField(
+        max_length=32,
+        editable=False,
+        blank=True,
+        default="",
+    )
 
     vente = models.OneToOneField(
         "sale.Vente",
@@ -378,6 +494,22 @@ class Facture(models.Model):
         default=ZERO,
     )
 
+    # Montants dénormalisés, maintenus à partir des PaiementLigne
+    # (voir refresh_paiement_totals). Ne pas modifier à la main.
+    montant_paye = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=ZERO,
+        editable=False,
+    )
+
+    reste_a_payer = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=ZERO,
+        editable=False,
+    )
+
     status = models.CharField(
         max_length=20,
         choices=STATUS,
@@ -424,15 +556,24 @@ class Facture(models.Model):
 
     stock_consumed = models.BooleanField(default=False, db_index=True)
 
+    # Révision incrémentée à chaque save() : entre dans l'empreinte des
+    # documents imprimables en cache (sale.services.facture_document_service).
+    documents_version = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ["-id"]
         indexes = [
             models.Index(fields=["numero_facture"]),
+            models.Index(fields=["numero_facture_key"], name="facture_numero_key_idx"),
             models.Index(fields=["date_creation"]),
             models.Index(fields=["status"]),
             models.Index(fields=["type_facture"]),
             models.Index(fields=["bijouterie", "date_creation"]),
             models.Index(fields=["commande_client"]),
+            models.Index(
+                fields=["bijouterie", "status", "reste_a_payer"],
+                name="facture_shop_status_reste_idx",
+            ),
         ]
         constraints = [
             CheckConstraint(check=Q(montant_ht__gte=0), name="facture_montant_ht_gte_0"),
@@ -449,11 +590,19 @@ class Facture(models.Model):
     def __str__(self):
         return self.numero_facture
 
+    @staticmethod
+    def normalize_numero(numero) -> str:
+        """
+        Forme canonique d'un numéro de facture (saisie caisse, URL...).
+        """
+        return (numero or "").strip().upper()
+
     @staticmethod
     def generer_numero_unique(bijouterie) -> str:
-        seq = InvoiceCounter.next_for_today(bijouterie)
-        day = timezone.localdate().strftime("%Y%m%d")
-        return f"FAC-{day}-{seq:04d}"
+        if not bijouterie:
+            raise ValueError("Bijouterie requise pour incrémenter le compteur.")
+
+        return next_numero_facture(bijouterie.pk)
 
     def recalculer_totaux(self):
 
@@ -501,6 +650,10 @@ class Facture(models.Model):
     @staticmethod
     def recompute_facture_status(facture):
 
+        # Les totaux sont mis à jour en base par les PaiementLigne :
+        # l'instance en mémoire peut être en retard.
+        facture.refresh_from_db(fields=["montant_paye", "reste_a_payer"])
+
         total_paye = Decimal(str(facture.total_paye or ZERO))
         reste = Decimal(str(facture.reste_a_payer or ZERO))
 
@@ -522,30 +675,118 @@ class Facture(models.Model):
 
     def save(self, *args, **kwargs):
         if self.pk:
-            old = Facture.objects.filter(pk=self.pk).only("is_locked").first()
+            old = (
+                Facture.objects
+                .filter(pk=self.pk)
+                .only("is_locked", "montant_paye")
+                .first()
+            )
             if old and old.is_locked:
                 raise ValidationError("Facture verrouillée")
 
-        if not self.numero_facture:
-            if not self.bijouterie_id:
-                raise ValueError("La bijouterie est obligatoire pour numéroter la facture.")
+            # montant_paye appartient aux paiements :
+            # une instance périmée ne doit pas l'écraser.
+            if old:
+                self.montant_paye = old.montant_paye
 
-            self.numero_facture = self.generer_numero_unique(self.bijouterie)
+        numeroter = not self.numero_facture
+
+        if numeroter and not self.bijouterie_id:
+            raise ValueError("La bijouterie est obligatoire pour numéroter la facture.")
 
         self.recalculer_totaux()
-        super().save(*args, **kwargs)
 
-    @property
-    def total_paye(self) -> Decimal:
+        self.reste_a_payer = max(
+            (self.montant_total or ZERO) - (self.montant_paye or ZERO),
+            ZERO,
+        )
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            set(update_fields) & self.TOTAUX_FIELDS
+        ):
+            kwargs["update_fields"] = {*update_fields, "reste_a_payer"}
+
+        # Numéro et INSERT dans la même transaction : si l'INSERT
+        # échoue, le compteur revient en arrière (séquence sans trou).
+        with transaction.atomic():
+            if numeroter:
+                self.numero_facture = self.generer_numero_unique(self.bijouterie)
+
+            self.numero_facture_key = self.normalize_numero(self.numero_facture)
+
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "numero_facture" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "numero_facture_key"}
+
+            if self._state.adding:
+                self.documents_version = 1
+                super().save(*args, **kwargs)
+                return
+
+            # documents_version est incrémentée en base : deux save()
+            # depuis des copies périmées donnent deux versions distinctes.
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+
+            kwargs["update_fields"] = set(update_fields) - {"documents_version"}
+
+            super().save(*args, **kwargs)
+
+            Facture.objects.filter(pk=self.pk).update(
+                documents_version=F("documents_version") + 1,
+            )
+            self.refresh_from_db(fields=["documents_version"])
+
+    @classmethod
+    def refresh_paiement_totals(cls, **filters) -> int:
+        """
+        Recalcule montant_paye / reste_a_payer en une seule requête
+        UPDATE pour les factures ciblées par `filters`
+        (ex: pk=facture_id, paiements=paiement_id).
+
+        Passe par QuerySet.update : fonctionne aussi pour une
+        facture verrouillée, les totaux découlant des paiements.
+        """
         PaiementLigne = apps.get_model("sale", "PaiementLigne")
-        total = PaiementLigne.objects.filter(
-            paiement__facture=self
-        ).aggregate(total=Sum("montant_paye"))["total"]
-        return total or ZERO
+
+        money = DecimalField(max_digits=14, decimal_places=2)
+
+        paye = Coalesce(
+            Subquery(
+                PaiementLigne.objects
+                .filter(paiement__facture_id=OuterRef("pk"))
+                .order_by()
+                .values("paiement__facture_id")
+                .annotate(total=Sum("montant_paye"))
+                .values("total")[:1],
+                output_field=money,
+            ),
+            Value(ZERO),
+            output_field=money,
+        )
+
+        # reste_a_payer ne réutilise pas F("montant_paye") :
+        # MySQL évalue les SET de gauche à droite avec les
+        # nouvelles valeurs, les autres SGBD avec les anciennes.
+        return cls.objects.filter(**filters).update(
+            montant_paye=paye,
+            reste_a_payer=Greatest(
+                F("montant_total") - paye,
+                Value(ZERO),
+                output_field=money,
+            ),
+        )
 
     @property
-    def reste_a_payer(self) -> Decimal:
-        return max((self.montant_total or ZERO) - self.total_paye, ZERO)
+    def total_paye(self) -> Decimal:
+        return self.montant_paye or ZERO
 
     def est_reglee(self) -> bool:
         return self.status == self.STAT_PAYE
@@ -580,6 +821,9 @@ class Paiement(models.Model):
 
     class Meta:
         ordering = ["-date_paiement"]
+        indexes = [
+            models.Index(fields=["date_paiement"], name="paiement_date_idx"),
+        ]
 
     def __str__(self):
         num = getattr(self.facture, "numero_facture", None) or "Aucune facture"
@@ -607,6 +851,12 @@ class Paiement(models.Model):
         
 
 def get_default_mode_paiement():
+    # Lu depuis le cache de référence ; créé au premier besoin.
+    mode = get_mode_paiement("cash", active_only=False)
+
+    if mode is not None:
+        return mode.id
+
     return ModePaiement.objects.get_or_create(
         code="cash",
         defaults={
@@ -764,7 +1014,12 @@ class PaiementLigne(models.Model):
                 "mode_paiement": "Le mode de paiement est obligatoire."
             })
 
-        mode = self.mode_paiement
+        # Instance fournie par l'appelant, sinon cache de référence
+        # (évite une requête par ligne).
+        if PaiementLigne.mode_paiement.is_cached(self):
+            mode = self.mode_paiement
+        else:
+            mode = get_mode_paiement_by_id(self.mode_paiement_id) or self.mode_paiement
 
         if not mode.active:
             raise ValidationError({
@@ -802,7 +1057,10 @@ class PaiementLigne(models.Model):
 
         self.full_clean()
 
-        super().save(*args, **kwargs)
+        # Même transaction que la mise à jour des totaux facture
+        # (signal post_save, voir sale/signals.py).
+        with transaction.atomic():
+            super().save(*args, **kwargs)
         
         
 
@@ -0,0 +1,83 @@
+# sale/selectors/factures.py
+
+from sale.models import Facture
+
+# ============================================================
+# Recherche d'une facture par numéro
+# ============================================================
+#
+# Égalité sur Facture.numero_facture_key (numéro canonique, indexé)
+# au lieu de numero_facture__iexact, qui selon la collation / le
+# moteur n'utilise pas l'index et parcourt la table.
+#
+# Chaque profil charge en une fois les relations lues par le rendu :
+# nombre de requêtes fixe par ticket / document.
+
+FACTURE_PROFILES = {
+    # Tickets POS 58 / 80 mm
+    "ticket": {
+        "select_related": ("vente", "vente__client", "bijouterie"),
+        "prefetch_related": (),
+    },
+    # Facture A5 paysage (PDF)
+    "facture_a5": {
+        "select_related": (
+            "vente",
+            "vente__client",
+            "vente__vendor__user",
+            "bijouterie",
+        ),
+        "prefetch_related": ("vente__lignes__produit",),
+    },
+    # Encaissement (paiement multi-modes)
+    "paiement": {
+        "select_related": ("vente", "vente__client", "bijouterie"),
+        "prefetch_related": ("paiements__lignes",),
+    },
+}
+
+
+def facture_queryset(profile="ticket"):
+    try:
+        config = FACTURE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Profil de facture inconnu : {profile}")
+
+    queryset = Facture.objects.select_related(*config["select_related"])
+
+    if config["prefetch_related"]:
+        queryset = queryset.prefetch_related(*config["prefetch_related"])
+
+    return queryset
+
+
+def get_facture_by_numero(numero_facture, *, profile="ticket", for_update=False) -> Facture:
+    """
+    Facture par numéro (insensible à la casse et aux espaces).
+
+    Lève Facture.DoesNotExist si aucune facture ne correspond.
+    Le numéro n'est unique que par bijouterie : en cas d'homonymes,
+    la plus récente est retournée.
+    """
+
+    key = Facture.normalize_numero(numero_facture)
+
+    if not key:
+        raise Facture.DoesNotExist("Numéro de facture vide.")
+
+    queryset = facture_queryset(profile)
+
+    if for_update:
+        queryset = queryset.select_for_update()
+
+    facture = (
+        queryset
+        .filter(numero_facture_key=key)
+        .order_by("-id")
+        .first()
+    )
+
+    if facture is None:
+        raise Facture.DoesNotExist(f"Facture introuvable : {numero_facture}")
+
+    return facture
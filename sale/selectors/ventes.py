@@ -0,0 +1,197 @@
+# sale/selectors/ventes.py
+
+from __future__ import annotations
+
+from backend.values_serializers import ValuesSerializer
+from sale.models import Vente, VenteProduit
+
+# ============================================================
+# Liste des ventes : lignes values()
+# ============================================================
+#
+# Même représentation que VenteListSerializer (produits, vendeurs et
+# bijouteries imbriqués), en deux requêtes values() :
+#     ventes + client + facture ;
+#     lignes + produit + vendeur (utilisateur, bijouterie).
+# Le nombre de requêtes ne dépend pas de la taille de la page.
+
+
+class VenteRows(ValuesSerializer):
+    model = Vente
+    fields = {
+        "id": "id",
+        "uuid": "uuid",
+        "numero_vente": "numero_vente",
+        "created_at": "created_at",
+        "montant_total": "montant_total",
+        "client_id": "client_id",
+        "client_prenom": "client__prenom",
+        "client_nom": "client__nom",
+        "client_telephone": "client__telephone",
+        "facture_id": "facture_vente__id",
+        "numero_facture": "facture_vente__numero_facture",
+        "type_facture": "facture_vente__type_facture",
+        "status": "facture_vente__status",
+        "facture_montant_ht": "facture_vente__montant_ht",
+        "facture_montant_tva": "facture_vente__montant_tva",
+        "facture_montant_total": "facture_vente__montant_total",
+    }
+
+    # VenteListSerializer.get_facture : str() de la valeur brute.
+    FACTURE_MONTANTS = (
+        "facture_montant_ht",
+        "facture_montant_tva",
+        "facture_montant_total",
+    )
+
+    def to_representation(self, row: dict) -> dict:
+        data = super().to_representation(row)
+
+        for key in self.FACTURE_MONTANTS:
+            data[key] = str(row[self.fields[key]])
+
+        return data
+
+
+class VenteLigneRows(ValuesSerializer):
+    model = VenteProduit
+    fields = {
+        "id": "id",
+        "vente_id": "vente_id",
+        "quantite": "quantite",
+        "prix_vente_grammes": "prix_vente_grammes",
+        "remise": "remise",
+        "autres": "autres",
+        "montant_ht": "montant_ht",
+        "montant_total": "montant_total",
+
+        # sale.serializers.ProduitSerializer
+        "produit_id": "produit_id",
+        "produit_nom": "produit__nom",
+        "produit_sku": "produit__sku",
+        "produit_slug": "produit__slug",
+        "produit_poids": "produit__poids",
+        "produit_categorie": "produit__categorie_id",
+        "produit_marque": "produit__marque_id",
+        "produit_purete": "produit__purete_id",
+
+        # sale.serializers.VendorSerializer / BijouterieSerializer
+        "vendor_id": "vendor_id",
+        "vendor_username": "vendor__user__username",
+        "vendor_email": "vendor__user__email",
+        "bijouterie_id": "vendor__bijouterie_id",
+        "bijouterie_nom": "vendor__bijouterie__nom",
+        "bijouterie_telephone": "vendor__bijouterie__telephone_portable_1",
+        "bijouterie_adresse": "vendor__bijouterie__adresse",
+        "bijouterie_domaine": "vendor__bijouterie__nom_de_domaine",
+    }
+
+    def to_representation(self, row: dict) -> dict:
+        data = super().to_representation(row)
+
+        vendor = None
+
+        if data["vendor_id"] is not None:
+            vendor = {
+                "id": data["vendor_id"],
+                "username": data["vendor_username"],
+                "email": data["vendor_email"],
+                "bijouterie": (
+                    {
+                        "id": data["bijouterie_id"],
+                        "nom": data["bijouterie_nom"],
+                        "telephone_portable_1": data["bijouterie_telephone"],
+                        "adresse": data["bijouterie_adresse"],
+                        "nom_de_domaine": data["bijouterie_domaine"],
+                    }
+                    if data["bijouterie_id"] is not None else None
+                ),
+            }
+
+        return {
+            "vente_id": data["vente_id"],
+            "id": data["id"],
+            "slug": data["produit_slug"],
+            "produit": {
+                "id": data["produit_id"],
+                "nom": data["produit_nom"],
+                "sku": data["produit_sku"],
+                "slug": data["produit_slug"],
+                "poids": data["produit_poids"],
+                "categorie": data["produit_categorie"],
+                "marque": data["produit_marque"],
+                "purete": data["produit_purete"],
+            },
+            "vendor": vendor,
+            "quantite": data["quantite"],
+            "prix_vente_grammes": data["prix_vente_grammes"],
+            "remise": data["remise"],
+            "autres": data["autres"],
+            "montant_ht": data["montant_ht"],
+            "montant_total": data["montant_total"],
+        }
+
+
+def vente_list_rows(vente_ids) -> list[dict]:
+    """
+    Représentation VenteListSerializer des ventes données, dans
+    l'ordre de `vente_ids`.
+    """
+
+    vente_ids = list(vente_ids)
+
+    if not vente_ids:
+        return []
+
+    ventes = {
+        row["id"]: row
+        for row in VenteRows().rows(Vente.objects.filter(id__in=vente_ids))
+    }
+
+    lignes_par_vente = {}
+
+    for ligne in VenteLigneRows().rows(
+        VenteProduit.objects
+        .filter(vente_id__in=vente_ids)
+        .order_by("id")
+    ):
+        lignes_par_vente.setdefault(ligne.pop("vente_id"), []).append(ligne)
+
+    data = []
+
+    for vente_id in vente_ids:
+        row = ventes.get(vente_id)
+
+        if row is None:
+            continue
+
+        data.append({
+            "id": row["id"],
+            "uuid": row["uuid"],
+            "numero_vente": row["numero_vente"],
+            "created_at": row["created_at"],
+            "montant_total": row["montant_total"],
+            "client": (
+                {
+                    "prenom": row["client_prenom"],
+                    "nom": row["client_nom"],
+                    "telephone": row["client_telephone"],
+                }
+                if row["client_id"] is not None else None
+            ),
+            "facture": (
+                {
+                    "id": row["facture_id"],
+                    "numero_facture": row["numero_facture"],
+                    "type_facture": row["type_facture"],
+                    "status": row["status"],
+                    "montant_ht": row["facture_montant_ht"],
+                    "montant_tva": row["facture_montant_tva"],
+                    "montant_total": row["facture_montant_total"],
+                }
+                if row["facture_id"] is not None else None
+            ),
+            "produits": lignes_par_vente.get(vente_id, []),
+        })
+
+    return data
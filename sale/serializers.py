@@ -5,16 +5,17 @@ from django.db import models
 from django.db.models import Sum
 from rest_framework import serializers
 
+from backend.reference_cache import get_mode_paiement
 from backend.permissions import (ROLE_ADMIN, ROLE_MANAGER, ROLE_VENDOR,
                                  get_role_name)
+from sale.selectors.factures import get_facture_by_numero
 from sale.services.sale_service import validate_facture_payable
 from store.models import Bijouterie, MarquePurete, Produit
 from store.serializers import BijouterieSerializer, ProduitSerializer
 from vendor.models import Vendor
 from vendor.serializer import VendorSerializer
 
-from .models import (Facture, ModePaiement, Paiement, PaiementLigne, Vente,
-                     VenteProduit)
+from .models import Facture, Paiement, PaiementLigne, Vente, VenteProduit
 
 
 # ---- store serializers light ----
@@ -794,9 +795,7 @@ class PaiementMultiModeSerializer(serializers.Serializer):
         lignes = attrs.get("lignes") or []
 
         try:
-            facture = Facture.objects.select_related("vente", "vente__client").get(
-                numero_facture__iexact=numero_facture
-            )
+            facture = get_facture_by_numero(numero_facture, profile="ticket")
         except Facture.DoesNotExist:
             raise serializers.ValidationError({"numero_facture": "Facture introuvable."})
 
@@ -813,9 +812,9 @@ class PaiementMultiModeSerializer(serializers.Serializer):
         for i, item in enumerate(lignes):
             code = (item.get("mode_paiement") or "").strip()
 
-            try:
-                mode = ModePaiement.objects.get(code=code, active=True)
-            except ModePaiement.DoesNotExist:
+            mode = get_mode_paiement(code)
+
+            if mode is None:
                 raise serializers.ValidationError({
                     "lignes": {
                         i: {
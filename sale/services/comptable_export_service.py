@@ -1,21 +1,41 @@
 # sale/services/comptable_export_service.py
 from decimal import Decimal
 
-from openpyxl import Workbook
+from django.db.models import Prefetch, Sum
+
+from backend.mixins import (EXPORT_CHUNK_SIZE, write_only_sheet,
+                            write_only_workbook)
+from sale.models import Paiement
 
 
 def export_comptable_factures(factures):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Journal"
+    """
+    Journal comptable en mode write-only.
+
+    Les factures sont lues par lots ; le total de chaque paiement
+    est calculé en SQL dans le prefetch (pas une requête par paiement).
+    Retourne le classeur, à servir avec xlsx_file_response().
+    """
+    wb = write_only_workbook()
 
     headers = [
         "Date", "Journal", "Piece", "Compte",
         "Libelle", "Debit", "Credit"
     ]
-    ws.append(headers)
+    ws = write_only_sheet(wb, "Journal", headers)
 
-    for f in factures:
+    factures = factures.prefetch_related(
+        Prefetch(
+            "paiements",
+            queryset=(
+                Paiement.objects
+                .order_by("date_paiement", "id")
+                .annotate(total_lignes=Sum("lignes__montant_paye"))
+            ),
+        )
+    )
+
+    for f in factures.iterator(chunk_size=EXPORT_CHUNK_SIZE):
         date = f.date_creation.strftime("%Y-%m-%d") if getattr(f, "date_creation", None) else ""
 
         # 1) Ecriture de facture
@@ -52,7 +72,7 @@ def export_comptable_factures(factures):
 
         # 2) Ecritures de paiement
         for p in f.paiements.all():
-            montant_paye = Decimal(p.montant_total_paye or 0)
+            montant_paye = Decimal(p.total_lignes or 0)
 
             if montant_paye <= 0:
                 continue
@@ -80,4 +100,3 @@ def export_comptable_factures(factures):
             ])
 
     return wb
-
@@ -1,7 +1,7 @@
 # sale/services/confirm_service.py
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import List
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
@@ -9,8 +9,9 @@ from django.db import transaction
 from inventory.models import InventoryMovement, MovementType
 from purchase.models import ProduitLine
 from sale.models import Facture, VenteProduit
-from sale.services.inventory_audit_service import create_sale_out_consumption
-from sale.services.vendor_stock_service import consume_vendor_stock
+from sale.services.inventory_audit_service import \
+    bulk_create_sale_out_consumptions
+from sale.services.vendor_stock_service import consume_vendor_stock_batch
 
 
 @transaction.atomic
@@ -93,7 +94,6 @@ def confirm_sale_out_from_vendor(*, facture: Facture, by_user) -> dict:
     lines_done = 0
 
     all_pl_ids: List[int] = []
-    consumptions_by_lp: Dict[int, List[dict]] = {}
 
     # =========================================================
     # 1. Vérifications avant toute modification du stock
@@ -130,14 +130,23 @@ def confirm_sale_out_from_vendor(*, facture: Facture, by_user) -> dict:
 
     # =========================================================
     # 2. Consommer le VendorStock en FIFO
+    #    (un seul verrouillage pour toute la facture)
     # =========================================================
+    consumptions_by_lp = consume_vendor_stock_batch(
+        bijouterie=facture.bijouterie,
+        demandes=[
+            {
+                "key": ligne.id,
+                "vendor": ligne.vendor,
+                "produit": ligne.produit,
+                "quantite": int(ligne.quantite),
+            }
+            for ligne in lignes
+        ],
+    )
+
     for ligne in lignes:
-        consumptions = consume_vendor_stock(
-            vendor=ligne.vendor,
-            bijouterie=facture.bijouterie,
-            produit=ligne.produit,
-            quantite=int(ligne.quantite),
-        )
+        consumptions = consumptions_by_lp.get(ligne.id, [])
 
         total_consumed = sum(
             int(item.get("qty") or 0)
@@ -151,8 +160,6 @@ def confirm_sale_out_from_vendor(*, facture: Facture, by_user) -> dict:
                 f"obtenu={total_consumed}."
             )
 
-        consumptions_by_lp[ligne.id] = consumptions
-
         all_pl_ids.extend(
             int(item["produit_line_id"])
             for item in consumptions
@@ -190,41 +197,27 @@ def confirm_sale_out_from_vendor(*, facture: Facture, by_user) -> dict:
         )
 
     # =========================================================
-    # 4. Créer SALE_OUT : VENDOR -> EXTERNAL
+    # 4. Créer SALE_OUT : VENDOR -> EXTERNAL (bulk_create)
     # =========================================================
-    for ligne in lignes:
-        consumptions = consumptions_by_lp.get(ligne.id, [])
+    items = []
 
-        for item in consumptions:
-            produit_line_id = int(item["produit_line_id"])
-            qty = int(item["qty"])
-
-            if qty <= 0:
-                raise ValidationError(
-                    f"Quantité SALE_OUT invalide pour la ProduitLine "
-                    f"{produit_line_id}."
-                )
-
-            produit_line = pl_map[produit_line_id]
-
-            movement_created = create_sale_out_consumption(
-                facture=facture,
-                vente=vente,
-                vente_ligne=ligne,
-                produit_line=produit_line,
-                qty=qty,
-                by_user=by_user,
-            )
-
-            if movement_created:
-                created += 1
-            else:
-                # En pratique ce cas ne devrait plus arriver grâce au
-                # contrôle global effectué avant la consommation.
-                already += 1
+    for ligne in lignes:
+        for item in consumptions_by_lp.get(ligne.id, []):
+            items.append((
+                ligne,
+                pl_map[int(item["produit_line_id"])],
+                int(item["qty"]),
+            ))
 
         lines_done += 1
 
+    created = bulk_create_sale_out_consumptions(
+        facture=facture,
+        vente=vente,
+        items=items,
+        by_user=by_user,
+    )
+
     # =========================================================
     # 5. Marquer la facture consommée
     # =========================================================
@@ -1,32 +1,39 @@
 # sale/services/export/export_facture_excel.py
-from django.http import HttpResponse
 from django.utils.timezone import localtime
-from openpyxl import Workbook
-
-
-def export_factures_excel(queryset):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Journal des ventes"
-
-    ws.append([
-        "Numero Facture",
-        "Date Facture",
-        "Type Facture",
-        "Client",
-        "Téléphone",
-        "Bijouterie",
-        "NINEA",
-        "Vendeur",
-        "Montant HT",
-        "TVA",
-        "Total TTC",
-        "Total Payé",
-        "Reste à payer",
-        "Statut",
-    ])
-
-    for f in queryset:
+
+from backend.mixins import (EXPORT_CHUNK_SIZE, write_only_sheet,
+                            write_only_workbook, xlsx_file_response)
+
+HEADERS = [
+    "Numero Facture",
+    "Date Facture",
+    "Type Facture",
+    "Client",
+    "Téléphone",
+    "Bijouterie",
+    "NINEA",
+    "Vendeur",
+    "Montant HT",
+    "TVA",
+    "Total TTC",
+    "Total Payé",
+    "Reste à payer",
+    "Statut",
+]
+
+
+def export_factures_excel(queryset, filename="journal_ventes.xlsx"):
+    """
+    Journal des ventes en streaming : classeur write-only alimenté
+    par lots (.iterator), mémoire bornée quel que soit le volume.
+
+    Le queryset doit déjà être filtré (scope + période) et porter
+    les select_related nécessaires.
+    """
+    wb = write_only_workbook()
+    ws = write_only_sheet(wb, "Journal des ventes", HEADERS)
+
+    for f in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
         vente = getattr(f, "vente", None)
         client = getattr(vente, "client", None) if vente else None
         vendor = getattr(vente, "vendor", None) if vente else None
@@ -44,15 +51,9 @@ def export_factures_excel(queryset):
             float(f.montant_ht or 0),
             float(f.montant_tva or 0),
             float(f.montant_total or 0),
-            float(f.total_paye or 0),
+            float(f.montant_paye or 0),
             float(f.reste_a_payer or 0),
             f.status,
         ])
 
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="journal_ventes.xlsx"'
-    wb.save(response)
-    return response
-
+    return xlsx_file_response(wb, filename)
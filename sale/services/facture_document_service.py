@@ -0,0 +1,323 @@
+# sale/services/facture_document_service.py
+# documents imprimables d'une facture (A5, tickets POS), rendus une fois
+# puis servis depuis le cache disque (backend/document_cache.py)
+from __future__ import annotations
+
+import logging
+import threading
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from backend.document_cache import (document_fingerprint,
+                                    get_or_render_document,
+                                    invalidate_documents)
+from sale.models import Facture, Paiement
+from sale.pdf.escpos_ticket_58mm import build_escpos_ticket_proforma_58mm
+from sale.pdf.escpos_ticket_80mm import build_escpos_recu_paiement_80mm
+from sale.pdf.facture_A5_paysage import build_facture_a5_paysage_pdf
+from sale.selectors.factures import facture_queryset
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_OWNER = "factures"
+
+DOC_FACTURE_A5 = "facture_a5"
+DOC_TICKET_PROFORMA_58MM = "ticket_proforma_58mm"
+DOC_TICKET_PAIEMENT_80MM = "ticket_paiement_80mm"
+
+EXTENSIONS = {
+    DOC_FACTURE_A5: "pdf",
+    DOC_TICKET_PROFORMA_58MM: "bin",
+    DOC_TICKET_PAIEMENT_80MM: "bin",
+}
+
+
+def _shop_phone(bijouterie) -> str:
+    return (
+        getattr(bijouterie, "telephone_portable_1", None)
+        or getattr(bijouterie, "telephone_portable_2", None)
+        or getattr(bijouterie, "telephone_fix", None)
+        or ""
+    )
+
+
+# ============================================================
+# Empreinte
+# ============================================================
+
+def facture_document_fingerprint(facture: Facture, kind: str) -> str:
+    """
+    Empreinte des données imprimées : documents_version change à chaque
+    save() de la facture, les montants payés (mis à jour par les
+    paiements sans save()) et l'en-tête boutique / client sont ajoutés.
+    """
+
+    bijouterie = facture.bijouterie
+    vente = facture.vente if facture.vente_id else None
+    client = vente.client if vente and vente.client_id else None
+
+    return document_fingerprint(
+        kind,
+        facture.pk,
+        facture.documents_version,
+        facture.integrity_hash,
+        facture.numero_facture,
+        facture.type_facture,
+        facture.status,
+        facture.montant_total,
+        facture.montant_paye,
+        facture.reste_a_payer,
+        getattr(bijouterie, "nom", None),
+        _shop_phone(bijouterie),
+        getattr(bijouterie, "ninea", None),
+        getattr(bijouterie, "adresse", None),
+        getattr(client, "prenom", None),
+        getattr(client, "nom", None),
+        getattr(client, "telephone", None),
+    )
+
+
+# ============================================================
+# Rendu
+# ============================================================
+
+def render_ticket_proforma_58mm(facture: Facture) -> bytes:
+    bijouterie = facture.bijouterie
+
+    return build_escpos_ticket_proforma_58mm(
+        shop_name=(
+            getattr(bijouterie, "nom", None)
+            or "BIJOUTERIE RIO-GOLD"
+        ),
+        shop_phone=_shop_phone(bijouterie),
+        numero_facture=facture.numero_facture,
+        date_txt=facture.date_creation.strftime("%d/%m/%Y %H:%M"),
+        montant_a_payer=facture.reste_a_payer,
+        statut_txt=(
+            facture.get_status_display()
+            if hasattr(facture, "get_status_display")
+            else facture.status
+        ),
+        note="Ticket PROFORMA - à régler en caisse",
+    )
+
+
+def render_ticket_paiement_80mm(facture: Facture) -> bytes:
+    """
+    Reçu du dernier paiement. Paiement.DoesNotExist si aucun.
+    """
+
+    paiement = (
+        Paiement.objects
+        .filter(facture=facture)
+        .prefetch_related("lignes")
+        .order_by("-date_paiement", "-id")
+        .first()
+    )
+
+    if not paiement:
+        raise Paiement.DoesNotExist("Aucun paiement trouvé")
+
+    bijouterie = facture.bijouterie
+
+    # Lignes déjà chargées : pas de requête d'agrégat.
+    montant_paye = sum(
+        (ligne.montant_paye for ligne in paiement.lignes.all()),
+        Decimal("0.00"),
+    )
+
+    return build_escpos_recu_paiement_80mm(
+        shop_name=getattr(bijouterie, "nom", None) or "RIO-GOLD",
+        shop_phone=_shop_phone(bijouterie),
+        numero_facture=facture.numero_facture,
+        date_paiement=paiement.date_paiement,
+        montant_paye=montant_paye,
+        # reste_a_payer=facture.reste_a_payer,
+        reste_a_payer=None,
+    )
+
+
+def build_facture_a5_data(facture: Facture) -> dict:
+    vente = facture.vente
+    client = vente.client if vente else None
+    bijouterie = facture.bijouterie
+
+    lines = []
+
+    if vente:
+        for vp in vente.lignes.all():
+            produit_nom = (
+                vp.produit.nom
+                if vp.produit else "Produit supprimé"
+            )
+
+            lines.append({
+                "label": produit_nom,
+                "qty": vp.quantite,
+                "pu": vp.prix_vente_grammes,
+                "ttc": vp.montant_total,
+            })
+
+    return {
+        "shop_name": getattr(bijouterie, "nom", None) or "RIO GOLD",
+        "shop_phone": _shop_phone(bijouterie),
+        "shop_ninea": getattr(bijouterie, "ninea", None) or "",
+        "shop_address": getattr(bijouterie, "adresse", None) or "",
+
+        "title": "FACTURE",
+        "invoice_no": facture.numero_facture,
+        "invoice_type": facture.type_facture,
+        "qr_code_path": (
+            facture.qr_code_image.path
+            if getattr(facture, "qr_code_image", None)
+            else None
+        ),
+        "date": facture.date_creation.strftime("%d/%m/%Y %H:%M"),
+        # "document_type": facture.type_facture.upper(),
+
+        "client_name": (
+            f"{client.prenom} {client.nom}"
+            if client else ""
+        ),
+        "client_phone": client.telephone if client else "",
+        "client_address": "",
+
+        "vendor": (
+            str(vente.vendor)
+            if vente and getattr(vente, "vendor", None)
+            else ""
+        ),
+        "cashier": "",
+
+        "sale_no": vente.numero_vente if vente else "",
+        "status": facture.status,
+
+        "lines": lines,
+
+        "total_ht": facture.montant_ht,
+        "taux_tva": facture.taux_tva,
+        "montant_tva": facture.montant_tva,
+        "total_ttc": facture.montant_total,
+
+        "amount_paid": facture.total_paye,
+        "deposit_amount": 0,
+        "remaining_amount": facture.reste_a_payer,
+
+        "thanks": "Merci pour votre confiance.",
+        "footer_note": "A la prochaine visite insha Allah.",
+    }
+
+
+def render_facture_a5(facture: Facture) -> bytes:
+    buffer = BytesIO()
+
+    try:
+        build_facture_a5_paysage_pdf(buffer, build_facture_a5_data(facture))
+        return buffer.getvalue()
+    finally:
+        buffer.close()
+
+
+RENDERERS = {
+    DOC_FACTURE_A5: render_facture_a5,
+    DOC_TICKET_PROFORMA_58MM: render_ticket_proforma_58mm,
+    DOC_TICKET_PAIEMENT_80MM: render_ticket_paiement_80mm,
+}
+
+
+def document_cache_options(facture: Facture, kind: str) -> dict:
+    """
+    Arguments de backend.document_cache pour un document de la facture.
+    """
+    return {
+        "owner": DOCUMENTS_OWNER,
+        "owner_id": facture.pk,
+        "kind": kind,
+        "fingerprint": facture_document_fingerprint(facture, kind),
+        "extension": EXTENSIONS[kind],
+        "render": lambda: RENDERERS[kind](facture),
+    }
+
+
+def get_facture_document(facture: Facture, kind: str) -> bytes:
+    return get_or_render_document(**document_cache_options(facture, kind))
+
+
+# ============================================================
+# Pré-génération / invalidation
+# ============================================================
+
+def pregenerate_facture_documents(facture_id) -> list:
+    """
+    Rend les documents imprimables d'une facture (après paiement) :
+    A5 et ticket 80mm si payée, ticket proforma sinon.
+    """
+
+    facture = facture_queryset("facture_a5").filter(pk=facture_id).first()
+
+    if facture is None:
+        return []
+
+    kinds = [DOC_FACTURE_A5]
+    kinds.append(
+        DOC_TICKET_PAIEMENT_80MM
+        if facture.status == Facture.STAT_PAYE
+        else DOC_TICKET_PROFORMA_58MM
+    )
+
+    for kind in kinds:
+        get_facture_document(facture, kind)
+
+    return kinds
+
+
+def _pregenerate_in_background(facture_id):
+    """
+    Repli dev (DOCUMENTS_PREGENERATE) : rendu dans un thread après le
+    COMMIT. En production : commande pregenerate_facture_documents.
+    """
+
+    def _run():
+        close_old_connections()
+
+        try:
+            pregenerate_facture_documents(facture_id)
+        except Exception:
+            logger.exception(
+                "Pré-génération des documents de la facture %s impossible.",
+                facture_id,
+            )
+        finally:
+            connection.close()
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def schedule_facture_documents(facture: Facture) -> None:
+    """
+    Dev uniquement (DOCUMENTS_PREGENERATE) : pré-génère les documents
+    dans un thread, après le COMMIT. En production, le worker
+    pregenerate_facture_documents s'en charge hors du processus web.
+    """
+
+    if not getattr(settings, "DOCUMENTS_PREGENERATE", False):
+        return
+
+    facture_id = facture.pk
+    transaction.on_commit(lambda: _pregenerate_in_background(facture_id))
+
+
+def invalidate_facture_documents(facture: Facture) -> None:
+    """
+    Changement non porté par un save() de la facture (retour client...) :
+    nouvelle révision, fichiers en cache supprimés au COMMIT.
+    """
+
+    Facture.objects.filter(pk=facture.pk).update(
+        documents_version=F("documents_version") + 1,
+    )
+    invalidate_documents(DOCUMENTS_OWNER, facture.pk)
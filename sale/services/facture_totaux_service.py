@@ -0,0 +1,108 @@
+# sale/services/facture_totaux_service.py
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db.models import Sum
+
+from sale.models import Facture, PaiementLigne
+
+ZERO = Decimal("0.00")
+
+
+def _factures(bijouterie_ids: Optional[Iterable[int]] = None):
+    qs = Facture.objects.all()
+
+    if bijouterie_ids is not None:
+        qs = qs.filter(bijouterie_id__in=list(bijouterie_ids))
+
+    return qs
+
+
+def rebuild_facture_totaux(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recalcule montant_paye / reste_a_payer depuis les PaiementLigne.
+
+    Une seule requête UPDATE, quel que soit le nombre de factures.
+    Retourne le nombre de factures mises à jour.
+    """
+
+    if bijouterie_ids is None:
+        return Facture.refresh_paiement_totals()
+
+    return Facture.refresh_paiement_totals(
+        bijouterie_id__in=list(bijouterie_ids),
+    )
+
+
+def verify_facture_totaux(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> List[dict]:
+    """
+    Compare les totaux dénormalisés avec la somme des PaiementLigne.
+
+    Retourne la liste des écarts (vide si tout est cohérent).
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    lignes = PaiementLigne.objects.all()
+
+    if bijouterie_ids is not None:
+        lignes = lignes.filter(
+            paiement__facture__bijouterie_id__in=bijouterie_ids,
+        )
+
+    paye_par_facture = {
+        row["paiement__facture_id"]: row["total"]
+        for row in (
+            lignes
+            .order_by()
+            .values("paiement__facture_id")
+            .annotate(total=Sum("montant_paye"))
+        )
+    }
+
+    differences = []
+
+    for facture in (
+        _factures(bijouterie_ids)
+        .order_by("id")
+        .values(
+            "id",
+            "numero_facture",
+            "montant_total",
+            "montant_paye",
+            "reste_a_payer",
+        )
+        .iterator(chunk_size=2000)
+    ):
+        paye = paye_par_facture.get(facture["id"]) or ZERO
+        reste = max((facture["montant_total"] or ZERO) - paye, ZERO)
+
+        ecarts = {}
+
+        if facture["montant_paye"] != paye:
+            ecarts["montant_paye"] = {
+                "attendu": paye,
+                "enregistre": facture["montant_paye"],
+            }
+
+        if facture["reste_a_payer"] != reste:
+            ecarts["reste_a_payer"] = {
+                "attendu": reste,
+                "enregistre": facture["reste_a_payer"],
+            }
+
+        if ecarts:
+            differences.append({
+                "facture_id": facture["id"],
+                "numero_facture": facture["numero_facture"],
+                "ecarts": ecarts,
+            })
+
+    return differences
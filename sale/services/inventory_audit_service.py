@@ -4,7 +4,8 @@ from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from django.utils import timezone
 
-from inventory.models import Bucket, InventoryMovement, MovementType
+from inventory.models import (Bucket, InventoryBalance, InventoryMovement,
+                              MovementType)
 from purchase.models import ProduitLine
 from sale.models import Facture, Vente, VenteProduit
 
@@ -108,6 +109,182 @@ def create_sale_out_consumption(
         return False
 
 
+def bulk_create_sale_out_consumptions(
+    *,
+    facture: Facture,
+    vente: Vente,
+    items,
+    by_user,
+) -> int:
+    """
+    Variante par lot de create_sale_out_consumption.
+
+    items : [(vente_ligne, produit_line, qty), ...]
+
+    Les règles de create_sale_out_consumption et de
+    InventoryMovement.clean() (SALE_OUT) sont vérifiées en mémoire
+    sur tout le lot, les doublons en une seule requête ; les
+    mouvements sont ensuite insérés par bulk_create et répercutés
+    sur InventoryBalance (un UPDATE par solde touché).
+
+    Retourne le nombre de mouvements créés.
+    """
+
+    items = list(items)
+
+    if not items:
+        return 0
+
+    if not facture or not facture.pk:
+        raise ValidationError("facture requise.")
+
+    if not vente or not vente.pk:
+        raise ValidationError("vente requise.")
+
+    if facture.vente_id and facture.vente_id != vente.pk:
+        raise ValidationError("La facture ne correspond pas à la vente.")
+
+    # =========================================================
+    # 1. Validation vectorisée (sans requête)
+    # =========================================================
+    pairs = set()
+
+    for vente_ligne, produit_line, qty in items:
+        q = int(qty or 0)
+
+        if q <= 0:
+            raise ValidationError("qty doit être supérieur à 0.")
+
+        if not vente_ligne or not vente_ligne.pk or not vente_ligne.produit_id:
+            raise ValidationError("vente_ligne.produit requis.")
+
+        if vente_ligne.vente_id != vente.pk:
+            raise ValidationError(
+                f"Ligne de vente {vente_ligne.pk} : "
+                "la ligne ne correspond pas à la vente."
+            )
+
+        if not produit_line or not produit_line.pk:
+            raise ValidationError("produit_line requise.")
+
+        if not produit_line.lot_id:
+            raise ValidationError("produit_line.lot requis.")
+
+        if produit_line.produit_id != vente_ligne.produit_id:
+            raise ValidationError(
+                "La ProduitLine ne correspond pas au produit de la ligne de vente."
+            )
+
+        vendor = (
+            getattr(vente_ligne, "vendor", None)
+            or getattr(vente, "vendor", None)
+        )
+
+        if not vendor:
+            raise ValidationError("Vendeur requis pour SALE_OUT.")
+
+        if vente.vendor_id and vendor.id != vente.vendor_id:
+            raise ValidationError(
+                "Le vendeur de la ligne est différent du vendeur de la vente."
+            )
+
+        if vendor.bijouterie_id != facture.bijouterie_id:
+            raise ValidationError(
+                "Le vendeur n'appartient pas à la bijouterie de la facture."
+            )
+
+        pair = (vente_ligne.pk, produit_line.pk)
+
+        if pair in pairs:
+            raise ValidationError(
+                f"Ligne de vente {vente_ligne.pk} : ProduitLine "
+                f"{produit_line.pk} présente deux fois dans le lot."
+            )
+
+        pairs.add(pair)
+
+    # Contrainte uniq_sale_out_per_sale_line_product_line,
+    # vérifiée pour tout le lot en une requête.
+    existing = set(
+        InventoryMovement.objects
+        .filter(
+            movement_type=MovementType.SALE_OUT,
+            vente_ligne_id__in={ligne_id for ligne_id, _ in pairs},
+            produit_line_id__in={pl_id for _, pl_id in pairs},
+        )
+        .values_list("vente_ligne_id", "produit_line_id")
+    ) & pairs
+
+    if existing:
+        raise ValidationError({
+            "non_field_errors": (
+                "Un mouvement SALE_OUT existe déjà pour cette "
+                "ligne de vente et cette ProduitLine : "
+                + ", ".join(
+                    f"ligne={ligne_id}/pl={pl_id}"
+                    for ligne_id, pl_id in sorted(existing)
+                )
+            )
+        })
+
+    # =========================================================
+    # 2. Insertion groupée
+    # =========================================================
+    now = timezone.now()
+    movements = []
+
+    for vente_ligne, produit_line, qty in items:
+        vendor = (
+            getattr(vente_ligne, "vendor", None)
+            or getattr(vente, "vendor", None)
+        )
+
+        movements.append(
+            InventoryMovement(
+                produit_id=vente_ligne.produit_id,
+                produit_line=produit_line,
+                lot_id=produit_line.lot_id,
+                achat_id=getattr(produit_line.lot, "achat_id", None),
+
+                movement_type=MovementType.SALE_OUT,
+                qty=int(qty),
+                unit_cost=None,
+
+                reason=(
+                    f"SALE_OUT | vente={vente.numero_vente} | "
+                    f"facture={facture.numero_facture} | "
+                    f"ligne={vente_ligne.id} | "
+                    f"vendor={vendor.id} | "
+                    f"pl={produit_line.id} | "
+                    f"lot={produit_line.lot_id}"
+                ),
+
+                # VENDOR -> EXTERNAL
+                src_bucket=Bucket.VENDOR,
+                src_bijouterie_id=facture.bijouterie_id,
+
+                dst_bucket=Bucket.EXTERNAL,
+                dst_bijouterie=None,
+
+                facture=facture,
+                vente=vente,
+                vente_ligne=vente_ligne,
+                vendor=vendor,
+
+                occurred_at=now,
+                created_by=by_user,
+            )
+        )
+
+    InventoryMovement.objects.bulk_create(movements, batch_size=500)
+
+    # bulk_create ne passe pas par save() : soldes mis à jour ici,
+    # dans la même transaction.
+    InventoryBalance.apply_movements(movements)
+
+    return len(movements)
+
+
 # ============================================================
 # RETURN_IN : EXTERNAL -> BIJOUTERIE
 # ============================================================
@@ -0,0 +1,270 @@
+# sale/services/numbering_service.py
+from __future__ import annotations
+
+import threading
+import uuid
+from datetime import date
+from typing import Optional
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from sale.counters import SEQUENCE_FACTURE, SEQUENCE_VENTE, InvoiceCounter
+
+# ============================================================
+# Numérotation par compteur (séquence, bijouterie, jour)
+# ============================================================
+#
+# Un numéro = une seule instruction UPDATE sur la ligne du compteur :
+#
+#   PostgreSQL / SQLite ≥ 3.35 : UPDATE ... RETURNING last_value
+#   MySQL / MariaDB            : UPDATE ... SET last_value =
+#                                LAST_INSERT_ID(last_value + n),
+#                                valeur lue via cursor.lastrowid
+#
+# Pas de SELECT ... FOR UPDATE, pas de refresh_from_db.
+#
+# Factures (séquence fiscale, sans trou) : l'incrément se fait dans
+# la transaction de la facture ; un rollback rend le numéro.
+#
+# Ventes (non fiscal) : réservation par blocs. Un worker réserve
+# VENTE_BLOCK_SIZE numéros d'un coup puis les distribue en mémoire ;
+# la ligne du compteur n'est touchée qu'une fois par bloc.
+
+VENTE_BLOCK_SIZE = 20
+
+
+def _today() -> date:
+    return timezone.localdate()
+
+
+def _update_sql(returning: bool, mysql: bool) -> str:
+    table = connection.ops.quote_name(InvoiceCounter._meta.db_table)
+
+    if mysql:
+        value = "LAST_INSERT_ID(last_value + %s)"
+    else:
+        value = "last_value + %s"
+
+    sql = (
+        f"UPDATE {table} SET last_value = {value} "
+        "WHERE sequence = %s AND bijouterie_id = %s AND day = %s"
+    )
+
+    if returning:
+        sql += " RETURNING last_value"
+
+    return sql
+
+
+def _supports_update_returning() -> bool:
+    if connection.vendor == "postgresql":
+        return True
+
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+
+    return False
+
+
+def _increment(sequence: str, bijouterie_id: int, day: date, step: int) -> Optional[int]:
+    """
+    Incrémente le compteur de `step` et retourne la nouvelle valeur,
+    ou None si la ligne (séquence, bijouterie, jour) n'existe pas encore.
+    """
+
+    params = [step, sequence, bijouterie_id, day]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(_update_sql(returning=False, mysql=True), params)
+            return cursor.lastrowid if cursor.rowcount else None
+
+        if _supports_update_returning():
+            cursor.execute(_update_sql(returning=True, mysql=False), params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+        # Autres moteurs : UPDATE puis lecture (ligne déjà verrouillée).
+        cursor.execute(_update_sql(returning=False, mysql=False), params)
+        if not cursor.rowcount:
+            return None
+
+    return (
+        InvoiceCounter.objects
+        .filter(sequence=sequence, bijouterie_id=bijouterie_id, day=day)
+        .values_list("last_value", flat=True)
+        .get()
+    )
+
+
+def next_value(
+    sequence: str,
+    bijouterie_id: int,
+    *,
+    day: Optional[date] = None,
+    step: int = 1,
+) -> int:
+    """
+    Réserve `step` valeurs et retourne la dernière.
+
+    Les valeurs réservées sont [retour - step + 1, retour].
+    À appeler dans la transaction qui utilise le numéro si la
+    séquence doit rester sans trou.
+    """
+
+    if not bijouterie_id:
+        raise ValueError("Bijouterie requise pour incrémenter le compteur.")
+
+    if step < 1:
+        raise ValueError("step doit être >= 1.")
+
+    day = day or _today()
+
+    with transaction.atomic():
+        value = _increment(sequence, bijouterie_id, day, step)
+
+        if value is None:
+            # Première valeur du jour : création de la ligne.
+            # Deux créations concurrentes → IntegrityError sur l'une,
+            # absorbée par le savepoint ; l'UPDATE suivant sert les deux.
+            try:
+                with transaction.atomic():
+                    InvoiceCounter.objects.create(
+                        sequence=sequence,
+                        bijouterie_id=bijouterie_id,
+                        day=day,
+                    )
+            except IntegrityError:
+                pass
+
+            value = _increment(sequence, bijouterie_id, day, step)
+
+    return value
+
+
+# ============================================================
+# Réservation par blocs (séquences non fiscales)
+# ============================================================
+
+class _BlockPool:
+    """
+    Blocs de numéros réservés par ce processus, par clé
+    (séquence, bijouterie, jour). Partagé entre threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def take(self, key) -> Optional[int]:
+        with self._lock:
+            block = self._blocks.get(key)
+
+            if not block:
+                return None
+
+            value = block[0]
+
+            if block[0] >= block[1]:
+                del self._blocks[key]
+            else:
+                block[0] += 1
+
+            return value
+
+    def put(self, key, first: int, last: int) -> None:
+        if first > last:
+            return
+
+        with self._lock:
+            # Les jours passés ne servent plus.
+            for old_key in [k for k in self._blocks if k[2] != key[2]]:
+                del self._blocks[old_key]
+
+            self._blocks[key] = [first, last]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+
+
+_block_pool = _BlockPool()
+
+
+def reset_number_blocks() -> None:
+    """Oublie les blocs réservés (tests, benchmark)."""
+    _block_pool.clear()
+
+
+def next_value_from_block(
+    sequence: str,
+    bijouterie_id: int,
+    *,
+    day: Optional[date] = None,
+    block_size: int = VENTE_BLOCK_SIZE,
+) -> int:
+    """
+    Numéro unique pris dans un bloc réservé par ce processus.
+
+    Numéros uniques mais non contigus entre workers ; un numéro pris
+    dans une transaction annulée est perdu (trou), jamais réutilisé.
+
+    Le reste du bloc n'est rendu disponible qu'au commit de la
+    transaction qui l'a réservé : si elle est annulée, le compteur
+    revient en arrière et aucun numéro du bloc n'est distribué.
+    (Conséquence : plusieurs appels dans une même transaction
+    réservent chacun un bloc.)
+    """
+
+    if not bijouterie_id:
+        raise ValueError("Bijouterie requise pour incrémenter le compteur.")
+
+    day = day or _today()
+    key = (sequence, bijouterie_id, day)
+
+    value = _block_pool.take(key)
+    if value is not None:
+        return value
+
+    last = next_value(sequence, bijouterie_id, day=day, step=block_size)
+    first = last - block_size + 1
+
+    transaction.on_commit(
+        lambda: _block_pool.put(key, first + 1, last)
+    )
+
+    return first
+
+
+# ============================================================
+# Formats
+# ============================================================
+
+def next_numero_facture(bijouterie_id: int) -> str:
+    """FAC-AAAAMMJJ-0001, séquence sans trou par bijouterie et par jour."""
+
+    day = _today()
+    seq = next_value(SEQUENCE_FACTURE, bijouterie_id, day=day)
+
+    return f"FAC-{day.strftime('%Y%m%d')}-{seq:04d}"
+
+
+def next_numero_vente(bijouterie_id: int) -> str:
+    """VENTE-AAAAMMJJ-<bijouterie>-00001, unique globalement."""
+
+    day = _today()
+    seq = next_value_from_block(SEQUENCE_VENTE, bijouterie_id, day=day)
+
+    return f"VENTE-{day.strftime('%Y%m%d')}-{bijouterie_id}-{seq:05d}"
+
+
+def numero_vente_sans_bijouterie() -> str:
+    """
+    VENTE-AAAAMMJJ-SB-<10 hex> : vente sans bijouterie ni vendeur
+    rattaché (Vente.bijouterie reste facultative), hors compteur.
+    """
+
+    day = _today()
+
+    return f"VENTE-{day.strftime('%Y%m%d')}-SB-{uuid.uuid4().hex[:10].upper()}"
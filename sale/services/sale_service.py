@@ -7,12 +7,14 @@ from typing import Dict
 from django.core.exceptions import ValidationError
 from django.db import transaction
 
-from sale.models import Client, Facture, Vente, VenteProduit
+from backend.reference_cache import get_marque_purete_prix_map
+from sale.models import Client, Facture, Vente
 from sale.services.sale_context_service import (
     dec, resolve_vendor_and_bijouterie_for_sale)
 from sale.services.vendor_stock_service import ensure_vendor_stock_available
+from sale.services.vente_lines_service import write_vente_lines
 from sale.utils import ZERO
-from store.models import MarquePurete, Produit
+from store.models import Produit
 
 
 def upsert_client_for_payment(*, facture, client_data: dict):
@@ -214,20 +216,15 @@ def create_sale_one_vendor(*, user, role: str, payload: Dict) -> tuple[Vente, Fa
         if p.marque_id and p.purete_id
     }
 
-    tarifs = {}
+    # Prix courants : cache de référence (invalidé à chaque
+    # modification de MarquePurete).
+    prix_courants = get_marque_purete_prix_map()
 
-    if pairs:
-
-        marques = [m for (m, _) in pairs]
-        puretes = [p for (_, p) in pairs]
-
-        mp_qs = MarquePurete.objects.filter(
-            marque_id__in=marques,
-            purete_id__in=puretes,
-        )
-
-        for mp in mp_qs:
-            tarifs[(mp.marque_id, mp.purete_id)] = Decimal(str(mp.prix))
+    tarifs = {
+        pair: prix_courants[pair]
+        for pair in pairs
+        if pair in prix_courants
+    }
 
     # =========================================================
     # Vérification stock vendeur
@@ -247,24 +244,14 @@ def create_sale_one_vendor(*, user, role: str, payload: Dict) -> tuple[Vente, Fa
         )
 
     # =========================================================
-    # Création vente
+    # Prix des lignes (avant toute écriture)
     # =========================================================
-    vente = Vente.objects.create(
-        client=client,
-        created_by=user,
-        bijouterie=bijouterie,
-        vendor=vendor,
-    )
+    lignes = []
 
-    # =========================================================
-    # Création lignes vente
-    # =========================================================
     for pid, data_item in grouped.items():
 
         produit = produits[pid]
 
-        qte = data_item["quantite"]
-
         prix_vente = data_item["prix_vente_grammes"]
 
         # fallback prix marque/pureté
@@ -281,20 +268,34 @@ def create_sale_one_vendor(*, user, role: str, payload: Dict) -> tuple[Vente, Fa
                     )
                 })
 
-        VenteProduit.objects.create(
-            vente=vente,
-            produit=produit,
-            vendor=vendor,
-            quantite=qte,
-            prix_vente_grammes=prix_vente,
-            remise=data_item["remise"],
-            autres=data_item["autres"],
-        )
+        lignes.append({
+            "produit_id": pid,
+            "quantite": data_item["quantite"],
+            "prix_vente_grammes": prix_vente,
+            "remise": data_item["remise"],
+            "autres": data_item["autres"],
+        })
 
     # =========================================================
-    # Recalcul total vente
+    # Création vente
     # =========================================================
-    vente.mettre_a_jour_montant_total()
+    vente = Vente.objects.create(
+        client=client,
+        created_by=user,
+        bijouterie=bijouterie,
+        vendor=vendor,
+    )
+
+    # =========================================================
+    # Création lignes vente + total vente
+    # (insertion groupée, total écrit une seule fois)
+    # =========================================================
+    write_vente_lines(
+        vente=vente,
+        vendor=vendor,
+        lignes=lignes,
+        produits=produits,
+    )
 
     # =========================================================
     # Création facture PROFORMA
@@ -1,11 +1,13 @@
 # sale/services/vendor_stock_service.py
 from __future__ import annotations
 
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List
 
 from django.core.exceptions import ValidationError
 from django.db.models import ExpressionWrapper, F, IntegerField, Sum
 from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from stock.models import VendorStock
 
@@ -282,3 +284,193 @@ def consume_vendor_stock(
 
     return consumed
 
+
+
+def consume_vendor_stock_batch(
+    *,
+    bijouterie,
+    demandes: Iterable[dict],
+) -> Dict[Hashable, List[Dict[str, int]]]:
+    """
+    Variante par lot de consume_vendor_stock, pour toute une facture.
+
+    demandes :
+        [
+            {
+                "key": ligne.id,
+                "vendor": vendor,
+                "produit": produit,
+                "quantite": 2,
+            },
+            ...
+        ]
+
+    - une seule requête SELECT ... FOR UPDATE verrouille toutes les
+      lignes VendorStock utiles, dans l'ordre FIFO ;
+    - l'allocation FIFO est calculée en mémoire, demande par demande,
+      dans l'ordre reçu (deux lignes du même produit se partagent
+      le stock comme deux appels successifs) ;
+    - les quantite_vendue sont écrites par un seul bulk_update.
+
+    Retour :
+        {key: [{"produit_line_id": 12, "qty": 2}, ...]}
+    """
+
+    demandes = list(demandes)
+
+    if not demandes:
+        return {}
+
+    if not bijouterie:
+        raise ValidationError({
+            "bijouterie": "La bijouterie est obligatoire."
+        })
+
+    # =========================================================
+    # 1. Validation des demandes (sans requête)
+    # =========================================================
+    normalized = []
+
+    for demande in demandes:
+        vendor = demande.get("vendor")
+        produit = demande.get("produit")
+
+        try:
+            q = int(demande.get("quantite"))
+        except (TypeError, ValueError):
+            raise ValidationError({
+                "quantite": "La quantité doit être un entier valide."
+            })
+
+        if q <= 0:
+            raise ValidationError({
+                "quantite": "La quantité doit être supérieure ou égale à 1."
+            })
+
+        if not vendor:
+            raise ValidationError({
+                "vendor": "Le vendeur est obligatoire."
+            })
+
+        if not produit:
+            raise ValidationError({
+                "produit": "Le produit est obligatoire."
+            })
+
+        if vendor.bijouterie_id != bijouterie.id:
+            raise ValidationError({
+                "vendor": (
+                    "Le vendeur n'appartient pas à la bijouterie sélectionnée."
+                )
+            })
+
+        normalized.append((demande["key"], vendor, produit, q))
+
+    # =========================================================
+    # 2. Verrouillage FIFO en une requête
+    # =========================================================
+    vendor_ids = {vendor.id for _, vendor, _, _ in normalized}
+    produit_ids = {produit.id for _, _, produit, _ in normalized}
+
+    stocks = list(
+        VendorStock.objects
+        .select_for_update()
+        .filter(
+            vendor_id__in=vendor_ids,
+            bijouterie=bijouterie,
+            produit_line__produit_id__in=produit_ids,
+        )
+        .annotate(
+            produit_fifo_id=F("produit_line__produit_id"),
+            stock_disponible=_en_stock_expr(),
+        )
+        .filter(
+            stock_disponible__gt=0
+        )
+        .order_by(
+            "produit_line__lot__received_at",
+            "produit_line_id",
+            "id",
+        )
+    )
+
+    fifo = defaultdict(list)
+
+    for vendor_stock in stocks:
+        fifo[(vendor_stock.vendor_id, vendor_stock.produit_fifo_id)].append(
+            vendor_stock
+        )
+
+    # =========================================================
+    # 3. Allocation FIFO en mémoire
+    # =========================================================
+    restant = {
+        vendor_stock.pk: int(vendor_stock.stock_disponible or 0)
+        for vendor_stock in stocks
+    }
+
+    consumed: Dict[Hashable, List[Dict[str, int]]] = {}
+    touched = {}
+
+    for key, vendor, produit, q in normalized:
+        file_fifo = fifo[(vendor.id, produit.id)]
+
+        disponible = sum(restant[vs.pk] for vs in file_fifo)
+
+        if disponible < q:
+            produit_nom = (
+                getattr(produit, "nom", None)
+                or f"ID={getattr(produit, 'id', '')}"
+            )
+
+            raise ValidationError({
+                "stock": (
+                    f"Stock insuffisant en FIFO pour '{produit_nom}'. "
+                    f"Disponible : {disponible}, demandé : {q}."
+                )
+            })
+
+        remaining = q
+        allocations: List[Dict[str, int]] = []
+
+        for vendor_stock in file_fifo:
+            if remaining <= 0:
+                break
+
+            take = min(restant[vendor_stock.pk], remaining)
+
+            if take <= 0:
+                continue
+
+            restant[vendor_stock.pk] -= take
+            remaining -= take
+
+            allocations.append({
+                "produit_line_id": int(vendor_stock.produit_line_id),
+                "qty": int(take),
+            })
+
+            touched[vendor_stock.pk] = vendor_stock
+
+        consumed[key] = allocations
+
+    # =========================================================
+    # 4. Écriture en un bulk_update
+    # =========================================================
+    now = timezone.now()
+
+    # Lignes verrouillées : les valeurs lues sont à jour, la
+    # quantité vendue se déduit du disponible restant.
+    for vendor_stock in touched.values():
+        vendor_stock.quantite_vendue = (
+            int(vendor_stock.quantite_allouee or 0)
+            - restant[vendor_stock.pk]
+        )
+        vendor_stock.updated_at = now
+
+    VendorStock.objects.bulk_update(
+        list(touched.values()),
+        ["quantite_vendue", "updated_at"],
+    )
+
+    return consumed
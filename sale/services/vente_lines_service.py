@@ -0,0 +1,167 @@
+# sale/services/vente_lines_service.py
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from sale.models import Vente, VenteProduit
+from sale.utils import ZERO
+from store.models import Produit
+
+# ============================================================
+# Écriture groupée des lignes de vente
+# ============================================================
+#
+# VenteProduit.save() fait full_clean(), charge le produit puis
+# ré-agrège toutes les lignes de la vente : O(N²) lectures et N
+# UPDATE de la vente pour N lignes.
+#
+# Ici :
+# - produits chargés une fois (in_bulk) ;
+# - règles de VenteProduit.clean() et montants calculés en mémoire ;
+# - lignes insérées par bulk_create ;
+# - Vente.montant_total écrit une seule fois.
+
+
+def _produits_for_lignes(lignes: List[Dict], produits=None) -> Dict[int, Produit]:
+    produits = dict(produits or {})
+
+    missing_ids = {
+        int(ligne["produit_id"])
+        for ligne in lignes
+        if int(ligne["produit_id"]) not in produits
+    }
+
+    if missing_ids:
+        produits.update(
+            Produit.objects
+            .only("id", "nom", "poids")
+            .in_bulk(missing_ids)
+        )
+
+    introuvables = sorted(
+        pid for pid in missing_ids
+        if pid not in produits
+    )
+
+    if introuvables:
+        raise ValidationError({
+            "produits": f"Produits introuvables : {introuvables}"
+        })
+
+    return produits
+
+
+def build_vente_lines(
+    *,
+    vente: Vente,
+    vendor,
+    lignes: Iterable[Dict],
+    produits: Dict[int, Produit] | None = None,
+) -> List[VenteProduit]:
+    """
+    Construit et valide les VenteProduit en mémoire (aucune écriture).
+
+    lignes : [{"produit_id", "quantite", "prix_vente_grammes",
+               "remise", "autres"}, ...]
+    produits : produits déjà chargés par l'appelant (optionnel),
+               les autres sont chargés en une requête.
+    """
+
+    lignes = list(lignes)
+
+    if not lignes:
+        raise ValidationError({
+            "produits": "Au moins un produit est requis."
+        })
+
+    vendor_id = getattr(vendor, "id", None)
+
+    # Règle de VenteProduit.clean() : même vendeur que la vente.
+    if vente.vendor_id and vendor_id and vendor_id != vente.vendor_id:
+        raise ValidationError({
+            "vendor": "Le vendeur doit être identique à celui de la vente."
+        })
+
+    if not vendor_id and vente.vendor_id:
+        vendor = vente.vendor
+
+    produits = _produits_for_lignes(lignes, produits)
+
+    objets = []
+
+    for ligne in lignes:
+        produit = produits[int(ligne["produit_id"])]
+
+        objet = VenteProduit(
+            vente=vente,
+            produit=produit,
+            vendor=vendor,
+            quantite=int(ligne.get("quantite") or 0),
+            prix_vente_grammes=ligne.get("prix_vente_grammes") or ZERO,
+            remise=ligne.get("remise") or ZERO,
+            autres=ligne.get("autres") or ZERO,
+        )
+
+        if objet.quantite < 1:
+            raise ValidationError({
+                f"produit_{produit.id}": "Quantité invalide."
+            })
+
+        for field in ("prix_vente_grammes", "remise", "autres"):
+            value = getattr(objet, field)
+
+            if value is not None and Decimal(str(value)) < ZERO:
+                raise ValidationError({
+                    field: "Ne peut pas être négatif."
+                })
+
+        objet.calculer_montants(objet._get_product_weight())
+        objets.append(objet)
+
+    return objets
+
+
+@transaction.atomic
+def write_vente_lines(
+    *,
+    vente: Vente,
+    vendor,
+    lignes: Iterable[Dict],
+    produits: Dict[int, Produit] | None = None,
+    replace: bool = False,
+) -> Decimal:
+    """
+    Écrit les lignes d'une vente et met à jour Vente.montant_total.
+
+    replace=True : les lignes existantes sont supprimées d'abord
+    (modification d'une vente avant paiement).
+
+    Retourne le nouveau montant total de la vente.
+    """
+
+    objets = build_vente_lines(
+        vente=vente,
+        vendor=vendor,
+        lignes=lignes,
+        produits=produits,
+    )
+
+    if replace:
+        VenteProduit.objects.filter(vente=vente).delete()
+        total = ZERO
+    else:
+        # Lignes déjà présentes : une agrégation.
+        total = vente.mettre_a_jour_montant_total(commit=False)
+
+    VenteProduit.objects.bulk_create(objets, batch_size=500)
+
+    total += sum((objet.montant_total for objet in objets), ZERO)
+
+    vente.montant_total = total
+    vente.save(update_fields=["montant_total"])
+
+    return total
@@ -1,9 +1,37 @@
 # sale/signals.py
 
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
-from sale.models import ModePaiement
+from backend.reference_cache import invalidate_reference_model
+from sale.models import Facture, ModePaiement, Paiement, PaiementLigne
+
+
+# =========================================================
+# Totaux dénormalisés Facture.montant_paye / reste_a_payer
+# =========================================================
+@receiver(post_save, sender=PaiementLigne)
+@receiver(post_delete, sender=PaiementLigne)
+def refresh_facture_totaux_from_ligne(sender, instance, **kwargs):
+    """
+    Toute création / modification / suppression d'une ligne
+    (y compris en cascade) recalcule les totaux de sa facture.
+    """
+    Facture.refresh_paiement_totals(paiements__id=instance.paiement_id)
+
+
+@receiver(post_delete, sender=Paiement)
+def refresh_facture_totaux_from_paiement(sender, instance, **kwargs):
+    Facture.refresh_paiement_totals(pk=instance.facture_id)
+
+
+# =========================================================
+# Cache des modes de paiement (backend/reference_cache.py)
+# =========================================================
+@receiver(post_save, sender=ModePaiement)
+@receiver(post_delete, sender=ModePaiement)
+def invalidate_modes_paiement_cache(sender, **kwargs):
+    invalidate_reference_model(sender)
 
 
 @receiver(post_migrate)
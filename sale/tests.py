@@ -1,3 +1,1107 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import FileResponse
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from backend.mixins import (aware_range_period, date_range_filter,
+                            range_filter)
+from backend.renderers import FastJSONRenderer
+from finance.models import Depense
+from inventory.models import InventoryBalance, InventoryMovement, MovementType
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+
+from sale.counters import SEQUENCE_VENTE, InvoiceCounter
+from sale.models import (Client, Facture, Paiement, PaiementLigne, Vente,
+                         VenteProduit, deferred_vente_totals)
+from sale.selectors.factures import get_facture_by_numero
+from sale.selectors.ventes import vente_list_rows
+from sale.serializers import VenteListSerializer
+from sale.services.facture_document_service import (
+    DOC_TICKET_PROFORMA_58MM, RENDERERS, invalidate_facture_documents,
+    pregenerate_facture_documents)
+from sale.services.confirm_service import confirm_sale_out_from_vendor
+from sale.services.facture_totaux_service import verify_facture_totaux
+from sale.services.numbering_service import (VENTE_BLOCK_SIZE,
+                                             next_value_from_block,
+                                             reset_number_blocks)
+from sale.services.vente_lines_service import write_vente_lines
+from staff.models import Manager
+from stock.models import VendorStock
+from stock_matiere_premiere.models import RachatClient
+from store.models import (Bijouterie, Categorie, Marque, Modele, Produit,
+                          Purete)
+from vendor.models import Vendor
+
+
+class FactureTotauxTests(TestCase):
+    """
+    montant_paye / reste_a_payer sont maintenus par les PaiementLigne.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie A")
+
+    def _facture(self, montant):
+        return Facture.objects.create(
+            bijouterie=self.bijouterie,
+            montant_ht=Decimal(montant),
+            type_facture=Facture.TYPE_FACTURE,
+        )
+
+    def _payer(self, facture, montant):
+        return PaiementLigne.objects.create(
+            paiement=Paiement.objects.create(facture=facture),
+            montant_paye=Decimal(montant),
+        )
+
+    def _assert_totaux(self, facture, paye, reste):
+        facture.refresh_from_db()
+
+        self.assertEqual(facture.montant_paye, Decimal(paye))
+        self.assertEqual(facture.reste_a_payer, Decimal(reste))
+
+    def test_totaux_suivent_les_paiements(self):
+        facture = self._facture("1000.00")
+        self._assert_totaux(facture, "0.00", "1000.00")
+
+        ligne = self._payer(facture, "300.00")
+        self._assert_totaux(facture, "300.00", "700.00")
+
+        ligne.montant_paye = Decimal("450.00")
+        ligne.save()
+        self._assert_totaux(facture, "450.00", "550.00")
+
+        self._payer(facture, "550.00")
+        self._assert_totaux(facture, "1000.00", "0.00")
+
+        Facture.recompute_facture_status(facture)
+        self.assertEqual(facture.status, Facture.STAT_PAYE)
+
+        # Suppression en cascade depuis le Paiement
+        ligne.paiement.delete()
+        self._assert_totaux(facture, "550.00", "450.00")
+
+        self.assertEqual(verify_facture_totaux(), [])
+
+    def test_save_facture_perimee_ne_perd_pas_les_paiements(self):
+        facture = self._facture("1000.00")
+
+        self._payer(Facture.objects.get(pk=facture.pk), "400.00")
+
+        # Instance en mémoire antérieure au paiement
+        facture.montant_ht = Decimal("1200.00")
+        facture.save()
+
+        self._assert_totaux(facture, "400.00", "800.00")
+
+    def test_commande_rebuild_corrige_les_ecarts(self):
+        facture = self._facture("1000.00")
+        self._payer(facture, "250.00")
+
+        Facture.objects.filter(pk=facture.pk).update(
+            montant_paye=Decimal("0.00"),
+            reste_a_payer=Decimal("1000.00"),
+        )
+        self.assertEqual(len(verify_facture_totaux()), 1)
+
+        call_command("rebuild_facture_totaux", stdout=None)
+
+        self._assert_totaux(facture, "250.00", "750.00")
+
+    def test_liste_a_payer_filtre_et_trie_sur_le_reste(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+
+        for montant, paye in (
+            ("1000.00", "100.00"),
+            ("5000.00", "1000.00"),
+            ("300.00", None),
+        ):
+            facture = self._facture(montant)
+            if paye:
+                self._payer(facture, paye)
+                Facture.recompute_facture_status(facture)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get(
+            "/api/facture/List-factures-a-payer",
+            {"reste_min": "500", "ordering": "-reste_a_payer"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["reste_a_payer"] for row in response.data["results"]],
+            ["4000.00", "900.00"],
+        )
+
+
+class VenteListKeysetPaginationTests(TestCase):
+    """
+    ?cursor= parcourt les ventes sans COUNT(*) ni OFFSET,
+    sans doublon ni trou, même à created_at égal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin.keyset@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+
+        bijouterie = Bijouterie.objects.create(nom="Bijouterie Keyset")
+
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.keyset@example.com",
+                password="secret",
+            ),
+            bijouterie=bijouterie,
+        )
+
+        ventes = [
+            Vente.objects.create(bijouterie=bijouterie, vendor=vendor)
+            for _ in range(5)
+        ]
+
+        # Deux ventes au même instant : départage par id.
+        Vente.objects.filter(pk=ventes[1].pk).update(
+            created_at=ventes[2].created_at,
+        )
+
+        cls.expected_ids = list(
+            Vente.objects
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_parcours_complet_par_curseur(self):
+        seen = []
+        cursor = ""
+
+        while True:
+            response = self.client.get(
+                "/api/vente/list-produit",
+                {"cursor": cursor, "page_size": 2},
+            )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+
+            seen += [row["id"] for row in response.data["results"]]
+
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(seen, self.expected_ids)
+
+    def test_comptage_optionnel_et_mode_page_inchange(self):
+        response = self.client.get(
+            "/api/vente/list-produit",
+            {"cursor": "", "count": "exact"},
+        )
+        self.assertEqual(response.data["count"], 5)
+        self.assertTrue(response.data["count_is_exact"])
+
+        response = self.client.get(
+            "/api/vente/list-produit",
+            {"page": 1, "page_size": 2},
+        )
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(response.data["num_pages"], 3)
+
+    def test_curseur_invalide(self):
+        response = self.client.get(
+            "/api/vente/list-produit",
+            {"cursor": "pas-un-curseur"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class VenteListRowsTests(TestCase):
+    """
+    vente_list_rows (values()) : même représentation que
+    VenteListSerializer, en nombre de requêtes fixe.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin.rows@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        bijouterie = Bijouterie.objects.create(nom="Bijouterie Rows")
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.rows@example.com",
+                password="secret",
+            ),
+            bijouterie=bijouterie,
+        )
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+        marque, _ = Marque.objects.get_or_create(marque="Rows")
+        purete, _ = Purete.objects.get_or_create(purete="21")
+
+        produits = [
+            Produit.objects.create(
+                nom=f"Bague {index}",
+                categorie=categorie,
+                modele=Modele.objects.get_or_create(
+                    modele="Solitaire",
+                    categorie=categorie,
+                )[0],
+                purete=purete,
+                marque=marque,
+                poids=Decimal("2.25"),
+            )
+            for index in range(3)
+        ]
+
+        client = Client.objects.create(
+            prenom="Awa",
+            nom="Diop",
+            telephone="771234567",
+        )
+
+        for index in range(3):
+            vente = Vente.objects.create(
+                bijouterie=bijouterie,
+                vendor=vendor,
+                client=client if index else None,
+            )
+            write_vente_lines(
+                vente=vente,
+                vendor=vendor if index != 1 else None,
+                lignes=[
+                    {
+                        "produit_id": produit.id,
+                        "quantite": 1,
+                        "prix_vente_grammes": Decimal("42000.00"),
+                        "remise": Decimal("0.00"),
+                        "autres": Decimal("0.00"),
+                    }
+                    for produit in produits[:index + 1]
+                ],
+            )
+
+            if index:
+                Facture.objects.create(
+                    bijouterie=bijouterie,
+                    vente=vente,
+                    montant_ht=Decimal("42000.00"),
+                    type_facture=Facture.TYPE_PROFORMA,
+                )
+
+    def test_meme_representation_que_le_serializer(self):
+        ventes = list(Vente.objects.order_by("-created_at", "-id"))
+
+        expected = VenteListSerializer(ventes, many=True).data
+        rows = vente_list_rows(vente.id for vente in ventes)
+
+        # Mêmes clés, dans le même ordre, et mêmes valeurs.
+        self.assertEqual(
+            json.dumps(rows, default=str),
+            json.dumps(expected, default=str),
+        )
+
+    def test_requetes_constantes_et_renderer(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        vente_ids = list(Vente.objects.values_list("id", flat=True))
+
+        # Ventes (+ client, facture), lignes (+ produit, vendeur).
+        with self.assertNumQueries(2):
+            rows = vente_list_rows(vente_ids)
+
+        self.assertEqual(len(rows), 3)
+
+        with override_settings(API_JSON_RENDERER="orjson"):
+            fast = FastJSONRenderer().render(rows)
+
+        with override_settings(API_JSON_RENDERER="json"):
+            standard = FastJSONRenderer().render(rows)
+
+        self.assertEqual(fast, standard)
+        self.assertEqual(standard, JSONRenderer().render(rows))
+
+        response = client.get("/api/vente/list-produit", {"page_size": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["results"], json.loads(
+            JSONRenderer().render(rows[:2])
+        ))
+
+
+class ExportComptableTests(TestCase):
+    """
+    L'export comptable est servi en flux depuis un fichier temporaire
+    et reste limité aux bijouteries de l'utilisateur.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="manager.export@example.com",
+            password="secret",
+        )
+
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Export")
+        autre = Bijouterie.objects.create(nom="Bijouterie Autre")
+
+        Manager.objects.create(
+            user=cls.user,
+            verifie=True,
+        ).bijouteries.add(cls.bijouterie)
+
+        for bijouterie, montant in (
+            (cls.bijouterie, "1000.00"),
+            (autre, "2000.00"),
+        ):
+            facture = Facture.objects.create(
+                bijouterie=bijouterie,
+                montant_ht=Decimal(montant),
+                type_facture=Facture.TYPE_FACTURE,
+            )
+
+            parts = (
+                ("400.00", "600.00")
+                if bijouterie == cls.bijouterie
+                else (montant,)
+            )
+
+            for part in parts:
+                PaiementLigne.objects.create(
+                    paiement=Paiement.objects.create(facture=facture),
+                    montant_paye=Decimal(part),
+                )
+
+            Facture.recompute_facture_status(facture)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_export_en_flux_et_scope(self):
+        response = self.client.get("/api/factures/export-comptable")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn(
+            'filename="comptabilite.xlsx"',
+            response["Content-Disposition"],
+        )
+
+        ws = load_workbook(
+            BytesIO(b"".join(response.streaming_content))
+        )["Journal"]
+
+        rows = list(ws.iter_rows(min_row=2, values_only=True))
+
+        # Facture (411 + 701) puis un couple 571 / 411 par paiement ;
+        # la facture de l'autre bijouterie n'apparaît pas.
+        self.assertEqual(
+            [row[3] for row in rows],
+            ["411", "701", "571", "411", "571", "411"],
+        )
+        self.assertEqual(rows[0][5], 1000)
+        self.assertEqual([rows[2][5], rows[4][5]], [400, 600])
+
+    def test_periode_invalide(self):
+        response = self.client.get(
+            "/api/factures/export-comptable",
+            {"start_date": "2024-13-01"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class NumerotationTests(TestCase):
+    """
+    Factures : séquence sans trou par bijouterie et par jour.
+    Ventes : numéros uniques pris dans des blocs réservés.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Num")
+
+        cls.vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.num@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+        )
+
+    def setUp(self):
+        reset_number_blocks()
+        self.addCleanup(reset_number_blocks)
+
+    def _facture(self):
+        return Facture.objects.create(
+            bijouterie=self.bijouterie,
+            montant_ht=Decimal("100.00"),
+            type_facture=Facture.TYPE_FACTURE,
+        )
+
+    def test_factures_sans_trou_meme_apres_rollback(self):
+        premiere = self._facture()
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self._facture()
+                raise RuntimeError
+
+        seconde = self._facture()
+
+        self.assertTrue(premiere.numero_facture.endswith("-0001"))
+        self.assertTrue(seconde.numero_facture.endswith("-0002"))
+
+    def test_ventes_par_blocs(self):
+        ventes = []
+
+        # Une vente par transaction, comme dans les vues.
+        for _ in range(VENTE_BLOCK_SIZE + 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                ventes.append(
+                    Vente.objects.create(
+                        bijouterie=self.bijouterie,
+                        vendor=self.vendor,
+                    )
+                )
+
+        numeros = [vente.numero_vente for vente in ventes]
+
+        self.assertEqual(len(set(numeros)), len(numeros))
+        self.assertTrue(numeros[0].endswith(f"-{self.bijouterie.pk}-00001"))
+
+        # Deux blocs réservés, compteur avancé d'autant.
+        self.assertEqual(
+            InvoiceCounter.objects.get(sequence=SEQUENCE_VENTE).last_value,
+            2 * VENTE_BLOCK_SIZE,
+        )
+
+    def test_vente_sans_bijouterie(self):
+        premier = Vente().generer_numero_vente()
+        second = Vente().generer_numero_vente()
+
+        self.assertIn("-SB-", premier)
+        self.assertLessEqual(len(premier), 30)
+        self.assertNotEqual(premier, second)
+        self.assertFalse(
+            InvoiceCounter.objects.filter(sequence=SEQUENCE_VENTE).exists()
+        )
+
+    def test_bloc_annule_jamais_distribue(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                next_value_from_block(SEQUENCE_VENTE, self.bijouterie.pk)
+                raise RuntimeError
+
+        # Compteur revenu à zéro : le bloc est réservé à nouveau.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(
+                next_value_from_block(SEQUENCE_VENTE, self.bijouterie.pk),
+                1,
+            )
+
+        self.assertEqual(
+            next_value_from_block(SEQUENCE_VENTE, self.bijouterie.pk),
+            2,
+        )
+
+
+class ConfirmSaleOutBatchTests(TestCase):
+    """
+    La confirmation consomme le stock vendeur de toute la facture
+    en FIFO, avec un seul verrouillage et des écritures groupées.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="vendor.fifo@example.com",
+            password="secret",
+        )
+
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie FIFO")
+        cls.vendor = Vendor.objects.create(
+            user=cls.user,
+            bijouterie=cls.bijouterie,
+        )
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Colliers")
+        kwargs = {
+            "categorie": categorie,
+            "modele": Modele.objects.get_or_create(
+                modele="Chaîne",
+                categorie=categorie,
+            )[0],
+            "purete": Purete.objects.get_or_create(purete="18")[0],
+            "marque": Marque.objects.get_or_create(marque="Local")[0],
+        }
+
+        cls.produit_a = Produit.objects.create(poids=Decimal("2.00"), **kwargs)
+        cls.produit_b = Produit.objects.create(poids=Decimal("3.00"), **kwargs)
+
+        achat = Achat.objects.create(
+            fournisseur=Fournisseur.objects.create(telephone="770001122"),
+            bijouterie=cls.bijouterie,
+        )
+
+        now = timezone.now()
+
+        def allouer(numero_lot, produit, quantite, received_at):
+            produit_line = ProduitLine.objects.create(
+                lot=Lot.objects.create(
+                    achat=achat,
+                    numero_lot=numero_lot,
+                    received_at=received_at,
+                ),
+                produit=produit,
+                prix_achat_gramme=Decimal("1000.00"),
+                quantite=quantite,
+            )
+            VendorStock.objects.create(
+                produit_line=produit_line,
+                vendor=cls.vendor,
+                bijouterie=cls.bijouterie,
+                quantite_allouee=quantite,
+            )
+            return produit_line
+
+        # Le lot le plus récent est créé en premier : seul received_at compte.
+        cls.pl_a_recent = allouer("FIFO-A2", cls.produit_a, 5, now)
+        cls.pl_a_ancien = allouer("FIFO-A1", cls.produit_a, 2, now - timedelta(days=10))
+        cls.pl_b = allouer("FIFO-B1", cls.produit_b, 4, now)
+
+    def _facture_payee(self, lignes):
+        vente = Vente.objects.create(bijouterie=self.bijouterie, vendor=self.vendor)
+
+        for produit, quantite in lignes:
+            VenteProduit.objects.create(
+                vente=vente,
+                produit=produit,
+                vendor=self.vendor,
+                quantite=quantite,
+                prix_vente_grammes=Decimal("1000.00"),
+            )
+
+        return Facture.objects.create(
+            vente=vente,
+            bijouterie=self.bijouterie,
+            montant_ht=Decimal("100.00"),
+            type_facture=Facture.TYPE_FACTURE,
+            status=Facture.STAT_PAYE,
+        )
+
+    def _vendu(self, produit_line):
+        return VendorStock.objects.get(produit_line=produit_line).quantite_vendue
+
+    def test_fifo_sur_toute_la_facture(self):
+        facture = self._facture_payee([
+            (self.produit_a, 3),
+            (self.produit_b, 2),
+            (self.produit_a, 1),
+        ])
+
+        result = confirm_sale_out_from_vendor(facture=facture, by_user=self.user)
+
+        self.assertEqual(result["lines_done"], 3)
+        self.assertEqual(result["created"], 4)
+
+        # 3 = 2 (lot ancien) + 1 (lot récent), puis 1 sur le lot récent.
+        self.assertEqual(self._vendu(self.pl_a_ancien), 2)
+        self.assertEqual(self._vendu(self.pl_a_recent), 2)
+        self.assertEqual(self._vendu(self.pl_b), 2)
+
+        movements = InventoryMovement.objects.filter(
+            facture=facture,
+            movement_type=MovementType.SALE_OUT,
+        )
+        self.assertEqual(sum(m.qty for m in movements), 6)
+        self.assertEqual(
+            {m.achat_id for m in movements},
+            {self.pl_b.lot.achat_id},
+        )
+
+        balance = InventoryBalance.objects.get(
+            bijouterie=self.bijouterie,
+            produit_line=self.pl_a_recent,
+        )
+        self.assertEqual(balance.sale_out, 2)
+
+        facture.refresh_from_db()
+        self.assertTrue(facture.stock_consumed)
+
+    def test_stock_insuffisant_ne_modifie_rien(self):
+        facture = self._facture_payee([
+            (self.produit_b, 3),
+            (self.produit_a, 8),
+        ])
+
+        with self.assertRaises(ValidationError):
+            confirm_sale_out_from_vendor(facture=facture, by_user=self.user)
+
+        self.assertEqual(self._vendu(self.pl_b), 0)
+        self.assertFalse(
+            InventoryMovement.objects.filter(facture=facture).exists()
+        )
+
+
+class VenteLinesBatchTests(TestCase):
+    """
+    Lignes de vente écrites par lot : montants identiques à
+    VenteProduit.save(), total de la vente écrit une fois.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Lignes")
+        cls.vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.lignes@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+        )
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Colliers")
+        kwargs = {
+            "categorie": categorie,
+            "modele": Modele.objects.get_or_create(
+                modele="Chaîne",
+                categorie=categorie,
+            )[0],
+            "purete": Purete.objects.get_or_create(purete="18")[0],
+            "marque": Marque.objects.get_or_create(marque="Local")[0],
+        }
+
+        cls.produits = [
+            Produit.objects.create(poids=Decimal("1.50") + index, **kwargs)
+            for index in range(20)
+        ]
+
+    def _vente(self):
+        return Vente.objects.create(
+            bijouterie=self.bijouterie,
+            vendor=self.vendor,
+        )
+
+    def _lignes(self, count):
+        return [
+            {
+                "produit_id": produit.id,
+                "quantite": 2,
+                "prix_vente_grammes": Decimal("40000.00"),
+                "remise": Decimal("1000.00"),
+                "autres": Decimal("0.00"),
+            }
+            for produit in self.produits[:count]
+        ]
+
+    def test_ecriture_groupee_en_requetes_constantes(self):
+        vente_petite = self._vente()
+        with self.assertNumQueries(6):
+            # savepoint, in_bulk produits, somme des lignes existantes,
+            # INSERT lignes, UPDATE vente, release savepoint
+            write_vente_lines(
+                vente=vente_petite,
+                vendor=self.vendor,
+                lignes=self._lignes(2),
+            )
+
+        vente = self._vente()
+        with self.assertNumQueries(6):
+            total = write_vente_lines(
+                vente=vente,
+                vendor=self.vendor,
+                lignes=self._lignes(20),
+            )
+
+        # Mêmes montants que le chemin save() ligne à ligne.
+        reference = self._vente()
+        for ligne in self._lignes(20):
+            VenteProduit.objects.create(
+                vente=reference,
+                vendor=self.vendor,
+                **ligne,
+            )
+
+        reference.refresh_from_db()
+        vente.refresh_from_db()
+
+        self.assertEqual(total, reference.montant_total)
+        self.assertEqual(vente.montant_total, reference.montant_total)
+        self.assertEqual(
+            sorted(vente.lignes.values_list("montant_ht", "montant_total")),
+            sorted(reference.lignes.values_list("montant_ht", "montant_total")),
+        )
+
+    def test_remplacement_des_lignes(self):
+        vente = self._vente()
+        write_vente_lines(vente=vente, vendor=self.vendor, lignes=self._lignes(5))
+
+        total = write_vente_lines(
+            vente=vente,
+            vendor=self.vendor,
+            lignes=self._lignes(1),
+            replace=True,
+        )
+
+        vente.refresh_from_db()
+        self.assertEqual(vente.lignes.count(), 1)
+        self.assertEqual(vente.montant_total, total)
+        # 40000 × 1.50 g × 2 - 1000
+        self.assertEqual(total, Decimal("119000.00"))
+
+    def test_recalcul_differe(self):
+        vente = self._vente()
+
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_vente_totals():
+                for ligne in self._lignes(10):
+                    VenteProduit.objects.create(
+                        vente=vente,
+                        vendor=self.vendor,
+                        **ligne,
+                    )
+
+                vente.refresh_from_db()
+                self.assertEqual(vente.montant_total, Decimal("0.00"))
+
+        updates = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "sale_vente"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+        vente.refresh_from_db()
+        self.assertEqual(
+            vente.montant_total,
+            sum(vente.lignes.values_list("montant_total", flat=True)),
+        )
+
+
+@override_settings(DOCUMENTS_CACHE_DIR="")
+class FactureNumeroLookupTests(TestCase):
+    """
+    Recherche par numéro sur la clé canonique indexée,
+    en nombre de requêtes fixe.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin.numero@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Numéro")
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.numero@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+        )
+        cls.facture = Facture.objects.create(
+            bijouterie=cls.bijouterie,
+            vente=Vente.objects.create(bijouterie=cls.bijouterie, vendor=vendor),
+            montant_ht=Decimal("100.00"),
+            type_facture=Facture.TYPE_PROFORMA,
+        )
+
+    def test_cle_canonique_et_selecteur(self):
+        self.assertEqual(
+            self.facture.numero_facture_key,
+            self.facture.numero_facture.upper(),
+        )
+
+        with self.assertNumQueries(1):
+            facture = get_facture_by_numero(
+                f"  {self.facture.numero_facture.lower()} "
+            )
+            self.assertEqual(facture.vente.bijouterie_id, self.bijouterie.id)
+            self.assertEqual(facture.bijouterie.nom, "Bijouterie Numéro")
+
+        with self.assertRaises(Facture.DoesNotExist):
+            get_facture_by_numero("FAC-INCONNUE")
+
+    def test_ticket_58mm_par_numero_en_minuscules(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        url = "/api/factures/{}/ticket-58mm/?debug=1"
+
+        response = client.get(url.format(self.facture.numero_facture.lower()))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.facture.numero_facture, response.content.decode())
+
+        self.assertEqual(client.get(url.format("FAC-INCONNUE")).status_code, 404)
+
+
+class FactureDocumentCacheTests(TestCase):
+    """
+    Documents imprimables rendus une fois, servis depuis le disque,
+    avec ETag ; toute modification de la facture change l'empreinte.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin.documents@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Documents")
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email="vendor.documents@example.com",
+                password="secret",
+            ),
+            bijouterie=cls.bijouterie,
+        )
+        cls.facture = Facture.objects.create(
+            bijouterie=cls.bijouterie,
+            vente=Vente.objects.create(bijouterie=cls.bijouterie, vendor=vendor),
+            montant_ht=Decimal("100.00"),
+            type_facture=Facture.TYPE_PROFORMA,
+        )
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+        settings_override = override_settings(DOCUMENTS_CACHE_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f"/api/factures/{self.facture.numero_facture}/ticket-58mm/"
+
+    def _documents(self):
+        return sorted(
+            path.name
+            for path in (
+                Path(self.cache_dir)
+                / "factures"
+                / str(self.facture.pk)
+            ).glob("*")
+        )
+
+    def test_reimpression_servie_depuis_le_cache(self):
+        first = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"])
+        self.assertEqual(len(self._documents()), 1)
+
+        def _no_render(facture):
+            raise AssertionError("document rendu à nouveau")
+
+        with mock.patch.dict(RENDERERS, {DOC_TICKET_PROFORMA_58MM: _no_render}):
+            second = self.client.get(self.url)
+            not_modified = self.client.get(
+                self.url,
+                HTTP_IF_NONE_MATCH=first["ETag"],
+            )
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_modification_change_l_etag(self):
+        first = self.client.get(self.url)
+
+        facture = Facture.objects.get(pk=self.facture.pk)
+        facture.status = Facture.STAT_PARTIEL
+        facture.save(update_fields=["status"])
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        # L'ancienne version est supprimée à l'écriture de la nouvelle.
+        self.assertEqual(len(self._documents()), 1)
+
+    def test_copies_perimees_versions_distinctes(self):
+        version = Facture.objects.get(pk=self.facture.pk).documents_version
+
+        first = Facture.objects.get(pk=self.facture.pk)
+        second = Facture.objects.get(pk=self.facture.pk)
+
+        first.status = Facture.STAT_PARTIEL
+        first.save(update_fields=["status"])
+        second.save()
+
+        self.assertEqual(first.documents_version, version + 1)
+        self.assertEqual(second.documents_version, version + 2)
+        self.assertEqual(
+            Facture.objects.get(pk=self.facture.pk).documents_version,
+            version + 2,
+        )
+
+    def test_pregeneration_puis_invalidation(self):
+        kinds = pregenerate_facture_documents(self.facture.pk)
+
+        self.assertEqual(len(kinds), 2)
+        self.assertEqual(len(self._documents()), 2)
+
+        version = Facture.objects.get(pk=self.facture.pk).documents_version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_facture_documents(self.facture)
+
+        self.assertEqual(self._documents(), [])
+        self.assertEqual(
+            Facture.objects.get(pk=self.facture.pk).documents_version,
+            version + 1,
+        )
+
+    def test_commande_pregeneration(self):
+        Paiement.objects.create(facture=self.facture)
+
+        call_command(
+            "pregenerate_facture_documents",
+            "--once",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(len(self._documents()), 2)
+
+
+class PeriodFilterIndexTests(TestCase):
+    """
+    Filtres de période en bornes [début, fin) sur la colonne : le
+    plan d'exécution parcourt l'index (bijouterie ou vendeur, date),
+    ou l'index de date, sur la plage demandée.
+    """
+
+    def _index_name(self, model, fields):
+        return next(
+            index.name
+            for index in model._meta.indexes
+            if list(index.fields) == fields
+        )
+
+    def assertUsesIndex(self, queryset, index_name, column):
+        plan = queryset.explain()
+
+        self.assertIn(index_name, plan)
+
+        if connection.vendor == "sqlite":
+            # La colonne de date fait partie de la recherche dans l'index.
+            self.assertRegex(plan, rf"SEARCH .*{index_name} \(.*{column}[<>]")
+
+    def test_periodes(self):
+        tz = timezone.get_current_timezone()
+        mercredi = date(2026, 3, 18)
+
+        start, end = aware_range_period("week", reference=mercredi, tz=tz)
+        self.assertEqual((start.date(), end.date()), (date(2026, 3, 16), date(2026, 3, 23)))
+
+        start, end = aware_range_period("month", reference=mercredi, tz=tz)
+        self.assertEqual((start.date(), end.date()), (date(2026, 3, 1), date(2026, 4, 1)))
+
+        start, end = aware_range_period("year", reference=mercredi, tz=tz)
+        self.assertEqual((start.date(), end.date()), (date(2026, 1, 1), date(2027, 1, 1)))
+        self.assertEqual(start.tzinfo, tz)
+
+        with self.assertRaises(ValueError):
+            aware_range_period("trimestre")
+
+        self.assertEqual(date_range_filter("created_at", "", None), {})
+        self.assertEqual(
+            set(date_range_filter("created_at", "2026-03-01", date(2026, 3, 31))),
+            {"created_at__gte", "created_at__lt"},
+        )
+
+        for invalide in ("2026-02-30", "01/03/2026"):
+            with self.assertRaises(ValueError):
+                date_range_filter("created_at", invalide)
+
+    def test_plans_utilisent_les_index_composites(self):
+        mois = aware_range_period("month")
+        annee = aware_range_period("year")
+
+        self.assertUsesIndex(
+            Vente.objects.filter(bijouterie_id=1, **range_filter("created_at", *mois)),
+            "vente_shop_created_idx",
+            "created_at",
+        )
+        self.assertUsesIndex(
+            Vente.objects.filter(
+                vendor_id=1,
+                **date_range_filter("created_at", "2026-01-01", "2026-01-31"),
+            ),
+            self._index_name(Vente, ["vendor", "created_at"]),
+            "created_at",
+        )
+        self.assertUsesIndex(
+            Paiement.objects.filter(**range_filter("date_paiement", *aware_range_period("day"))),
+            "paiement_date_idx",
+            "date_paiement",
+        )
+        self.assertUsesIndex(
+            Depense.objects.filter(bijouterie_id=1, **range_filter("created_at", *annee)),
+            "depense_shop_created_idx",
+            "created_at",
+        )
+        self.assertUsesIndex(
+            RachatClient.objects.filter(bijouterie_id=1, **range_filter("created_at", *annee)),
+            "rachat_shop_created_idx",
+            "created_at",
+        )
+        self.assertUsesIndex(
+            Achat.objects.filter(bijouterie_id=1, **range_filter("created_at", *annee)),
+            "achat_shop_created_idx",
+            "created_at",
+        )
+        self.assertUsesIndex(
+            InventoryMovement.objects.filter(
+                src_bijouterie_id=1,
+                **date_range_filter("occurred_at", "2026-01-01", None),
+            ),
+            "inv_mov_src_shop_date_idx",
+            "occurred_at",
+        )
+
+        # __year=<entier> est déjà compilé en bornes par Django.
+        self.assertUsesIndex(
+            Vente.objects.filter(bijouterie_id=1, created_at__year=2026),
+            "vente_shop_created_idx",
+            "created_at",
+        )
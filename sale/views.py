@@ -3,9 +3,8 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from io import BytesIO
 from uuid import UUID
 
 from django.conf import settings
@@ -14,9 +13,9 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.paginator import EmptyPage, Paginator
 from django.db import transaction
 from django.db.models import (Count, DecimalField, Exists, ExpressionWrapper,
-                              F, Min, OuterRef, Q, Sum, Value)
+                              F, Min, OuterRef, Sum, Value)
 from django.db.models.functions import Coalesce
-from django.http import FileResponse, HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
@@ -32,12 +31,16 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.document_cache import document_response
 from backend.mixins import (GROUP_BY_CHOICES, ExportXlsxMixin,
-                            aware_range_month, parse_month_or_default,
-                            resolve_tz)
+                            aware_range_month, aware_range_period,
+                            parse_export_period, parse_month_or_default,
+                            range_filter, resolve_tz, xlsx_file_response)
+from backend.pagination import CURSOR_SWAGGER_PARAMETERS, KeysetPagination
 from backend.permissions import (CanCreateSale, CanProcessInvoicePayment,
                                  IsCashierOnly)
 from backend.query_scopes import scope_bijouterie_q
+from backend.reference_cache import get_mode_paiement
 from backend.renderers import UserRenderer
 from backend.roles import (ROLE_ADMIN, ROLE_CASHIER, ROLE_MANAGER, ROLE_VENDOR,
                            get_role_name)
@@ -48,26 +51,29 @@ from compte_depot.services import effectuer_retrait
 from inventory.models import Bucket, InventoryMovement, MovementType
 from inventory.services import log_move
 from sale.models import (Client, Facture,  # adapte le chemin si besoin
-                         ModePaiement, Paiement, PaiementLigne, Vente,
-                         VenteProduit)
-from sale.pdf.escpos_ticket_58mm import build_escpos_ticket_proforma_58mm
-from sale.pdf.escpos_ticket_80mm import build_escpos_recu_paiement_80mm
-from sale.pdf.facture_A5_paysage import build_facture_a5_paysage_pdf
+                         Paiement, PaiementLigne, Vente, VenteProduit)
+from sale.selectors.factures import get_facture_by_numero
+from sale.selectors.ventes import vente_list_rows
 from sale.serializers import (CancelProformaVenteSerializer,
                               FactureListSerializer,
                               RetourVenteProduitSerializer,
                               UpdateVenteProduitSerializer,
-                              VenteCreateInSerializer, VenteDetailSerializer,
-                              VenteListSerializer)
+                              VenteCreateInSerializer, VenteDetailSerializer)
 from sale.services.comptable_export_service import export_comptable_factures
 from sale.services.confirm_service import confirm_sale_out_from_vendor
 from sale.services.export.export_facture_excel import export_factures_excel
+from sale.services.facture_document_service import (
+    DOC_FACTURE_A5, DOC_TICKET_PAIEMENT_80MM, DOC_TICKET_PROFORMA_58MM,
+    document_cache_options, get_facture_document,
+    invalidate_facture_documents, schedule_facture_documents)
 from sale.services.facture_hash_service import generate_facture_hash
 from sale.services.facture_pdf_service import generate_facture_pdf
 from sale.services.facture_qr_service import generate_facture_qr
+from sale.services.vente_lines_service import write_vente_lines
 from sale.services.sale_service import (create_sale_one_vendor,
                                         upsert_client_for_payment,
                                         validate_facture_payable)
+from search.selectors import search, search_ids
 from staff.models import Cashier
 from stock.models import Stock, VendorStock
 from store.models import Produit
@@ -376,6 +382,8 @@ Filtres disponibles :
 - status_facture
 - page
 - page_size
+- cursor (mode curseur, tri -created_at, -id)
+- count (mode curseur : exact ou capped)
         """,
         manual_parameters=[
             openapi.Parameter(
@@ -425,6 +433,7 @@ Filtres disponibles :
                 description="Nombre d’éléments par page",
                 type=openapi.TYPE_INTEGER,
             ),
+            *CURSOR_SWAGGER_PARAMETERS,
         ],
         responses={
             200: openapi.Response(
@@ -530,20 +539,13 @@ Filtres disponibles :
         # Queryset de base avec scope bijouterie
         # =====================================================
 
+        # Seuls id / created_at (tri, curseur) sont chargés ici : la
+        # représentation est construite par vente_list_rows (values()).
         qs = (
             Vente.objects
-            .select_related(
-                "client",
-                "vendor",
-                "vendor__user",
-                "bijouterie",
-                "facture_vente",
-            )
-            .prefetch_related(
-                "lignes",
-                "lignes__produit",
-                "lignes__vendor",
-                "lignes__vendor__user",
+            .only(
+                "id",
+                "created_at",
             )
             .filter(
                 scope_bijouterie_q(
@@ -572,17 +574,11 @@ Filtres disponibles :
 
         today = timezone.localdate()
 
-        start_date = timezone.make_aware(
-            datetime(
-                today.year,
-                1,
-                1,
-            ),
-            timezone.get_current_timezone(),
-        )
-
         qs = qs.filter(
-            created_at__gte=start_date,
+            **range_filter(
+                "created_at",
+                *aware_range_period("year", reference=today),
+            )
         )
 
         # =====================================================
@@ -599,8 +595,10 @@ Filtres disponibles :
         )
 
         if numero_vente:
-            qs = qs.filter(
-                numero_vente__icontains=numero_vente,
+            qs = search(
+                qs,
+                numero_vente,
+                kind="vente",
             )
 
         # =====================================================
@@ -616,19 +614,11 @@ Filtres disponibles :
             .strip()
         )
 
-        if client_q:
+        client_ids = search_ids("client", client_q)
+
+        if client_ids is not None:
             qs = qs.filter(
-                Q(
-                    client__nom__icontains=client_q
-                )
-                |
-                Q(
-                    client__prenom__icontains=client_q
-                )
-                |
-                Q(
-                    client__telephone__icontains=client_q
-                )
+                client_id__in=client_ids,
             )
 
         # =====================================================
@@ -727,6 +717,26 @@ Filtres disponibles :
                 facture_vente__status=status_facture,
             )
 
+        # =====================================================
+        # Mode curseur (opt-in) : ni COUNT(*) ni OFFSET
+        # =====================================================
+
+        keyset = KeysetPagination(
+            ordering=("-created_at", "-id"),
+        )
+
+        if keyset.is_requested(request):
+            ventes = keyset.paginate_queryset(qs, request)
+
+            return Response(
+                keyset.get_response_data(
+                    vente_list_rows(
+                        vente.id
+                        for vente in ventes
+                    )
+                )
+            )
+
         # =====================================================
         # Pagination
         # =====================================================
@@ -796,24 +806,106 @@ Filtres disponibles :
                 paginator.num_pages
             )
 
-        serializer = VenteListSerializer(
-            page_obj.object_list,
-            many=True,
-        )
-
         return Response(
             {
                 "count": paginator.count,
                 "page": page_obj.number,
                 "page_size": page_size,
                 "num_pages": paginator.num_pages,
-                "results": serializer.data,
+                "results": vente_list_rows(
+                    vente.id
+                    for vente in page_obj.object_list
+                ),
             }
         )
 
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
 
+FACTURE_ALLOWED_ORDERING = {
+    "date_creation",
+    "-date_creation",
+    "montant_total",
+    "-montant_total",
+    "montant_paye",
+    "-montant_paye",
+    "reste_a_payer",
+    "-reste_a_payer",
+}
+
+# paramètre -> lookup sur les colonnes dénormalisées
+FACTURE_MONTANT_FILTERS = {
+    "reste_min": "reste_a_payer__gte",
+    "reste_max": "reste_a_payer__lte",
+    "paye_min": "montant_paye__gte",
+    "paye_max": "montant_paye__lte",
+}
+
+
+def _apply_facture_montant_filters(qs, params):
+    """
+    Filtres et tri sur montant_paye / reste_a_payer
+    (colonnes indexées, sans agrégation sur les paiements).
+
+    ?reste_min=50000&ordering=-reste_a_payer
+    """
+    for param, lookup in FACTURE_MONTANT_FILTERS.items():
+        raw = (params.get(param) or "").strip()
+        if not raw:
+            continue
+
+        try:
+            value = Decimal(raw)
+        except InvalidOperation:
+            raise DRFValidationError({param: "Montant invalide."})
+
+        qs = qs.filter(**{lookup: value})
+
+    ordering = (params.get("ordering") or "-date_creation").strip()
+
+    if ordering not in FACTURE_ALLOWED_ORDERING:
+        raise DRFValidationError({
+            "ordering": (
+                "Tri invalide. Valeurs autorisées : "
+                + ", ".join(sorted(FACTURE_ALLOWED_ORDERING))
+            )
+        })
+
+    return qs.order_by(ordering, "-id")
+
+
+def _facture_keyset_response(request, qs):
+    """
+    Mode curseur des listes de factures (?cursor=).
+
+    Retourne None si le mode n'est pas demandé : la vue garde
+    alors sa pagination page/page_size.
+    """
+    keyset = KeysetPagination(
+        ordering=("-date_creation", "-id"),
+        default_page_size=DEFAULT_PAGE_SIZE,
+        max_page_size=MAX_PAGE_SIZE,
+    )
+
+    if not keyset.is_requested(request):
+        return None
+
+    ordering = (request.query_params.get("ordering") or "-date_creation").strip()
+
+    if ordering != "-date_creation":
+        raise DRFValidationError({
+            "ordering": "Le mode curseur impose le tri -date_creation."
+        })
+
+    factures = keyset.paginate_queryset(qs, request)
+
+    return Response(
+        keyset.get_response_data(
+            FactureListSerializer(factures, many=True).data
+        ),
+        status=status.HTTP_200_OK,
+    )
+
 class ListFacturesAPayerView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -828,7 +920,6 @@ class ListFacturesAPayerView(APIView):
             Facture.objects
             .select_related("bijouterie", "vente", "vente__client")
             .prefetch_related(
-                "paiements",
                 "vente__lignes__vendor",
                 "vente__lignes__produit",
                 "vente__lignes__produit__categorie",
@@ -850,24 +941,21 @@ class ListFacturesAPayerView(APIView):
         # ✅ Ventes de l'année en cours pour tous les rôles
         today = timezone.localdate()
 
-        start_date = timezone.make_aware(
-            datetime(today.year, 1, 1)
+        qs = qs.filter(
+            **range_filter(
+                "date_creation",
+                *aware_range_period("year", reference=today),
+            )
         )
 
-        qs = qs.filter(date_creation__gte=start_date)
-
         # ✅ Filtres
         numero = (request.query_params.get("numero_facture") or "").strip()
         if numero:
             qs = qs.filter(numero_facture__icontains=numero)
 
-        client_q = (request.query_params.get("client_q") or "").strip()
-        if client_q:
-            qs = qs.filter(
-                Q(vente__client__nom__icontains=client_q) |
-                Q(vente__client__prenom__icontains=client_q) |
-                Q(vente__client__telephone__icontains=client_q)
-            )
+        client_ids = search_ids("client", request.query_params.get("client_q"))
+        if client_ids is not None:
+            qs = qs.filter(vente__client_id__in=client_ids)
 
         # (optionnel) payment_mode -> DISTINCT nécessaire uniquement ici
         payment_mode = (request.query_params.get("payment_mode") or "").strip()
@@ -876,7 +964,13 @@ class ListFacturesAPayerView(APIView):
                 paiements__lignes__mode_paiement__code__iexact=payment_mode
             ).distinct()
 
-        qs = qs.order_by("-date_creation")
+        # ✅ Montants (reste_min, paye_min, ...) + tri
+        qs = _apply_facture_montant_filters(qs, request.query_params)
+
+        # ✅ Mode curseur (opt-in)
+        keyset_response = _facture_keyset_response(request, qs)
+        if keyset_response is not None:
+            return keyset_response
 
         # ✅ Pagination safe
         def _int(name: str, default: int) -> int:
@@ -931,7 +1025,6 @@ class ListFacturePayeesView(APIView):
             Facture.objects
             .select_related("bijouterie", "vente", "vente__client")
             .prefetch_related(
-                "paiements",
                 "vente__lignes__vendor",
                 "vente__lignes__produit",
                 "vente__lignes__produit__categorie",
@@ -948,12 +1041,13 @@ class ListFacturePayeesView(APIView):
         # ✅ Ventes de l'année en cours pour tous les rôles
         today = timezone.localdate()
 
-        start_date = timezone.make_aware(
-            datetime(today.year, 1, 1)
+        qs = qs.filter(
+            **range_filter(
+                "date_creation",
+                *aware_range_period("year", reference=today),
+            )
         )
 
-        qs = qs.filter(date_creation__gte=start_date)
-
         # ✅ filtres
         numero = (request.query_params.get("numero_facture") or "").strip()
         if numero:
@@ -988,13 +1082,9 @@ class ListFacturePayeesView(APIView):
             )
             qs = qs.annotate(_has_vendor=Exists(venteproduit_exists)).filter(_has_vendor=True)
 
-        client_q = (request.query_params.get("client_q") or "").strip()
-        if client_q:
-            qs = qs.filter(
-                Q(vente__client__nom__icontains=client_q) |
-                Q(vente__client__prenom__icontains=client_q) |
-                Q(vente__client__telephone__icontains=client_q)
-            )
+        client_ids = search_ids("client", request.query_params.get("client_q"))
+        if client_ids is not None:
+            qs = qs.filter(vente__client_id__in=client_ids)
 
         payment_mode = (request.query_params.get("payment_mode") or "").strip()
         if payment_mode:
@@ -1002,7 +1092,13 @@ class ListFacturePayeesView(APIView):
                 paiements__lignes__mode_paiement__code__iexact=payment_mode
             ).distinct()
 
-        qs = qs.order_by("-date_creation")
+        # ✅ Montants (reste_min, paye_min, ...) + tri
+        qs = _apply_facture_montant_filters(qs, request.query_params)
+
+        # ✅ Mode curseur (opt-in)
+        keyset_response = _facture_keyset_response(request, qs)
+        if keyset_response is not None:
+            return keyset_response
 
         # ✅ pagination safe
         def _int(name: str, default: int) -> int:
@@ -1158,16 +1254,13 @@ class PaiementFactureMultiModeView(APIView):
         if not lignes_data:
             return Response({"detail": "lignes requises."}, status=400)
 
-        facture = (
-            Facture.objects
-            .select_for_update()
-            .select_related("vente", "vente__client", "bijouterie")
-            .prefetch_related("paiements__lignes")
-            .filter(numero_facture__iexact=numero_facture)
-            .first()
-        )
-
-        if not facture:
+        try:
+            facture = get_facture_by_numero(
+                numero_facture,
+                profile="paiement",
+                for_update=True,
+            )
+        except Facture.DoesNotExist:
             return Response(
                 {"detail": f"Facture introuvable avec le numéro : {numero_facture}"},
                 status=404,
@@ -1247,10 +1340,7 @@ class PaiementFactureMultiModeView(APIView):
         lignes_creees = []
 
         for item in normalized_lignes:
-            mode_obj = ModePaiement.objects.filter(
-                code__iexact=item["mode"],
-                active=True,
-            ).first()
+            mode_obj = get_mode_paiement(item["mode"])
 
             if not mode_obj:
                 transaction.set_rollback(True)
@@ -1390,6 +1480,9 @@ class PaiementFactureMultiModeView(APIView):
                 facture.is_locked = True
                 facture.locked_at = timezone.now()
                 facture.save(update_fields=["is_locked", "locked_at"])
+
+            # A5 + ticket 80mm prêts avant la première impression.
+            schedule_facture_documents(facture)
                 
         
         facture_download_url = request.build_absolute_uri(
@@ -1532,6 +1625,7 @@ class TicketProforma58mmView(APIView):
             200: openapi.Response(
                 description="Ticket PROFORMA généré avec succès. Retourne un fichier .bin ou du texte si debug=1."
             ),
+            304: "Document inchangé depuis la dernière impression (If-None-Match).",
             400: "Aucune vente associée à cette facture.",
             403: "Accès refusé.",
             404: "Facture introuvable.",
@@ -1541,16 +1635,11 @@ class TicketProforma58mmView(APIView):
 
     def get(self, request, numero_facture: str):
         try:
+            facture = get_facture_by_numero(numero_facture, profile="ticket")
+        except Facture.DoesNotExist:
+            raise Http404("Facture introuvable.")
 
-            facture = get_object_or_404(
-                Facture.objects.select_related(
-                    "vente",
-                    "bijouterie",
-                    "vente__client",
-                ),
-                numero_facture__iexact=numero_facture,
-            )
-
+        try:
             if not _can_access_facture(request.user, facture):
                 return Response(
                     {"detail": "⛔ Accès refusé à cette facture."},
@@ -1563,52 +1652,23 @@ class TicketProforma58mmView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            bijouterie = facture.bijouterie
-
-            shop_name = (
-                getattr(bijouterie, "nom", None)
-                or "BIJOUTERIE RIO-GOLD"
-            )
-
-            shop_phone = (
-                getattr(bijouterie, "telephone_portable_1", None)
-                or getattr(bijouterie, "telephone_portable_2", None)
-                or getattr(bijouterie, "telephone_fix", None)
-                or ""
-            )
-
-            date_txt = facture.date_creation.strftime("%d/%m/%Y %H:%M")
-
-            escpos_bytes = build_escpos_ticket_proforma_58mm(
-                shop_name=shop_name,
-                shop_phone=shop_phone,
-                numero_facture=facture.numero_facture,
-                date_txt=date_txt,
-                montant_a_payer=facture.reste_a_payer,
-                statut_txt=(
-                    facture.get_status_display()
-                    if hasattr(facture, "get_status_display")
-                    else facture.status
-                ),
-                note="Ticket PROFORMA - à régler en caisse",
-            )
-
             # ✅ Mode debug
             if request.query_params.get("debug") == "1":
+                escpos_bytes = get_facture_document(
+                    facture,
+                    DOC_TICKET_PROFORMA_58MM,
+                )
                 return HttpResponse(
                     escpos_bytes.decode("cp1252", errors="ignore"),
                     content_type="text/plain; charset=utf-8",
                 )
 
-            # ✅ Mode POS
-            return HttpResponse(
-                escpos_bytes,
+            # ✅ Mode POS (cache disque + ETag)
+            return document_response(
+                request,
+                **document_cache_options(facture, DOC_TICKET_PROFORMA_58MM),
                 content_type="application/octet-stream",
-                headers={
-                    "Content-Disposition": (
-                        f'inline; filename="ticket_proforma_{facture.numero_facture}.bin"'
-                    )
-                },
+                filename=f"ticket_proforma_{facture.numero_facture}.bin",
             )
 
         except Exception as e:
@@ -1727,6 +1787,7 @@ class TicketPaiement80mmESCPosView(APIView):
             200: openapi.Response(
                 description="Ticket de paiement généré avec succès. Retourne un fichier .bin ou du texte si debug=1."
             ),
+            304: "Document inchangé depuis la dernière impression (If-None-Match).",
             400: "Facture non entièrement payée ou aucun paiement trouvé.",
             403: "Accès refusé.",
             404: "Facture introuvable.",
@@ -1734,14 +1795,10 @@ class TicketPaiement80mmESCPosView(APIView):
         tags=["Tickets POS"],
     )
     def get(self, request, numero_facture: str):
-        facture = get_object_or_404(
-            Facture.objects.select_related(
-                "vente",
-                "bijouterie",
-                "vente__client",
-            ),
-            numero_facture__iexact=numero_facture,
-        )
+        try:
+            facture = get_facture_by_numero(numero_facture, profile="ticket")
+        except Facture.DoesNotExist:
+            raise Http404("Facture introuvable.")
 
         if not _can_access_facture(request.user, facture):
             return Response(
@@ -1760,62 +1817,32 @@ class TicketPaiement80mmESCPosView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        paiement = (
-            Paiement.objects
-            .filter(facture=facture)
-            .select_related("facture", "cashier", "created_by")
-            .prefetch_related("lignes__mode_paiement")
-            .order_by("-date_paiement", "-id")
-            .first()
-        )
+        try:
+            # ✅ Mode debug
+            if request.query_params.get("debug") == "1":
+                escpos_bytes = get_facture_document(
+                    facture,
+                    DOC_TICKET_PAIEMENT_80MM,
+                )
+                return HttpResponse(
+                    escpos_bytes.decode("cp1252", errors="ignore"),
+                    content_type="text/plain; charset=utf-8",
+                )
 
-        if not paiement:
+            # ✅ Mode POS (cache disque + ETag)
+            return document_response(
+                request,
+                **document_cache_options(facture, DOC_TICKET_PAIEMENT_80MM),
+                content_type="application/octet-stream",
+                filename=f"ticket_paiement_{facture.numero_facture}.bin",
+            )
+
+        except Paiement.DoesNotExist:
             return Response(
                 {"detail": "Aucun paiement trouvé"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        bijouterie = facture.bijouterie
-
-        shop_name = getattr(bijouterie, "nom", None) or "RIO-GOLD"
-
-        shop_phone = (
-            getattr(bijouterie, "telephone_portable_1", None)
-            or getattr(bijouterie, "telephone_portable_2", None)
-            or getattr(bijouterie, "telephone_fix", None)
-            or ""
-        )
-
-        montant_paye = paiement.lignes.aggregate(
-            total=Sum("montant_paye")
-        )["total"] or Decimal("0.00")
-
-        escpos_bytes = build_escpos_recu_paiement_80mm(
-            shop_name=shop_name,
-            shop_phone=shop_phone,
-            numero_facture=facture.numero_facture,
-            date_paiement=paiement.date_paiement,
-            montant_paye=montant_paye,
-            # reste_a_payer=facture.reste_a_payer,
-            reste_a_payer=None,
-        )
-
-        if request.query_params.get("debug") == "1":
-            return HttpResponse(
-                escpos_bytes.decode("cp1252", errors="ignore"),
-                content_type="text/plain; charset=utf-8",
-            )
-
-        return HttpResponse(
-            escpos_bytes,
-            content_type="application/octet-stream",
-            headers={
-                "Content-Disposition": (
-                    f'inline; filename="ticket_paiement_{facture.numero_facture}.bin"'
-                )
-            },
-        )
-
 # class FactureA5PaysageView(APIView):
 #     permission_classes = [IsAuthenticated]
 
@@ -1841,19 +1868,10 @@ class FactureA5PaysageView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, numero_facture: str):
-        facture = get_object_or_404(
-            Facture.objects
-            .select_related(
-                "vente",
-                "vente__client",
-                "bijouterie",
-            )
-            .prefetch_related(
-                "vente__lignes__produit",
-                "paiements",
-            ),
-            numero_facture__iexact=numero_facture,
-        )
+        try:
+            facture = get_facture_by_numero(numero_facture, profile="facture_a5")
+        except Facture.DoesNotExist:
+            raise Http404("Facture introuvable.")
 
         if not _can_access_facture(request.user, facture):
             return Response(
@@ -1861,110 +1879,90 @@ class FactureA5PaysageView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        buffer = BytesIO()
-
-        vente = facture.vente
-        client = vente.client if vente else None
-        bijouterie = facture.bijouterie
-
-        lines = []
-
-        if vente:
-            for vp in vente.lignes.all():
-                produit_nom = (
-                    vp.produit.nom
-                    if vp.produit else "Produit supprimé"
-                )
-
-                lines.append({
-                    "label": produit_nom,
-                    "qty": vp.quantite,
-                    "pu": vp.prix_vente_grammes,
-                    "ttc": vp.montant_total,
-                })
-
-        shop_phone = (
-            getattr(bijouterie, "telephone_portable_1", None)
-            or getattr(bijouterie, "telephone_portable_2", None)
-            or getattr(bijouterie, "telephone_fix", None)
-            or ""
+        # Facture payée et verrouillée : rendue une fois, puis relue
+        # depuis le cache disque (réimpressions).
+        return document_response(
+            request,
+            **document_cache_options(facture, DOC_FACTURE_A5),
+            content_type="application/pdf",
+            filename=f"facture_{facture.numero_facture}.pdf",
+            as_attachment=True,
         )
 
-        data = {
-            "shop_name": getattr(bijouterie, "nom", None) or "RIO GOLD",
-            "shop_phone": shop_phone,
-            "shop_ninea": getattr(bijouterie, "ninea", None) or "",
-            "shop_address": getattr(bijouterie, "adresse", None) or "",
-
-            "title": "FACTURE",
-            "invoice_no": facture.numero_facture,
-            "invoice_type": facture.type_facture,
-            "qr_code_path": (
-                facture.qr_code_image.path
-                if getattr(facture, "qr_code_image", None)
-                else None
-            ),
-            "date": facture.date_creation.strftime("%d/%m/%Y %H:%M"),
-            # "document_type": facture.type_facture.upper(),
-
-            "client_name": (
-                f"{client.prenom} {client.nom}"
-                if client else ""
-            ),
-            "client_phone": client.telephone if client else "",
-            "client_address": "",
-
-            "vendor": (
-                str(vente.vendor)
-                if vente and getattr(vente, "vendor", None)
-                else ""
-            ),
-            "cashier": "",
-
-            "sale_no": vente.numero_vente if vente else "",
-            "status": facture.status,
-
-            "lines": lines,
-
-            "total_ht": facture.montant_ht,
-            "taux_tva": facture.taux_tva,
-            "montant_tva": facture.montant_tva,
-            "total_ttc": facture.montant_total,
-
-            "amount_paid": facture.total_paye,
-            "deposit_amount": 0,
-            "remaining_amount": facture.reste_a_payer,
 
-            "thanks": "Merci pour votre confiance.",
-            "footer_note": "A la prochaine visite insha Allah.",
-        }
 
-        build_facture_a5_paysage_pdf(buffer, data)
+EXPORT_PERIOD_PARAMETERS = [
+    openapi.Parameter(
+        "start_date",
+        openapi.IN_QUERY,
+        description="Début (YYYY-MM-DD). Défaut : 1er janvier de l'année en cours.",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+    ),
+    openapi.Parameter(
+        "end_date",
+        openapi.IN_QUERY,
+        description="Fin incluse (YYYY-MM-DD). Défaut : aujourd'hui.",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+    ),
+    openapi.Parameter(
+        "bijouterie_id",
+        openapi.IN_QUERY,
+        description="Limiter à une bijouterie (dans le périmètre de l'utilisateur).",
+        type=openapi.TYPE_INTEGER,
+    ),
+]
+
+
+def _factures_export_queryset(request, queryset):
+    """
+    Périmètre commun des exports de factures :
+    scope bijouterie de l'utilisateur + période + bijouterie_id.
+
+    Filtre de période indexable (date_creation >= start, < end).
+    """
+    start, end = parse_export_period(request.query_params)
+
+    queryset = queryset.filter(
+        scope_bijouterie_q(request.user, field="bijouterie_id"),
+        date_creation__gte=start,
+        date_creation__lt=end,
+    )
 
-        buffer.seek(0)
+    bijouterie_id = (request.query_params.get("bijouterie_id") or "").strip()
 
-        filename = f"facture_{facture.numero_facture}.pdf"
+    if bijouterie_id:
+        if not bijouterie_id.isdigit():
+            raise ValueError("bijouterie_id doit être un entier.")
 
-        response = FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=filename,
-            content_type="application/pdf",
-        )
-        return response
+        queryset = queryset.filter(bijouterie_id=int(bijouterie_id))
 
+    return queryset.order_by("date_creation", "id")
 
 
 class ExportFacturesExcelView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @swagger_auto_schema(
+        operation_summary="Exporter le journal des ventes (Excel)",
+        manual_parameters=EXPORT_PERIOD_PARAMETERS,
+        tags=["Factures"],
+    )
     def get(self, request):
-        factures = Facture.objects.all().select_related(
-            "vente",
-            "vente__client",
-            "vente__vendor__user",
-            "bijouterie",
-        )
+        try:
+            factures = _factures_export_queryset(
+                request,
+                Facture.objects.select_related(
+                    "vente",
+                    "vente__client",
+                    "vente__vendor__user",
+                    "bijouterie",
+                ),
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
         return export_factures_excel(factures)
 
 
@@ -1972,17 +1970,23 @@ class ExportFacturesExcelView(APIView):
 class ExportComptableView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @swagger_auto_schema(
+        operation_summary="Exporter le journal comptable (Excel)",
+        manual_parameters=EXPORT_PERIOD_PARAMETERS,
+        tags=["Factures"],
+    )
     def get(self, request):
-        factures = Facture.objects.filter(status=Facture.STAT_PAYE).prefetch_related("paiements")
-        wb = export_comptable_factures(factures)
+        try:
+            factures = _factures_export_queryset(
+                request,
+                Facture.objects.filter(status=Facture.STAT_PAYE),
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="comptabilite.xlsx"'
+        wb = export_comptable_factures(factures)
 
-        wb.save(response)
-        return response
+        return xlsx_file_response(wb, "comptabilite.xlsx")
 
 
 
@@ -2130,6 +2134,57 @@ def _update_client_if_provided(data, vente):
     vente.save(update_fields=["client"])
     return None
 
+def _resolve_products_for_sale_items(items):
+    """
+    Variante par lot de _resolve_product_for_sale_item : les
+    produits désignés par produit_id ou QR sont chargés en une
+    requête ; sku / slug restent résolus un par un.
+
+    Retourne une liste alignée sur items (None si introuvable).
+    """
+
+    def _direct_id(item):
+        if item.get("produit_id"):
+            try:
+                return int(item["produit_id"])
+            except (TypeError, ValueError):
+                return None
+
+        qr = item.get("qr") or item.get("qr_code")
+
+        if qr:
+            raw_id = str(qr).strip().replace("P:", "", 1).strip()
+
+            if str(qr).strip().startswith("P:") and raw_id.isdigit():
+                return int(raw_id)
+
+        return None
+
+    ids = {pid for pid in map(_direct_id, items) if pid}
+
+    by_id = (
+        Produit.objects
+        .select_related("marque", "purete")
+        .in_bulk(ids)
+        if ids
+        else {}
+    )
+
+    produits = []
+
+    for item in items:
+        pid = _direct_id(item)
+
+        if pid:
+            produits.append(by_id.get(pid))
+        elif item.get("produit_id") or item.get("qr") or item.get("qr_code"):
+            produits.append(None)
+        else:
+            produits.append(_resolve_product_for_sale_item(item))
+
+    return produits
+
+
 def _resolve_product_for_sale_item(item):
     produit_id = item.get("produit_id")
     slug = item.get("slug")
@@ -2277,14 +2332,11 @@ Important :
             return client_error
 
         produits_data = data["produits"]
+        produits = _resolve_products_for_sale_items(produits_data)
 
-        # ✅ Remplacement des lignes sans toucher au stock
-        VenteProduit.objects.select_for_update().filter(vente=vente).delete()
-
-        for item in produits_data:
-            quantite = item["quantite"]
-            produit = _resolve_product_for_sale_item(item)
+        lignes = []
 
+        for item, produit in zip(produits_data, produits):
             if not produit:
                 return error_response(
                     "PRODUCT_NOT_FOUND",
@@ -2304,22 +2356,27 @@ Important :
                         status.HTTP_400_BAD_REQUEST,
                     )
 
-            VenteProduit.objects.create(
-                vente=vente,
-                produit=produit,
-                vendor=vendor,
-                quantite=quantite,
-                prix_vente_grammes=prix_vente_grammes,
-                remise=item.get("remise", Decimal("0.00")),
-                autres=item.get("autres", Decimal("0.00")),
-            )
+            lignes.append({
+                "produit_id": produit.id,
+                "quantite": item["quantite"],
+                "prix_vente_grammes": prix_vente_grammes,
+                "remise": item.get("remise", Decimal("0.00")),
+                "autres": item.get("autres", Decimal("0.00")),
+            })
 
         vente.vendor = vendor
         vente.bijouterie = vendor.bijouterie
         vente.save(update_fields=["vendor", "bijouterie"])
 
-        vente.mettre_a_jour_montant_total()
-        vente.refresh_from_db()
+        # ✅ Remplacement des lignes sans toucher au stock :
+        # insertion groupée, total de la vente écrit une seule fois.
+        write_vente_lines(
+            vente=vente,
+            vendor=vendor,
+            lignes=lignes,
+            produits={produit.id: produit for produit in produits},
+            replace=True,
+        )
 
         _recalculate_facture_from_vente(facture, vente, vendor)
 
@@ -2843,6 +2900,9 @@ Conditions :
                 status.HTTP_400_BAD_REQUEST,
             )
 
+        # Facture verrouillée (pas de save()) : documents à régénérer.
+        invalidate_facture_documents(facture)
+
         return Response(
             {
                 "status": "success",
@@ -0,0 +1,124 @@
+# search/documents.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+# ============================================================
+# Types de documents indexés
+# ============================================================
+#
+# Chaque type décrit :
+# - le modèle indexé ("app_label.Model") ;
+# - les champs lus par values() (chemins "lot__numero_lot" autorisés) ;
+# - les modèles liés dont la modification change le document, avec
+#   le chemin depuis le modèle indexé ("lot__achat" pour Achat).
+#
+# Uniquement des chemins values() : la reconstruction fonctionne aussi
+# avec les modèles historiques d'une migration.
+
+
+@dataclass(frozen=True)
+class SearchKind:
+    name: str
+    model: str
+    fields: tuple
+    sources: dict = field(default_factory=dict)
+
+    def path_for(self, label: str):
+        """
+        Chemin du modèle `label` depuis le modèle indexé : "pk" pour
+        le modèle lui-même, None s'il n'entre pas dans le document.
+        """
+
+        if label == self.model:
+            return "pk"
+
+        return self.sources.get(label)
+
+    def watched_fields(self, label: str) -> set:
+        """
+        Champs de `label` lus par le document (pour ignorer les
+        save(update_fields=...) qui n'y touchent pas).
+        """
+
+        path = self.path_for(label)
+
+        if path == "pk":
+            return {lookup.split("__")[0] for lookup in self.fields}
+
+        prefix = f"{path}__"
+
+        return {
+            lookup[len(prefix):].split("__")[0]
+            for lookup in self.fields
+            if lookup.startswith(prefix)
+        }
+
+
+SEARCH_KINDS = {
+    kind.name: kind
+    for kind in (
+        SearchKind(
+            name="produit",
+            model="store.Produit",
+            fields=("nom", "sku"),
+        ),
+        SearchKind(
+            name="produit_line",
+            model="purchase.ProduitLine",
+            fields=(
+                "produit__nom",
+                "produit__sku",
+                "lot__numero_lot",
+                "lot__description",
+                "lot__achat__numero_achat",
+                "lot__achat__description",
+                "lot__achat__fournisseur__nom",
+                "lot__achat__fournisseur__prenom",
+                "lot__achat__fournisseur__telephone",
+            ),
+            sources={
+                "store.Produit": "produit",
+                "purchase.Lot": "lot",
+                "purchase.Achat": "lot__achat",
+                "purchase.Fournisseur": "lot__achat__fournisseur",
+            },
+        ),
+        SearchKind(
+            name="fournisseur",
+            model="purchase.Fournisseur",
+            fields=("nom", "prenom", "telephone"),
+        ),
+        SearchKind(
+            name="client",
+            model="sale.Client",
+            fields=("prenom", "nom", "telephone"),
+        ),
+        SearchKind(
+            name="vente",
+            model="sale.Vente",
+            fields=("numero_vente",),
+        ),
+    )
+}
+
+
+def kind_for_model(model) -> SearchKind:
+    label = model._meta.label
+
+    for kind in SEARCH_KINDS.values():
+        if kind.model == label:
+            return kind
+
+    raise LookupError(f"Aucun index de recherche pour {label}.")
+
+
+def watched_models() -> set:
+    labels = set()
+
+    for kind in SEARCH_KINDS.values():
+        labels.add(kind.model)
+        labels.update(kind.sources)
+
+    return labels
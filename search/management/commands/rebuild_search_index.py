@@ -0,0 +1,43 @@
+# search/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from search.documents import SEARCH_KINDS
+from search.services import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit l'index de recherche (SearchDocument, SearchToken) "
+        "depuis les tables métier : après un import, un bulk_create "
+        "ou des update() qui ne passent pas par les signaux."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            help=(
+                "Limiter à un type de document (option répétable) : "
+                + ", ".join(SEARCH_KINDS)
+                + "."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        kinds = options.get("kinds")
+
+        unknown = set(kinds or []) - set(SEARCH_KINDS)
+
+        if unknown:
+            raise CommandError(
+                "Type(s) inconnu(s) : " + ", ".join(sorted(unknown))
+            )
+
+        counts = rebuild_search_index(kinds)
+
+        for kind, count in counts.items():
+            self.stdout.write(f"{kind} : {count} document(s) réécrit(s).")
+
+        self.stdout.write(self.style.SUCCESS("Index de recherche à jour."))
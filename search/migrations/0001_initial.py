@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    # Index initial depuis les tables métier (modèles historiques).
+    from search.services import rebuild_search_index
+
+    rebuild_search_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('purchase', '0003_initial'),
+        ('sale', '0009_facture_documents_version'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('text', models.TextField(blank=True, default='')),
+                ('compact', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uq_search_document_object')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('token', models.CharField(max_length=32)),
+            ],
+            options={
+                'verbose_name': 'Jeton de recherche',
+                'verbose_name_plural': 'Jetons de recherche',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='search_token_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'token', 'object_id'), name='uq_search_token')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# search/models.py
+
+from django.db import models
+
+# ============================================================
+# Index de recherche dénormalisé
+# ============================================================
+#
+# Un SearchDocument par objet indexé (produit, ProduitLine, client...),
+# avec son texte normalisé ; un SearchToken par jeton (préfixe de mot
+# ou trigramme, voir search.tokenizer). La recherche lit uniquement
+# l'index (kind, token) : ni jointures ni LIKE '%x%' sur les tables
+# métier. Tenu à jour par search.signals, reconstruit par la commande
+# rebuild_search_index.
+
+
+class SearchDocument(models.Model):
+    kind = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+
+    # Mots normalisés séparés par des espaces.
+    text = models.TextField(blank=True, default="")
+
+    # Valeurs compactées (sans séparateurs) jointes par "|" :
+    # vérification des recherches par fragment (téléphone, SKU).
+    compact = models.TextField(blank=True, default="")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"],
+                name="uq_search_document_object",
+            ),
+        ]
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id}"
+
+
+class SearchToken(models.Model):
+    kind = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = [
+            # Sert aussi d'index de recherche (kind, token) -> object_id.
+            models.UniqueConstraint(
+                fields=["kind", "token", "object_id"],
+                name="uq_search_token",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["kind", "object_id"],
+                name="search_token_object_idx",
+            ),
+        ]
+        verbose_name = "Jeton de recherche"
+        verbose_name_plural = "Jetons de recherche"
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id} {self.token}"
@@ -0,0 +1,78 @@
+# search/selectors.py
+
+from __future__ import annotations
+
+from django.db.models import Count
+
+from search.documents import SEARCH_KINDS, kind_for_model
+from search.models import SearchDocument, SearchToken
+from search.tokenizer import query_plan
+
+# ============================================================
+# Recherche
+# ============================================================
+#
+# Remplace les chaînes Q(a__icontains=q) | Q(b__icontains=q) | ...
+# des vues de liste :
+#
+#     queryset = search(queryset, q)                  # modèle indexé
+#     ventes = ventes.filter(client_id__in=search_ids("client", q))
+#
+# Tous les termes de la requête doivent correspondre : début d'un mot
+# (« bag » -> « Bague »), ou fragment d'une valeur contenant des
+# chiffres (« 4567 » -> « 77 123 45 67 »). Casse et accents ignorés.
+
+
+def search_ids(kind_name: str, query):
+    """
+    Sous-requête des object_id correspondant à `query`, ou None si la
+    requête ne contient aucun terme (pas de filtre à appliquer).
+    """
+
+    kind = SEARCH_KINDS[kind_name]
+    tokens, text_terms, compact_terms = query_plan(query)
+
+    if not tokens:
+        return None
+
+    matching = (
+        SearchToken.objects
+        .filter(kind=kind.name, token__in=tokens)
+        .order_by()
+        .values("object_id")
+        .annotate(matches=Count("token"))
+        .filter(matches=len(tokens))
+        .values("object_id")
+    )
+
+    if not text_terms and not compact_terms:
+        return matching
+
+    documents = SearchDocument.objects.filter(
+        kind=kind.name,
+        object_id__in=matching,
+    )
+
+    for term in text_terms:
+        documents = documents.filter(text__contains=term)
+
+    for term in compact_terms:
+        documents = documents.filter(compact__contains=term)
+
+    return documents.values("object_id")
+
+
+def search(queryset, query, *, kind: str | None = None):
+    """
+    `queryset` restreint aux objets correspondant à `query`.
+    """
+
+    if kind is None:
+        kind = kind_for_model(queryset.model).name
+
+    ids = search_ids(kind, query)
+
+    if ids is None:
+        return queryset
+
+    return queryset.filter(pk__in=ids)
@@ -0,0 +1,198 @@
+# search/services.py
+
+from __future__ import annotations
+
+from django.apps import apps as global_apps
+from django.db import transaction
+
+from search.documents import SEARCH_KINDS
+from search.tokenizer import document_text, document_tokens
+
+BATCH_SIZE = 1000
+
+# ============================================================
+# Indexation
+# ============================================================
+#
+# `apps` : registre des modèles (global par défaut, historique dans
+# une migration). Un document inchangé (même texte) n'est pas réécrit :
+# les save() répétés d'un même objet ne coûtent qu'une lecture.
+# La reconstruction complète réécrit tout (jetons perdus ou corrompus).
+
+
+def _models(kind, apps):
+    return (
+        apps.get_model(kind.model),
+        apps.get_model("search", "SearchDocument"),
+        apps.get_model("search", "SearchToken"),
+    )
+
+
+def _remove(kind, object_ids, Document, Token) -> int:
+    object_ids = list(object_ids)
+
+    if not object_ids:
+        return 0
+
+    Token.objects.filter(kind=kind.name, object_id__in=object_ids).delete()
+
+    deleted, _ = Document.objects.filter(
+        kind=kind.name,
+        object_id__in=object_ids,
+    ).delete()
+
+    return deleted
+
+
+def _index_rows(kind, rows, Document, Token, *, force=False) -> int:
+    existing = {} if force else {
+        object_id: (text, compact)
+        for object_id, text, compact in (
+            Document.objects
+            .filter(
+                kind=kind.name,
+                object_id__in=[row["pk"] for row in rows],
+            )
+            .values_list("object_id", "text", "compact")
+        )
+    }
+
+    changed = []
+
+    for row in rows:
+        values = [row[lookup] for lookup in kind.fields]
+        text, compact = document_text(values)
+
+        if existing.get(row["pk"]) != (text, compact):
+            changed.append((row["pk"], values, text, compact))
+
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        _remove(kind, [entry[0] for entry in changed], Document, Token)
+
+        Document.objects.bulk_create(
+            [
+                Document(
+                    kind=kind.name,
+                    object_id=object_id,
+                    text=text,
+                    compact=compact,
+                )
+                for object_id, _values, text, compact in changed
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        Token.objects.bulk_create(
+            [
+                Token(kind=kind.name, object_id=object_id, token=token)
+                for object_id, values, _text, _compact in changed
+                for token in sorted(document_tokens(values))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    return len(changed)
+
+
+def index_objects(kind_name: str, object_ids, *, apps=global_apps) -> int:
+    """
+    (Ré)indexe les objets donnés ; les objets disparus sont retirés
+    de l'index. Retourne le nombre de documents réécrits.
+    """
+
+    kind = SEARCH_KINDS[kind_name]
+    Model, Document, Token = _models(kind, apps)
+
+    object_ids = list(dict.fromkeys(object_ids))
+    count = 0
+
+    for start in range(0, len(object_ids), BATCH_SIZE):
+        chunk = object_ids[start:start + BATCH_SIZE]
+
+        rows = list(
+            Model._default_manager
+            .filter(pk__in=chunk)
+            .values("pk", *kind.fields)
+        )
+
+        count += _index_rows(kind, rows, Document, Token)
+
+        found = {row["pk"] for row in rows}
+        _remove(
+            kind,
+            [object_id for object_id in chunk if object_id not in found],
+            Document,
+            Token,
+        )
+
+    return count
+
+
+def reindex_related(kind_name: str, label: str, pk, *, apps=global_apps) -> int:
+    """
+    Réindexe les documents `kind_name` qui lisent l'objet `label`#pk
+    (lui-même, ou un modèle lié : Fournisseur -> ses ProduitLine).
+    """
+
+    kind = SEARCH_KINDS[kind_name]
+    path = kind.path_for(label)
+
+    if path == "pk":
+        return index_objects(kind_name, [pk], apps=apps)
+
+    return index_objects(
+        kind_name,
+        apps.get_model(kind.model)._default_manager
+        .filter(**{path: pk})
+        .values_list("pk", flat=True),
+        apps=apps,
+    )
+
+
+def rebuild_search_index(kind_names=None, *, apps=global_apps) -> dict:
+    """
+    Reconstruit l'index depuis les tables métier (données insérées
+    par bulk_create ou update(), hors signaux).
+
+    Retourne {kind: documents réécrits}.
+    """
+
+    counts = {}
+
+    for kind_name in kind_names or SEARCH_KINDS:
+        kind = SEARCH_KINDS[kind_name]
+        Model, Document, Token = _models(kind, apps)
+
+        stale = (
+            Document.objects
+            .filter(kind=kind.name)
+            .exclude(object_id__in=Model._default_manager.values("pk"))
+            .values_list("object_id", flat=True)
+        )
+        _remove(kind, list(stale), Document, Token)
+
+        queryset = (
+            Model._default_manager
+            .order_by("pk")
+            .values("pk", *kind.fields)
+        )
+
+        count = 0
+        last_pk = None
+
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:BATCH_SIZE])
+
+            if not rows:
+                break
+
+            count += _index_rows(kind, rows, Document, Token, force=True)
+            last_pk = rows[-1]["pk"]
+
+        counts[kind.name] = count
+
+    return counts
@@ -0,0 +1,67 @@
+# search/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from search.documents import SEARCH_KINDS, watched_models
+from search.services import index_objects, reindex_related
+
+# ============================================================
+# Synchronisation de l'index
+# ============================================================
+#
+# Réindexation après validation de la transaction (comme
+# purchase.signals) : un échec d'indexation est journalisé
+# (robust=True) sans annuler l'écriture métier.
+# bulk_create / update() ne déclenchent pas ces signaux :
+# python manage.py rebuild_search_index.
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+
+    label = sender._meta.label
+
+    for kind in SEARCH_KINDS.values():
+        if kind.path_for(label) is None:
+            continue
+
+        if (
+            update_fields is not None
+            and not set(update_fields) & kind.watched_fields(label)
+        ):
+            continue
+
+        transaction.on_commit(
+            partial(reindex_related, kind.name, label, instance.pk),
+            robust=True,
+        )
+
+
+def _on_delete(sender, instance, **kwargs):
+    label = sender._meta.label
+
+    # Modèles liés : PROTECT ou CASCADE, la suppression des objets
+    # indexés déclenche leur propre post_delete.
+    for kind in SEARCH_KINDS.values():
+        if kind.model == label:
+            transaction.on_commit(
+                partial(index_objects, kind.name, [instance.pk]),
+                robust=True,
+            )
+
+
+for _label in sorted(watched_models()):
+    post_save.connect(
+        _on_save,
+        sender=_label,
+        dispatch_uid=f"search_post_save_{_label}",
+    )
+    post_delete.connect(
+        _on_delete,
+        sender=_label,
+        dispatch_uid=f"search_post_delete_{_label}",
+    )
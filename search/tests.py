@@ -0,0 +1,216 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from purchase.models import Achat, Fournisseur, Lot, ProduitLine
+from sale.models import Client
+from search.models import SearchDocument, SearchToken
+from search.selectors import search, search_ids
+from search.tokenizer import document_tokens, query_plan
+from store.models import (Bijouterie, Categorie, Marque, Modele, Produit,
+                          Purete)
+
+
+class TokenizerTests(TestCase):
+    def test_prefixes_and_ngrams(self):
+        tokens = document_tokens(["Émeraude", "+221 77 123 45 67"])
+
+        self.assertIn("p:eme", tokens)
+        self.assertIn("p:emeraude", tokens)
+        self.assertIn("g:456", tokens)
+        self.assertNotIn("g:eme", tokens)
+
+    def test_query_plan(self):
+        tokens, text_terms, compact_terms = query_plan("Éme 4567")
+
+        self.assertEqual(
+            set(tokens),
+            {"p:eme", "g:456", "g:567"},
+        )
+        self.assertEqual(text_terms, [])
+        self.assertEqual(compact_terms, ["4567"])
+
+        self.assertFalse(query_plan("  - ")[0])
+
+
+class SearchIndexTests(TestCase):
+    """
+    L'index suit les écritures (signaux après commit) et remplace les
+    icontains des vues de liste.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+
+        categorie, _ = Categorie.objects.get_or_create(nom="Bagues")
+
+        cls.produit_kwargs = {
+            "categorie": categorie,
+            "modele": Modele.objects.get_or_create(
+                modele="Solitaire",
+                categorie=categorie,
+            )[0],
+            "purete": Purete.objects.get_or_create(purete="18")[0],
+            "marque": Marque.objects.get_or_create(marque="Local")[0],
+        }
+
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Centre")
+
+    def _create_line(self, *, nom, telephone, numero_lot):
+        with self.captureOnCommitCallbacks(execute=True):
+            fournisseur = Fournisseur.objects.create(
+                nom=nom,
+                prenom="Awa",
+                telephone=telephone,
+            )
+            produit = Produit.objects.create(
+                poids=Decimal("2.50"),
+                **self.produit_kwargs,
+            )
+            achat = Achat.objects.create(
+                fournisseur=fournisseur,
+                bijouterie=self.bijouterie,
+            )
+            line = ProduitLine.objects.create(
+                lot=Lot.objects.create(achat=achat, numero_lot=numero_lot),
+                produit=produit,
+                prix_achat_gramme=Decimal("1000.00"),
+                quantite=10,
+            )
+
+        return line
+
+    def _line_ids(self, query):
+        return set(
+            search(ProduitLine.objects.all(), query)
+            .values_list("id", flat=True)
+        )
+
+    def test_index_follows_writes(self):
+        line = self._create_line(
+            nom="Diop",
+            telephone="+221 77 123 45 67",
+            numero_lot="LOT-2024-0042",
+        )
+        other = self._create_line(
+            nom="Ndiaye",
+            telephone="+221 76 000 11 22",
+            numero_lot="LOT-2024-0043",
+        )
+
+        self.assertEqual(self._line_ids("diop"), {line.id})
+        self.assertEqual(self._line_ids("4567"), {line.id})
+        self.assertEqual(self._line_ids("0042"), {line.id})
+        self.assertEqual(self._line_ids("awa lot"), {line.id, other.id})
+        self.assertEqual(self._line_ids("diop 0043"), set())
+
+        # Modèle lié : le nouveau nom du fournisseur est répercuté
+        # sur ses lignes.
+        fournisseur = line.lot.achat.fournisseur
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fournisseur.nom = "Sarr"
+            fournisseur.save()
+
+        self.assertEqual(self._line_ids("diop"), set())
+        self.assertEqual(self._line_ids("sar"), {line.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client = Client.objects.create(
+                prenom="Fatou",
+                nom="Fall",
+                telephone="778889900",
+            )
+
+        self.assertEqual(
+            set(
+                search_ids("client", "fat 8899")
+                .values_list("object_id", flat=True)
+            ),
+            {client.id},
+        )
+        self.assertIsNone(search_ids("client", ""))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete()
+
+        self.assertFalse(
+            SearchDocument.objects.filter(
+                kind="client",
+                object_id=client.id,
+            ).exists()
+        )
+
+    def test_rebuild_command(self):
+        line = self._create_line(
+            nom="Diop",
+            telephone="771234567",
+            numero_lot="LOT-1",
+        )
+
+        # update() ne passe pas par les signaux.
+        Fournisseur.objects.update(nom="Kane")
+        self.assertEqual(self._line_ids("kan"), set())
+
+        SearchToken.objects.filter(kind="produit").delete()
+
+        out = StringIO()
+        call_command(
+            "rebuild_search_index",
+            "--kind",
+            "produit_line",
+            "--kind",
+            "fournisseur",
+            stdout=out,
+        )
+
+        self.assertIn("produit_line : 1 document(s)", out.getvalue())
+        self.assertEqual(self._line_ids("kan"), {line.id})
+        self.assertFalse(SearchToken.objects.filter(kind="produit").exists())
+
+        # Reconstruction complète : les jetons perdus sont réécrits
+        # même si le texte du document n'a pas changé.
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(
+            set(
+                search(Produit.objects.all(), "bagues")
+                .values_list("id", flat=True)
+            ),
+            {line.produit_id},
+        )
+
+    def test_produit_line_list_endpoint(self):
+        line = self._create_line(
+            nom="Diop",
+            telephone="771234567",
+            numero_lot="LOT-1",
+        )
+        self._create_line(
+            nom="Ndiaye",
+            telephone="760001122",
+            numero_lot="LOT-2",
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get(
+            "/api/inventory/produit-lines",
+            {"q": "diop"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["id"] for row in response.json()["results"]],
+            [line.id],
+        )
@@ -0,0 +1,145 @@
+# search/tokenizer.py
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# ============================================================
+# Normalisation et découpage en jetons
+# ============================================================
+#
+# Deux familles de jetons :
+#
+# - préfixes de mots ("p:ba", "p:bag", ... "p:bague") : recherche
+#   « commence par » sur les noms, prénoms, numéros de lot ;
+#
+# - trigrammes ("g:771", "g:712", ...) des valeurs contenant des
+#   chiffres, compactées sans séparateurs : recherche par fragment
+#   sur les SKU, téléphones et numéros (« 4567 » retrouve
+#   « +221 77 123 45 67 », « 180042 » retrouve « BG-18-0042 »).
+#
+# La requête est découpée de la même façon ; tous ses jetons doivent
+# être présents dans le document.
+
+PREFIX_MARK = "p:"
+NGRAM_MARK = "g:"
+
+# Préfixes indexés jusqu'à cette longueur ; au-delà, le terme est
+# vérifié sur le texte du document.
+MAX_PREFIX = 15
+NGRAM = 3
+
+# Valeurs plus longues (descriptions) : trigrammes par mot seulement.
+MAX_COMPACT_VALUE = 40
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(value) -> str:
+    """
+    Minuscules sans accents : « Émeraude » -> « emeraude ».
+    """
+
+    if value is None:
+        return ""
+
+    decomposed = unicodedata.normalize("NFKD", str(value))
+
+    return "".join(
+        char
+        for char in decomposed
+        if not unicodedata.combining(char)
+    ).casefold()
+
+
+def words(value) -> list[str]:
+    return _WORD_RE.findall(normalize(value))
+
+
+def _has_digit(value: str) -> bool:
+    return any(char.isdigit() for char in value)
+
+
+def _ngrams(value: str) -> set[str]:
+    return {
+        NGRAM_MARK + value[index:index + NGRAM]
+        for index in range(len(value) - NGRAM + 1)
+    }
+
+
+def _prefixes(word: str) -> set[str]:
+    return {
+        PREFIX_MARK + word[:length]
+        for length in range(1, min(len(word), MAX_PREFIX) + 1)
+    }
+
+
+def document_text(values) -> tuple[str, str]:
+    """
+    (text, compact) d'un document : mots normalisés, puis valeurs
+    compactées jointes par "|".
+    """
+
+    text = []
+    compact = []
+
+    for value in values:
+        value_words = words(value)
+
+        text.extend(value_words)
+
+        if value_words:
+            compact.append("".join(value_words))
+
+    return " ".join(text), "|".join(compact)
+
+
+def document_tokens(values) -> set[str]:
+    tokens = set()
+
+    for value in values:
+        value_words = words(value)
+        packed = "".join(value_words)
+
+        for word in value_words:
+            tokens |= _prefixes(word)
+
+        if len(packed) <= MAX_COMPACT_VALUE:
+            if _has_digit(packed):
+                tokens |= _ngrams(packed)
+        else:
+            for word in value_words:
+                if _has_digit(word):
+                    tokens |= _ngrams(word)
+
+    return tokens
+
+
+def query_plan(query) -> tuple[set[str], list[str], list[str]]:
+    """
+    Découpage d'une requête :
+
+    - jetons à trouver tous dans l'index ;
+    - termes à vérifier dans SearchDocument.text (mots plus longs
+      que MAX_PREFIX) ;
+    - termes à vérifier dans SearchDocument.compact (fragments
+      contenant des chiffres).
+    """
+
+    tokens = set()
+    text_terms = []
+    compact_terms = []
+
+    for term in words(query):
+        if _has_digit(term) and len(term) >= NGRAM:
+            tokens |= _ngrams(term)
+            compact_terms.append(term)
+            continue
+
+        tokens.add(PREFIX_MARK + term[:MAX_PREFIX])
+
+        if len(term) > MAX_PREFIX:
+            text_terms.append(term)
+
+    return tokens, text_terms, compact_terms
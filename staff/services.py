@@ -7,7 +7,7 @@ from django.contrib.auth import get_user_model
 from django.db import IntegrityError, transaction
 
 from backend.roles import (ROLE_ADMIN, ROLE_BUYER, ROLE_CASHIER, ROLE_MANAGER,
-                           ROLE_VENDOR, get_role_name)
+                           ROLE_VENDOR, clear_staff_context, get_role_name)
 from staff.models import Buyer, Cashier, Manager
 from userauths.models import Role
 from vendor.models import Vendor
@@ -253,6 +253,9 @@ def create_staff_member(
     user.user_role = role_obj
     user.save(update_fields=["user_role"])
 
+    # Le rôle mémorisé sur l'instance n'est plus valable.
+    clear_staff_context(user)
+
     return StaffCreationResult(
         staff_type=target_role,
         staff=staff,
@@ -485,6 +488,9 @@ def update_staff_member(
                 ]
             )
 
+    if user is not None:
+        clear_staff_context(user)
+
     return StaffUpdateResult(
         staff_type=target_role,
         staff=staff,
@@ -545,5 +551,7 @@ def promote_user_to_admin(
         update_fields=["user_role"]
     )
 
+    clear_staff_context(user)
+
     return user
 
@@ -1,3 +1,204 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.permissions import IsAdminManagerVendorCashier
+from backend.query_scopes import scope_bijouterie_q
+from backend.roles import ROLE_MANAGER, ROLE_VENDOR, get_role_name
+from backend.utils.helpers import (resolve_bijouterie_for_user,
+                                   user_can_access_bijouterie)
+from sale.models import Facture, Paiement, PaiementLigne, Vente
+from staff.models import Manager
+from store.models import Bijouterie
+from vendor.models import Vendor
+
+
+class ManagerDashboardQueryCountTests(TestCase):
+    """
+    Le dashboard manager doit exécuter un nombre fixe de requêtes,
+    quel que soit le nombre de bijouteries ou de factures ouvertes.
+    """
+
+    EXPECTED_QUERIES = 14
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="manager@example.com",
+            password="secret",
+        )
+
+        cls.manager = Manager.objects.create(user=cls.user)
+
+        cls.counter = 0
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _add_shop_with_sales(self):
+        # DailyActivity est recalculée après commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_shop_with_sales()
+
+    def _create_shop_with_sales(self):
+        type(self).counter += 1
+        n = self.counter
+
+        bijouterie = Bijouterie.objects.create(nom=f"Bijouterie {n}")
+        self.manager.bijouteries.add(bijouterie)
+
+        vendor = Vendor.objects.create(
+            user=get_user_model().objects.create_user(
+                email=f"vendor{n}@example.com",
+                password="secret",
+            ),
+            bijouterie=bijouterie,
+        )
+
+        for montant, paye in (
+            (Decimal("1000.00"), Decimal("400.00")),
+            (Decimal("500.00"), None),
+        ):
+            vente = Vente.objects.create(
+                bijouterie=bijouterie,
+                vendor=vendor,
+                montant_total=montant,
+            )
+
+            facture = Facture.objects.create(
+                vente=vente,
+                bijouterie=bijouterie,
+                montant_ht=montant,
+                type_facture=Facture.TYPE_FACTURE,
+                status=(
+                    Facture.STAT_PARTIEL
+                    if paye
+                    else Facture.STAT_NON_PAYE
+                ),
+            )
+
+            if paye:
+                PaiementLigne.objects.create(
+                    paiement=Paiement.objects.create(facture=facture),
+                    montant_paye=paye,
+                )
+
+    def _get_dashboard(self):
+        # Utilisateur rechargé : pas de rôle déjà en cache sur l'instance.
+        self.client.force_authenticate(
+            get_user_model().objects.get(pk=self.user.pk)
+        )
+
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get("/api/manager/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+
+        return response.data
+
+    def test_constant_query_count(self):
+        self._add_shop_with_sales()
+
+        data = self._get_dashboard()
+
+        self.assertEqual(data["ventes"]["aujourd_hui"], 2)
+        self.assertEqual(data["factures"]["partielles"], 1)
+        self.assertEqual(data["factures"]["non_payees"], 1)
+        self.assertEqual(
+            data["factures"]["reste_a_encaisser"],
+            Decimal("1100.00"),
+        )
+
+        for _ in range(3):
+            self._add_shop_with_sales()
+
+        data = self._get_dashboard()
+
+        self.assertEqual(len(data["par_bijouterie"]), 4)
+        self.assertEqual(data["resume"]["ventes_annee"], 8)
+        self.assertEqual(
+            data["resume"]["chiffre_affaires_annee"],
+            Decimal("6000.00"),
+        )
+        self.assertEqual(
+            data["factures"]["reste_a_encaisser"],
+            Decimal("4400.00"),
+        )
+
+
+class StaffContextQueryCountTests(TestCase):
+    """
+    Rôle, profil et scope sont résolus en une seule requête
+    puis réutilisés pendant toute la requête HTTP.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Scope")
+
+        cls.vendor_user = get_user_model().objects.create_user(
+            email="vendor.scope@example.com",
+            password="secret",
+        )
+        Vendor.objects.create(
+            user=cls.vendor_user,
+            bijouterie=cls.bijouterie,
+            verifie=True,
+        )
+
+        cls.manager_user = get_user_model().objects.create_user(
+            email="manager.scope@example.com",
+            password="secret",
+        )
+        Manager.objects.create(
+            user=cls.manager_user,
+            verifie=True,
+        ).bijouteries.add(cls.bijouterie)
+
+    def _fresh(self, user):
+        # Instance neuve, comme request.user à chaque requête.
+        return get_user_model().objects.get(pk=user.pk)
+
+    def test_vendor_resolution_en_une_requete(self):
+        user = self._fresh(self.vendor_user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_role_name(user), ROLE_VENDOR)
+            self.assertTrue(
+                IsAdminManagerVendorCashier().has_permission(
+                    SimpleNamespace(user=user),
+                    None,
+                )
+            )
+            scope_bijouterie_q(user, field="bijouterie_id")
+            self.assertEqual(
+                resolve_bijouterie_for_user(user),
+                self.bijouterie,
+            )
+            self.assertTrue(
+                user_can_access_bijouterie(user, self.bijouterie.id)
+            )
+            self.assertEqual(get_role_name(user), ROLE_VENDOR)
+
+    def test_manager_resolution_en_une_requete(self):
+        user = self._fresh(self.manager_user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_role_name(user), ROLE_MANAGER)
+            scope_q = scope_bijouterie_q(user, field="id")
+            self.assertEqual(get_role_name(user), ROLE_MANAGER)
+
+        self.assertEqual(
+            list(Bijouterie.objects.filter(scope_q)),
+            [self.bijouterie],
+        )
 
-# Create your tests here.
+        # Les bijouteries du manager sont chargées une seule fois.
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertTrue(
+                    user_can_access_bijouterie(user, self.bijouterie.id)
+                )
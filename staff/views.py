@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from django.db.models import (Count, DecimalField, ExpressionWrapper, F, Min,
                               Q, Sum, Value)
-from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 # staff/views.py
 # staff/views.py
@@ -17,11 +17,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import date_range_filter
 from backend.permissions import IsAdmin, IsAdminOrManager
 from backend.roles import (ROLE_ADMIN, ROLE_BUYER, ROLE_CASHIER, ROLE_MANAGER,
                            ROLE_VENDOR, get_role_name)
 from purchase.models import Achat, Lot
-from sale.models import Facture, Vente, VenteProduit
+from reporting.selectors import (activity, monthly_totals, period_totals,
+                                 total, yearly_totals)
+from sale.models import Facture, VenteProduit
 from staff.models import Buyer, Cashier, Manager
 from staff.serializers import (CreateStaffSerializer,
                                StaffDashboardResponseSerializer,
@@ -37,7 +40,7 @@ SINGLE_BIJOUTERIE_ROLES = {
     ROLE_BUYER,
 }
 
-from sale.models import Facture, Paiement, PaiementLigne, Vente
+from sale.models import Facture, Paiement
 
 ZERO = Decimal("0.00")
 
@@ -2210,14 +2213,13 @@ class ManagerDashboardView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        # Déjà préchargées par _get_manager.
         bijouteries = manager.bijouteries.all()
 
-        bijouterie_ids = list(
-            bijouteries.values_list(
-                "id",
-                flat=True,
-            )
-        )
+        bijouterie_ids = [
+            bijouterie.id
+            for bijouterie in bijouteries
+        ]
 
         if not bijouterie_ids:
             return Response(
@@ -2257,14 +2259,6 @@ class ManagerDashboardView(APIView):
         # Querysets de base
         # ========================================================
 
-        ventes = (
-            Vente.objects
-            .filter(
-                bijouterie_id__in=bijouterie_ids,
-                is_cancelled=False,
-            )
-        )
-
         ventes_produits = (
             VenteProduit.objects
             .filter(
@@ -2305,14 +2299,6 @@ class ManagerDashboardView(APIView):
             )
         )
 
-        achats = (
-            Achat.objects
-            .filter(
-                bijouterie_id__in=bijouterie_ids,
-                status=Achat.STATUS_CONFIRMED,
-            )
-        )
-
         lots = (
             Lot.objects
             .filter(
@@ -2322,30 +2308,10 @@ class ManagerDashboardView(APIView):
         )
 
         # ========================================================
-        # Ventes périodes
-        # ========================================================
-
-        ventes_today = ventes.filter(
-            created_at__date=today,
-        )
-
-        ventes_week = ventes.filter(
-            created_at__date__gte=start_week,
-            created_at__date__lte=today,
-        )
-
-        ventes_month = ventes.filter(
-            created_at__date__gte=start_month,
-            created_at__date__lte=today,
-        )
-
-        ventes_year = ventes.filter(
-            created_at__date__gte=start_year,
-            created_at__date__lte=today,
-        )
-
-        # ========================================================
-        # CA
+        # Ventes périodes + par bijouterie
+        #
+        # Une seule requête groupée par bijouterie, avec des
+        # agrégats conditionnels pour chaque période.
         # ========================================================
 
         money_output = DecimalField(
@@ -2353,98 +2319,102 @@ class ManagerDashboardView(APIView):
             decimal_places=2,
         )
 
-        ca_week = self._decimal(
-            ventes_week.aggregate(
-                total=Coalesce(
-                    Sum("montant_total"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                )
-            )["total"]
+        weight_output = DecimalField(
+            max_digits=20,
+            decimal_places=3,
         )
 
-        ca_month = self._decimal(
-            ventes_month.aggregate(
-                total=Coalesce(
-                    Sum("montant_total"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                )
-            )["total"]
+        zero_money = Value(
+            Decimal("0.00"),
+            output_field=money_output,
         )
 
-        ca_year = self._decimal(
-            ventes_year.aggregate(
-                total=Coalesce(
-                    Sum("montant_total"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                )
-            )["total"]
+        # Agrégat journalier (reporting.DailyActivity) : lignes sans
+        # mode de paiement = ventes non annulées par jour et vendeur.
+        activite = activity(
+            bijouterie_ids=bijouterie_ids,
+        ).filter(
+            mode_paiement__isnull=True,
         )
 
-        # ========================================================
-        # Stock magasin
-        # ========================================================
+        periods = {
+            "today": (today, today),
+            "week": (start_week, today),
+            "month": (start_month, today),
+            "year": (start_year, today),
+        }
 
-        stock_magasin = self._int(
-            stocks.aggregate(
-                total=Coalesce(
-                    Sum("en_stock"),
-                    Value(0),
-                )
-            )["total"]
+        ventes_rows = (
+            activite
+            .filter(
+                jour__gte=min(start_week, start_year),
+                jour__lte=today,
+            )
+            .order_by()
+            .values(
+                "bijouterie_id",
+            )
+            .annotate(
+                **{
+                    f"ca_{period}": total(
+                        "montant_ventes",
+                        jour__gte=start,
+                        jour__lte=end,
+                    )
+                    for period, (start, end) in periods.items()
+                },
+                **{
+                    f"nb_{period}": total(
+                        "nb_ventes",
+                        jour__gte=start,
+                        jour__lte=end,
+                    )
+                    for period, (start, end) in periods.items()
+                },
+            )
         )
 
-        # ========================================================
-        # Stock vendeurs
-        # ========================================================
-
-        vendor_stock_data = vendor_stocks.aggregate(
-            allouee=Coalesce(
-                Sum("quantite_allouee"),
-                Value(0),
-            ),
-            vendue=Coalesce(
-                Sum("quantite_vendue"),
-                Value(0),
-            ),
-        )
+        ventes_par_bijouterie = {
+            row["bijouterie_id"]: row
+            for row in ventes_rows
+        }
 
-        stock_vendeurs = (
-            self._int(
-                vendor_stock_data["allouee"]
-            )
-            - self._int(
-                vendor_stock_data["vendue"]
+        def _total_ventes(key):
+            return sum(
+                (
+                    row[key]
+                    for row in ventes_par_bijouterie.values()
+                ),
+                Decimal("0.00") if key.startswith("ca_") else 0,
             )
-        )
 
-        quantite_totale = (
-            stock_magasin
-            + stock_vendeurs
-        )
+        ca_week = self._decimal(_total_ventes("ca_week"))
+        ca_month = self._decimal(_total_ventes("ca_month"))
+        ca_year = self._decimal(_total_ventes("ca_year"))
+
+        ventes_today_count = self._int(_total_ventes("nb_today"))
+        ventes_week_count = self._int(_total_ventes("nb_week"))
+        ventes_month_count = self._int(_total_ventes("nb_month"))
+        ventes_year_count = self._int(_total_ventes("nb_year"))
 
         # ========================================================
-        # Poids magasin
+        # Stock magasin
         #
         # Stock -> ProduitLine -> Produit -> poids
         # ========================================================
 
-        weight_output = DecimalField(
-            max_digits=20,
-            decimal_places=3,
-        )
-
-        poids_magasin = self._decimal(
-            stocks.aggregate(
-                total=Coalesce(
+        stock_rows = (
+            stocks
+            .order_by()
+            .values(
+                "bijouterie_id",
+            )
+            .annotate(
+                quantite=Coalesce(
+                    Sum("en_stock"),
+                    Value(0),
+                ),
+                poids=Coalesce(
                     Sum(
                         ExpressionWrapper(
                             F("en_stock")
@@ -2458,17 +2428,48 @@ class ManagerDashboardView(APIView):
                         Decimal("0.000"),
                         output_field=weight_output,
                     ),
-                )
-            )["total"]
+                ),
+            )
+        )
+
+        stock_par_bijouterie = {
+            row["bijouterie_id"]: row
+            for row in stock_rows
+        }
+
+        stock_magasin = sum(
+            self._int(row["quantite"])
+            for row in stock_par_bijouterie.values()
+        )
+
+        poids_magasin = sum(
+            (
+                self._decimal(row["poids"])
+                for row in stock_par_bijouterie.values()
+            ),
+            Decimal("0.000"),
         )
 
         # ========================================================
-        # Poids vendeurs
+        # Stock vendeurs
         # ========================================================
 
-        poids_vendeurs = self._decimal(
-            vendor_stocks.aggregate(
-                total=Coalesce(
+        vendor_stock_rows = (
+            vendor_stocks
+            .order_by()
+            .values(
+                "bijouterie_id",
+            )
+            .annotate(
+                allouee=Coalesce(
+                    Sum("quantite_allouee"),
+                    Value(0),
+                ),
+                vendue=Coalesce(
+                    Sum("quantite_vendue"),
+                    Value(0),
+                ),
+                poids=Coalesce(
                     Sum(
                         ExpressionWrapper(
                             (
@@ -2485,8 +2486,33 @@ class ManagerDashboardView(APIView):
                         Decimal("0.000"),
                         output_field=weight_output,
                     ),
-                )
-            )["total"]
+                ),
+            )
+        )
+
+        vendor_stock_par_bijouterie = {
+            row["bijouterie_id"]: (
+                self._int(row["allouee"])
+                - self._int(row["vendue"])
+            )
+            for row in vendor_stock_rows
+        }
+
+        stock_vendeurs = sum(
+            vendor_stock_par_bijouterie.values()
+        )
+
+        poids_vendeurs = sum(
+            (
+                self._decimal(row["poids"])
+                for row in vendor_stock_rows
+            ),
+            Decimal("0.000"),
+        )
+
+        quantite_totale = (
+            stock_magasin
+            + stock_vendeurs
         )
 
         poids_total = (
@@ -2559,16 +2585,18 @@ class ManagerDashboardView(APIView):
         # Vendeurs
         # ========================================================
 
-        nombre_vendeurs = vendors.count()
-
-        vendeurs_actifs = (
-            vendors
-            .filter(
-                verifie=True,
-            )
-            .count()
+        vendor_counts = vendors.aggregate(
+            total=Count("id"),
+            actifs=Count(
+                "id",
+                filter=Q(verifie=True),
+            ),
         )
 
+        nombre_vendeurs = vendor_counts["total"]
+
+        vendeurs_actifs = vendor_counts["actifs"]
+
         # ========================================================
         # Performance vendeurs
         #
@@ -2576,11 +2604,11 @@ class ManagerDashboardView(APIView):
         # ========================================================
 
         vendor_stats = (
-            ventes
+            activite
             .filter(
                 vendor__isnull=False,
-                created_at__date__gte=start_month,
-                created_at__date__lte=today,
+                jour__gte=start_month,
+                jour__lte=today,
             )
             .values(
                 "vendor_id",
@@ -2590,49 +2618,18 @@ class ManagerDashboardView(APIView):
                 "vendor__bijouterie__nom",
             )
             .annotate(
-                chiffre_affaires=Coalesce(
-                    Sum("montant_total"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                ),
-
-                nombre_ventes=Count(
-                    "id",
-                    distinct=True,
-                ),
-            )
-            .order_by(
-                "-chiffre_affaires",
+                chiffre_affaires=total("montant_ventes"),
+                nombre_ventes=total("nb_ventes"),
+                quantite_vendue=total("quantite_vendue"),
             )
-        )
-
-        vendor_quantities_qs = (
-            ventes_produits
             .filter(
-                vendor__isnull=False,
-                vente__created_at__date__gte=start_month,
-                vente__created_at__date__lte=today,
-            )
-            .values(
-                "vendor_id",
+                nombre_ventes__gt=0,
             )
-            .annotate(
-                quantite=Coalesce(
-                    Sum("quantite"),
-                    Value(0),
-                )
+            .order_by(
+                "-chiffre_affaires",
             )
         )
 
-        quantites_vendor = {
-            row["vendor_id"]: self._int(
-                row["quantite"]
-            )
-            for row in vendor_quantities_qs
-        }
-
         performance_vendeurs = []
 
         for item in vendor_stats:
@@ -2693,11 +2690,8 @@ class ManagerDashboardView(APIView):
                         ]
                     ),
 
-                    "quantite_vendue": (
-                        quantites_vendor.get(
-                            item["vendor_id"],
-                            0,
-                        )
+                    "quantite_vendue": self._int(
+                        item["quantite_vendue"]
                     ),
                 }
             )
@@ -2711,8 +2705,11 @@ class ManagerDashboardView(APIView):
         top_produits_qs = (
             ventes_produits
             .filter(
-                vente__created_at__date__gte=start_month,
-                vente__created_at__date__lte=today,
+                **date_range_filter(
+                    "vente__created_at",
+                    start_month,
+                    today,
+                )
             )
             .values(
                 "produit_id",
@@ -2777,24 +2774,22 @@ class ManagerDashboardView(APIView):
         # Achats du mois
         # ========================================================
 
-        achats_month = (
-            achats
+        achats_month_data = (
+            activite
             .filter(
-                created_at__date__gte=start_month,
-                created_at__date__lte=today,
+                jour__gte=start_month,
+                jour__lte=today,
+            )
+            .aggregate(
+                nombre=total("nb_achats"),
+                total=total("montant_achats_ttc"),
             )
         )
 
+        achats_mois = achats_month_data["nombre"]
+
         montant_achats_mois = self._decimal(
-            achats_month.aggregate(
-                total=Coalesce(
-                    Sum("montant_total_ttc"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                )
-            )["total"]
+            achats_month_data["total"]
         )
 
         # ========================================================
@@ -2862,42 +2857,43 @@ class ManagerDashboardView(APIView):
 
         # ========================================================
         # Factures
+        #
+        # reste_a_payer est une colonne maintenue par les paiements.
         # ========================================================
 
-        factures_non_payees = (
+        factures_data = (
             factures
-            .filter(
-                status=Facture.STAT_NON_PAYE,
+            .aggregate(
+                non_payees=Count(
+                    "id",
+                    filter=Q(status=Facture.STAT_NON_PAYE),
+                ),
+                partielles=Count(
+                    "id",
+                    filter=Q(status=Facture.STAT_PARTIEL),
+                ),
+                payees=Count(
+                    "id",
+                    filter=Q(status=Facture.STAT_PAYE),
+                ),
+                reste=Coalesce(
+                    Sum(
+                        "reste_a_payer",
+                        filter=~Q(status=Facture.STAT_PAYE),
+                    ),
+                    zero_money,
+                ),
             )
-            .count()
         )
 
-        factures_partielles = (
-            factures
-            .filter(
-                status=Facture.STAT_PARTIEL,
-            )
-            .count()
-        )
+        factures_non_payees = factures_data["non_payees"]
 
-        factures_payees = (
-            factures
-            .filter(
-                status=Facture.STAT_PAYE,
-            )
-            .count()
-        )
+        factures_partielles = factures_data["partielles"]
 
-        # reste_a_payer est une @property Python.
-        # Donc pas de Sum("reste_a_payer").
-        reste_a_encaisser = sum(
-            (
-                facture.reste_a_payer
-                for facture in factures.exclude(
-                    status=Facture.STAT_PAYE,
-                )
-            ),
-            Decimal("0.00"),
+        factures_payees = factures_data["payees"]
+
+        reste_a_encaisser = self._decimal(
+            factures_data["reste"]
         )
 
         # ========================================================
@@ -2908,82 +2904,21 @@ class ManagerDashboardView(APIView):
 
         for bijouterie in bijouteries:
 
-            # ----------------------------------------------------
-            # Ventes année
-            # ----------------------------------------------------
-
-            ventes_bijouterie = (
-                ventes_year
-                .filter(
-                    bijouterie_id=bijouterie.id,
-                )
+            ventes_bijouterie = ventes_par_bijouterie.get(
+                bijouterie.id,
+                {},
             )
 
-            ca_bijouterie = self._decimal(
-                ventes_bijouterie.aggregate(
-                    total=Coalesce(
-                        Sum("montant_total"),
-                        Value(
-                            Decimal("0.00"),
-                            output_field=money_output,
-                        ),
-                    )
-                )["total"]
-            )
-
-            # ----------------------------------------------------
-            # Stock magasin
-            # ----------------------------------------------------
-
             stock_bijouterie = self._int(
-                stocks
-                .filter(
-                    bijouterie_id=bijouterie.id,
-                )
-                .aggregate(
-                    total=Coalesce(
-                        Sum("en_stock"),
-                        Value(0),
-                    )
-                )["total"]
-            )
-
-            # ----------------------------------------------------
-            # Stock vendeurs
-            # ----------------------------------------------------
-
-            vendor_stock_bijouterie = (
-                vendor_stocks
-                .filter(
-                    bijouterie_id=bijouterie.id,
-                )
-                .aggregate(
-                    allouee=Coalesce(
-                        Sum(
-                            "quantite_allouee"
-                        ),
-                        Value(0),
-                    ),
-
-                    vendue=Coalesce(
-                        Sum(
-                            "quantite_vendue"
-                        ),
-                        Value(0),
-                    ),
-                )
+                stock_par_bijouterie
+                .get(bijouterie.id, {})
+                .get("quantite")
             )
 
             stock_vendor_bijouterie = (
-                self._int(
-                    vendor_stock_bijouterie[
-                        "allouee"
-                    ]
-                )
-                - self._int(
-                    vendor_stock_bijouterie[
-                        "vendue"
-                    ]
+                vendor_stock_par_bijouterie.get(
+                    bijouterie.id,
+                    0,
                 )
             )
 
@@ -2998,11 +2933,15 @@ class ManagerDashboardView(APIView):
                     ),
 
                     "chiffre_affaires": (
-                        ca_bijouterie
+                        self._decimal(
+                            ventes_bijouterie.get("ca_year")
+                        )
                     ),
 
                     "ventes": (
-                        ventes_bijouterie.count()
+                        self._int(
+                            ventes_bijouterie.get("nb_year")
+                        )
                     ),
 
                     "stock_magasin": (
@@ -3024,37 +2963,12 @@ class ManagerDashboardView(APIView):
         # Historique
         # ========================================================
 
-        historique_qs = (
-            ventes
-            .annotate(
-                year=ExtractYear(
-                    "created_at"
-                ),
-                month=ExtractMonth(
-                    "created_at"
-                ),
-            )
-            .values(
-                "year",
-                "month",
-            )
-            .annotate(
-                chiffre_affaires=Coalesce(
-                    Sum("montant_total"),
-                    Value(
-                        Decimal("0.00"),
-                        output_field=money_output,
-                    ),
-                ),
-                nombre_ventes=Count(
-                    "id",
-                    distinct=True,
-                ),
-            )
-            .order_by(
-                "year",
-                "month",
-            )
+        historique_qs = monthly_totals(
+            activite,
+            {
+                "chiffre_affaires": "montant_ventes",
+                "nombre_ventes": "nb_ventes",
+            },
         )
 
         month_names = {
@@ -3076,14 +2990,15 @@ class ManagerDashboardView(APIView):
 
         for row in historique_qs:
 
-            if row["year"] is None or row["month"] is None:
+            # Mois sans vente (achats, dépenses seuls)
+            if not row["nombre_ventes"]:
                 continue
 
             year = int(
-                row["year"]
+                row["annee"]
             )
 
-            month_number = int(row["month"])
+            month_number = int(row["mois"])
 
             if year not in historique_map:
 
@@ -3190,15 +3105,15 @@ class ManagerDashboardView(APIView):
                     ),
 
                     "ventes_semaine": (
-                        ventes_week.count()
+                        ventes_week_count
                     ),
 
                     "ventes_mois": (
-                        ventes_month.count()
+                        ventes_month_count
                     ),
 
                     "ventes_annee": (
-                        ventes_year.count()
+                        ventes_year_count
                     ),
 
                     "nombre_bijouteries": (
@@ -3210,19 +3125,19 @@ class ManagerDashboardView(APIView):
 
                 "ventes": {
                     "aujourd_hui": (
-                        ventes_today.count()
+                        ventes_today_count
                     ),
 
                     "semaine": (
-                        ventes_week.count()
+                        ventes_week_count
                     ),
 
                     "mois": (
-                        ventes_month.count()
+                        ventes_month_count
                     ),
 
                     "annee": (
-                        ventes_year.count()
+                        ventes_year_count
                     ),
                 },
 
@@ -3276,7 +3191,7 @@ class ManagerDashboardView(APIView):
 
                 "achats": {
                     "achats_mois": (
-                        achats_month.count()
+                        achats_mois
                     ),
 
                     "montant_achats_mois": (
@@ -3374,28 +3289,6 @@ class CashierDashboardView(APIView):
         value = value or ZERO
         return f"{Decimal(value):.2f}"
 
-    @staticmethod
-    def _payment_sum(queryset):
-        """
-        Somme des PaiementLigne.montant_paye.
-        """
-
-        return (
-            queryset.aggregate(
-                total=Coalesce(
-                    Sum("montant_paye"),
-                    Value(
-                        ZERO,
-                        output_field=DecimalField(
-                            max_digits=18,
-                            decimal_places=2,
-                        ),
-                    ),
-                )
-            )["total"]
-            or ZERO
-        )
-
     # ============================================================
     # Swagger
     # ============================================================
@@ -3852,14 +3745,6 @@ class CashierDashboardView(APIView):
         # 4. Querysets de base
         # ========================================================
 
-        ventes = (
-            Vente.objects
-            .filter(
-                bijouterie_id=bijouterie.id,
-                is_cancelled=False,
-            )
-        )
-
         factures = (
             Facture.objects
             .filter(
@@ -3874,13 +3759,6 @@ class CashierDashboardView(APIView):
             )
         )
 
-        paiement_lignes = (
-            PaiementLigne.objects
-            .filter(
-                paiement__facture__bijouterie_id=bijouterie.id,
-            )
-        )
-
         # ========================================================
         # 5. CA encaissé
         # ========================================================
@@ -3897,50 +3775,35 @@ class CashierDashboardView(APIView):
         # et non 500 000.
         # ========================================================
 
-        ca_aujourdhui = self._payment_sum(
-            paiement_lignes.filter(
-                paiement__date_paiement__date=today,
-            )
-        )
-
-        ca_semaine = self._payment_sum(
-            paiement_lignes.filter(
-                paiement__date_paiement__date__range=(
-                    start_week,
-                    end_week,
-                ),
-            )
+        # Agrégat journalier (reporting.DailyActivity) : une requête
+        # pour toutes les périodes.
+        activite = activity(
+            bijouterie_ids=[bijouterie.id],
         )
 
-        ca_mois = self._payment_sum(
-            paiement_lignes.filter(
-                paiement__date_paiement__year=current_year,
-                paiement__date_paiement__month=current_month,
-            )
+        periodes = period_totals(
+            activite,
+            {
+                "jour": (today, today),
+                "semaine": (start_week, end_week),
+                "mois": (today.replace(day=1), today),
+                "annee": (today.replace(month=1, day=1), today),
+            },
+            ["montant_encaisse", "nb_paiements", "nb_ventes"],
         )
 
-        ca_annee = self._payment_sum(
-            paiement_lignes.filter(
-                paiement__date_paiement__year=current_year,
-            )
-        )
+        ca_aujourdhui = periodes["jour"]["montant_encaisse"]
+        ca_semaine = periodes["semaine"]["montant_encaisse"]
+        ca_mois = periodes["mois"]["montant_encaisse"]
+        ca_annee = periodes["annee"]["montant_encaisse"]
 
         # ========================================================
         # 6. Paiements
         # ========================================================
 
-        paiements_jour = paiements.filter(
-            date_paiement__date=today,
-        )
-
-        paiements_mois = paiements.filter(
-            date_paiement__year=current_year,
-            date_paiement__month=current_month,
-        )
-
-        nombre_paiements_jour = paiements_jour.count()
+        nombre_paiements_jour = periodes["jour"]["nb_paiements"]
 
-        nombre_paiements_mois = paiements_mois.count()
+        nombre_paiements_mois = periodes["mois"]["nb_paiements"]
 
         # Les montants sont pris dans PaiementLigne
         montant_paiements_jour = ca_aujourdhui
@@ -3951,23 +3814,17 @@ class CashierDashboardView(APIView):
         # ========================================================
 
         modes_raw = (
-            paiement_lignes
+            activite
+            .filter(
+                mode_paiement__isnull=False,
+            )
             .values(
                 "mode_paiement__code",
                 "mode_paiement__nom",
             )
             .annotate(
-                montant=Coalesce(
-                    Sum("montant_paye"),
-                    Value(
-                        ZERO,
-                        output_field=DecimalField(
-                            max_digits=18,
-                            decimal_places=2,
-                        ),
-                    ),
-                ),
-                nombre=Count("id"),
+                montant=total("montant_encaisse"),
+                nombre=total("nb_lignes_paiement"),
             )
             .order_by(
                 "mode_paiement__ordre_affichage",
@@ -4107,49 +3964,19 @@ class CashierDashboardView(APIView):
         ).count()
 
         # --------------------------------------------------------
-        # Calcul SQL :
-        #
-        # reste =
-        # montant_total - somme des paiements
+        # reste_a_payer est une colonne maintenue par les paiements.
         #
-        # On calcule uniquement les factures non totalement payées.
+        # On somme uniquement les factures non totalement payées.
         # --------------------------------------------------------
 
-        factures_a_encaisser = (
+        montant_restant_a_encaisser = (
             factures
             .exclude(
                 status=Facture.STAT_PAYE,
             )
-            .annotate(
-                total_paye_db=Coalesce(
-                    Sum(
-                        "paiements__lignes__montant_paye"
-                    ),
-                    Value(
-                        ZERO,
-                        output_field=DecimalField(
-                            max_digits=18,
-                            decimal_places=2,
-                        ),
-                    ),
-                )
-            )
-            .annotate(
-                reste_db=ExpressionWrapper(
-                    F("montant_total")
-                    - F("total_paye_db"),
-                    output_field=DecimalField(
-                        max_digits=18,
-                        decimal_places=2,
-                    ),
-                )
-            )
-        )
-
-        montant_restant_a_encaisser = (
-            factures_a_encaisser.aggregate(
+            .aggregate(
                 total=Coalesce(
-                    Sum("reste_db"),
+                    Sum("reste_a_payer"),
                     Value(
                         ZERO,
                         output_field=DecimalField(
@@ -4172,25 +3999,13 @@ class CashierDashboardView(APIView):
         # 9. Nombre de ventes
         # ========================================================
 
-        ventes_jour = ventes.filter(
-            created_at__date=today,
-        ).count()
+        ventes_jour = periodes["jour"]["nb_ventes"]
 
-        ventes_semaine = ventes.filter(
-            created_at__date__range=(
-                start_week,
-                end_week,
-            ),
-        ).count()
+        ventes_semaine = periodes["semaine"]["nb_ventes"]
 
-        ventes_mois = ventes.filter(
-            created_at__year=current_year,
-            created_at__month=current_month,
-        ).count()
+        ventes_mois = periodes["mois"]["nb_ventes"]
 
-        ventes_annee = ventes.filter(
-            created_at__year=current_year,
-        ).count()
+        ventes_annee = periodes["annee"]["nb_ventes"]
 
         # ========================================================
         # 10. Derniers paiements
@@ -4326,57 +4141,16 @@ class CashierDashboardView(APIView):
 
         HISTORIQUE_START_YEAR = 2026
 
-        ventes_par_annee = {
-            row["created_at__year"]: row["total"]
-            for row in (
-                ventes
-                .values(
-                    "created_at__year"
-                )
-                .annotate(
-                    total=Count("id")
-                )
-            )
-            if row["created_at__year"]
-        }
-
-        encaissements_par_annee = {
-            row["paiement__date_paiement__year"]:
-                row["montant"]
-            for row in (
-                paiement_lignes
-                .values(
-                    "paiement__date_paiement__year"
-                )
-                .annotate(
-                    montant=Coalesce(
-                        Sum("montant_paye"),
-                        Value(
-                            ZERO,
-                            output_field=DecimalField(
-                                max_digits=18,
-                                decimal_places=2,
-                            ),
-                        ),
-                    )
-                )
-            )
-            if row["paiement__date_paiement__year"]
-        }
-
-        paiements_par_annee = {
-            row["date_paiement__year"]: row["total"]
-            for row in (
-                paiements
-                .values(
-                    "date_paiement__year"
-                )
-                .annotate(
-                    total=Count("id")
-                )
-            )
-            if row["date_paiement__year"]
-        }
+        par_annee = yearly_totals(
+            activite.filter(
+                jour__gte=today.replace(
+                    year=HISTORIQUE_START_YEAR,
+                    month=1,
+                    day=1,
+                ),
+            ),
+            ["nb_ventes", "nb_paiements", "montant_encaisse"],
+        )
 
         historique = {}
 
@@ -4386,21 +4160,21 @@ class CashierDashboardView(APIView):
         ):
             historique[str(year)] = {
                 "ventes": (
-                    ventes_par_annee.get(
-                        year,
+                    par_annee.get(year, {}).get(
+                        "nb_ventes",
                         0,
                     )
                 ),
                 "nombre_paiements": (
-                    paiements_par_annee.get(
-                        year,
+                    par_annee.get(year, {}).get(
+                        "nb_paiements",
                         0,
                     )
                 ),
                 "encaissements": (
                     self._money_string(
-                        encaissements_par_annee.get(
-                            year,
+                        par_annee.get(year, {}).get(
+                            "montant_encaisse",
                             ZERO,
                         )
                     )
@@ -0,0 +1,79 @@
+# stock_matiere_premiere/management/commands/reconcile_matiere_premiere.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock_matiere_premiere.services import (align_matiere_stocks,
+                                             rebuild_matiere_daily,
+                                             verify_matiere_daily,
+                                             verify_matiere_stocks)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit l'agrégat journalier MatierePremiereMovementDaily "
+        "depuis le journal MatierePremiereMovement, puis vérifie "
+        "MatierePremiereStock.poids_total contre ce journal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bijouterie",
+            type=int,
+            action="append",
+            dest="bijouterie_ids",
+            help="Limiter à une bijouterie (option répétable).",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Vérifier sans reconstruire l'agrégat journalier.",
+        )
+        parser.add_argument(
+            "--fix-stock",
+            action="store_true",
+            help="Aligner poids_total sur le journal en cas d'écart.",
+        )
+
+    def handle(self, *args, **options):
+        bijouterie_ids = options.get("bijouterie_ids")
+
+        if not options["verify_only"]:
+            count = rebuild_matiere_daily(bijouterie_ids)
+            self.stdout.write(f"{count} ligne(s) journalière(s) reconstruite(s).")
+
+        errors = 0
+
+        daily_differences = verify_matiere_daily(bijouterie_ids)
+
+        for diff in daily_differences[:50]:
+            self.stderr.write(f"Agrégat {diff['cle']} : {diff['ecarts']}")
+
+        errors += len(daily_differences)
+
+        stock_differences = verify_matiere_stocks(bijouterie_ids)
+
+        if stock_differences and options["fix_stock"]:
+            aligned = align_matiere_stocks(stock_differences)
+            self.stdout.write(f"{aligned} stock(s) aligné(s) sur le journal.")
+
+            stock_differences = verify_matiere_stocks(bijouterie_ids)
+
+        for diff in stock_differences[:50]:
+            self.stderr.write(
+                f"Stock#{diff['id']} bijouterie#{diff['bijouterie_id']} "
+                f"{diff['matiere']} purete#{diff['purete_id']} : "
+                f"poids_total={diff['poids_total']} "
+                f"journal={diff['poids_journal']}"
+            )
+
+        errors += len(stock_differences)
+
+        if errors:
+            raise CommandError(
+                f"{errors} écart(s) entre les stocks matière première "
+                "et le journal."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            "Stocks matière première cohérents avec le journal."
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def backfill_movement_daily(apps, schema_editor):
+    """
+    Agrégat initial depuis le journal (même calcul que
+    stock_matiere_premiere.services.rebuild_matiere_daily).
+    """
+    Movement = apps.get_model("stock_matiere_premiere", "MatierePremiereMovement")
+    Daily = apps.get_model("stock_matiere_premiere", "MatierePremiereMovementDaily")
+
+    rows = (
+        Movement.objects
+        .annotate(jour=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .order_by()
+        .values("bijouterie_id", "matiere", "purete_id", "source", "jour")
+        .annotate(
+            nb=Count("id"),
+            poids=Coalesce(Sum("poids"), Decimal("0.000")),
+            montant=Coalesce(Sum("montant_total"), Decimal("0.00")),
+        )
+    )
+
+    Daily.objects.bulk_create(
+        [
+            Daily(
+                bijouterie_id=row["bijouterie_id"],
+                matiere=row["matiere"],
+                purete_id=row["purete_id"],
+                source=row["source"],
+                jour=row["jour"],
+                nb_mouvements=row["nb"],
+                poids_total=row["poids"],
+                montant_total=row["montant"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_matiere_premiere', '0003_initial'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matierepremieremovement',
+            name='source',
+            field=models.CharField(choices=[('rachat_client', 'Rachat client'), ('achat_fournisseur', 'Achat fournisseur'), ('rachat_client_cancel', 'Annulation rachat client'), ('achat_fournisseur_cancel', 'Annulation achat fournisseur'), ('remise_vente', 'Remise vente'), ('raffinage_out', 'Raffinage sortie'), ('raffinage_in', 'Raffinage entrée'), ('vente_poids', 'Vente par poids'), ('commande_client', 'Commande client'), ('vente_raffine', 'Vente raffinée'), ('commande_atelier_out', 'Sortie atelier (commande)'), ('commande_atelier_in', 'Retour atelier (commande)')], default='rachat_client', max_length=50),
+        ),
+        migrations.CreateModel(
+            name='MatierePremiereMovementDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matiere', models.CharField(choices=[('or', 'Or'), ('argent', 'Argent'), ('mixte', 'Mixte')], max_length=30)),
+                ('source', models.CharField(choices=[('rachat_client', 'Rachat client'), ('achat_fournisseur', 'Achat fournisseur'), ('rachat_client_cancel', 'Annulation rachat client'), ('achat_fournisseur_cancel', 'Annulation achat fournisseur'), ('remise_vente', 'Remise vente'), ('raffinage_out', 'Raffinage sortie'), ('raffinage_in', 'Raffinage entrée'), ('vente_poids', 'Vente par poids'), ('commande_client', 'Commande client'), ('vente_raffine', 'Vente raffinée'), ('commande_atelier_out', 'Sortie atelier (commande)'), ('commande_atelier_in', 'Retour atelier (commande)')], max_length=50)),
+                ('jour', models.DateField()),
+                ('nb_mouvements', models.PositiveIntegerField(default=0)),
+                ('poids_total', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('montant_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('bijouterie', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mouvements_matiere_journaliers', to='store.bijouterie')),
+                ('purete', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mouvements_matiere_journaliers', to='store.purete')),
+            ],
+            options={
+                'ordering': ['-jour', 'bijouterie_id', 'matiere', 'purete_id', 'source'],
+                'indexes': [models.Index(fields=['jour'], name='mvt_matiere_jour_idx'), models.Index(fields=['bijouterie', 'jour'], name='mvt_matiere_shop_jour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bijouterie', 'matiere', 'purete', 'source', 'jour'), name='uq_mvt_matiere_jour')],
+            },
+        ),
+        migrations.RunPython(
+            backfill_movement_daily,
+            migrations.RunPython.noop,
+        ),
+    ]
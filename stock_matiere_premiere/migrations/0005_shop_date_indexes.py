@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0004_shop_date_indexes'),
+        ('sale', '0010_paiement_date_index'),
+        ('stock_matiere_premiere', '0004_movement_daily'),
+        ('store', '0003_alter_gallery_active_alter_gallery_produit_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achatmatierepremiere',
+            index=models.Index(fields=['bijouterie', 'created_at'], name='achat_mp_shop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rachatclient',
+            index=models.Index(fields=['bijouterie', 'created_at'], name='rachat_shop_created_idx'),
+        ),
+    ]
@@ -73,6 +73,10 @@ class RachatClient(models.Model):
             models.Index(fields=["payment_status"]),
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["bijouterie", "created_at"],
+                name="rachat_shop_created_idx",
+            ),
         ]
 
     def __str__(self):
@@ -258,6 +262,10 @@ class AchatMatierePremiere(models.Model):
             models.Index(fields=["payment_status"]),
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["bijouterie", "created_at"],
+                name="achat_mp_shop_created_idx",
+            ),
         ]
 
     def __str__(self):
@@ -326,6 +334,8 @@ class MatierePremiereMovement(models.Model):
     SOURCE_VENTE_POIDS = "vente_poids"
     SOURCE_COMMANDE_CLIENT = "commande_client"
     SOURCE_VENTE_RAFFINE = "vente_raffine"
+    SOURCE_COMMANDE_ATELIER_OUT = "commande_atelier_out"
+    SOURCE_COMMANDE_ATELIER_IN = "commande_atelier_in"
 
 
     SOURCE_CHOICES = [
@@ -339,8 +349,22 @@ class MatierePremiereMovement(models.Model):
         (SOURCE_VENTE_POIDS, "Vente par poids"),
         (SOURCE_COMMANDE_CLIENT, "Commande client"),
         (SOURCE_VENTE_RAFFINE, "Vente raffinée"),
+        (SOURCE_COMMANDE_ATELIER_OUT, "Sortie atelier (commande)"),
+        (SOURCE_COMMANDE_ATELIER_IN, "Retour atelier (commande)"),
     ]
 
+    # Sources qui diminuent MatierePremiereStock.poids_total
+    # (poids est toujours positif : le sens vient de la source).
+    SOURCES_SORTIE = frozenset({
+        SOURCE_RACHAT_CLIENT_CANCEL,
+        SOURCE_ACHAT_FOURNISSEUR_CANCEL,
+        SOURCE_RAFFINAGE_OUT,
+        SOURCE_VENTE_POIDS,
+        SOURCE_COMMANDE_CLIENT,
+        SOURCE_VENTE_RAFFINE,
+        SOURCE_COMMANDE_ATELIER_OUT,
+    })
+
     stock = models.ForeignKey(
         MatierePremiereStock,
         on_delete=models.PROTECT,
@@ -426,6 +450,83 @@ class MatierePremiereMovement(models.Model):
             f"{self.poids} g"
         )
 
+class MatierePremiereMovementDaily(models.Model):
+    """
+    Agrégat journalier du journal MatierePremiereMovement.
+
+    Une ligne par (bijouterie, matière, pureté, source, jour local),
+    maintenue dans la transaction du mouvement par
+    stock_matiere_premiere.services.post_matiere_movement.
+
+    Les vues mensuelles / annuelles (dashboard, export Excel) somment
+    ces lignes au lieu de parcourir le journal. Le journal reste la
+    source de vérité : la commande `reconcile_matiere_premiere`
+    reconstruit et vérifie cet agrégat.
+    """
+
+    bijouterie = models.ForeignKey(
+        "store.Bijouterie",
+        on_delete=models.PROTECT,
+        related_name="mouvements_matiere_journaliers",
+    )
+
+    matiere = models.CharField(
+        max_length=30,
+        choices=MATIERE,
+    )
+
+    purete = models.ForeignKey(
+        "store.Purete",
+        on_delete=models.PROTECT,
+        related_name="mouvements_matiere_journaliers",
+    )
+
+    source = models.CharField(
+        max_length=50,
+        choices=MatierePremiereMovement.SOURCE_CHOICES,
+    )
+
+    jour = models.DateField()
+
+    nb_mouvements = models.PositiveIntegerField(default=0)
+
+    poids_total = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal("0.000"),
+    )
+
+    montant_total = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    class Meta:
+        ordering = ["-jour", "bijouterie_id", "matiere", "purete_id", "source"]
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bijouterie", "matiere", "purete", "source", "jour"],
+                name="uq_mvt_matiere_jour",
+            ),
+        ]
+
+        indexes = [
+            models.Index(fields=["jour"], name="mvt_matiere_jour_idx"),
+            models.Index(
+                fields=["bijouterie", "jour"],
+                name="mvt_matiere_shop_jour_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.jour} - {self.get_source_display()} - "
+            f"{self.get_matiere_display()} : {self.poids_total} g"
+        )
+
+
 ###################################################################
 ########################  Raffinage   #############################
 ###################################################################
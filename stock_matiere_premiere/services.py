@@ -0,0 +1,316 @@
+# stock_matiere_premiere/services.py
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from stock_matiere_premiere.models import (MatierePremiereMovement,
+                                           MatierePremiereMovementDaily,
+                                           MatierePremiereStock)
+
+ZERO_POIDS = Decimal("0.000")
+ZERO_MONTANT = Decimal("0.00")
+
+
+# ============================================================
+# Écriture d'un mouvement
+# ============================================================
+
+def signed_poids(source: str, poids) -> Decimal:
+    """
+    Effet d'un mouvement sur MatierePremiereStock.poids_total.
+    """
+    poids = Decimal(str(poids or ZERO_POIDS))
+
+    if source in MatierePremiereMovement.SOURCES_SORTIE:
+        return -poids
+
+    return poids
+
+
+@transaction.atomic
+def post_matiere_movement(
+    *,
+    stock: MatierePremiereStock,
+    source: str,
+    poids,
+    montant_total=None,
+    cout_unitaire=None,
+    rachat=None,
+    achat=None,
+) -> MatierePremiereMovement:
+    """
+    Point d'entrée unique des mouvements matière première :
+    - met à jour stock.poids_total (UPDATE ... SET poids_total = poids_total ± poids) ;
+    - écrit le mouvement ;
+    - cumule l'agrégat journalier MatierePremiereMovementDaily.
+
+    Le stock doit être verrouillé par l'appelant (select_for_update),
+    qui contrôle aussi la disponibilité avant une sortie.
+    """
+
+    delta = signed_poids(source, poids)
+
+    MatierePremiereStock.objects.filter(pk=stock.pk).update(
+        poids_total=F("poids_total") + delta,
+        updated_at=timezone.now(),
+    )
+    stock.refresh_from_db(fields=["poids_total", "updated_at"])
+
+    movement = MatierePremiereMovement.objects.create(
+        stock=stock,
+        bijouterie_id=stock.bijouterie_id,
+        matiere=stock.matiere,
+        purete_id=stock.purete_id,
+        poids=poids,
+        source=source,
+        montant_total=montant_total,
+        cout_unitaire=cout_unitaire,
+        rachat=rachat,
+        achat=achat,
+    )
+
+    _add_to_daily(movement)
+
+    return movement
+
+
+def _add_to_daily(movement: MatierePremiereMovement) -> None:
+    key = {
+        "bijouterie_id": movement.bijouterie_id,
+        "matiere": movement.matiere,
+        "purete_id": movement.purete_id,
+        "source": movement.source,
+        "jour": timezone.localdate(movement.created_at),
+    }
+
+    # Ligne créée au premier mouvement du jour (get_or_create rattrape
+    # la course avec un autre worker via la contrainte d'unicité).
+    MatierePremiereMovementDaily.objects.get_or_create(**key)
+
+    MatierePremiereMovementDaily.objects.filter(**key).update(
+        nb_mouvements=F("nb_mouvements") + 1,
+        poids_total=F("poids_total") + movement.poids,
+        montant_total=F("montant_total") + (movement.montant_total or ZERO_MONTANT),
+    )
+
+
+# ============================================================
+# Reconstruction / vérification
+# ============================================================
+
+def _scoped(queryset, bijouterie_ids):
+    if bijouterie_ids is not None:
+        queryset = queryset.filter(bijouterie_id__in=list(bijouterie_ids))
+
+    return queryset
+
+
+def compute_daily_from_ledger(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> dict:
+    """
+    Agrégat journalier recalculé depuis le journal, en une requête.
+
+    Retourne :
+        {(bijouterie_id, matiere, purete_id, source, jour): {
+            "nb_mouvements": ..., "poids_total": ..., "montant_total": ...
+        }}
+    """
+
+    rows = (
+        _scoped(MatierePremiereMovement.objects.all(), bijouterie_ids)
+        .annotate(
+            jour=TruncDate(
+                "created_at",
+                tzinfo=timezone.get_current_timezone(),
+            )
+        )
+        .order_by()
+        .values("bijouterie_id", "matiere", "purete_id", "source", "jour")
+        .annotate(
+            nb=Count("id"),
+            poids=Coalesce(Sum("poids"), ZERO_POIDS),
+            montant=Coalesce(Sum("montant_total"), ZERO_MONTANT),
+        )
+    )
+
+    return {
+        (
+            row["bijouterie_id"],
+            row["matiere"],
+            row["purete_id"],
+            row["source"],
+            row["jour"],
+        ): {
+            "nb_mouvements": row["nb"],
+            "poids_total": row["poids"],
+            "montant_total": row["montant"],
+        }
+        for row in rows
+    }
+
+
+@transaction.atomic
+def rebuild_matiere_daily(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Reconstruit MatierePremiereMovementDaily depuis le journal.
+
+    Retourne le nombre de lignes écrites.
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    expected = compute_daily_from_ledger(bijouterie_ids)
+
+    _scoped(MatierePremiereMovementDaily.objects.all(), bijouterie_ids).delete()
+
+    MatierePremiereMovementDaily.objects.bulk_create(
+        [
+            MatierePremiereMovementDaily(
+                bijouterie_id=bijouterie_id,
+                matiere=matiere,
+                purete_id=purete_id,
+                source=source,
+                jour=jour,
+                **values,
+            )
+            for (
+                bijouterie_id,
+                matiere,
+                purete_id,
+                source,
+                jour,
+            ), values in expected.items()
+        ],
+        batch_size=1000,
+    )
+
+    return len(expected)
+
+
+def verify_matiere_daily(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> list[dict]:
+    """
+    Compare l'agrégat journalier avec le journal.
+
+    Retourne la liste des écarts (vide si tout est cohérent).
+    """
+
+    if bijouterie_ids is not None:
+        bijouterie_ids = list(bijouterie_ids)
+
+    expected = compute_daily_from_ledger(bijouterie_ids)
+
+    fields = ("nb_mouvements", "poids_total", "montant_total")
+
+    stored = {
+        (
+            row["bijouterie_id"],
+            row["matiere"],
+            row["purete_id"],
+            row["source"],
+            row["jour"],
+        ): row
+        for row in _scoped(
+            MatierePremiereMovementDaily.objects.all(),
+            bijouterie_ids,
+        ).values(
+            "bijouterie_id", "matiere", "purete_id", "source", "jour", *fields,
+        )
+    }
+
+    differences = []
+
+    for key in sorted(set(expected) | set(stored), key=str):
+        attendu = expected.get(key, {})
+        actuel = stored.get(key, {})
+
+        ecarts = {
+            field: (actuel.get(field, 0), attendu.get(field, 0))
+            for field in fields
+            if actuel.get(field, 0) != attendu.get(field, 0)
+        }
+
+        if ecarts:
+            differences.append({"cle": key, "ecarts": ecarts})
+
+    return differences
+
+
+def verify_matiere_stocks(
+    bijouterie_ids: Optional[Iterable[int]] = None,
+) -> list[dict]:
+    """
+    Compare MatierePremiereStock.poids_total au solde du journal
+    (entrées - sorties des mouvements de chaque stock).
+
+    Retourne la liste des écarts (vide si tout est cohérent).
+    """
+
+    ledger = {}
+
+    rows = (
+        _scoped(MatierePremiereMovement.objects.all(), bijouterie_ids)
+        .order_by()
+        .values("stock_id", "source")
+        .annotate(poids=Coalesce(Sum("poids"), ZERO_POIDS))
+    )
+
+    for row in rows:
+        ledger[row["stock_id"]] = (
+            ledger.get(row["stock_id"], ZERO_POIDS)
+            + signed_poids(row["source"], row["poids"])
+        )
+
+    differences = []
+
+    stocks = _scoped(MatierePremiereStock.objects.all(), bijouterie_ids)
+
+    for stock in stocks.values(
+        "id", "bijouterie_id", "matiere", "purete_id", "poids_total",
+    ).order_by("id"):
+        attendu = ledger.get(stock["id"], ZERO_POIDS)
+
+        if stock["poids_total"] != attendu:
+            differences.append({
+                **stock,
+                "poids_journal": attendu,
+            })
+
+    return differences
+
+
+@transaction.atomic
+def align_matiere_stocks(differences: list[dict]) -> int:
+    """
+    Aligne poids_total sur le journal pour les écarts donnés.
+
+    Un solde de journal négatif (sorties sans entrées enregistrées)
+    n'est pas appliqué : il est laissé à la correction manuelle.
+    Retourne le nombre de stocks alignés.
+    """
+
+    aligned = 0
+
+    for diff in differences:
+        if diff["poids_journal"] < 0:
+            continue
+
+        MatierePremiereStock.objects.filter(pk=diff["id"]).update(
+            poids_total=diff["poids_journal"],
+            updated_at=timezone.now(),
+        )
+        aligned += 1
+
+    return aligned
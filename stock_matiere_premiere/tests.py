@@ -1,3 +1,124 @@
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from stock_matiere_premiere.models import (MatierePremiereMovement,
+                                           MatierePremiereMovementDaily,
+                                           MatierePremiereStock)
+from stock_matiere_premiere.services import (post_matiere_movement,
+                                             verify_matiere_daily,
+                                             verify_matiere_stocks)
+from store.models import Bijouterie, Purete
+
+
+class MatierePremiereLedgerTests(TestCase):
+    """
+    Mouvements écrits par post_matiere_movement : stock, journal et
+    agrégat journalier restent cohérents.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bijouterie = Bijouterie.objects.create(nom="Bijouterie Matière")
+        cls.purete, _ = Purete.objects.get_or_create(purete="18")
+
+    def setUp(self):
+        self.stock = MatierePremiereStock.objects.create(
+            bijouterie=self.bijouterie,
+            matiere="or",
+            purete=self.purete,
+        )
+
+        post_matiere_movement(
+            stock=self.stock,
+            poids=Decimal("10.000"),
+            source=MatierePremiereMovement.SOURCE_RACHAT_CLIENT,
+        )
+        post_matiere_movement(
+            stock=self.stock,
+            poids=Decimal("4.500"),
+            source=MatierePremiereMovement.SOURCE_ACHAT_FOURNISSEUR,
+        )
+        post_matiere_movement(
+            stock=self.stock,
+            poids=Decimal("3.000"),
+            source=MatierePremiereMovement.SOURCE_VENTE_POIDS,
+            montant_total=Decimal("150000.00"),
+        )
+
+    def test_stock_et_agregat_tenus_par_le_service(self):
+        self.assertEqual(self.stock.poids_total, Decimal("11.500"))
+
+        vente = MatierePremiereMovementDaily.objects.get(
+            source=MatierePremiereMovement.SOURCE_VENTE_POIDS,
+        )
+        self.assertEqual(vente.nb_mouvements, 1)
+        self.assertEqual(vente.poids_total, Decimal("3.000"))
+        self.assertEqual(vente.montant_total, Decimal("150000.00"))
+
+        self.assertEqual(verify_matiere_daily(), [])
+        self.assertEqual(verify_matiere_stocks(), [])
+
+    def test_reconciliation(self):
+        MatierePremiereMovementDaily.objects.all().delete()
+        MatierePremiereStock.objects.filter(pk=self.stock.pk).update(
+            poids_total=Decimal("12.000"),
+        )
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "reconcile_matiere_premiere",
+                "--verify-only",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        # Agrégat reconstruit, stock encore en écart.
+        with self.assertRaises(CommandError):
+            call_command(
+                "reconcile_matiere_premiere",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        self.assertEqual(verify_matiere_daily(), [])
+        self.assertEqual(MatierePremiereMovementDaily.objects.count(), 3)
+
+        call_command(
+            "reconcile_matiere_premiere",
+            "--fix-stock",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.poids_total, Decimal("11.500"))
+
+    def test_export_lit_l_agregat(self):
+        admin = get_user_model().objects.create_user(
+            email="admin.matiere@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        # Le journal n'est plus lu : seul l'agrégat compte.
+        MatierePremiereMovement.objects.update(poids=Decimal("99.000"))
+
+        response = client.get("/api/export/dashboard-matiere-premiere/")
+
+        self.assertEqual(response.status_code, 200)
+
+        ws = load_workbook(
+            BytesIO(b"".join(response.streaming_content))
+        ).active
+        rows = [row[:2] for row in ws.iter_rows(values_only=True)]
 
-# Create your tests here.
+        self.assertIn(("vente_poids", 3), rows)
+        self.assertIn(("rachat_client", 10), rows)
@@ -3,20 +3,24 @@ from decimal import Decimal
 from io import BytesIO
 
 from django.db import transaction
-from django.db.models import Count, F, Q, Sum
+from django.db.models import Count, F, Q, Sum, prefetch_related_objects
 from django.db.models.functions import Coalesce, ExtractMonth
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from openpyxl import Workbook
 from openpyxl.styles import Font
 from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.document_cache import document_fingerprint, document_response
+from backend.mixins import (EXPORT_CHUNK_SIZE, date_range_filter, styled_row,
+                            write_only_sheet, write_only_workbook,
+                            xlsx_file_response)
+from backend.pagination import CURSOR_SWAGGER_PARAMETERS, KeysetPagination
 from backend.permissions import IsAdminManagerBuyer, IsSameBijouterieOrAdmin
 from backend.roles import (ROLE_ADMIN, ROLE_CASHIER, ROLE_MANAGER, ROLE_VENDOR,
                            get_role_name)
@@ -30,12 +34,13 @@ from stock_matiere_premiere.serializers import (
 from store.models import Bijouterie, Purete
 
 from .models import (AchatMatierePremiere, AchatMatierePremiereItem,
-                     MatierePremiereMovement, MatierePremiereStock,
-                     RachatClient, RachatClientItem, Raffinage, StockRaffine,
-                     VenteMatierePremiere)
+                     MatierePremiereMovement, MatierePremiereMovementDaily,
+                     MatierePremiereStock, RachatClient, RachatClientItem,
+                     Raffinage, StockRaffine, VenteMatierePremiere)
 from .pdf.attestation_rachat_client_pdf import \
     build_attestation_rachat_client_pdf
 from .pdf.ticket_rachat_client_58mm import build_rachat_client_ticket_58mm
+from .services import post_matiere_movement
 from .serializers import (AchatMatierePremiereCreateSerializer,
                           AchatMatierePremiereDetailSerializer,
                           AchatMatierePremiereItemOutputSerializer,
@@ -187,6 +192,13 @@ class RachatClientListView(APIView):
                 type=openapi.TYPE_STRING,
                 format=openapi.FORMAT_DATE,
             ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description="Mode curseur uniquement.",
+            ),
+            *CURSOR_SWAGGER_PARAMETERS,
         ],
         responses={200: RachatClientDetailSerializer(many=True)},
         tags=["Rachat Client"],
@@ -265,14 +277,32 @@ class RachatClientListView(APIView):
                 client__telephone__icontains=telephone
             )
 
-        if date_debut:
+        try:
             queryset = queryset.filter(
-                created_at__date__gte=date_debut
+                **date_range_filter("created_at", date_debut, date_fin)
+            )
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if date_fin:
-            queryset = queryset.filter(
-                created_at__date__lte=date_fin
+        # Mode curseur (opt-in) ; sans ?cursor= : liste complète
+        keyset = KeysetPagination(
+            ordering=("-created_at", "-id"),
+        )
+
+        if keyset.is_requested(request):
+            rachats = keyset.paginate_queryset(queryset, request)
+
+            return Response(
+                keyset.get_response_data(
+                    RachatClientDetailSerializer(
+                        rachats,
+                        many=True,
+                        context={"request": request},
+                    ).data
+                )
             )
 
         serializer = RachatClientDetailSerializer(
@@ -480,15 +510,8 @@ class PaiementRachatClientView(APIView):
                 defaults={"poids_total": Decimal("0.000")},
             )
 
-            stock.poids_total = F("poids_total") + item.poids
-            stock.save(update_fields=["poids_total", "updated_at"])
-            stock.refresh_from_db()
-
-            movement = MatierePremiereMovement.objects.create(
+            movement = post_matiere_movement(
                 stock=stock,
-                bijouterie=rachat.bijouterie,
-                matiere=item.matiere,
-                purete=item.purete,
                 poids=item.poids,
                 source=MatierePremiereMovement.SOURCE_RACHAT_CLIENT,
                 rachat=rachat,
@@ -531,6 +554,7 @@ class RachatClientTicket58mmPDFView(APIView):
             200: openapi.Response(
                 description="Ticket PDF 58mm généré avec succès",
             ),
+            304: "Ticket inchangé depuis la dernière impression (If-None-Match).",
             404: "Rachat client introuvable",
         },
         produces=["application/pdf"],
@@ -541,26 +565,44 @@ class RachatClientTicket58mmPDFView(APIView):
             RachatClient.objects.select_related(
                 "client",
                 "bijouterie",
-            ).prefetch_related(
-                "items__purete",
             ),
             uuid=uuid,
         )
 
-        buffer = BytesIO()
+        def render():
+            prefetch_related_objects([rachat], "items__purete")
 
-        build_rachat_client_ticket_58mm(
-            buffer,
-            rachat,
-        )
+            buffer = BytesIO()
 
-        buffer.seek(0)
+            build_rachat_client_ticket_58mm(
+                buffer,
+                rachat,
+            )
 
-        return FileResponse(
-            buffer,
-            as_attachment=False,
-            filename=f"ticket_rachat_{rachat.numero_ticket}.pdf",
+            return buffer.getvalue()
+
+        # Lignes figées à la création : l'en-tête suffit à l'empreinte.
+        fingerprint = document_fingerprint(
+            rachat.pk,
+            rachat.numero_ticket,
+            rachat.montant_total,
+            rachat.payment_status,
+            rachat.status,
+            rachat.adresse_client,
+            rachat.client,
+            rachat.bijouterie,
+        )
+
+        return document_response(
+            request,
+            owner="rachats",
+            owner_id=rachat.pk,
+            kind="ticket_58mm",
+            fingerprint=fingerprint,
+            extension="pdf",
+            render=render,
             content_type="application/pdf",
+            filename=f"ticket_rachat_{rachat.numero_ticket}.pdf",
         )
 
 class RachatClientAttestationPDFView(APIView):
@@ -776,15 +818,8 @@ class ReverseRachatClientView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            stock.poids_total = F("poids_total") - item.poids
-            stock.save(update_fields=["poids_total", "updated_at"])
-            stock.refresh_from_db()
-
-            MatierePremiereMovement.objects.create(
+            post_matiere_movement(
                 stock=stock,
-                bijouterie=rachat.bijouterie,
-                matiere=item.matiere,
-                purete=item.purete,
                 poids=item.poids,
                 source=MatierePremiereMovement.SOURCE_RACHAT_CLIENT_CANCEL,
                 rachat=rachat,
@@ -1022,24 +1057,9 @@ class AchatMatierePremiereCreateView(APIView):
                 },
             )
 
-            # ➕ Ajouter au stock
-            stock.poids_total = F("poids_total") + item.poids
-
-            stock.save(
-                update_fields=[
-                    "poids_total",
-                    "updated_at",
-                ]
-            )
-
-            stock.refresh_from_db()
-
-            # 🧾 Movement
-            movement = MatierePremiereMovement.objects.create(
+            # ➕ Ajouter au stock + 🧾 Movement
+            movement = post_matiere_movement(
                 stock=stock,
-                bijouterie=achat.bijouterie,
-                matiere=item.matiere,
-                purete=item.purete,
                 poids=item.poids,
                 source=MatierePremiereMovement.SOURCE_ACHAT_FOURNISSEUR,
                 achat=achat,
@@ -1142,13 +1162,16 @@ class AchatRachatMatierePremiereListView(APIView):
             achats = achats.filter(payment_status=payment_status)
             rachats = rachats.filter(payment_status=payment_status)
 
-        if start_date:
-            achats = achats.filter(created_at__date__gte=start_date)
-            rachats = rachats.filter(created_at__date__gte=start_date)
+        try:
+            periode = date_range_filter("created_at", start_date, end_date)
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        if end_date:
-            achats = achats.filter(created_at__date__lte=end_date)
-            rachats = rachats.filter(created_at__date__lte=end_date)
+        achats = achats.filter(**periode)
+        rachats = rachats.filter(**periode)
 
         result = []
 
@@ -1371,17 +1394,24 @@ class DashboardAchatRachatMatierePremiereView(APIView):
             rachat_items = rachat_items.filter(rachat__bijouterie_id=bijouterie_id)
             stocks = stocks.filter(bijouterie_id=bijouterie_id)
 
-        if start_date:
-            achats = achats.filter(created_at__date__gte=start_date)
-            rachats = rachats.filter(created_at__date__gte=start_date)
-            achat_items = achat_items.filter(achat__created_at__date__gte=start_date)
-            rachat_items = rachat_items.filter(rachat__created_at__date__gte=start_date)
-
-        if end_date:
-            achats = achats.filter(created_at__date__lte=end_date)
-            rachats = rachats.filter(created_at__date__lte=end_date)
-            achat_items = achat_items.filter(achat__created_at__date__lte=end_date)
-            rachat_items = rachat_items.filter(rachat__created_at__date__lte=end_date)
+        try:
+            achats = achats.filter(
+                **date_range_filter("created_at", start_date, end_date)
+            )
+            rachats = rachats.filter(
+                **date_range_filter("created_at", start_date, end_date)
+            )
+            achat_items = achat_items.filter(
+                **date_range_filter("achat__created_at", start_date, end_date)
+            )
+            rachat_items = rachat_items.filter(
+                **date_range_filter("rachat__created_at", start_date, end_date)
+            )
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         current_year = timezone.now().year
 
@@ -1593,15 +1623,8 @@ class ReverseAchatMatierePremiereView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            stock.poids_total = F("poids_total") - item.poids
-            stock.save(update_fields=["poids_total", "updated_at"])
-            stock.refresh_from_db()
-
-            MatierePremiereMovement.objects.create(
+            post_matiere_movement(
                 stock=stock,
-                bijouterie=achat.bijouterie,
-                matiere=item.matiere,
-                purete=item.purete,
                 poids=item.poids,
                 source=MatierePremiereMovement.SOURCE_ACHAT_FOURNISSEUR_CANCEL,
                 achat=achat,
@@ -1725,15 +1748,8 @@ class RaffinageCreateView(APIView):
         )
 
         # Sortie stock matière première
-        stock_mp.poids_total = F("poids_total") - data["poids_entree"]
-        stock_mp.save(update_fields=["poids_total", "updated_at"])
-        stock_mp.refresh_from_db()
-
-        MatierePremiereMovement.objects.create(
+        post_matiere_movement(
             stock=stock_mp,
-            bijouterie=bijouterie,
-            matiere=data["matiere"],
-            purete=purete_avant,
             poids=data["poids_entree"],
             source=MatierePremiereMovement.SOURCE_RAFFINAGE_OUT,
         )
@@ -1852,10 +1868,7 @@ class VenteMatierePremiereCreateView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            stock.poids_total = F("poids_total") - data["poids"]
-            stock.save(update_fields=["poids_total", "updated_at"])
-            stock.refresh_from_db()
-
+            # Sortie écrite avec le mouvement, après la vente.
             movement_source = MatierePremiereMovement.SOURCE_VENTE_POIDS
 
         # 2. Vente après raffinage
@@ -1906,11 +1919,8 @@ class VenteMatierePremiereCreateView(APIView):
         )
 
         if stock:
-            MatierePremiereMovement.objects.create(
+            post_matiere_movement(
                 stock=stock,
-                bijouterie=bijouterie,
-                matiere=data["matiere"],
-                purete=purete,
                 poids=data["poids"],
                 source=movement_source,
                 montant_total=data["montant_total"],
@@ -1995,9 +2005,11 @@ class DashboardMatierePremiereView(APIView):
             "bijouterie", "purete"
         )
 
-        mouvements = MatierePremiereMovement.objects.select_related(
-            "bijouterie", "purete"
-        ).filter(created_at__year=current_year)
+        # Agrégat journalier (tenu par post_matiere_movement) :
+        # quelques centaines de lignes au lieu du journal complet.
+        mouvements = MatierePremiereMovementDaily.objects.filter(
+            jour__year=current_year,
+        )
 
         achats = AchatMatierePremiere.objects.filter(
             status=AchatMatierePremiere.STATUS_CONFIRMED,
@@ -2095,17 +2107,17 @@ class DashboardMatierePremiereView(APIView):
         mouvements_par_source = mouvements.values(
             "source"
         ).annotate(
-            total=Count("id"),
-            poids_total=Coalesce(Sum("poids"), Decimal("0.000")),
+            total=Coalesce(Sum("nb_mouvements"), 0),
+            poids_total=Coalesce(Sum("poids_total"), Decimal("0.000")),
         ).order_by("source")
 
         mouvements_par_mois = mouvements.annotate(
-            mois=ExtractMonth("created_at")
+            mois=ExtractMonth("jour")
         ).values(
             "mois"
         ).annotate(
-            total=Count("id"),
-            poids_total=Coalesce(Sum("poids"), Decimal("0.000")),
+            total=Coalesce(Sum("nb_mouvements"), 0),
+            poids_total=Coalesce(Sum("poids_total"), Decimal("0.000")),
         ).order_by("mois")
 
         ventes_par_source = ventes.values(
@@ -2201,7 +2213,7 @@ class DashboardMatierePremiereView(APIView):
         # =========================
         stock_brut_qs = MatierePremiereStock.objects.all()
         stock_raffine_qs = StockRaffine.objects.all()
-        mouvement_qs = MatierePremiereMovement.objects.all()
+        mouvement_qs = MatierePremiereMovementDaily.objects.all()
         achat_qs = AchatMatierePremiere.objects.all()
         rachat_qs = RachatClient.objects.all()
         raffinage_qs = Raffinage.objects.all()
@@ -2246,7 +2258,7 @@ class DashboardMatierePremiereView(APIView):
         # =========================
         # Filtre année
         # =========================
-        mouvement_qs = mouvement_qs.filter(created_at__year=year)
+        mouvement_qs = mouvement_qs.filter(jour__year=year)
         achat_qs = achat_qs.filter(created_at__year=year)
         rachat_qs = rachat_qs.filter(created_at__year=year)
         raffinage_qs = raffinage_qs.filter(created_at__year=year)
@@ -2275,18 +2287,19 @@ class DashboardMatierePremiereView(APIView):
         # =========================
         # Mouvements par source
         # =========================
+        # (agrégat journalier MatierePremiereMovementDaily)
         mouvements_par_source = mouvement_qs.values("source").annotate(
-            total=Count("id"),
-            poids_total=Coalesce(Sum("poids"), Decimal("0.000")),
-        )
+            total=Coalesce(Sum("nb_mouvements"), 0),
+            poids_total=Coalesce(Sum("poids_total"), Decimal("0.000")),
+        ).order_by("source")
 
         # =========================
         # Evolution mensuelle
         # =========================
         evolution = mouvement_qs.annotate(
-            mois=ExtractMonth("created_at")
+            mois=ExtractMonth("jour")
         ).values("mois").annotate(
-            poids=Coalesce(Sum("poids"), Decimal("0.000"))
+            poids=Coalesce(Sum("poids_total"), Decimal("0.000"))
         ).order_by("mois")
 
         # =========================
@@ -2369,9 +2382,9 @@ class ExportDashboardMatierePremiereExcelView(APIView):
         # =========================
         # Gestion scope bijouterie
         # =========================
-        stock_brut_qs = MatierePremiereStock.objects.all()
-        stock_raffine_qs = StockRaffine.objects.all()
-        mouvement_qs = MatierePremiereMovement.objects.all()
+        stock_brut_qs = MatierePremiereStock.objects.select_related("bijouterie", "purete")
+        stock_raffine_qs = StockRaffine.objects.select_related("bijouterie", "purete")
+        mouvement_qs = MatierePremiereMovementDaily.objects.all()
         achat_qs = AchatMatierePremiere.objects.all()
         rachat_qs = RachatClient.objects.all()
         raffinage_qs = Raffinage.objects.all()
@@ -2402,8 +2415,8 @@ class ExportDashboardMatierePremiereExcelView(APIView):
             raffinage_qs = raffinage_qs.filter(bijouterie_id=bijouterie_id)
             vente_qs = vente_qs.filter(bijouterie_id=bijouterie_id)
 
-        wb = Workbook()
-        wb.remove(wb.active)
+        # Classeur write-only : les lignes partent sur disque au fil de l'eau.
+        wb = write_only_workbook()
 
         bold = Font(bold=True)
 
@@ -2411,19 +2424,17 @@ class ExportDashboardMatierePremiereExcelView(APIView):
         # LOOP ANNEES
         # =========================
         for year in years:
-            ws = wb.create_sheet(title=str(year))
-            row = 1
+            ws = write_only_sheet(wb, str(year), widths=[25, 25, 15, 15, 15])
 
             def write_title(title):
-                nonlocal row
-                ws.cell(row=row, column=1, value=title).font = bold
-                row += 1
+                ws.append(styled_row(ws, [title], font=bold))
 
             def write_row(values):
-                nonlocal row
-                for col, val in enumerate(values, 1):
-                    ws.cell(row=row, column=col, value=val)
-                row += 1
+                ws.append(values)
+
+            def skip_rows(count=2):
+                for _ in range(count):
+                    ws.append([])
 
             # =========================
             # 1. Résumé
@@ -2450,7 +2461,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
             write_row(["Total ventes", ventes.count()])
             write_row(["Total raffinages", raffinages.count()])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # 2. Stock brut
@@ -2459,7 +2470,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
 
             write_row(["Bijouterie", "Matière", "Pureté", "Poids"])
 
-            for s in stock_brut_qs:
+            for s in stock_brut_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
                 write_row([
                     str(s.bijouterie),
                     s.matiere,
@@ -2467,7 +2478,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
                     s.poids_total
                 ])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # Stock raffiné
@@ -2476,7 +2487,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
 
             write_row(["Bijouterie", "Matière", "Pureté", "Poids"])
 
-            for s in stock_raffine_qs:
+            for s in stock_raffine_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
                 write_row([
                     str(s.bijouterie),
                     s.matiere,
@@ -2484,25 +2495,25 @@ class ExportDashboardMatierePremiereExcelView(APIView):
                     s.poids_total
                 ])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # 3. Mouvements
             # =========================
             write_title("3. Mouvements")
 
-            mouvements = mouvement_qs.filter(created_at__year=year)
+            mouvements = mouvement_qs.filter(jour__year=year)
 
             write_row(["Source", "Poids"])
 
             par_source = mouvements.values("source").annotate(
-                poids=Coalesce(Sum("poids"), Decimal("0.000"))
-            )
+                poids=Coalesce(Sum("poids_total"), Decimal("0.000"))
+            ).order_by("source")
 
             for m in par_source:
                 write_row([m["source"], m["poids"]])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # 4. Raffinage
@@ -2519,7 +2530,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
             write_row(["Sortie", stats["sortie"]])
             write_row(["Perte", stats["perte"]])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # 5. Vente
@@ -2536,7 +2547,7 @@ class ExportDashboardMatierePremiereExcelView(APIView):
             for v in ventes_stats:
                 write_row([v["source_stock"], v["poids"], v["montant"]])
 
-            row += 2
+            skip_rows()
 
             # =========================
             # 6. Alertes
@@ -2556,10 +2567,6 @@ class ExportDashboardMatierePremiereExcelView(APIView):
         # =========================
         # EXPORT
         # =========================
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
         filename = "dashboard_matiere.xlsx"
         if mode == "multi":
             filename = "dashboard_matiere_3_ans.xlsx"
@@ -2567,9 +2574,6 @@ class ExportDashboardMatierePremiereExcelView(APIView):
         if bijouterie_id:
             filename = f"dashboard_matiere_bijouterie_{bijouterie_id}.xlsx"
 
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        wb.save(response)
-        return response
+        return xlsx_file_response(wb, filename)
 
 
@@ -1,6 +1,9 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 
 from backend import settings
+from backend.reference_cache import get_marque_purete_prix
 from store.models import (Bijouterie, Categorie, Gallery, Marque, MarquePurete,
                           MarquePuretePrixHistory, Modele, Produit, Purete)
 
@@ -298,24 +301,13 @@ class ProduitSerializer(serializers.ModelSerializer):
         )
 
     def get_prix_vente_gramme(self, obj):
-        if not obj.marque or not obj.purete:
-            return None
-
-        marque_purete = (
-            MarquePurete.objects
-            .filter(
-                marque=obj.marque,
-                purete=obj.purete,
-                prix__gt=0,
-            )
-            .only("prix")
-            .first()
-        )
+        # Cache de référence : pas de requête par produit listé.
+        prix = get_marque_purete_prix(obj.marque_id, obj.purete_id)
 
-        if not marque_purete:
+        if not prix or prix <= 0:
             return None
 
-        return str(marque_purete.prix)
+        return str(prix.quantize(Decimal("0.01")))
 
 
     def get_categorie_detail(self, obj):
@@ -33,3 +33,28 @@
 #     transaction.on_commit(_do)
     
 
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.reference_cache import invalidate_reference_model
+
+from .models import Categorie, Marque, MarquePurete, Modele, Purete
+
+
+# =========================================================
+# Cache des données de référence (backend/reference_cache.py)
+# =========================================================
+@receiver(post_save, sender=Categorie)
+@receiver(post_delete, sender=Categorie)
+@receiver(post_save, sender=Modele)
+@receiver(post_delete, sender=Modele)
+@receiver(post_save, sender=Purete)
+@receiver(post_delete, sender=Purete)
+@receiver(post_save, sender=Marque)
+@receiver(post_delete, sender=Marque)
+@receiver(post_save, sender=MarquePurete)
+@receiver(post_delete, sender=MarquePurete)
+def invalidate_reference_cache(sender, **kwargs):
+    invalidate_reference_model(sender)
@@ -1,3 +1,94 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.reference_cache import (clear_reference_cache, get_mode_paiement,
+                                     get_marque_purete_prix)
+from sale.models import ModePaiement, get_default_mode_paiement
+from store.models import Marque, MarquePurete, MarquePuretePrixHistory, Purete
+
+
+class ReferenceCacheTests(TestCase):
+    """
+    Données de référence servies depuis le cache, invalidées
+    au COMMIT des modifications.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            email="admin-reference@example.com",
+            password="secret",
+            is_superuser=True,
+        )
+        cls.marque, _ = Marque.objects.get_or_create(marque="Local")
+        cls.purete, _ = Purete.objects.get_or_create(purete="18")
+        cls.tarif = MarquePurete.objects.create(
+            marque=cls.marque,
+            purete=cls.purete,
+            prix=Decimal("5000.00"),
+        )
+
+    def setUp(self):
+        clear_reference_cache()
+        self.addCleanup(clear_reference_cache)
+
+    def test_lectures_servies_par_le_cache(self):
+        get_marque_purete_prix(self.marque.id, self.purete.id)
+        get_default_mode_paiement()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_marque_purete_prix(self.marque.id, self.purete.id),
+                Decimal("5000.00"),
+            )
+            self.assertEqual(get_mode_paiement("WAVE").code, "wave")
+            self.assertEqual(
+                get_default_mode_paiement(),
+                get_mode_paiement("cash").id,
+            )
+
+    def test_modification_invalidee_au_commit(self):
+        self.assertEqual(get_mode_paiement("tpe").code, "tpe")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ModePaiement.objects.filter(code="tpe").update(active=False)
+            ModePaiement.objects.get(code="tpe").save()
+
+            # Avant le COMMIT : le thread qui écrit relit la base.
+            self.assertIsNone(get_mode_paiement("tpe"))
+
+        self.assertIsNone(get_mode_paiement("tpe"))
+        self.assertFalse(
+            get_mode_paiement("tpe", active_only=False).active
+        )
+
+    def test_rollback_de_prix_invalide_le_cache(self):
+        self.assertEqual(
+            get_marque_purete_prix(self.marque.id, self.purete.id),
+            Decimal("5000.00"),
+        )
+
+        history = MarquePuretePrixHistory.objects.create(
+            marque_purete=self.tarif,
+            marque=self.marque,
+            purete=self.purete,
+            ancien_prix=Decimal("4500.00"),
+            nouveau_prix=Decimal("5000.00"),
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                f"/api/prix/history/{history.id}/rollback"
+            )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            get_marque_purete_prix(self.marque.id, self.purete.id),
+            Decimal("4500.00"),
+        )
@@ -13,7 +13,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.generics import ListAPIView
 from rest_framework.parsers import (FileUploadParser, FormParser, JSONParser,
                                     MultiPartParser)
@@ -21,9 +21,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.mixins import date_range_filter
 from backend.permissions import IsAdminOrManager, IsAdminOrManagerOrVendor
+from backend.reference_cache import (NS_CATEGORIE, NS_MARQUE_PURETE,
+                                     NS_MODELE, NS_PURETE, cached_reference,
+                                     invalidate_reference_data)
 from backend.renderers import UserRenderer
 from backend.roles import ROLE_ADMIN, ROLE_MANAGER, ROLE_VENDOR, get_role_name
+from search.selectors import search as search_index
 from store.models import (Bijouterie, Categorie, Gallery, Marque, MarquePurete,
                           MarquePuretePrixHistory, Modele, Produit, Purete)
 from store.serializers import (BijouterieSerializer, CategorieSerializer,
@@ -198,10 +203,16 @@ class CategorieListAPIView(APIView):
             return Response({"message": "Access Denied"}, status=403)
 
         search_query = request.query_params.get('search')
-        categories = Categorie.objects.all()
 
-        if search_query:
-            categories = categories.filter(nom__icontains=search_query)
+        if not search_query:
+            # Liste complète : cache de référence
+            return Response(cached_reference(
+                NS_CATEGORIE,
+                "liste",
+                lambda: CategorieSerializer(Categorie.objects.all(), many=True).data,
+            ))
+
+        categories = Categorie.objects.filter(nom__icontains=search_query)
 
         serializer = CategorieSerializer(categories, many=True)
         return Response(serializer.data)
@@ -358,9 +369,15 @@ class PureteListAPIView(APIView):
             return Response({"message": "Access Denied"}, status=status.HTTP_403_FORBIDDEN)
 
         search = request.query_params.get('search', None)
-        queryset = Purete.objects.all()
-        if search:
-            queryset = queryset.filter(Q(purete__icontains=search))
+        if not search:
+            # Liste complète : cache de référence
+            return Response(cached_reference(
+                NS_PURETE,
+                "liste",
+                lambda: PureteSerializer(Purete.objects.all(), many=True).data,
+            ))
+
+        queryset = Purete.objects.filter(Q(purete__icontains=search))
 
         serializer = PureteSerializer(queryset, many=True)
         return Response(serializer.data)
@@ -523,6 +540,13 @@ class ListMarquePureteView(APIView):
         tags=["Marques"],
     )
     def get(self, request):
+        return Response(
+            cached_reference(NS_MARQUE_PURETE, "groupes", self._build_groupes),
+            status=200,
+        )
+
+    @staticmethod
+    def _build_groupes():
         queryset = MarquePurete.objects.select_related(
             "marque",
             "purete"
@@ -546,7 +570,7 @@ class ListMarquePureteView(APIView):
                 "prix": str(item.prix),
             })
 
-        return Response(list(grouped.values()), status=200)
+        return list(grouped.values())
     
 
 class CreateMarquePureteView(APIView):
@@ -1074,6 +1098,17 @@ class ModeleListAPIView(APIView):
         nom = request.GET.get('nom')
         categorie_id = request.GET.get('categorie_id')
 
+        if not nom and not categorie_id:
+            # Liste complète : cache de référence
+            return Response(cached_reference(
+                NS_MODELE,
+                "liste",
+                lambda: ModeleSerializer(
+                    queryset.select_related("categorie"),
+                    many=True,
+                ).data,
+            ))
+
         if nom:
             queryset = queryset.filter(modele__icontains=nom)
         if categorie_id:
@@ -1378,8 +1413,10 @@ class ProduitListAPIView(ListAPIView):
         search = self.request.query_params.get("search")
 
         if search:
-            queryset = queryset.filter(
-                sku__icontains=search
+            queryset = search_index(
+                queryset,
+                search,
+                kind="produit",
             )
 
         return queryset.distinct().order_by("-id")
@@ -2194,11 +2231,12 @@ Permet de savoir :
         date_from = self.request.query_params.get("date_from")
         date_to = self.request.query_params.get("date_to")
 
-        if date_from:
-            qs = qs.filter(date_modification__date__gte=date_from)
-
-        if date_to:
-            qs = qs.filter(date_modification__date__lte=date_to)
+        try:
+            qs = qs.filter(
+                **date_range_filter("date_modification", date_from, date_to)
+            )
+        except ValueError as exc:
+            raise ValidationError({"date": str(exc)})
 
         # sécurité manager -> seulement ses bijouteries
         user = self.request.user
@@ -2337,11 +2375,12 @@ Cette vue est utile pour :
         if bijouterie:
             qs = qs.filter(bijouterie_id=bijouterie)
 
-        if date_from:
-            qs = qs.filter(date_modification__date__gte=date_from)
-
-        if date_to:
-            qs = qs.filter(date_modification__date__lte=date_to)
+        try:
+            qs = qs.filter(
+                **date_range_filter("date_modification", date_from, date_to)
+            )
+        except ValueError as exc:
+            raise ValidationError({"date": str(exc)})
 
         # sécurité manager -> seulement ses bijouteries
         user = request.user
@@ -2476,6 +2515,9 @@ Fonctionnement :
         obj.prix = rollback_price
         obj.save(update_fields=["prix"])
 
+        # Prix servi aux ventes : cache de référence invalidé au COMMIT.
+        invalidate_reference_data(NS_MARQUE_PURETE)
+
         # nouvelle ligne d'historique
         rollback_history = MarquePuretePrixHistory.objects.create(
             marque_purete=obj,
@@ -2484,7 +2526,7 @@ Fonctionnement :
             bijouterie=history.bijouterie,
             ancien_prix=old_current_price,
             nouveau_prix=rollback_price,
-            changed_by=request.user,
+            modifier_par=request.user,
             source=MarquePuretePrixHistory.SOURCE_ROLLBACK,
             note=f"Rollback depuis historique #{history.id}",
         )
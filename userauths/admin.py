@@ -8,9 +8,9 @@ admin.site.register(User)
 admin.site.register(Role)
 
 
-@admin.register(OutboxEmail)
+@admin.register(OutboxMessage)
 class OutboxEmailAdmin(admin.ModelAdmin):
-    list_display = ("to", "template", "attempts", "next_try_at", "created_at")
-    list_filter = ("template",)
+    list_display = ("to", "channel", "template", "status", "attempts", "next_try_at", "created_at")
+    list_filter = ("channel", "status", "template")
     search_fields = ("to",)
-    readonly_fields = ("created_at",)
\ No newline at end of file
+    readonly_fields = ("created_at", "sent_at")
\ No newline at end of file
@@ -0,0 +1,71 @@
+# userauths/management/commands/process_outbox.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from userauths.outbox import DEFAULT_BATCH_SIZE, deliver_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie les notifications en attente de l'outbox (emails, SMS) : "
+        "réservation par lots, envoi sur un pool de threads, nouvel "
+        "essai avec backoff en cas d'échec."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Messages réservés par lot (défaut : {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Threads d'envoi (défaut : 4).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Vider la file puis s'arrêter (cron).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Pause (s) quand la file est vide (défaut : 2).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        workers = max(1, options["workers"])
+
+        self.stdout.write(
+            f"Outbox : lots de {batch_size}, {workers} thread(s)."
+        )
+
+        try:
+            while True:
+                close_old_connections()
+
+                report = deliver_due(batch_size=batch_size, workers=workers)
+
+                if report.total:
+                    self.stdout.write(
+                        f"{report.sent} envoyé(s), {report.retried} à retenter, "
+                        f"{report.failed} en échec définitif."
+                    )
+
+                # Lot incomplet : plus rien de dû pour l'instant.
+                if report.total < batch_size:
+                    if options["once"]:
+                        break
+
+                    time.sleep(options["sleep"])
+
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt demandé.")
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauths', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='OutboxEmail',
+            new_name='OutboxMessage',
+        ),
+        migrations.AlterModelOptions(
+            name='outboxmessage',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Notification en attente', 'verbose_name_plural': 'Notifications en attente'},
+        ),
+        migrations.RenameIndex(
+            model_name='outboxmessage',
+            new_name='userauths_o_status_1e2734_idx',
+            old_name='userauths_o_status_86fc30_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='outboxmessage',
+            new_name='userauths_o_to_fe6320_idx',
+            old_name='userauths_o_to_8ac7b8_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='channel',
+            field=models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], db_index=True, default='email', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='subject',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='html_body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='to',
+            field=models.CharField(db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='template',
+            field=models.CharField(help_text='Type de notification (ex: confirm_email, compte_depot)', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='context',
+            field=models.JSONField(blank=True, default=dict, help_text='Données ayant servi au rendu (traçabilité)'),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='reason',
+            field=models.TextField(blank=True, help_text='Pourquoi ce message a été créé'),
+        ),
+    ]
@@ -487,37 +487,65 @@ class Profile(models.Model):
 #         indexes = [models.Index(fields=["next_try_at", "to"])]
 
 
-class OutboxEmail(models.Model):
+class OutboxMessage(models.Model):
+    """
+    Outbox transactionnelle des notifications (email, SMS).
+
+    Écrite dans la transaction de la requête, envoyée après COMMIT
+    par le worker `process_outbox` (voir userauths/outbox.py) :
+    une passerelle SMTP / SMS lente ne rallonge ni la transaction
+    ni la réponse HTTP.
+    """
+
+    class Channel(models.TextChoices):
+        EMAIL = "email", "Email"
+        SMS = "sms", "SMS"
 
     class Status(models.TextChoices):
         PENDING = "pending", "Pending"
         SENT = "sent", "Sent"
         FAILED = "failed", "Failed"
 
-    to = models.EmailField(db_index=True)
+    channel = models.CharField(
+        max_length=10,
+        choices=Channel.choices,
+        default=Channel.EMAIL,
+        db_index=True,
+    )
+
+    # Email ou numéro de téléphone selon le canal
+    to = models.CharField(max_length=254, db_index=True)
 
     template = models.CharField(
         max_length=100,
-        help_text="Nom du template email (ex: confirm_email)"
+        help_text="Type de notification (ex: confirm_email, compte_depot)"
     )
 
     context = models.JSONField(
         default=dict,
-        help_text="Données injectées dans le template"
+        blank=True,
+        help_text="Données ayant servi au rendu (traçabilité)"
     )
 
+    # Contenu rendu au moment de l'écriture
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+
     reason = models.TextField(
         blank=True,
-        help_text="Pourquoi cet email a été créé"
+        help_text="Pourquoi ce message a été créé"
     )
 
     attempts = models.PositiveIntegerField(default=0)
 
+    # Prochaine tentative ; repoussée pendant un envoi en cours (bail).
     next_try_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     last_error = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
     status = models.CharField(
         max_length=20,
@@ -532,9 +560,9 @@ class OutboxEmail(models.Model):
             models.Index(fields=["status", "next_try_at"]),
             models.Index(fields=["to"]),
         ]
-        verbose_name = "Email en attente"
-        verbose_name_plural = "Emails en attente"
+        verbose_name = "Notification en attente"
+        verbose_name_plural = "Notifications en attente"
 
     def __str__(self):
-        return f"{self.to} ({self.status})"
+        return f"[{self.channel}] {self.to} ({self.status})"
     
@@ -0,0 +1,343 @@
+# userauths/outbox.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from userauths.models import OutboxMessage
+
+logger = logging.getLogger("mailer")
+
+# ============================================================
+# Outbox transactionnelle (email + SMS)
+# ============================================================
+#
+# Écriture : enqueue_email() / enqueue_sms() dans la transaction de
+# la requête. Rien n'est envoyé si la transaction est annulée.
+#
+# Envoi (après COMMIT) :
+# - worker : python manage.py process_outbox (pool de threads) ;
+# - dev : OUTBOX_INPROCESS=True -> envoi dans un thread du processus
+#   web juste après le COMMIT.
+#
+# Les messages dus sont réservés par lot (select_for_update
+# skip_locked + bail sur next_try_at) : plusieurs workers peuvent
+# tourner sans double envoi. Échec -> nouvel essai avec backoff
+# exponentiel, abandon (FAILED) après OUTBOX_MAX_ATTEMPTS.
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================================
+# Écriture
+# ============================================================
+
+def _enqueue(**fields) -> OutboxMessage:
+    message = OutboxMessage.objects.create(**fields)
+
+    if _setting("OUTBOX_INPROCESS", False):
+        transaction.on_commit(lambda: _deliver_in_background([message.pk]))
+
+    return message
+
+
+def enqueue_email(
+    *,
+    to,
+    subject,
+    body,
+    html_body="",
+    template="",
+    context=None,
+    reason="",
+) -> OutboxMessage:
+    """
+    Met un email en file ; envoyé après le COMMIT.
+    """
+    return _enqueue(
+        channel=OutboxMessage.Channel.EMAIL,
+        to=to,
+        subject=subject,
+        body=body,
+        html_body=html_body or "",
+        template=template,
+        context=context or {},
+        reason=reason,
+    )
+
+
+def enqueue_sms(
+    *,
+    to,
+    body,
+    template="",
+    context=None,
+    reason="",
+) -> OutboxMessage:
+    """
+    Met un SMS en file ; envoyé après le COMMIT.
+    """
+    return _enqueue(
+        channel=OutboxMessage.Channel.SMS,
+        to=to,
+        body=body,
+        template=template,
+        context=context or {},
+        reason=reason,
+    )
+
+
+# ============================================================
+# Passerelles
+# ============================================================
+
+class ConsoleSmsBackend:
+    """
+    Passerelle SMS par défaut : journalise le message.
+    Brancher ici WhatsApp / Orange SMS / Twilio via SMS_BACKEND.
+    """
+
+    def send(self, to, body):
+        logger.info("SMS à %s :\n%s", to, body)
+
+
+def get_sms_backend():
+    return import_string(
+        _setting("SMS_BACKEND", "userauths.outbox.ConsoleSmsBackend")
+    )()
+
+
+# ============================================================
+# Réservation / résultat
+# ============================================================
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Backoff exponentiel : base, 2×base, 4×base... plafonné.
+    """
+    base = _setting("OUTBOX_RETRY_BASE_SECONDS", 30)
+    cap = _setting("OUTBOX_RETRY_MAX_SECONDS", 3600)
+
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def claim_due_messages(*, batch_size=DEFAULT_BATCH_SIZE, ids=None, now=None):
+    """
+    Réserve jusqu'à `batch_size` messages dus : leur next_try_at est
+    repoussé de OUTBOX_LEASE_SECONDS le temps de l'envoi (un worker
+    interrompu les rend à nouveau disponibles à l'expiration du bail).
+    """
+
+    now = now or timezone.now()
+    lease = timedelta(seconds=_setting("OUTBOX_LEASE_SECONDS", 300))
+
+    with transaction.atomic():
+        queryset = (
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                status=OutboxMessage.Status.PENDING,
+                next_try_at__lte=now,
+            )
+            .order_by("next_try_at", "id")
+        )
+
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+
+        messages = list(queryset[:batch_size])
+
+        if messages:
+            OutboxMessage.objects.filter(
+                pk__in=[message.pk for message in messages]
+            ).update(next_try_at=now + lease)
+
+    return messages
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    def __iadd__(self, other):
+        self.sent += other.sent
+        self.retried += other.retried
+        self.failed += other.failed
+        return self
+
+    @property
+    def total(self):
+        return self.sent + self.retried + self.failed
+
+
+def _record_success(message):
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=OutboxMessage.Status.SENT,
+        attempts=message.attempts + 1,
+        sent_at=timezone.now(),
+        last_error="",
+    )
+
+
+def _record_failure(message, error) -> bool:
+    """
+    Retourne True si le message sera retenté.
+    """
+    attempts = message.attempts + 1
+    retry = attempts < _setting("OUTBOX_MAX_ATTEMPTS", 8)
+
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=(
+            OutboxMessage.Status.PENDING
+            if retry
+            else OutboxMessage.Status.FAILED
+        ),
+        attempts=attempts,
+        next_try_at=timezone.now() + retry_delay(attempts),
+        last_error=str(error)[:2000],
+    )
+
+    logger.warning(
+        "Envoi %s à %s échoué (tentative %s) : %s",
+        message.channel,
+        message.to,
+        attempts,
+        error,
+    )
+
+    return retry
+
+
+# ============================================================
+# Envoi
+# ============================================================
+
+def _send_chunk(messages) -> DeliveryReport:
+    """
+    Envoie un groupe de messages : une seule connexion SMTP
+    (et une passerelle SMS) pour tout le groupe.
+    """
+
+    report = DeliveryReport()
+    email_connection = None
+    sms_backend = None
+
+    try:
+        for message in messages:
+            try:
+                if message.channel == OutboxMessage.Channel.SMS:
+                    sms_backend = sms_backend or get_sms_backend()
+                    sms_backend.send(message.to, message.body)
+
+                else:
+                    if email_connection is None:
+                        email_connection = get_connection(fail_silently=False)
+                        email_connection.open()
+
+                    email = EmailMultiAlternatives(
+                        subject=message.subject,
+                        body=message.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[message.to],
+                        connection=email_connection,
+                    )
+
+                    if message.html_body:
+                        email.attach_alternative(message.html_body, "text/html")
+
+                    email.send(fail_silently=False)
+
+            except Exception as exc:
+                if _record_failure(message, exc):
+                    report.retried += 1
+                else:
+                    report.failed += 1
+
+                continue
+
+            _record_success(message)
+            report.sent += 1
+
+    finally:
+        if email_connection is not None:
+            try:
+                email_connection.close()
+            except Exception:
+                logger.exception("Fermeture de la connexion SMTP impossible.")
+
+    return report
+
+
+def _send_chunk_in_thread(messages) -> DeliveryReport:
+    try:
+        return _send_chunk(messages)
+    finally:
+        # Connexion DB propre au thread du pool.
+        connection.close()
+
+
+def deliver_messages(messages, *, workers=1) -> DeliveryReport:
+    """
+    Envoie des messages déjà réservés, répartis sur `workers` threads.
+    """
+
+    messages = list(messages)
+    report = DeliveryReport()
+
+    if not messages:
+        return report
+
+    workers = max(1, min(workers, len(messages)))
+
+    if workers == 1:
+        return _send_chunk(messages)
+
+    chunks = [messages[index::workers] for index in range(workers)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk_report in executor.map(_send_chunk_in_thread, chunks):
+            report += chunk_report
+
+    return report
+
+
+def deliver_due(*, batch_size=DEFAULT_BATCH_SIZE, workers=1, ids=None) -> DeliveryReport:
+    """
+    Réserve puis envoie un lot de messages dus.
+    """
+    return deliver_messages(
+        claim_due_messages(batch_size=batch_size, ids=ids),
+        workers=workers,
+    )
+
+
+def _deliver_in_background(ids):
+    """
+    Repli dev (OUTBOX_INPROCESS) : envoi dans un thread après le COMMIT,
+    sans bloquer la réponse HTTP.
+    """
+
+    def _run():
+        close_old_connections()
+
+        try:
+            deliver_due(batch_size=len(ids), ids=ids)
+        except Exception:
+            logger.exception("Envoi en arrière-plan de l'outbox impossible.")
+        finally:
+            connection.close()
+
+    threading.Thread(target=_run, daemon=True).start()
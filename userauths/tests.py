@@ -1,3 +1,89 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from userauths.models import OutboxMessage
+from userauths.outbox import deliver_due, enqueue_email, enqueue_sms
+from userauths.utils import send_confirmation_email
+
+
+class FailingSmsBackend:
+    def send(self, to, body):
+        raise ConnectionError("passerelle indisponible")
+
+
+@override_settings(OUTBOX_INPROCESS=False)
+class OutboxTests(TestCase):
+    """
+    Notifications écrites dans la transaction, envoyées ensuite
+    par le worker avec nouvel essai.
+    """
+
+    def test_rien_n_est_mis_en_file_si_la_transaction_est_annulee(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue_sms(to="770000001", body="Dépôt effectué")
+                raise RuntimeError()
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_email_de_confirmation_envoye_par_le_worker(self):
+        user = get_user_model().objects.create_user(
+            email="outbox@example.com",
+            password="secret",
+        )
+
+        send_confirmation_email(user, confirm_url="https://example.com/ok")
+
+        # Rien n'est parti pendant la requête.
+        self.assertEqual(len(mail.outbox), 0)
+
+        message = OutboxMessage.objects.get(template="confirm_email")
+        self.assertEqual(message.channel, OutboxMessage.Channel.EMAIL)
+        self.assertIn("https://example.com/ok", message.html_body)
+
+        enqueue_email(to="autre@example.com", subject="Test", body="Corps")
+
+        call_command("process_outbox", "--once", "--workers", "1", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(email.to[0] for email in mail.outbox),
+            ["autre@example.com", "outbox@example.com"],
+        )
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxMessage.Status.SENT).exists()
+        )
+
+    @override_settings(
+        SMS_BACKEND="userauths.tests.FailingSmsBackend",
+        OUTBOX_MAX_ATTEMPTS=2,
+        OUTBOX_RETRY_BASE_SECONDS=60,
+    )
+    def test_echec_retente_avec_backoff_puis_abandon(self):
+        message = enqueue_sms(to="770000002", body="Retrait effectué")
+
+        report = deliver_due()
+        message.refresh_from_db()
+
+        self.assertEqual((report.retried, report.failed), (1, 0))
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertIn("passerelle indisponible", message.last_error)
+        self.assertGreater(message.next_try_at, timezone.now())
+
+        # Pas encore dû : rien n'est réservé.
+        self.assertEqual(deliver_due().total, 0)
+
+        OutboxMessage.objects.filter(pk=message.pk).update(next_try_at=timezone.now())
+
+        report = deliver_due()
+        message.refresh_from_db()
+
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(message.attempts, 2)
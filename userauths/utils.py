@@ -2,13 +2,14 @@
 import logging
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import strip_tags
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 
+from userauths.outbox import enqueue_email
+
 logger = logging.getLogger(__name__)
 
 EMAIL_CONFIRMATION_SALT = "email-confirmation"
@@ -150,22 +151,23 @@ def send_confirmation_email(
 
     plain_message = strip_tags(html_message)
 
-    email = EmailMultiAlternatives(
+    # Envoi après COMMIT par le worker de l'outbox (userauths/outbox.py).
+    enqueue_email(
+        to=user.email,
         subject=subject,
         body=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email],
-    )
-
-    email.attach_alternative(
-        html_message,
-        "text/html",
+        html_body=html_message,
+        template="confirm_email",
+        context={
+            "user_id": user.pk,
+            "confirm_url": confirm_url,
+            "home_url": home_url,
+        },
+        reason="Confirmation de l'adresse email",
     )
 
-    email.send(fail_silently=False)
-
     logger.info(
-        "Email de confirmation envoyé à %s.",
+        "Email de confirmation mis en file pour %s.",
         user.email,
     )
 
@@ -204,31 +206,18 @@ def send_password_reset_email(
 
     plain_message = strip_tags(html_message)
 
-    try:
-        email = EmailMultiAlternatives(
-            subject="Réinitialisation de votre mot de passe",
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[reset_password_token.user.email],
-        )
-
-        email.attach_alternative(
-            html_message,
-            "text/html",
-        )
-
-        email.send(fail_silently=False)
-
-        logger.info(
-            "Email de réinitialisation envoyé à %s.",
-            reset_password_token.user.email,
-        )
-
-    except Exception:
-        logger.exception(
-            "Erreur lors de l'envoi de l'email "
-            "de réinitialisation à %s.",
-            reset_password_token.user.email,
-        )
-        
+    # Envoi après COMMIT par le worker de l'outbox (userauths/outbox.py).
+    enqueue_email(
+        to=reset_password_token.user.email,
+        subject="Réinitialisation de votre mot de passe",
+        body=plain_message,
+        html_body=html_message,
+        template="password_reset",
+        context={"user_id": reset_password_token.user_id},
+        reason="Réinitialisation du mot de passe",
+    )
 
+    logger.info(
+        "Email de réinitialisation mis en file pour %s.",
+        reset_password_token.user.email,
+    )